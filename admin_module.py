@@ -4,6 +4,9 @@ from datetime import datetime
 import re
 from db_connect import *
 from CTkTable import *
+from dashboard_metrics import dashboard_metrics
+from bed_service import bed_service
+from widgets import VirtualTable, ScheduleCalendar, import_records, export_records
 
 class AdminModule:
     def __init__(self, main_frame, user_info):
@@ -76,56 +79,48 @@ class AdminModule:
         stats_frame.pack(fill="x", padx=20, pady=10)
         stats_frame.grid_columnconfigure((0, 1, 2, 3), weight=1)
         
-        # Get real stats from database
-        try:
-            conn = connect_db()
-            if conn:
-                cursor = conn.cursor()
-                
-                # Get doctor count
-                cursor.execute("SELECT COUNT(*) FROM Doctor")
-                doctor_count = cursor.fetchone()[0] or 0
-                
-                # Get staff count
-                cursor.execute("SELECT COUNT(*) FROM Staff")
-                staff_count = cursor.fetchone()[0] or 0
-                
-                # Get room count
-                cursor.execute("SELECT COUNT(*) FROM Room")
-                room_count = cursor.fetchone()[0] or 0
-                
-                # Get available bed count
-                cursor.execute("SELECT COUNT(*) FROM Bed WHERE is_occupied = 0")
-                available_beds = cursor.fetchone()[0] or 0
-                
-                cursor.close()
-                conn.close()
-                
-                stats = [
-                    ("👨‍⚕️ Doctors", str(doctor_count), "#3498db"),
-                    ("👥 Staff", str(staff_count), "#e74c3c"),
-                    ("🏠 Rooms", str(room_count), "#f39c12"),
-                    ("🛏️ Available Beds", str(available_beds), "#27ae60")
-                ]
-        except Exception as e:
-            # Fallback to sample data if database error
-            print(f"Error fetching stats: {e}")
-            stats = [
-                ("👨‍⚕️ Doctors", "0", "#3498db"),
-                ("👥 Staff", "0", "#e74c3c"),
-                ("🏠 Rooms", "0", "#f39c12"),
-                ("🛏️ Available Beds", "0", "#27ae60")
-            ]
-        
-        for i, (title, count, color) in enumerate(stats):
+        # Counters come from the shared metrics cache; a background refresh
+        # fills them in if the cached values are stale or missing
+        values, fresh = dashboard_metrics.get('admin')
+        stats = [
+            ("👨‍⚕️ Doctors", 'doctors', "#3498db"),
+            ("👥 Staff", 'staff', "#e74c3c"),
+            ("🏠 Rooms", 'rooms', "#f39c12"),
+            ("🛏️ Available Beds", 'available_beds', "#27ae60")
+        ]
+        
+        value_labels = {}
+        for i, (title, key, color) in enumerate(stats):
             card = ctk.CTkFrame(stats_frame, fg_color=color)
             card.grid(row=0, column=i, padx=10, pady=20, sticky="ew")
             
-            ctk.CTkLabel(card, text=count, font=ctk.CTkFont(size=36, weight="bold"), 
-                        text_color="white").pack(pady=(20, 5))
+            count = str(values[key]) if values and key in values else "…"
+            value_labels[key] = ctk.CTkLabel(card, text=count, font=ctk.CTkFont(size=36, weight="bold"), 
+                        text_color="white")
+            value_labels[key].pack(pady=(20, 5))
             ctk.CTkLabel(card, text=title, font=ctk.CTkFont(size=14), 
                         text_color="white").pack(pady=(0, 20))
         
+        if not fresh:
+            dashboard_metrics.bind_labels(stats_frame, 'admin',
+                                          {key: label for key, label in value_labels.items() if key != 'available_beds'})
+        
+        # Free beds come from the in-memory occupancy bitmaps, by room type
+        beds_card = value_labels['available_beds'].master
+        beds_by_type = ctk.CTkLabel(beds_card, text="", font=ctk.CTkFont(size=12), text_color="white")
+        beds_by_type.pack(pady=(0, 10))
+        
+        def show_free_beds(wait=True):
+            counts, ready = bed_service.free_counts()
+            if not ready:
+                if wait:
+                    bed_service.after_refresh(beds_card, lambda: show_free_beds(wait=False))
+                return
+            value_labels['available_beds'].configure(text=str(sum(counts.values())))
+            beds_by_type.configure(text="  ".join(f"{kind or 'Other'}: {free}" for kind, free in sorted(
+                counts.items(), key=lambda item: str(item[0]))))
+        show_free_beds()
+        
         # Quick actions
         actions_frame = ctk.CTkFrame(self.content_frame)
         actions_frame.pack(fill="x", padx=20, pady=20)
@@ -201,13 +196,30 @@ class AdminModule:
                      font=ctk.CTkFont(size=18, weight="bold")).grid(row=0, column=0, sticky="w")
         ctk.CTkButton(header, text="🔄 Refresh", command=self.load_doctors,
                      width=100, height=30).grid(row=0, column=1)
-        
-        # Scrollable table
-        self.doctor_table_scroll = ctk.CTkScrollableFrame(table_frame)
-        self.doctor_table_scroll.grid(row=1, column=0, sticky="nsew", padx=20, pady=(5, 20))
+        ctk.CTkButton(header, text="📥 Import", width=100, height=30,
+                      command=lambda: import_records(self.main_frame, "doctors", self.on_doctors_imported)
+                      ).grid(row=0, column=2, padx=(10, 0))
+        
+        # Virtualized table
+        self.doctor_table = VirtualTable(
+            table_frame,
+            columns=[("ID", 50), ("First Name", 100), ("Last Name", 100), ("Specialization", 120),
+                     ("Contact", 120), ("Email", 150), ("Department", 100)],
+            fetch_page=self.fetch_doctors_page,
+            error_message="Failed to load doctors",
+            format_row=lambda d: [d[0], d[1], d[2], d[3], d[4] or "N/A", d[5] or "N/A", d[6] or "N/A"],
+            row_actions=lambda d: [("✏️", self.edit_doctor), ("📅 Schedule", self.show_doctor_schedule_window)],
+        )
+        self.doctor_table.grid(row=1, column=0, sticky="nsew", padx=20, pady=(5, 20))
         
         self.load_doctors()
     
+    def on_doctors_imported(self, result):
+        if result.imported:
+            dashboard_metrics.invalidate('admin')
+            if self.doctor_table.winfo_exists():
+                self.load_doctors()
+    
     def add_doctor(self):
         entries = self.doctor_entries
         try:
@@ -235,6 +247,7 @@ class AdminModule:
                     VALUES (?, ?, ?, ?, ?, ?)
                 """, (first_name, last_name, specialization, contact, email, int(dept_id)))
                 conn.commit()
+                dashboard_metrics.invalidate('admin')
                 
                 messagebox.showinfo("Success", "Doctor added successfully!")
                 
@@ -252,77 +265,16 @@ class AdminModule:
                 conn.close()
     
     def load_doctors(self):
-        try:
-            # Clear existing content
-            for widget in self.doctor_table_scroll.winfo_children():
-                widget.destroy()
-            
-            conn = connect_db()
-            if conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT d.doctor_id, d.first_name, d.last_name, d.specialization, 
-                           d.contact_number, d.email, dep.name as department_name
-                    FROM Doctor d
-                    LEFT JOIN Department dep ON d.department_id = dep.department_id
-                """)
-                doctors = cursor.fetchall()
-                
-                # Create header
-                columns = ["ID", "First Name", "Last Name", "Specialization", "Contact", "Email", "Department", "Actions"]
-                widths = [50, 100, 100, 120, 120, 150, 100, 120]
-                
-                # Create main table frame inside a horizontally scrollable frame
-                scroll_x_frame = ctk.CTkScrollableFrame(self.doctor_table_scroll, orientation="horizontal", height=400)
-                scroll_x_frame.pack(fill="both", expand=True, padx=5, pady=5)
-                table_frame = ctk.CTkFrame(scroll_x_frame, width=1100)  # Set width larger than visible area
-                table_frame.pack(fill="y", expand=False, padx=0, pady=0)
-                
-                # Configure grid columns with minimum widths
-                for i, width in enumerate(widths):
-                    table_frame.grid_columnconfigure(i, minsize=width)
-                
-                # Create header row
-                header_frame = ctk.CTkFrame(table_frame, fg_color="#1f538d")
-                header_frame.grid(row=0, column=0, columnspan=len(columns), sticky="ew", padx=5, pady=(5,0))
-                
-                # Configure header columns
-                for i, width in enumerate(widths):
-                    header_frame.grid_columnconfigure(i, minsize=width)
-                
-                # Add header labels
-                for i, (col, width) in enumerate(zip(columns, widths)):
-                    label = ctk.CTkLabel(header_frame, text=col, font=ctk.CTkFont(weight="bold"),
-                                       text_color="white", width=width-10)
-                    label.grid(row=0, column=i, padx=5, pady=5, sticky="ew")
-                
-                # Add data rows
-                for row_idx, doctor in enumerate(doctors, 1):
-                    values = [str(doctor[0]), doctor[1], doctor[2], doctor[3], 
-                             doctor[4] or "N/A", doctor[5] or "N/A", doctor[6] or "N/A"]
-                    
-                    for col_idx, (value, width) in enumerate(zip(values, widths[:-1])):
-                        label = ctk.CTkLabel(table_frame, text=value, width=width-10)
-                        label.grid(row=row_idx, column=col_idx, padx=5, pady=2, sticky="ew")
-                    
-                    # Action buttons
-                    actions_frame = ctk.CTkFrame(table_frame, fg_color="transparent")
-                    actions_frame.grid(row=row_idx, column=len(columns)-1, padx=5, pady=2, sticky="ew")
-                    actions_frame.grid_columnconfigure(0, weight=1)
-                    actions_frame.grid_columnconfigure(1, weight=1)
-                    actions_frame.grid_columnconfigure(2, weight=1)
-                    
-                    ctk.CTkButton(actions_frame, text="✏️", width=30, height=24,
-                                 command=lambda d=doctor: self.edit_doctor(d)).grid(row=0, column=0, padx=2)
-                    ctk.CTkButton(actions_frame, text="📅 Schedule", width=80, height=24,
-                                 command=lambda d=doctor: self.show_doctor_schedule_window(d)).grid(row=0, column=1, padx=2)
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load doctors: {e}")
-        finally:
-            if conn:
-                cursor.close()
-                conn.close()
+        self.doctor_pages = KeysetPaginator("""
+            SELECT d.doctor_id, d.first_name, d.last_name, d.specialization, 
+                   d.contact_number, d.email, dep.name as department_name
+            FROM Doctor d
+            LEFT JOIN Department dep ON d.department_id = dep.department_id
+        """, order_by=[("d.doctor_id", "ASC", 0)])
+        self.doctor_table.refresh()
+    
+    def fetch_doctors_page(self, offset, limit):
+        return self.doctor_pages.fetch(offset, limit)
     
     def edit_doctor(self, doctor):
         dialog = ctk.CTkToplevel(self.main_frame)
@@ -391,62 +343,21 @@ class AdminModule:
         ctk.CTkButton(scroll_frame, text="Update", command=update_doctor).pack(pady=20)
     
     def show_doctor_schedule_window(self, doctor):
-        import datetime
-        from db_connect import get_doctor_schedule
         dialog = ctk.CTkToplevel(self.main_frame)
         dialog.title(f"Doctor Schedule - {doctor[1]} {doctor[2]}")
-        dialog.geometry("700x500")
+        dialog.geometry("900x650")
         dialog.grab_set()
 
         ctk.CTkLabel(dialog, text=f"Doctor: {doctor[1]} {doctor[2]}", font=ctk.CTkFont(size=18, weight="bold")).pack(pady=(20, 10))
 
-        # Date range selection
-        date_frame = ctk.CTkFrame(dialog)
-        date_frame.pack(pady=10)
-        ctk.CTkLabel(date_frame, text="Start Date (YYYY-MM-DD):").pack(side="left", padx=5)
-        start_entry = ctk.CTkEntry(date_frame, width=120)
-        start_entry.pack(side="left", padx=5)
-        ctk.CTkLabel(date_frame, text="End Date (YYYY-MM-DD):").pack(side="left", padx=5)
-        end_entry = ctk.CTkEntry(date_frame, width=120)
-        end_entry.pack(side="left", padx=5)
-        # Set default dates
-        today = datetime.date.today()
-        start_entry.insert(0, str(today))
-        end_entry.insert(0, str(today + datetime.timedelta(days=7)))
-
-        # Results frame
-        results_frame = ctk.CTkScrollableFrame(dialog, height=350)
-        results_frame.pack(fill="both", expand=True, padx=20, pady=10)
-
-        def show_schedule():
-            # Clear previous results
-            for widget in results_frame.winfo_children():
-                widget.destroy()
-            start_date = start_entry.get().strip()
-            end_date = end_entry.get().strip()
-            try:
-                schedule = get_doctor_schedule(doctor[0], start_date, end_date)
-                # Table header
-                columns = ["Appointment ID", "Date & Time", "Status", "Patient Name", "Contact"]
-                widths = [100, 150, 100, 180, 120]
-                header = ctk.CTkFrame(results_frame, fg_color="#1f538d")
-                header.pack(fill="x", padx=5, pady=(5,0))
-                for i, (col, width) in enumerate(zip(columns, widths)):
-                    ctk.CTkLabel(header, text=col, font=ctk.CTkFont(weight="bold"), text_color="white", width=width-10).pack(side="left", padx=5)
-                if schedule:
-                    for appt in schedule:
-                        row = ctk.CTkFrame(results_frame)
-                        row.pack(fill="x", padx=5, pady=2)
-                        for i, (value, width) in enumerate(zip(appt, widths)):
-                            ctk.CTkLabel(row, text=str(value), width=width-10).pack(side="left", padx=5)
-                else:
-                    ctk.CTkLabel(results_frame, text="No appointments found for this period.").pack(pady=20)
-            except Exception as e:
-                ctk.CTkLabel(results_frame, text=f"Error loading schedule: {e}").pack(pady=20)
-
-        ctk.CTkButton(dialog, text="Show Schedule", command=show_schedule).pack(pady=10)
-        # Show initial schedule
-        show_schedule()
+        # One range query per week or month shown; the periods around it are prefetched
+        calendar = ScheduleCalendar(dialog, lambda first, last: get_doctor_schedule(doctor[0], first, last),
+                                    format_item=lambda a: f"{a[1]:%H:%M} {a[3]}",
+                                    on_open=lambda a: messagebox.showinfo(
+                                        "Appointment", f"#{a[0]} · {a[1]:%Y-%m-%d %H:%M}\nPatient: {a[3]}\n"
+                                        f"Contact: {a[4]}\nStatus: {a[2]}", parent=dialog),
+                                    error_message="Error loading schedule")
+        calendar.pack(fill="both", expand=True, padx=20, pady=(0, 20))
     
     def show_staff_management(self):
         self.clear_content()
@@ -511,13 +422,30 @@ class AdminModule:
                      font=ctk.CTkFont(size=18, weight="bold")).grid(row=0, column=0, sticky="w")
         ctk.CTkButton(header, text="🔄 Refresh", command=self.load_staff,
                      width=100, height=30).grid(row=0, column=1)
-        
-        # Scrollable table
-        self.staff_table_scroll = ctk.CTkScrollableFrame(table_frame)
-        self.staff_table_scroll.grid(row=1, column=0, sticky="nsew", padx=20, pady=(5, 20))
+        ctk.CTkButton(header, text="📥 Import", width=100, height=30,
+                      command=lambda: import_records(self.main_frame, "staff", self.on_staff_imported)
+                      ).grid(row=0, column=2, padx=(10, 0))
+        
+        # Virtualized table
+        self.staff_table = VirtualTable(
+            table_frame,
+            columns=[("ID", 50), ("First Name", 100), ("Last Name", 100), ("Role", 120),
+                     ("Shift", 80), ("Contact", 120), ("Department", 120)],
+            fetch_page=self.fetch_staff_page,
+            error_message="Failed to load staff",
+            format_row=lambda s: [s[0], s[1], s[2], s[3], s[4], s[5] or "N/A", s[6] or "N/A"],
+            row_actions=lambda s: [("✏️", self.edit_staff)],
+        )
+        self.staff_table.grid(row=1, column=0, sticky="nsew", padx=20, pady=(5, 20))
         
         self.load_staff()
     
+    def on_staff_imported(self, result):
+        if result.imported:
+            dashboard_metrics.invalidate('admin')
+            if self.staff_table.winfo_exists():
+                self.load_staff()
+    
     def add_staff(self):
         entries = self.staff_entries
         try:
@@ -545,6 +473,7 @@ class AdminModule:
                     VALUES (?, ?, ?, ?, ?, ?)
                 """, (first_name, last_name, role, shift, contact, int(dept_id)))
                 conn.commit()
+                dashboard_metrics.invalidate('admin')
                 
                 messagebox.showinfo("Success", "Staff member added successfully!")
                 
@@ -565,71 +494,16 @@ class AdminModule:
                 conn.close()
     
     def load_staff(self):
-        try:
-            # Clear existing content
-            for widget in self.staff_table_scroll.winfo_children():
-                widget.destroy()
-            
-            conn = connect_db()
-            if conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT s.staff_id, s.first_name, s.last_name, s.role, s.shift, 
-                           s.contact_number, d.name as department_name
-                    FROM Staff s
-                    LEFT JOIN Department d ON s.department_id = d.department_id
-                """)
-                staff_members = cursor.fetchall()
-                
-                # Create header
-                columns = ["ID", "First Name", "Last Name", "Role", "Shift", "Contact", "Department", "Actions"]
-                widths = [50, 100, 100, 120, 80, 120, 120, 120]
-                
-                # Create main table frame
-                table_frame = ctk.CTkFrame(self.staff_table_scroll)
-                table_frame.pack(fill="both", expand=True, padx=5, pady=5)
-                
-                # Configure grid columns with minimum widths
-                for i, width in enumerate(widths):
-                    table_frame.grid_columnconfigure(i, minsize=width)
-                
-                # Create header row
-                header_frame = ctk.CTkFrame(table_frame, fg_color="#1f538d")
-                header_frame.grid(row=0, column=0, columnspan=len(columns), sticky="ew", padx=5, pady=(5,0))
-                
-                # Configure header columns
-                for i, width in enumerate(widths):
-                    header_frame.grid_columnconfigure(i, minsize=width)
-                
-                # Add header labels
-                for i, (col, width) in enumerate(zip(columns, widths)):
-                    label = ctk.CTkLabel(header_frame, text=col, font=ctk.CTkFont(weight="bold"),
-                                       text_color="white", width=width-10)
-                    label.grid(row=0, column=i, padx=5, pady=5, sticky="ew")
-                
-                # Add data rows
-                for row_idx, staff in enumerate(staff_members, 1):
-                    values = [str(staff[0]), staff[1], staff[2], staff[3], staff[4], 
-                             staff[5] or "N/A", staff[6] or "N/A"]
-                    
-                    for col_idx, (value, width) in enumerate(zip(values, widths[:-1])):
-                        label = ctk.CTkLabel(table_frame, text=value, width=width-10)
-                        label.grid(row=row_idx, column=col_idx, padx=5, pady=2, sticky="ew")
-                    
-                    # Action buttons
-                    actions_frame = ctk.CTkFrame(table_frame, fg_color="transparent")
-                    actions_frame.grid(row=row_idx, column=len(columns)-1, padx=5, pady=2, sticky="ew")
-                    actions_frame.grid_columnconfigure(0, weight=1)
-                    actions_frame.grid_columnconfigure(1, weight=1)
-                    
-                    ctk.CTkButton(actions_frame, text="✏️", width=30, height=24,
-                                 command=lambda s=staff: self.edit_staff(s)).grid(row=0, column=0, padx=2)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load staff: {e}")
-        finally:
-            if conn:
-                cursor.close()
-                conn.close()
+        self.staff_pages = KeysetPaginator("""
+            SELECT s.staff_id, s.first_name, s.last_name, s.role, s.shift, 
+                   s.contact_number, d.name as department_name
+            FROM Staff s
+            LEFT JOIN Department d ON s.department_id = d.department_id
+        """, order_by=[("s.staff_id", "ASC", 0)])
+        self.staff_table.refresh()
+    
+    def fetch_staff_page(self, offset, limit):
+        return self.staff_pages.fetch(offset, limit)
     
     def edit_staff(self, staff):
         dialog = ctk.CTkToplevel(self.main_frame)
@@ -743,98 +617,43 @@ class AdminModule:
                      font=ctk.CTkFont(size=18, weight="bold")).grid(row=0, column=0, sticky="w")
         ctk.CTkButton(header, text="🔄 Refresh", command=self.load_medical_records,
                      width=100, height=30).grid(row=0, column=1)
-        
-        # Scrollable table
-        self.records_table_scroll = ctk.CTkScrollableFrame(table_frame)
-        self.records_table_scroll.grid(row=1, column=0, sticky="nsew", padx=20, pady=(5, 20))
+        ctk.CTkButton(header, text="📤 Export", width=100, height=30,
+                      command=lambda: export_records(self.main_frame, "medical_records", "medical records")
+                      ).grid(row=0, column=2, padx=(10, 0))
+        
+        # Virtualized table
+        self.records_table = VirtualTable(
+            table_frame,
+            columns=[("Record ID", 80), ("Patient ID", 80), ("Patient Name", 150), ("Doctor ID", 80),
+                     ("Doctor Name", 150), ("Visit Date", 100), ("Diagnosis", 200), ("Notes", 200)],
+            fetch_page=self.fetch_medical_records_page,
+            error_message="Failed to load medical records",
+            format_row=lambda r: [r[0], r[1], r[2], r[3], r[4], r[5], r[6], r[7] or "N/A"],
+        )
+        self.records_table.grid(row=1, column=0, sticky="nsew", padx=20, pady=(5, 20))
         
         self.load_medical_records()
     
     def load_medical_records(self):
-        try:
-            # Clear existing content
-            for widget in self.records_table_scroll.winfo_children():
-                widget.destroy()
-            
-            conn = connect_db()
-            if conn:
-                cursor = conn.cursor()
-                
-                # Get search parameter
-                search_patient_id = self.patient_search_entry.get() if hasattr(self, 'patient_search_entry') else ""
-                
-                if search_patient_id and search_patient_id.isdigit():
-                    cursor.execute("""
-                        SELECT mr.record_id, mr.patient_id, 
-                               p.first_name + ' ' + p.last_name as patient_name,
-                               mr.doctor_id,
-                               d.first_name + ' ' + d.last_name as doctor_name,
-                               mr.visit_date, mr.diagnosis, mr.notes
-                        FROM Medical_Record mr
-                        JOIN Patient p ON mr.patient_id = p.patient_id
-                        JOIN Doctor d ON mr.doctor_id = d.doctor_id
-                        WHERE mr.patient_id = ?
-                        ORDER BY mr.visit_date DESC
-                    """, (int(search_patient_id),))
-                else:
-                    cursor.execute("""
-                        SELECT mr.record_id, mr.patient_id, 
-                               p.first_name + ' ' + p.last_name as patient_name,
-                               mr.doctor_id,
-                               d.first_name + ' ' + d.last_name as doctor_name,
-                               mr.visit_date, mr.diagnosis, mr.notes
-                        FROM Medical_Record mr
-                        JOIN Patient p ON mr.patient_id = p.patient_id
-                        JOIN Doctor d ON mr.doctor_id = d.doctor_id
-                        ORDER BY mr.visit_date DESC
-                    """)
-                
-                records = cursor.fetchall()
-                
-                # Create header
-                columns = ["Record ID", "Patient ID", "Patient Name", "Doctor ID", "Doctor Name", "Visit Date", "Diagnosis", "Notes"]
-                widths = [80, 80, 150, 80, 150, 100, 200, 200]
-                
-                # Create main table frame
-                table_frame = ctk.CTkFrame(self.records_table_scroll)
-                table_frame.pack(fill="both", expand=True, padx=5, pady=5)
-                
-                # Configure grid columns with minimum widths
-                for i, width in enumerate(widths):
-                    table_frame.grid_columnconfigure(i, minsize=width)
-                
-                # Create header row
-                header_frame = ctk.CTkFrame(table_frame, fg_color="#1f538d")
-                header_frame.grid(row=0, column=0, columnspan=len(columns), sticky="ew", padx=5, pady=(5,0))
-                
-                # Configure header columns
-                for i, width in enumerate(widths):
-                    header_frame.grid_columnconfigure(i, minsize=width)
-                
-                # Add header labels
-                for i, (col, width) in enumerate(zip(columns, widths)):
-                    label = ctk.CTkLabel(header_frame, text=col, font=ctk.CTkFont(weight="bold"),
-                                       text_color="white", width=width-10)
-                    label.grid(row=0, column=i, padx=5, pady=5, sticky="ew")
-                
-                # Add data rows
-                for row_idx, record in enumerate(records, 1):
-                    values = [
-                        str(record[0]), str(record[1]), record[2], str(record[3]),
-                        record[4], str(record[5]), record[6][:50] + "..." if len(record[6]) > 50 else record[6],
-                        record[7][:50] + "..." if record[7] and len(record[7]) > 50 else record[7] or "N/A"
-                    ]
-                    
-                    for col_idx, (value, width) in enumerate(zip(values, widths)):
-                        label = ctk.CTkLabel(table_frame, text=value, width=width-10, wraplength=width-10)
-                        label.grid(row=row_idx, column=col_idx, padx=5, pady=2, sticky="ew")
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load medical records: {e}")
-        finally:
-            if conn:
-                cursor.close()
-                conn.close()
+        # Get search parameter
+        search_patient_id = self.patient_search_entry.get() if hasattr(self, 'patient_search_entry') else ""
+        where, params = [], ()
+        if search_patient_id and search_patient_id.isdigit():
+            where, params = ["mr.patient_id = ?"], (int(search_patient_id),)
+        self.records_pages = KeysetPaginator("""
+            SELECT mr.record_id, mr.patient_id, 
+                   p.first_name + ' ' + p.last_name as patient_name,
+                   mr.doctor_id,
+                   d.first_name + ' ' + d.last_name as doctor_name,
+                   mr.visit_date, mr.diagnosis, mr.notes
+            FROM Medical_Record mr
+            JOIN Patient p ON mr.patient_id = p.patient_id
+            JOIN Doctor d ON mr.doctor_id = d.doctor_id
+        """, order_by=[("mr.visit_date", "DESC", 5), ("mr.record_id", "DESC", 0)], where=where, params=params)
+        self.records_table.refresh()
+    
+    def fetch_medical_records_page(self, offset, limit):
+        return self.records_pages.fetch(offset, limit)
     
     def show_room_management(self):
         self.clear_content()
@@ -897,9 +716,16 @@ class AdminModule:
         ctk.CTkButton(header, text="🔄 Refresh", command=self.load_rooms,
                      width=100, height=30).grid(row=0, column=1)
         
-        # Scrollable table
-        self.room_table_scroll = ctk.CTkScrollableFrame(table_frame)
-        self.room_table_scroll.grid(row=1, column=0, sticky="nsew", padx=20, pady=(5, 20))
+        # Virtualized table
+        self.room_table = VirtualTable(
+            table_frame,
+            columns=[("Room Number", 100), ("Room Type", 100), ("Bed Count", 100)],
+            fetch_page=self.fetch_rooms_page,
+            error_message="Failed to load rooms",
+            format_row=lambda r: [r[0], r[1], r[2]],
+            row_actions=lambda r: [("✏️", self.edit_room)],
+        )
+        self.room_table.grid(row=1, column=0, sticky="nsew", padx=20, pady=(5, 20))
         
         self.load_rooms()
     
@@ -922,6 +748,7 @@ class AdminModule:
                     VALUES (?, ?, ?)
                 """, (room_number, room_type, int(bed_count)))
                 conn.commit()
+                dashboard_metrics.invalidate('admin')
                 
                 messagebox.showinfo("Success", "Room added successfully!")
                 
@@ -942,68 +769,14 @@ class AdminModule:
                 conn.close()
     
     def load_rooms(self):
-        try:
-            # Clear existing content
-            for widget in self.room_table_scroll.winfo_children():
-                widget.destroy()
-            
-            conn = connect_db()
-            if conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT room_number, room_type, bed_count
-                    FROM Room
-                """)
-                rooms = cursor.fetchall()
-                
-                # Create header
-                columns = ["Room Number", "Room Type", "Bed Count", "Actions"]
-                widths = [100, 100, 100, 120]
-                
-                # Create main table frame
-                table_frame = ctk.CTkFrame(self.room_table_scroll)
-                table_frame.pack(fill="both", expand=True, padx=5, pady=5)
-                
-                # Configure grid columns with minimum widths
-                for i, width in enumerate(widths):
-                    table_frame.grid_columnconfigure(i, minsize=width)
-                
-                # Create header row
-                header_frame = ctk.CTkFrame(table_frame, fg_color="#1f538d")
-                header_frame.grid(row=0, column=0, columnspan=len(columns), sticky="ew", padx=5, pady=(5,0))
-                
-                # Configure header columns
-                for i, width in enumerate(widths):
-                    header_frame.grid_columnconfigure(i, minsize=width)
-                
-                # Add header labels
-                for i, (col, width) in enumerate(zip(columns, widths)):
-                    label = ctk.CTkLabel(header_frame, text=col, font=ctk.CTkFont(weight="bold"),
-                                       text_color="white", width=width-10)
-                    label.grid(row=0, column=i, padx=5, pady=5, sticky="ew")
-                
-                # Add data rows
-                for row_idx, room in enumerate(rooms, 1):
-                    values = [str(room[0]), room[1], str(room[2])]
-                    
-                    for col_idx, (value, width) in enumerate(zip(values, widths[:-1])):
-                        label = ctk.CTkLabel(table_frame, text=value, width=width-10)
-                        label.grid(row=row_idx, column=col_idx, padx=5, pady=2, sticky="ew")
-                    
-                    # Action buttons
-                    actions_frame = ctk.CTkFrame(table_frame, fg_color="transparent")
-                    actions_frame.grid(row=row_idx, column=len(columns)-1, padx=5, pady=2, sticky="ew")
-                    actions_frame.grid_columnconfigure(0, weight=1)
-                    actions_frame.grid_columnconfigure(1, weight=1)
-                    
-                    ctk.CTkButton(actions_frame, text="✏️", width=30, height=24,
-                                 command=lambda r=room: self.edit_room(r)).grid(row=0, column=0, padx=2)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load rooms: {e}")
-        finally:
-            if conn:
-                cursor.close()
-                conn.close()
+        self.room_pages = KeysetPaginator("""
+            SELECT room_number, room_type, bed_count
+            FROM Room
+        """, order_by=[("room_number", "ASC", 0)])
+        self.room_table.refresh()
+    
+    def fetch_rooms_page(self, offset, limit):
+        return self.room_pages.fetch(offset, limit)
     
     def edit_room(self, room):
         dialog = ctk.CTkToplevel(self.main_frame)
@@ -1038,6 +811,7 @@ class AdminModule:
                         room[0]
                     ))
                     conn.commit()
+                    bed_service.invalidate(reload=True)
                     messagebox.showinfo("Success", "Room updated successfully!")
                     dialog.destroy()
                     self.load_rooms()
@@ -1104,9 +878,16 @@ class AdminModule:
         ctk.CTkButton(header, text="🔄 Refresh", command=self.load_beds,
                      width=100, height=30).grid(row=0, column=1)
         
-        # Scrollable table
-        self.bed_table_scroll = ctk.CTkScrollableFrame(table_frame)
-        self.bed_table_scroll.grid(row=1, column=0, sticky="nsew", padx=20, pady=(5, 20))
+        # Virtualized table
+        self.bed_table = VirtualTable(
+            table_frame,
+            columns=[("Room Number", 100), ("Room Number", 100), ("Bed Number", 100), ("Status", 80)],
+            fetch_page=self.fetch_beds_page,
+            error_message="Failed to load beds",
+            format_row=lambda b: [b[0], b[1], b[2], "Occupied" if b[3] else "Available"],
+            row_actions=lambda b: [("✏️", self.edit_bed)],
+        )
+        self.bed_table.grid(row=1, column=0, sticky="nsew", padx=20, pady=(5, 20))
         
         self.load_beds()
     
@@ -1133,6 +914,8 @@ class AdminModule:
                     VALUES (?, ?, 0)
                 """, (room_number, bed_number))
                 conn.commit()
+                dashboard_metrics.invalidate('admin')
+                bed_service.invalidate()
                 
                 messagebox.showinfo("Success", "Bed added successfully!")
                 
@@ -1153,70 +936,15 @@ class AdminModule:
                 conn.close()
     
     def load_beds(self):
-        try:
-            # Clear existing content
-            for widget in self.bed_table_scroll.winfo_children():
-                widget.destroy()
-            
-            conn = connect_db()
-            if conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT b.room_number, r.room_number, b.bed_number, b.is_occupied
-                    FROM Bed b
-                    LEFT JOIN Room r ON b.room_number = r.room_number
-                """)
-                beds = cursor.fetchall()
-                
-                # Create header
-                columns = ["Room Number", "Room Number", "Bed Number", "Status", "Actions"]
-                widths = [100, 100, 100, 80, 120]
-                
-                # Create main table frame
-                table_frame = ctk.CTkFrame(self.bed_table_scroll)
-                table_frame.pack(fill="both", expand=True, padx=5, pady=5)
-                
-                # Configure grid columns with minimum widths
-                for i, width in enumerate(widths):
-                    table_frame.grid_columnconfigure(i, minsize=width)
-                
-                # Create header row
-                header_frame = ctk.CTkFrame(table_frame, fg_color="#1f538d")
-                header_frame.grid(row=0, column=0, columnspan=len(columns), sticky="ew", padx=5, pady=(5,0))
-                
-                # Configure header columns
-                for i, width in enumerate(widths):
-                    header_frame.grid_columnconfigure(i, minsize=width)
-                
-                # Add header labels
-                for i, (col, width) in enumerate(zip(columns, widths)):
-                    label = ctk.CTkLabel(header_frame, text=col, font=ctk.CTkFont(weight="bold"),
-                                       text_color="white", width=width-10)
-                    label.grid(row=0, column=i, padx=5, pady=5, sticky="ew")
-                
-                # Add data rows
-                for row_idx, bed in enumerate(beds, 1):
-                    values = [str(bed[0]), str(bed[1]), str(bed[2]), "Occupied" if bed[3] else "Available"]
-                    
-                    for col_idx, (value, width) in enumerate(zip(values, widths[:-1])):
-                        label = ctk.CTkLabel(table_frame, text=value, width=width-10)
-                        label.grid(row=row_idx, column=col_idx, padx=5, pady=2, sticky="ew")
-                    
-                    # Action buttons
-                    actions_frame = ctk.CTkFrame(table_frame, fg_color="transparent")
-                    actions_frame.grid(row=row_idx, column=len(columns)-1, padx=5, pady=2, sticky="ew")
-                    actions_frame.grid_columnconfigure(0, weight=1)
-                    actions_frame.grid_columnconfigure(1, weight=1)
-                    
-                    ctk.CTkButton(actions_frame, text="✏️", width=30, height=24,
-                                 command=lambda b=bed: self.edit_bed(b)).grid(row=0, column=0, padx=2)
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load beds: {e}")
-        finally:
-            if conn:
-                cursor.close()
-                conn.close()
+        self.bed_pages = KeysetPaginator("""
+            SELECT b.room_number, r.room_number, b.bed_number, b.is_occupied
+            FROM Bed b
+            LEFT JOIN Room r ON b.room_number = r.room_number
+        """, order_by=[("b.room_number", "ASC", 0), ("b.bed_number", "ASC", 2)])
+        self.bed_table.refresh()
+    
+    def fetch_beds_page(self, offset, limit):
+        return self.bed_pages.fetch(offset, limit)
     
     def edit_bed(self, bed):
         dialog = ctk.CTkToplevel(self.main_frame)
@@ -1249,6 +977,7 @@ class AdminModule:
                         bed[1]
                     ))
                     conn.commit()
+                    bed_service.invalidate(reload=True)
                     messagebox.showinfo("Success", "Bed updated successfully!")
                     dialog.destroy()
                     self.load_beds()
@@ -1277,93 +1006,30 @@ class AdminModule:
                                command=self.add_department)
         add_btn.pack(side="left", padx=5)
         
-        # Create table frame
-        self.department_table_scroll = ctk.CTkScrollableFrame(self.content_frame)
-        self.department_table_scroll.pack(fill="both", expand=True, padx=20, pady=(0, 20))
-        
-        # Create header
-        columns = ["ID", "Department Name", "Location", "Actions"]
-        widths = [50, 200, 200, 120]
-        
-        # Configure grid columns
-        for i, width in enumerate(widths):
-            self.department_table_scroll.grid_columnconfigure(i, minsize=width)
-        
-        # Create header row
-        header_frame = ctk.CTkFrame(self.department_table_scroll, fg_color="#1f538d")
-        header_frame.grid(row=0, column=0, columnspan=len(columns), sticky="ew", padx=5, pady=(5,0))
-        
-        for i, (col, width) in enumerate(zip(columns, widths)):
-            header_frame.grid_columnconfigure(i, minsize=width)
-            ctk.CTkLabel(header_frame, text=col, font=ctk.CTkFont(weight="bold"),
-                        text_color="white").grid(row=0, column=i, padx=5, pady=5, sticky="ew")
+        # Virtualized table
+        self.department_table = VirtualTable(
+            self.content_frame,
+            columns=[("Department ID", 100), ("Name", 150), ("Description", 200)],
+            fetch_page=self.fetch_departments_page,
+            error_message="Failed to load departments",
+            format_row=lambda d: [d[0], d[1], d[2] if d[2] else ""],
+            row_actions=lambda d: [("✏️", self.edit_department),
+                                   ("📊 Stats", lambda dept: self.show_department_statistics_window(dept[0]))],
+        )
+        self.department_table.pack(fill="both", expand=True, padx=20, pady=(0, 20))
         
         # Load departments
         self.load_departments()
     
     def load_departments(self):
-        try:
-            # Clear existing content
-            for widget in self.department_table_scroll.winfo_children():
-                widget.destroy()
-            
-            conn = connect_db()
-            if conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT * FROM Department")
-                departments = cursor.fetchall()
-                
-                # Create header
-                columns = ["Department ID", "Name", "Description", "Actions"]
-                widths = [100, 150, 200, 120]
-                
-                # Create main table frame
-                table_frame = ctk.CTkFrame(self.department_table_scroll)
-                table_frame.pack(fill="both", expand=True, padx=5, pady=5)
-                
-                # Configure grid columns with minimum widths
-                for i, width in enumerate(widths):
-                    table_frame.grid_columnconfigure(i, minsize=width)
-                
-                # Create header row
-                header_frame = ctk.CTkFrame(table_frame, fg_color="#1f538d")
-                header_frame.grid(row=0, column=0, columnspan=len(columns), sticky="ew", padx=5, pady=(5,0))
-                
-                # Configure header columns
-                for i, width in enumerate(widths):
-                    header_frame.grid_columnconfigure(i, minsize=width)
-                
-                # Add header labels
-                for i, (col, width) in enumerate(zip(columns, widths)):
-                    label = ctk.CTkLabel(header_frame, text=col, font=ctk.CTkFont(weight="bold"),
-                                       text_color="white", width=width-10)
-                    label.grid(row=0, column=i, padx=5, pady=5, sticky="ew")
-                
-                # Add data rows
-                for row_idx, dept in enumerate(departments, 1):
-                    values = [str(dept[0]), dept[1], dept[2] if dept[2] else ""]
-                    
-                    for col_idx, (value, width) in enumerate(zip(values, widths[:-1])):
-                        label = ctk.CTkLabel(table_frame, text=value, width=width-10)
-                        label.grid(row=row_idx, column=col_idx, padx=5, pady=2, sticky="ew")
-                    
-                    # Action buttons
-                    actions_frame = ctk.CTkFrame(table_frame, fg_color="transparent")
-                    actions_frame.grid(row=row_idx, column=len(columns)-1, padx=5, pady=2, sticky="ew")
-                    actions_frame.grid_columnconfigure(0, weight=1)
-                    actions_frame.grid_columnconfigure(1, weight=1)
-                    actions_frame.grid_columnconfigure(2, weight=1)
-                    ctk.CTkButton(actions_frame, text="✏️", width=30, height=24,
-                                 command=lambda d=dept: self.edit_department(d)).grid(row=0, column=0, padx=2)
-                    ctk.CTkButton(actions_frame, text="📊 Stats", width=60, height=24,
-                                 command=lambda id=dept[0]: self.show_department_statistics_window(id)).grid(row=0, column=2, padx=2)
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load departments: {e}")
-        finally:
-            if conn:
-                cursor.close()
-                conn.close()
+        self.department_pages = KeysetPaginator("""
+            SELECT department_id, name, location
+            FROM Department
+        """, order_by=[("department_id", "ASC", 0)])
+        self.department_table.refresh()
+    
+    def fetch_departments_page(self, offset, limit):
+        return self.department_pages.fetch(offset, limit)
     
     def edit_department(self, department):
         dialog = ctk.CTkToplevel(self.content_frame)
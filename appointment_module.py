@@ -5,6 +5,18 @@ import re
 from db_connect import *
 from CTkTable import *
 from tkcalendar import Calendar
+from dashboard_metrics import dashboard_metrics
+from widgets import VirtualTable, Spinner, Debouncer, LookupCombobox, ScheduleCalendar, export_records
+from lookups import patient_lookup, format_patient, doctor_lookup, format_doctor
+from name_search import name_filter, DOCTOR
+from patient_directory import patient_directory
+from query_executor import executor
+from slot_engine import slot_engine
+from validators import validate_date
+from recurrence import expand, weekdays_text, WEEKDAY_NAMES
+
+# Repeat menu of the schedule form -> recurrence.expand() frequency
+REPEAT_OPTIONS = {"Does not repeat": None, "Daily": "daily", "Weekly": "weekly"}
 
 class AppointmentModule:
     def __init__(self, main_frame, user_info):
@@ -82,49 +94,29 @@ class AppointmentModule:
         stats_frame.pack(fill="x", padx=20, pady=10)
         stats_frame.grid_columnconfigure((0, 1, 2, 3), weight=1)
         
-        # Get real stats from database
-        try:
-            conn = connect_db()
-            if conn:
-                cursor = conn.cursor()
-                # Today's Appointments
-                cursor.execute("SELECT COUNT(*) FROM Appointment WHERE CAST(appointment_date AS DATE) = CAST(GETDATE() AS DATE)")
-                todays_appointments = cursor.fetchone()[0] or 0
-                # Pending (scheduled)
-                cursor.execute("SELECT COUNT(*) FROM Appointment WHERE status = 'scheduled'")
-                pending = cursor.fetchone()[0] or 0
-                # Completed
-                cursor.execute("SELECT COUNT(*) FROM Appointment WHERE status = 'completed'")
-                completed = cursor.fetchone()[0] or 0
-                # Cancelled
-                cursor.execute("SELECT COUNT(*) FROM Appointment WHERE status = 'cancelled'")
-                cancelled = cursor.fetchone()[0] or 0
-                cursor.close()
-                conn.close()
-                stats = [
-                    ("📅 Today's Appointments", str(todays_appointments), "#3498db"),
-                    ("⏳ Pending", str(pending), "#f39c12"),
-                    ("✅ Completed", str(completed), "#27ae60"),
-                    ("❌ Cancelled", str(cancelled), "#e74c3c")
-                ]
-        except Exception as e:
-            # Fallback to sample data if database error
-            print(f"Error fetching stats: {e}")
-            stats = [
-                ("📅 Today's Appointments", "0", "#3498db"),
-                ("⏳ Pending", "0", "#f39c12"),
-                ("✅ Completed", "0", "#27ae60"),
-                ("❌ Cancelled", "0", "#e74c3c")
-            ]
+        # Counters come from the shared metrics cache; a background refresh
+        # fills them in if the cached values are stale or missing
+        values, fresh = dashboard_metrics.get('appointment')
+        stats = [
+            ("📅 Today's Appointments", 'today', "#3498db"),
+            ("⏳ Pending", 'scheduled', "#f39c12"),
+            ("✅ Completed", 'completed', "#27ae60"),
+            ("❌ Cancelled", 'cancelled', "#e74c3c")
+        ]
         
         num_stats = len(stats)
         for col in range(num_stats):
             stats_frame.grid_columnconfigure(col, weight=1)
-        for i, (label, value, color) in enumerate(stats):
+        value_labels = {}
+        for i, (label, key, color) in enumerate(stats):
             card = ctk.CTkFrame(stats_frame, fg_color=color)
             card.grid(row=0, column=i, padx=10, pady=20, sticky="nsew")
-            ctk.CTkLabel(card, text=str(value), font=ctk.CTkFont(size=28, weight="bold"), text_color="white").pack(pady=(10, 5))
+            value = str(values[key]) if values else "…"
+            value_labels[key] = ctk.CTkLabel(card, text=value, font=ctk.CTkFont(size=28, weight="bold"), text_color="white")
+            value_labels[key].pack(pady=(10, 5))
             ctk.CTkLabel(card, text=label, font=ctk.CTkFont(size=14), text_color="white").pack(pady=(0, 10))
+        if not fresh:
+            dashboard_metrics.bind_labels(stats_frame, 'appointment', value_labels)
         
         # Quick actions
         actions_frame = ctk.CTkFrame(self.content_frame)
@@ -213,10 +205,11 @@ class AppointmentModule:
         
         # Form fields
         fields = [
-            ("Patient ID:", "app_patient_id"),
-            ("Doctor ID:", "app_doctor_id"),
+            ("Patient:", "app_patient_id"),
+            ("Doctor:", "app_doctor_id"),
             ("Appointment Date:", "app_date"),
-            ("Appointment Time (Hour):", "app_time"),
+            ("Appointment Time:", "app_time"),
+            ("Repeat:", "app_repeat"),
             ("Remarks:", "app_remarks")
         ]
         
@@ -231,13 +224,50 @@ class AppointmentModule:
                 date_frame.grid(row=i, column=1, padx=(5, 20), pady=10, sticky="ew")
                 cal = Calendar(date_frame, selectmode='day', date_pattern='yyyy-mm-dd', mindate=datetime.now().date())
                 cal.pack()
+                cal.bind("<<CalendarSelected>>", lambda e: self.update_time_slots())
                 self.appointment_entries[key] = cal
             elif key == "app_time":
-                time_values = [f"{h:02d}:00" for h in range(0, 24)]
-                time_menu = ctk.CTkOptionMenu(form_frame, values=time_values)
-                time_menu.set(time_values[0])
+                # Only the doctor's free slots are offered, from the slot engine
+                time_menu = ctk.CTkOptionMenu(form_frame, values=[""])
                 time_menu.grid(row=i, column=1, padx=(5, 20), pady=10, sticky="ew")
                 self.appointment_entries[key] = time_menu
+            elif key == "app_repeat":
+                # Follow-up care (physiotherapy, dialysis) is booked as one series
+                repeat_frame = ctk.CTkFrame(form_frame, fg_color="transparent")
+                repeat_frame.grid(row=i, column=1, padx=(5, 20), pady=10, sticky="w")
+                repeat_menu = ctk.CTkOptionMenu(repeat_frame, values=list(REPEAT_OPTIONS), width=150)
+                repeat_menu.grid(row=0, column=0, padx=(0, 10))
+                ctk.CTkLabel(repeat_frame, text="every").grid(row=0, column=1, padx=5)
+                self.repeat_every = ctk.CTkEntry(repeat_frame, width=50)
+                self.repeat_every.insert(0, "1")
+                self.repeat_every.grid(row=0, column=2, padx=5)
+                ctk.CTkLabel(repeat_frame, text="day(s) / week(s),").grid(row=0, column=3, padx=5)
+                self.repeat_count = ctk.CTkEntry(repeat_frame, width=50)
+                self.repeat_count.insert(0, "10")
+                self.repeat_count.grid(row=0, column=4, padx=5)
+                ctk.CTkLabel(repeat_frame, text="times").grid(row=0, column=5, padx=5)
+                # Weekly series: on the checked days, or on the appointment date's weekday
+                weekdays_frame = ctk.CTkFrame(repeat_frame, fg_color="transparent")
+                weekdays_frame.grid(row=1, column=0, columnspan=6, pady=(5, 0), sticky="w")
+                self.repeat_weekdays = []
+                for day, name in enumerate(WEEKDAY_NAMES):
+                    box = ctk.CTkCheckBox(weekdays_frame, text=name, width=60)
+                    box.grid(row=0, column=day, padx=(0, 5))
+                    self.repeat_weekdays.append(box)
+                self.appointment_entries[key] = repeat_menu
+            elif key == "app_patient_id":
+                entry = LookupCombobox(form_frame, patient_lookup, format_patient, height=40,
+                                       placeholder_text="Type a name or ID",
+                                       error_message="Failed to load patients")
+                entry.grid(row=i, column=1, padx=(5, 20), pady=10, sticky="ew")
+                self.appointment_entries[key] = entry
+            elif key == "app_doctor_id":
+                entry = LookupCombobox(form_frame, doctor_lookup, format_doctor, height=40,
+                                       command=lambda _: self.update_time_slots(),
+                                       placeholder_text="Type a name, specialization or ID",
+                                       error_message="Failed to load doctors")
+                entry.grid(row=i, column=1, padx=(5, 20), pady=10, sticky="ew")
+                self.appointment_entries[key] = entry
             elif key == "app_remarks":
                 entry = ctk.CTkTextbox(form_frame, height=80)
                 entry.grid(row=i, column=1, padx=(5, 20), pady=10, sticky="ew")
@@ -255,13 +285,55 @@ class AppointmentModule:
                      command=self.browse_patients, width=150).pack(side="left", padx=10)
         ctk.CTkButton(helper_frame, text="👨‍⚕️ Browse Doctors", 
                      command=self.browse_doctors, width=150).pack(side="left", padx=10)
+        ctk.CTkButton(helper_frame, text="📆 Doctor's Calendar",
+                     command=self.show_doctor_schedule, width=150).pack(side="left", padx=10)
         
         # Schedule button
-        ctk.CTkButton(form_frame, text="📅 Schedule Appointment", 
+        schedule_btn = ctk.CTkButton(form_frame, text="📅 Schedule Appointment", 
                      command=self.schedule_appointment, height=50, 
-                     font=ctk.CTkFont(size=16, weight="bold")).grid(
-            row=len(fields)+2, column=0, columnspan=2, padx=20, pady=30, sticky="ew"
+                     font=ctk.CTkFont(size=16, weight="bold"))
+        schedule_btn.grid(
+            row=len(fields)+2, column=0, columnspan=2, padx=20, pady=(30, 5), sticky="ew"
         )
+        self.schedule_spinner = Spinner(form_frame, text="Scheduling", disables=[schedule_btn])
+        self.schedule_spinner.grid(row=len(fields)+3, column=0, columnspan=2, pady=(0, 20))
+        self.update_time_slots()
+    
+    def update_time_slots(self, loaded=None):
+        """Offer the selected doctor's free slots on the selected date.
+
+        loaded is the slot engine refresh key whose load just finished; the
+        slots are only reported missing if that load covered the date, so
+        picking a date in another window while one loads waits for it too.
+        """
+        time_menu = self.appointment_entries['app_time']
+        if not time_menu.winfo_exists():
+            return
+        doctor_id = self.appointment_entries['app_doctor_id'].get()
+        if doctor_id is None:
+            time_menu.configure(values=[""], state="disabled")
+            time_menu.set("Select a doctor first")
+            return
+        day = datetime.strptime(self.appointment_entries['app_date'].get_date(), '%Y-%m-%d').date()
+        key = slot_engine.refresh_key(doctor_id, day)
+        wait = key != loaded
+        slots, fresh = slot_engine.get(doctor_id, day)
+        if slots is None:
+            time_menu.configure(values=[""], state="disabled")
+            time_menu.set("Loading free slots…" if wait else "Could not load free slots")
+            if wait:
+                slot_engine.after_refresh(time_menu, lambda: self.update_time_slots(key), key)
+            return
+        if not slots:
+            time_menu.configure(values=[""], state="disabled")
+            time_menu.set("No free slots on this date")
+        else:
+            time_menu.configure(values=slots, state="normal")
+            if time_menu.get() not in slots:
+                time_menu.set(slots[0])
+        if not fresh and wait:
+            # Stale slots are shown while they reload, then replaced
+            slot_engine.after_refresh(time_menu, lambda: self.update_time_slots(key), key)
     
     def browse_patients(self):
         # Create patient browser dialog
@@ -281,38 +353,58 @@ class AppointmentModule:
         results_scroll = ctk.CTkScrollableFrame(dialog)
         results_scroll.pack(fill="both", expand=True, padx=20, pady=10)
         
-        def search_patients():
-            # Clear previous results
+        def show_patients(patients):
+            # patients are (patient_id, name, contact) tuples
             for widget in results_scroll.winfo_children():
                 widget.destroy()
-            
+            for patient in patients:
+                patient_frame = ctk.CTkFrame(results_scroll)
+                patient_frame.pack(fill="x", pady=2)
+                
+                info_text = f"ID: {patient[0]} | {patient[1]} | Contact: {patient[2]}"
+                ctk.CTkLabel(patient_frame, text=info_text).pack(side="left", padx=10, pady=5)
+                
+                ctk.CTkButton(patient_frame, text="Select", width=80,
+                             command=lambda p=patient: self.select_patient(p[0], f"{p[0]} - {p[1]}", dialog)).pack(side="right", padx=10, pady=5)
+        
+        def type_ahead():
+            # Per keystroke: answered from memory, no database round trip
+            search_term = search_entry.get().strip()
+            if not search_term:
+                return
+            matches, ready = patient_directory.lookup(search_term)
+            if not ready:
+                for widget in results_scroll.winfo_children():
+                    widget.destroy()
+                ctk.CTkLabel(results_scroll, text="⏳ Loading patient directory...").pack(pady=10)
+                patient_directory.after_refresh(results_scroll, type_ahead)
+                return
+            show_patients(matches)
+            if not matches:
+                ctk.CTkLabel(results_scroll, text="No names start with that; press Search to look for similar names",
+                             text_color="gray").pack(pady=10)
+        
+        search_entry.bind("<KeyRelease>", Debouncer(search_entry, type_ahead))
+        
+        def search_patients():
             search_term = search_entry.get().strip()
             try:
                 conn = connect_db()
                 if conn:
                     cursor = conn.cursor()
                     if search_term:
-                        cursor.execute("""
-                            SELECT patient_id, first_name, last_name, contact_number
-                            FROM Patient WHERE first_name LIKE ? OR last_name LIKE ?
-                        """, (f"%{search_term}%", f"%{search_term}%"))
+                        name_match, params = name_filter("patient_id", search_term)
+                        cursor.execute(f"""
+                            SELECT TOP 50 patient_id, first_name, last_name, contact_number
+                            FROM Patient WHERE {name_match} ORDER BY patient_id DESC
+                        """, params)
                     else:
                         cursor.execute("""
                             SELECT TOP 20 patient_id, first_name, last_name, contact_number
                             FROM Patient ORDER BY patient_id DESC
                         """)
                     
-                    patients = cursor.fetchall()
-                    
-                    for patient in patients:
-                        patient_frame = ctk.CTkFrame(results_scroll)
-                        patient_frame.pack(fill="x", pady=2)
-                        
-                        info_text = f"ID: {patient[0]} | {patient[1]} {patient[2]} | Contact: {patient[3]}"
-                        ctk.CTkLabel(patient_frame, text=info_text).pack(side="left", padx=10, pady=5)
-                        
-                        ctk.CTkButton(patient_frame, text="Select", width=80,
-                                     command=lambda p=patient: self.select_patient(p[0], dialog)).pack(side="right", padx=10, pady=5)
+                    show_patients([(p[0], f"{p[1]} {p[2]}", p[3]) for p in cursor.fetchall()])
                         
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to search patients: {e}")
@@ -326,9 +418,8 @@ class AppointmentModule:
         # Load initial results
         search_patients()
     
-    def select_patient(self, patient_id, dialog):
-        self.appointment_entries['app_patient_id'].delete(0, 'end')
-        self.appointment_entries['app_patient_id'].insert(0, str(patient_id))
+    def select_patient(self, patient_id, text, dialog):
+        self.appointment_entries['app_patient_id'].set(patient_id, text)
         dialog.destroy()
     
     def browse_doctors(self):
@@ -349,109 +440,156 @@ class AppointmentModule:
         results_scroll = ctk.CTkScrollableFrame(dialog)
         results_scroll.pack(fill="both", expand=True, padx=20, pady=10)
         
-        def search_doctors():
-            # Clear previous results
+        def show_doctors(doctors):
             for widget in results_scroll.winfo_children():
                 widget.destroy()
-            
+            for doctor in doctors:
+                doctor_frame = ctk.CTkFrame(results_scroll)
+                doctor_frame.pack(fill="x", pady=2)
+                
+                info_text = f"ID: {doctor[0]} | Dr. {doctor[1]} {doctor[2]} | {doctor[3]}"
+                ctk.CTkLabel(doctor_frame, text=info_text).pack(side="left", padx=10, pady=5)
+                
+                ctk.CTkButton(doctor_frame, text="Select", width=80,
+                             command=lambda d=doctor: self.select_doctor(d[0], format_doctor(d), dialog)).pack(side="right", padx=10, pady=5)
+            if not doctors:
+                ctk.CTkLabel(results_scroll, text="No doctors found.", text_color="gray").pack(pady=10)
+        
+        def search_doctors():
+            # Same prefix search as the doctor combobox, run off the Tk thread
             search_term = search_entry.get().strip()
-            try:
-                conn = connect_db()
-                if conn:
-                    cursor = conn.cursor()
-                    if search_term:
-                        cursor.execute("""
-                            SELECT doctor_id, first_name, last_name, specialization
-                            FROM Doctor WHERE first_name LIKE ? OR last_name LIKE ? OR specialization LIKE ?
-                        """, (f"%{search_term}%", f"%{search_term}%", f"%{search_term}%"))
-                    else:
-                        cursor.execute("""
-                            SELECT TOP 20 doctor_id, first_name, last_name, specialization
-                            FROM Doctor ORDER BY doctor_id DESC
-                        """)
-                    
-                    doctors = cursor.fetchall()
-                    
-                    for doctor in doctors:
-                        doctor_frame = ctk.CTkFrame(results_scroll)
-                        doctor_frame.pack(fill="x", pady=2)
-                        
-                        info_text = f"ID: {doctor[0]} | Dr. {doctor[1]} {doctor[2]} | {doctor[3]}"
-                        ctk.CTkLabel(doctor_frame, text=info_text).pack(side="left", padx=10, pady=5)
-                        
-                        ctk.CTkButton(doctor_frame, text="Select", width=80,
-                                     command=lambda d=doctor: self.select_doctor(d[0], dialog)).pack(side="right", padx=10, pady=5)
-                        
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to search doctors: {e}")
-            finally:
-                if conn:
-                    cursor.close()
-                    conn.close()
+            executor.submit(lambda: doctor_lookup(search_term).fetch(0),
+                            key=("browse-doctors", id(dialog)), owner=results_scroll,
+                            on_success=show_doctors,
+                            on_error=lambda e: messagebox.showerror("Error", f"Failed to search doctors: {e}"))
         
         ctk.CTkButton(search_frame, text="🔍 Search", command=search_doctors).pack(side="left", padx=10)
         
         # Load initial results
         search_doctors()
     
-    def select_doctor(self, doctor_id, dialog):
-        self.appointment_entries['app_doctor_id'].delete(0, 'end')
-        self.appointment_entries['app_doctor_id'].insert(0, str(doctor_id))
+    def select_doctor(self, doctor_id, text, dialog):
+        self.appointment_entries['app_doctor_id'].set(doctor_id, text)
         dialog.destroy()
     
     def schedule_appointment(self):
         entries = self.appointment_entries
         try:
-            patient_id = entries['app_patient_id'].get().strip()
-            doctor_id = entries['app_doctor_id'].get().strip()
+            patient_id = entries['app_patient_id'].get()
+            doctor_id = entries['app_doctor_id'].get()
             app_date = entries['app_date'].get_date()  # from Calendar
             app_time = entries['app_time'].get().strip()
             remarks = entries['app_remarks'].get("1.0", "end-1c").strip() if hasattr(entries['app_remarks'], 'get') else ""
             # Combine date and time
             app_datetime = f"{app_date} {app_time}"
             # Validation
-            if not all([patient_id, doctor_id, app_date, app_time]):
+            if patient_id is None or doctor_id is None or not all([app_date, app_time]):
                 messagebox.showerror("Error", "Please fill all required fields")
                 return
+            if not re.fullmatch(r"\d{2}:\d{2}", app_time):
+                messagebox.showerror("Error", "Please pick one of the doctor's free time slots")
+                return
             # Check if appointment time is in the future
             appointment_time = datetime.strptime(app_datetime, '%Y-%m-%d %H:%M')
             now = datetime.now()
             if appointment_time <= now:
                 messagebox.showerror("Error", "Appointment time must be in the future")
                 return
-            # If date is today, only allow future hours
-            if app_date == now.strftime('%Y-%m-%d') and int(app_time[:2]) <= now.hour:
-                messagebox.showerror("Error", "Please select a future hour for today.")
-                return
-            conn = connect_db()
-            if conn:
-                cursor = conn.cursor()
-                # Check for conflicts
-                cursor.execute("""
-                    SELECT COUNT(*) FROM Appointment 
-                    WHERE doctor_id = ? AND appointment_date = ? AND status != 'cancelled'
-                """, (int(doctor_id), app_datetime))
-                if cursor.fetchone()[0] > 0:
-                    messagebox.showerror("Error", "Doctor already has an appointment at this time")
+            patient_id, doctor_id = int(patient_id), int(doctor_id)
+            frequency = REPEAT_OPTIONS[entries['app_repeat'].get()]
+            if frequency:
+                try:
+                    every, count = int(self.repeat_every.get()), int(self.repeat_count.get())
+                except ValueError:
+                    messagebox.showerror("Error", "Repeat every and times must be whole numbers")
                     return
-                # Schedule the appointment
-                cursor.execute("EXEC BookAppointment @patient_id=?, @doctor_id=?, @appointment_date=?, @remarks=?",
-                             (int(patient_id), int(doctor_id), app_datetime, remarks or None))
-                conn.commit()
-                messagebox.showinfo("Success", "Appointment scheduled successfully!")
-                # Clear form
-                for key, entry in entries.items():
-                    if hasattr(entry, 'delete'):
-                        if "textbox" in str(type(entry)).lower():
-                            entry.delete("1.0", "end")
-                        else:
-                            entry.delete(0, 'end')
+                weekdays = None
+                if frequency == "weekly":
+                    weekdays = [day for day, box in enumerate(self.repeat_weekdays) if box.get()] or None
+                try:
+                    occurrences = expand(appointment_time, frequency, every, weekdays, count=count)
+                except ValueError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
+                pattern = {'frequency': frequency, 'every': every, 'count': count,
+                           'weekdays': weekdays_text(weekdays or [appointment_time.weekday()])
+                           if frequency == "weekly" else None}
         except Exception as e:
             messagebox.showerror("Error", f"Failed to schedule appointment: {e}")
-        finally:
-            if conn:
-                cursor.close()
-                conn.close()
+            return
+        if frequency:
+            # One query finds every clash, so they can all be shown before anything is booked
+            executor.submit(find_series_conflicts, doctor_id, occurrences,
+                            key="schedule-appointment", owner=self.schedule_spinner,
+                            indicator=self.schedule_spinner,
+                            on_success=lambda clashes: self.confirm_series(
+                                patient_id, doctor_id, occurrences, pattern, remarks or None, clashes),
+                            on_error=lambda e: messagebox.showerror("Error", f"Failed to schedule appointment: {e}"))
+            return
+        # The database round trips run on the query executor so the window stays responsive
+        executor.submit(self.book_appointment, patient_id, doctor_id, app_datetime, remarks or None,
+                        key="schedule-appointment", owner=self.schedule_spinner,
+                        indicator=self.schedule_spinner,
+                        on_success=self.on_appointment_booked,
+                        on_error=lambda e: messagebox.showerror("Error", f"Failed to schedule appointment: {e}"))
+    
+    def book_appointment(self, patient_id, doctor_id, app_datetime, remarks):
+        """Book an appointment; returns False if the doctor is already taken. Runs on a worker thread."""
+        if not book_appointment(patient_id, doctor_id, app_datetime, remarks):
+            # Booked elsewhere since the slots were loaded
+            slot_engine.invalidate(doctor_id)
+            return False
+        slot_engine.take(doctor_id, app_datetime)
+        return True
+    
+    def on_appointment_booked(self, booked):
+        if not booked:
+            messagebox.showerror("Error", "Doctor already has an appointment at this time")
+            self.update_time_slots()
+            return
+        dashboard_metrics.invalidate('appointment')
+        messagebox.showinfo("Success", "Appointment scheduled successfully!")
+        self.clear_schedule_form()
+    
+    def confirm_series(self, patient_id, doctor_id, occurrences, pattern, remarks, clashes):
+        """Book a series once any clashes with the doctor's appointments have been accepted"""
+        if len(clashes) == len(occurrences):
+            messagebox.showerror("Error", "Doctor already has an appointment at every one of these times")
+            return
+        if clashes:
+            listed = "\n".join(f"{c:%Y-%m-%d %H:%M}" for c in clashes[:10])
+            if len(clashes) > 10:
+                listed += f"\n… and {len(clashes) - 10} more"
+            if not messagebox.askyesno("Conflicts", f"{len(clashes)} of the {len(occurrences)} appointments clash "
+                                       f"with the doctor's schedule:\n\n{listed}\n\n"
+                                       f"Book the other {len(occurrences) - len(clashes)}?"):
+                return
+        executor.submit(book_appointment_series, patient_id, doctor_id, occurrences, remarks=remarks,
+                        skip_conflicts=bool(clashes), **pattern,
+                        key="schedule-appointment", owner=self.schedule_spinner,
+                        indicator=self.schedule_spinner,
+                        on_success=lambda result: self.on_series_booked(doctor_id, *result),
+                        on_error=lambda e: messagebox.showerror("Error", f"Failed to schedule appointments: {e}"))
+    
+    def on_series_booked(self, doctor_id, series_id, booked):
+        dashboard_metrics.invalidate('appointment')
+        slot_engine.invalidate(doctor_id)
+        messagebox.showinfo("Success", f"{booked} appointments scheduled (series #{series_id})!")
+        self.clear_schedule_form()
+    
+    def clear_schedule_form(self):
+        for key, entry in self.appointment_entries.items():
+            if isinstance(entry, LookupCombobox):
+                entry.clear()
+            elif hasattr(entry, 'delete'):
+                if "textbox" in str(type(entry)).lower():
+                    entry.delete("1.0", "end")
+                else:
+                    entry.delete(0, 'end')
+        self.appointment_entries['app_repeat'].set("Does not repeat")
+        for box in self.repeat_weekdays:
+            box.deselect()
+        self.update_time_slots()
     
     def show_manage_appointments(self):
         self.clear_content()
@@ -471,107 +609,254 @@ class AppointmentModule:
         self.status_filter.pack(side="left", padx=10)
         
         ctk.CTkButton(filter_frame, text="🔄 Refresh", command=self.load_appointments).pack(side="right", padx=10)
+        ctk.CTkButton(filter_frame, text="📤 Export", command=self.export_appointments).pack(side="right", padx=10)
+        
+        # Bulk actions: on the checked rows, or on a doctor's or a whole day's schedule
+        bulk_frame = ctk.CTkFrame(self.content_frame)
+        bulk_frame.pack(fill="x", padx=20, pady=(0, 10))
+        cancel_btn = ctk.CTkButton(bulk_frame, text="❌ Cancel Selected", width=140,
+                                   command=lambda: self.transition_selected('cancelled'))
+        cancel_btn.pack(side="left", padx=10, pady=5)
+        complete_btn = ctk.CTkButton(bulk_frame, text="✅ Complete Selected", width=140,
+                                     command=lambda: self.transition_selected('completed'))
+        complete_btn.pack(side="left", padx=10, pady=5)
+        schedule_btn = ctk.CTkButton(bulk_frame, text="📆 Update a Schedule", width=140,
+                                     command=self.show_schedule_transition)
+        schedule_btn.pack(side="right", padx=10, pady=5)
+        self.transition_spinner = Spinner(bulk_frame, text="Updating",
+                                          disables=[cancel_btn, complete_btn, schedule_btn])
+        self.transition_spinner.pack(side="left", padx=10)
         
         # Appointments table
-        self.appointments_scroll = ctk.CTkScrollableFrame(self.content_frame)
-        self.appointments_scroll.pack(fill="both", expand=True, padx=20, pady=20)
+        self.appointments_table = VirtualTable(
+            self.content_frame,
+            columns=[("ID", 60), ("Date & Time", 150), ("Patient", 150), ("Doctor", 150),
+                     ("Status", 100), ("Remarks", 200)],
+            fetch_page=self.fetch_appointments_page,
+            error_message="Failed to load appointments",
+            format_row=lambda a: [a[0], a[1], a[4] or "N/A", a[5] or "N/A", a[2], a[3] or "No remarks"],
+            row_actions=self.appointment_actions,
+            actions_width=150,
+            selectable=True,
+        )
+        self.appointments_table.pack(fill="both", expand=True, padx=20, pady=20)
         
         self.load_appointments()
     
+    def export_appointments(self):
+        status = self.status_filter.get()
+        export_records(self.main_frame, "appointments", status=None if status == "All" else status)
+    
     def filter_appointments(self, status):
         self.load_appointments(status_filter=status)
     
-    def load_appointments(self, status_filter="All"):
-        try:
-            # Clear existing content
-            for widget in self.appointments_scroll.winfo_children():
-                widget.destroy()
-            
-            conn = connect_db()
-            if conn:
-                cursor = conn.cursor()
-                
-                if status_filter == "All":
-                    cursor.execute("""
-                        SELECT a.appointment_id, a.appointment_date, a.status, a.remarks,
-                               p.first_name + ' ' + p.last_name as patient_name,
-                               d.first_name + ' ' + d.last_name as doctor_name
-                        FROM Appointment a
-                        LEFT JOIN Patient p ON a.patient_id = p.patient_id
-                        LEFT JOIN Doctor d ON a.doctor_id = d.doctor_id
-                        ORDER BY a.appointment_date DESC
-                    """)
-                else:
-                    cursor.execute("""
-                        SELECT a.appointment_id, a.appointment_date, a.status, a.remarks,
-                               p.first_name + ' ' + p.last_name as patient_name,
-                               d.first_name + ' ' + d.last_name as doctor_name
-                        FROM Appointment a
-                        LEFT JOIN Patient p ON a.patient_id = p.patient_id
-                        LEFT JOIN Doctor d ON a.doctor_id = d.doctor_id
-                        WHERE a.status = ?
-                        ORDER BY a.appointment_date DESC
-                    """, (status_filter,))
-                
-                appointments = cursor.fetchall()
-                
-                # Create header
-                columns = ["ID", "Date & Time", "Patient", "Doctor", "Status", "Remarks", "Actions"]
-                widths = [60, 150, 150, 150, 100, 200, 150]
-                
-                header_frame = ctk.CTkFrame(self.appointments_scroll, fg_color="#1f538d")
-                header_frame.pack(fill="x", padx=5, pady=(5,0))
-                
-                for i, (col, width) in enumerate(zip(columns, widths)):
-                    header_frame.grid_columnconfigure(i, minsize=width)
-                    ctk.CTkLabel(header_frame, text=col, font=ctk.CTkFont(weight="bold"),
-                                text_color="white").grid(row=0, column=i, padx=5, pady=5, sticky="ew")
-                
-                # Create content frame
-                content_frame = ctk.CTkFrame(self.appointments_scroll)
-                content_frame.pack(fill="both", expand=True, padx=5, pady=(0,5))
-                
-                for i, width in enumerate(widths):
-                    content_frame.grid_columnconfigure(i, minsize=width)
-                
-                # Add rows
-                for row_idx, appointment in enumerate(appointments):
-                    values = [
-                        str(appointment[0]),
-                        str(appointment[1]),
-                        appointment[4] or "N/A",
-                        appointment[5] or "N/A",
-                        appointment[2],
-                        appointment[3] or "No remarks"
-                    ]
-                    
-                    for col_idx, (value, width) in enumerate(zip(values, widths[:-1])):
-                        label_text = value[:30] + "..." if len(value) > 30 else value
-                        ctk.CTkLabel(content_frame, text=label_text).grid(
-                            row=row_idx, column=col_idx, padx=5, pady=2, sticky="w"
-                        )
-                    
-                    # Action buttons
-                    actions_frame = ctk.CTkFrame(content_frame, fg_color="transparent")
-                    actions_frame.grid(row=row_idx, column=len(columns)-1, padx=5, pady=2)
-                    
-                    # Only show action buttons for scheduled appointments
-                    if appointment[2] == "scheduled":
-                        ctk.CTkButton(actions_frame, text="❌", width=30, height=24,
-                                     command=lambda a=appointment: self.cancel_appointment(a[0])).pack(side="left", padx=2)
-                        ctk.CTkButton(actions_frame, text="✅", width=30, height=24,
-                                     command=lambda a=appointment: self.complete_appointment(a[0])).pack(side="left", padx=2)
-                    else:
-                        # Show status label for completed/cancelled appointments
-                        status_text = "✅ Completed" if appointment[2] == "completed" else "❌ Cancelled"
-                        ctk.CTkLabel(actions_frame, text=status_text).pack(side="left", padx=2)
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load appointments: {e}")
-        finally:
-            if conn:
-                cursor.close()
-                conn.close()
+    def load_appointments(self, status_filter=None):
+        if status_filter is not None:
+            self.status_filter.set(status_filter)
+        status_filter = self.status_filter.get()
+        where, params = [], ()
+        if status_filter != "All":
+            where, params = ["a.status = ?"], (status_filter,)
+        self.appointment_pages = KeysetPaginator("""
+            SELECT a.appointment_id, a.appointment_date, a.status, a.remarks,
+                   p.first_name + ' ' + p.last_name as patient_name,
+                   d.first_name + ' ' + d.last_name as doctor_name, a.series_id
+            FROM Appointment a
+            LEFT JOIN Patient p ON a.patient_id = p.patient_id
+            LEFT JOIN Doctor d ON a.doctor_id = d.doctor_id
+        """,
+            order_by=[("a.appointment_date", "DESC", 1), ("a.appointment_id", "DESC", 0)],
+            where=where, params=params)
+        self.appointments_table.refresh()
+    
+    def fetch_appointments_page(self, offset, limit):
+        return self.appointment_pages.fetch(offset, limit)
+    
+    def refresh_appointment_tables(self):
+        """Reload whichever appointment lists are currently on screen"""
+        for name in ("appointments_table", "search_results"):
+            table = getattr(self, name, None)
+            if table is not None and table.winfo_exists():
+                table.refresh()
+    
+    def appointment_actions(self, appointment):
+        # Only show action buttons for scheduled appointments
+        if appointment[2] == "scheduled":
+            actions = [("❌", lambda a: self.cancel_appointment(a[0])),
+                       ("✅", lambda a: self.complete_appointment(a[0]))]
+            if appointment[6] is not None:
+                actions.append(("🔁", self.edit_series_following))
+            return actions
+        # Show status label for completed/cancelled appointments
+        return [("✅ Completed" if appointment[2] == "completed" else "❌ Cancelled", None)]
+    
+    def search_actions(self, appointment):
+        # Search rows can always be edited; like appointment_actions, only
+        # scheduled ones can be cancelled or completed
+        actions = [("✏️ Edit", self.edit_appointment)]
+        if appointment[2] == "scheduled":
+            actions += [("❌ Cancel", lambda a: self.cancel_appointment(a[0])),
+                        ("✅ Complete", lambda a: self.complete_appointment(a[0]))]
+        else:
+            actions.append(("✅ Completed" if appointment[2] == "completed" else "❌ Cancelled", None))
+        return actions
+    
+    def transition_selected(self, new_status):
+        """Complete or cancel the checked appointments that are still scheduled"""
+        ids = [a[0] for a in self.appointments_table.selection() if a[2] == "scheduled"]
+        if not ids:
+            messagebox.showwarning("Warning", "Select one or more scheduled appointments first")
+            return
+        verb = "Cancel" if new_status == "cancelled" else "Complete"
+        if messagebox.askyesno("Confirm", f"{verb} {len(ids)} selected appointment(s)?"):
+            self.run_transition(new_status, appointment_ids=ids)
+    
+    def show_schedule_transition(self):
+        """Dialog to cancel or close out a doctor's or a day's scheduled appointments at once"""
+        dialog = ctk.CTkToplevel(self.main_frame)
+        dialog.title("Update a Schedule")
+        dialog.geometry("520x520")
+        
+        ctk.CTkLabel(dialog, text="Doctor (leave empty for every doctor):", font=ctk.CTkFont(size=14)).pack(pady=(15, 5))
+        doctor_entry = LookupCombobox(dialog, doctor_lookup, format_doctor, width=400,
+                                      placeholder_text="Type a name, specialization or ID",
+                                      error_message="Failed to load doctors")
+        doctor_entry.pack(pady=(0, 10))
+        
+        ctk.CTkLabel(dialog, text="Date (YYYY-MM-DD):", font=ctk.CTkFont(size=14)).pack(pady=(10, 5))
+        date_entry = ctk.CTkEntry(dialog, width=400)
+        date_entry.insert(0, datetime.now().strftime('%Y-%m-%d'))
+        date_entry.pack(pady=(0, 10))
+        
+        ctk.CTkLabel(dialog, text="From / To (HH:MM, leave empty for the whole day):",
+                     font=ctk.CTkFont(size=14)).pack(pady=(10, 5))
+        times_frame = ctk.CTkFrame(dialog, fg_color="transparent")
+        times_frame.pack(pady=(0, 10))
+        from_entry = ctk.CTkEntry(times_frame, width=190, placeholder_text="From")
+        from_entry.pack(side="left", padx=(0, 10))
+        to_entry = ctk.CTkEntry(times_frame, width=190, placeholder_text="To")
+        to_entry.pack(side="left")
+        
+        ctk.CTkLabel(dialog, text="Set scheduled appointments to:", font=ctk.CTkFont(size=14)).pack(pady=(10, 5))
+        status_menu = ctk.CTkOptionMenu(dialog, values=["cancelled", "completed"], width=400)
+        status_menu.pack(pady=(0, 10))
+        
+        ctk.CTkLabel(dialog, text="Reason:", font=ctk.CTkFont(size=14)).pack(pady=(10, 5))
+        reason_entry = ctk.CTkEntry(dialog, width=400, placeholder_text="e.g. Doctor called in sick")
+        reason_entry.pack(pady=(0, 10))
+        
+        def apply():
+            day = date_entry.get().strip()
+            if not validate_date(day):
+                messagebox.showerror("Error", "Invalid date format (YYYY-MM-DD)", parent=dialog)
+                return
+            start, end = day_bounds(day)
+            try:
+                for entry, name in ((from_entry, "start"), (to_entry, "end")):
+                    text = entry.get().strip()
+                    if text:
+                        at = datetime.strptime(f"{day} {text}", '%Y-%m-%d %H:%M')
+                        start, end = (at, end) if name == "start" else (start, at)
+            except ValueError:
+                messagebox.showerror("Error", "Times must be HH:MM", parent=dialog)
+                return
+            if end <= start:
+                messagebox.showerror("Error", "The end time must be after the start time", parent=dialog)
+                return
+            doctor_id = doctor_entry.get()
+            new_status = status_menu.get()
+            who = f"doctor {doctor_id}'s" if doctor_id is not None else "all"
+            verb = "Cancel" if new_status == "cancelled" else "Complete"
+            if not messagebox.askyesno("Confirm", f"{verb} {who} scheduled appointments on {day} "
+                                       f"from {start:%H:%M} to {end:%H:%M}?", parent=dialog):
+                return
+            self.run_transition(new_status, doctor_id=doctor_id, start=start, end=end,
+                                reason=reason_entry.get().strip() or None)
+            dialog.destroy()
+        
+        ctk.CTkButton(dialog, text="Apply", command=apply).pack(pady=20)
+    
+    def run_transition(self, new_status, **scope):
+        """Run one bulk status change on the query executor"""
+        executor.submit(transition_appointments, new_status, changed_by=self.user_info['username'], **scope,
+                        key="appointment-transition", owner=self.transition_spinner,
+                        indicator=self.transition_spinner,
+                        on_success=lambda changed: self.on_appointments_transitioned(new_status, changed),
+                        on_error=lambda e: messagebox.showerror("Error", f"Failed to update appointments: {e}"))
+    
+    def on_appointments_transitioned(self, new_status, changed):
+        dashboard_metrics.invalidate('appointment')
+        slot_engine.invalidate()
+        messagebox.showinfo("Success", f"{changed} appointment(s) {new_status}.")
+        self.refresh_appointment_tables()
+    
+    def edit_series_following(self, appointment):
+        """Dialog to move or cancel a recurring appointment and the rest of its series"""
+        dialog = ctk.CTkToplevel(self.main_frame)
+        dialog.title("Edit This and Following")
+        dialog.geometry("520x460")
+        
+        ctk.CTkLabel(dialog, text=f"Series #{appointment[6]}, from {appointment[1]:%Y-%m-%d %H:%M} on",
+                     font=ctk.CTkFont(size=16, weight="bold")).pack(pady=(15, 10))
+        
+        ctk.CTkLabel(dialog, text="New time (HH:MM, leave empty to keep):", font=ctk.CTkFont(size=14)).pack(pady=(10, 5))
+        time_entry = ctk.CTkEntry(dialog, width=400)
+        time_entry.pack(pady=(0, 10))
+        
+        ctk.CTkLabel(dialog, text="New doctor (leave empty to keep):", font=ctk.CTkFont(size=14)).pack(pady=(10, 5))
+        doctor_entry = LookupCombobox(dialog, doctor_lookup, format_doctor, width=400,
+                                      placeholder_text="Type a name, specialization or ID",
+                                      error_message="Failed to load doctors")
+        doctor_entry.pack(pady=(0, 10))
+        
+        ctk.CTkLabel(dialog, text="New remarks (leave empty to keep):", font=ctk.CTkFont(size=14)).pack(pady=(10, 5))
+        remarks_entry = ctk.CTkEntry(dialog, width=400)
+        remarks_entry.pack(pady=(0, 10))
+        
+        def update_following():
+            text = time_entry.get().strip()
+            try:
+                new_time = datetime.strptime(text, '%H:%M').time() if text else None
+            except ValueError:
+                messagebox.showerror("Error", "Time must be HH:MM", parent=dialog)
+                return
+            doctor_id = doctor_entry.get()
+            remarks = remarks_entry.get().strip() or None
+            if new_time is None and doctor_id is None and remarks is None:
+                messagebox.showwarning("Warning", "Nothing to change", parent=dialog)
+                return
+            executor.submit(update_series_from, appointment[0], new_time, doctor_id, remarks,
+                            key="appointment-transition", owner=self.transition_spinner,
+                            indicator=self.transition_spinner,
+                            on_success=self.on_series_updated,
+                            on_error=lambda e: messagebox.showerror("Error", f"Failed to update appointments: {e}"))
+            dialog.destroy()
+        
+        def cancel_following():
+            if not messagebox.askyesno("Confirm Cancellation", "Cancel this appointment and the rest of its series?",
+                                       parent=dialog):
+                return
+            executor.submit(cancel_series_from, appointment[0], changed_by=self.user_info['username'],
+                            reason=f"Series #{appointment[6]} cancelled from {appointment[1]:%Y-%m-%d}",
+                            key="appointment-transition", owner=self.transition_spinner,
+                            indicator=self.transition_spinner,
+                            on_success=lambda changed: self.on_appointments_transitioned('cancelled', changed),
+                            on_error=lambda e: messagebox.showerror("Error", f"Failed to cancel appointments: {e}"))
+            dialog.destroy()
+        
+        buttons = ctk.CTkFrame(dialog, fg_color="transparent")
+        buttons.pack(pady=20)
+        ctk.CTkButton(buttons, text="Update Following", command=update_following).pack(side="left", padx=10)
+        ctk.CTkButton(buttons, text="❌ Cancel Following", command=cancel_following).pack(side="left", padx=10)
+    
+    def on_series_updated(self, changed):
+        if changed is None:
+            messagebox.showerror("Error", "Doctor already has an appointment at one of the new times; nothing was changed")
+            return
+        dashboard_metrics.invalidate('appointment')
+        slot_engine.invalidate()
+        messagebox.showinfo("Success", f"{changed} appointment(s) updated.")
+        self.refresh_appointment_tables()
     
     def edit_appointment(self, appointment):
         # Create edit dialog
@@ -620,12 +905,17 @@ class AppointmentModule:
                     """, (new_datetime, new_status, new_remarks, appointment[0]))
                     
                     conn.commit()
+                    dashboard_metrics.invalidate('appointment')
+                    slot_engine.invalidate()
                     messagebox.showinfo("Success", "Appointment updated successfully!")
                     dialog.destroy()
-                    self.load_appointments()
+                    self.refresh_appointment_tables()
                     
             except Exception as e:
-                messagebox.showerror("Error", f"Failed to update appointment: {e}")
+                if is_double_booking(e):
+                    messagebox.showerror("Error", "Doctor already has an appointment at this time")
+                else:
+                    messagebox.showerror("Error", f"Failed to update appointment: {e}")
             finally:
                 if conn:
                     cursor.close()
@@ -635,37 +925,38 @@ class AppointmentModule:
     
     def cancel_appointment(self, appointment_id):
         if messagebox.askyesno("Confirm Cancellation", "Are you sure you want to cancel this appointment?"):
-            try:
-                conn = connect_db()
-                if conn:
-                    cursor = conn.cursor()
-                    cursor.execute("UPDATE Appointment SET status='cancelled' WHERE appointment_id=?", (appointment_id,))
-                    conn.commit()
-                    messagebox.showinfo("Success", "Appointment cancelled successfully!")
-                    self.load_appointments()
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to cancel appointment: {e}")
-            finally:
-                if conn:
-                    cursor.close()
-                    conn.close()
+            self.transition_appointment(appointment_id, 'cancelled', "Appointment cancelled successfully!",
+                                        "Failed to cancel appointment")
     
     def complete_appointment(self, appointment_id):
         if messagebox.askyesno("Mark Complete", "Mark this appointment as completed?"):
-            try:
-                conn = connect_db()
-                if conn:
-                    cursor = conn.cursor()
-                    cursor.execute("UPDATE Appointment SET status='completed' WHERE appointment_id=?", (appointment_id,))
-                    conn.commit()
-                    messagebox.showinfo("Success", "Appointment marked as completed!")
-                    self.load_appointments()
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to complete appointment: {e}")
-            finally:
-                if conn:
-                    cursor.close()
-                    conn.close()
+            self.transition_appointment(appointment_id, 'completed', "Appointment marked as completed!",
+                                        "Failed to complete appointment")
+    
+    def transition_appointment(self, appointment_id, new_status, success_text, error_text):
+        """Change one appointment's status on the query executor"""
+        # The manage view's spinner, if it is on screen; today's schedule and
+        # the search view have none
+        spinner = getattr(self, 'transition_spinner', None)
+        if spinner is not None and not spinner.winfo_exists():
+            spinner = None
+        
+        def on_success(changed):
+            if not changed:
+                # Only scheduled appointments change; this one was completed
+                # or cancelled, perhaps from another workstation
+                messagebox.showwarning("Warning", "Appointment is no longer scheduled")
+            else:
+                dashboard_metrics.invalidate('appointment')
+                slot_engine.invalidate()
+                messagebox.showinfo("Success", success_text)
+            self.refresh_appointment_tables()
+        
+        executor.submit(transition_appointments, new_status, appointment_ids=[appointment_id],
+                        changed_by=self.user_info['username'],
+                        key=("appointment-transition", appointment_id), indicator=spinner,
+                        on_success=on_success,
+                        on_error=lambda e: messagebox.showerror("Error", f"{error_text}: {e}"))
     
     def show_search_appointments(self):
         self.clear_content()
@@ -703,89 +994,67 @@ class AppointmentModule:
         )
         
         # Results area
-        self.search_results = ctk.CTkScrollableFrame(self.content_frame, height=300)
+        self.search_pages = None
+        self.search_results = VirtualTable(
+            self.content_frame,
+            columns=[("ID", 60), ("Date & Time", 150), ("Patient", 150), ("Doctor", 150),
+                     ("Status", 100), ("Remarks", 160)],
+            fetch_page=self.fetch_search_page,
+            error_message="Search failed",
+            format_row=lambda a: [f"#{a[0]}", a[1], a[4], a[5], a[2], a[3] or ""],
+            row_actions=self.search_actions,
+            actions_width=260,
+            empty_text="No appointments found matching your search criteria",
+        )
         self.search_results.pack(fill="both", expand=True, padx=20, pady=20)
     
     def perform_appointment_search(self):
-        # Clear previous results
-        for widget in self.search_results.winfo_children():
-            widget.destroy()
-        
         patient_query = self.search_patient.get().strip()
         doctor_query = self.search_doctor.get().strip()
         date_query = self.search_date.get().strip()
         
         if not any([patient_query, doctor_query, date_query]):
-            ctk.CTkLabel(self.search_results, text="Please enter at least one search criteria").pack(pady=20)
+            messagebox.showwarning("Search", "Please enter at least one search criteria")
             return
         
-        try:
-            conn = connect_db()
-            if conn:
-                cursor = conn.cursor()
-                
-                # Build dynamic query
-                base_query = """
-                    SELECT a.appointment_id, a.appointment_date, a.status, a.remarks,
-                           p.first_name + ' ' + p.last_name as patient_name,
-                           d.first_name + ' ' + d.last_name as doctor_name
-                    FROM Appointment a
-                    LEFT JOIN Patient p ON a.patient_id = p.patient_id
-                    LEFT JOIN Doctor d ON a.doctor_id = d.doctor_id
-                    WHERE 1=1
-                """
-                
-                params = []
-                
-                if patient_query:
-                    base_query += " AND (p.first_name LIKE ? OR p.last_name LIKE ?)"
-                    params.extend([f"%{patient_query}%", f"%{patient_query}%"])
-                
-                if doctor_query:
-                    base_query += " AND (d.first_name LIKE ? OR d.last_name LIKE ?)"
-                    params.extend([f"%{doctor_query}%", f"%{doctor_query}%"])
-                
-                if date_query:
-                    base_query += " AND CAST(a.appointment_date AS DATE) = ?"
-                    params.append(date_query)
-                
-                base_query += " ORDER BY a.appointment_date DESC"
-                
-                cursor.execute(base_query, params)
-                results = cursor.fetchall()
-                
-                if results:
-                    for appointment in results:
-                        result_card = ctk.CTkFrame(self.search_results)
-                        result_card.pack(fill="x", pady=5)
-                        
-                        info_text = f"#{appointment[0]} | {appointment[1]} | Patient: {appointment[4]} | Doctor: {appointment[5]} | Status: {appointment[2]}"
-                        ctk.CTkLabel(result_card, text=info_text).pack(anchor="w", padx=10, pady=5)
-                        
-                        if appointment[3]:
-                            ctk.CTkLabel(result_card, text=f"Remarks: {appointment[3]}",
-                                        wraplength=600).pack(anchor="w", padx=10, pady=(0, 5))
-                        
-                        # Action buttons
-                        btn_frame = ctk.CTkFrame(result_card, fg_color="transparent")
-                        btn_frame.pack(anchor="w", padx=10, pady=(0, 10))
-                        
-                        ctk.CTkButton(btn_frame, text="✏️ Edit", width=80,
-                                     command=lambda a=appointment: self.edit_appointment(a)).pack(side="left", padx=5)
-                        ctk.CTkButton(btn_frame, text="❌ Cancel", width=80,
-                                     command=lambda a=appointment: self.cancel_appointment(a[0])).pack(side="left", padx=5)
-                        ctk.CTkButton(btn_frame, text="✅ Complete", width=80,
-                                     command=lambda a=appointment: self.complete_appointment(a[0])).pack(side="left", padx=5)
-                else:
-                    ctk.CTkLabel(self.search_results, 
-                                text="No appointments found matching your search criteria").pack(pady=20)
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Search failed: {e}")
-        finally:
-            if conn:
-                cursor.close()
-                conn.close()
+        # Build dynamic filter
+        where, params = [], []
+        
+        if patient_query:
+            name_match, name_params = name_filter("a.patient_id", patient_query)
+            where.append(name_match)
+            params.extend(name_params)
+        
+        if doctor_query:
+            name_match, name_params = name_filter("a.doctor_id", doctor_query, DOCTOR)
+            where.append(name_match)
+            params.extend(name_params)
+        
+        if date_query:
+            try:
+                day_start, day_end = day_bounds(date_query)
+            except ValueError:
+                messagebox.showerror("Error", "Invalid date format (YYYY-MM-DD)")
+                return
+            where.append("a.appointment_date >= ? AND a.appointment_date < ?")
+            params.extend([day_start, day_end])
+        
+        self.search_pages = KeysetPaginator("""
+            SELECT a.appointment_id, a.appointment_date, a.status, a.remarks,
+                   p.first_name + ' ' + p.last_name as patient_name,
+                   d.first_name + ' ' + d.last_name as doctor_name
+            FROM Appointment a
+            LEFT JOIN Patient p ON a.patient_id = p.patient_id
+            LEFT JOIN Doctor d ON a.doctor_id = d.doctor_id
+        """,
+            order_by=[("a.appointment_date", "DESC", 1), ("a.appointment_id", "DESC", 0)],
+            where=where, params=params)
+        self.search_results.refresh()
+    
+    def fetch_search_page(self, offset, limit):
+        if not self.search_pages:
+            return []
+        return self.search_pages.fetch(offset, limit)
     
     def show_todays_schedule(self):
         self.clear_content()
@@ -812,9 +1081,9 @@ class AppointmentModule:
                     FROM Appointment a
                     LEFT JOIN Patient p ON a.patient_id = p.patient_id
                     LEFT JOIN Doctor d ON a.doctor_id = d.doctor_id
-                    WHERE CAST(a.appointment_date AS DATE) = CAST(GETDATE() AS DATE)
+                    WHERE a.appointment_date >= ? AND a.appointment_date < ?
                     ORDER BY a.appointment_date ASC
-                """)
+                """, day_bounds())
                 appointments = cursor.fetchall()
                 
                 if appointments:
@@ -878,22 +1147,11 @@ class AppointmentModule:
                             font=ctk.CTkFont(size=28, weight="bold"))
         title.pack(pady=(0, 20))
         
+        values, fresh = dashboard_metrics.get('appointment')
         try:
             conn = connect_db()
             if conn:
                 cursor = conn.cursor()
-                # Total appointments
-                cursor.execute("SELECT COUNT(*) FROM Appointment")
-                total = cursor.fetchone()[0] or 0
-                # Completed
-                cursor.execute("SELECT COUNT(*) FROM Appointment WHERE status = 'completed'")
-                completed = cursor.fetchone()[0] or 0
-                # Cancelled
-                cursor.execute("SELECT COUNT(*) FROM Appointment WHERE status = 'cancelled'")
-                cancelled = cursor.fetchone()[0] or 0
-                # Pending
-                cursor.execute("SELECT COUNT(*) FROM Appointment WHERE status = 'scheduled'")
-                pending = cursor.fetchone()[0] or 0
                 # Appointments per doctor (last 30 days)
                 cursor.execute("""
                     SELECT d.first_name + ' ' + d.last_name as doctor_name, COUNT(a.appointment_id)
@@ -913,19 +1171,24 @@ class AppointmentModule:
         stats_frame = ctk.CTkFrame(self.content_frame)
         stats_frame.pack(fill="x", padx=20, pady=10)
         stats = [
-            ("Total Appointments", total, "#2980b9"),
-            ("Completed", completed, "#27ae60"),
-            ("Cancelled", cancelled, "#e74c3c"),
-            ("Pending", pending, "#f39c12")
+            ("Total Appointments", 'total', "#2980b9"),
+            ("Completed", 'completed', "#27ae60"),
+            ("Cancelled", 'cancelled', "#e74c3c"),
+            ("Pending", 'scheduled', "#f39c12")
         ]
         num_stats = len(stats)
         for col in range(num_stats):
             stats_frame.grid_columnconfigure(col, weight=1)
-        for i, (label, value, color) in enumerate(stats):
+        value_labels = {}
+        for i, (label, key, color) in enumerate(stats):
             card = ctk.CTkFrame(stats_frame, fg_color=color)
             card.grid(row=0, column=i, padx=10, pady=20, sticky="nsew")
-            ctk.CTkLabel(card, text=str(value), font=ctk.CTkFont(size=28, weight="bold"), text_color="white").pack(pady=(10, 5))
+            value = str(values[key]) if values else "…"
+            value_labels[key] = ctk.CTkLabel(card, text=value, font=ctk.CTkFont(size=28, weight="bold"), text_color="white")
+            value_labels[key].pack(pady=(10, 5))
             ctk.CTkLabel(card, text=label, font=ctk.CTkFont(size=14), text_color="white").pack(pady=(0, 10))
+        if not fresh:
+            dashboard_metrics.bind_labels(stats_frame, 'appointment', value_labels)
         # Table: Appointments per doctor (last 30 days)
         table_frame = ctk.CTkFrame(self.content_frame)
         table_frame.pack(fill="x", padx=20, pady=20)
@@ -943,61 +1206,21 @@ class AppointmentModule:
         else:
             ctk.CTkLabel(table_frame, text="No data for the last 30 days.").pack(pady=20)
 
-    def show_doctor_schedule(self, doctor_id):
-        """Display doctor's schedule for the next 7 days"""
-        try:
-            # Get today and 7 days from now
-            today = datetime.now().date()
-            end_date = today + timedelta(days=7)
-            
-            schedule = get_doctor_schedule(doctor_id, today, end_date)
-            if schedule:
-                # Create a new window for schedule
-                schedule_window = ctk.CTkToplevel(self.main_frame)
-                schedule_window.title("Doctor's Schedule")
-                schedule_window.geometry("800x600")
-                
-                # Create scrollable frame
-                scroll_frame = ctk.CTkScrollableFrame(schedule_window)
-                scroll_frame.pack(fill="both", expand=True, padx=20, pady=20)
-                
-                # Add title
-                ctk.CTkLabel(scroll_frame, text="Upcoming Schedule", 
-                            font=ctk.CTkFont(size=24, weight="bold")).pack(pady=(0, 20))
-                
-                # Group appointments by date
-                appointments_by_date = {}
-                for appt in schedule:
-                    date = appt[1].date()
-                    if date not in appointments_by_date:
-                        appointments_by_date[date] = []
-                    appointments_by_date[date].append(appt)
-                
-                # Display appointments by date
-                for date in sorted(appointments_by_date.keys()):
-                    # Date header
-                    date_frame = ctk.CTkFrame(scroll_frame)
-                    date_frame.pack(fill="x", pady=10, padx=10)
-                    
-                    ctk.CTkLabel(date_frame, text=date.strftime("%A, %B %d, %Y"),
-                                font=ctk.CTkFont(size=16, weight="bold")).pack(anchor="w", padx=10, pady=5)
-                    
-                    # Appointments for this date
-                    for appt in appointments_by_date[date]:
-                        appt_frame = ctk.CTkFrame(date_frame)
-                        appt_frame.pack(fill="x", pady=5, padx=20)
-                        
-                        time_str = appt[1].strftime("%I:%M %p")
-                        status_color = "#27ae60" if appt[2] == "scheduled" else "#e74c3c"
-                        
-                        ctk.CTkLabel(appt_frame, text=f"{time_str} - {appt[3]}",
-                                    font=ctk.CTkFont(weight="bold")).pack(side="left", padx=10, pady=5)
-                        ctk.CTkLabel(appt_frame, text=f"Status: {appt[2]}",
-                                    text_color=status_color).pack(side="right", padx=10, pady=5)
-                    
-                    # Separator
-                    ctk.CTkFrame(scroll_frame, height=1, fg_color="gray").pack(fill="x", padx=10, pady=5)
-            else:
-                messagebox.showinfo("No Schedule", "No appointments found for this period.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load doctor's schedule: {e}") 
\ No newline at end of file
+    def show_doctor_schedule(self, doctor_id=None):
+        """Week/month calendar of a doctor's appointments, the selected doctor by default"""
+        if doctor_id is None:
+            doctor_id = self.appointment_entries['app_doctor_id'].get()
+            if doctor_id is None:
+                messagebox.showwarning("Warning", "Select a doctor first")
+                return
+        schedule_window = ctk.CTkToplevel(self.main_frame)
+        schedule_window.title("Doctor's Schedule")
+        schedule_window.geometry("900x650")
+        
+        calendar = ScheduleCalendar(schedule_window, lambda first, last: get_doctor_schedule(doctor_id, first, last),
+                                    format_item=lambda a: f"{a[1]:%H:%M} {a[3]}",
+                                    on_open=lambda a: messagebox.showinfo(
+                                        "Appointment", f"#{a[0]} · {a[1]:%Y-%m-%d %H:%M}\nPatient: {a[3]}\n"
+                                        f"Contact: {a[4]}\nStatus: {a[2]}", parent=schedule_window),
+                                    error_message="Failed to load doctor's schedule")
+        calendar.pack(fill="both", expand=True, padx=20, pady=20) 
\ No newline at end of file
@@ -0,0 +1,127 @@
+import threading
+import time
+from db_connect import borrowed_connection
+from query_executor import executor
+
+
+class BackgroundCache:
+    """Refresh machinery shared by the in-memory caches behind the GUI.
+
+    Nothing here queries on the calling thread: a stale entry starts a
+    refresh of its key on the query executor, at most one per key at a
+    time, and after_refresh() polls from the Tk main loop until it has
+    finished. Subclasses keep their data under self._lock and implement
+    _load(key, *args), which runs on a worker thread.
+    """
+
+    error_message = "Error refreshing cache"
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._refreshing = set()  # keys being refreshed
+        self._lock = threading.Lock()
+
+    def is_refreshing(self, key=None):
+        with self._lock:
+            return key in self._refreshing
+
+    def after_refresh(self, widget, callback, key=None, interval=100):
+        """Call callback on the GUI thread once the running refresh of key finishes"""
+        def poll():
+            if not widget.winfo_exists():
+                return
+            if self.is_refreshing(key):
+                widget.after(interval, poll)
+            else:
+                callback()
+        widget.after(interval, poll)
+
+    def _is_fresh(self, loaded_at):
+        return loaded_at is not None and time.monotonic() - loaded_at < self.ttl
+
+    def _start_refresh(self, key=None, *args):
+        # Called with the lock held
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        executor.submit(self._refresh, key, args)
+
+    def _refresh(self, key, args):
+        # Errors are reported here rather than through on_error: the entry
+        # must leave _refreshing even if the executor skips the callbacks
+        try:
+            self._load(key, *args)
+        except Exception as e:
+            print(f"{self.error_message}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _load(self, key, *args):
+        raise NotImplementedError
+
+
+class WatermarkCache(BackgroundCache):
+    """A BackgroundCache of one table, kept up to date by row_version.
+
+    The first refresh reads every row. After that, an entry older than ttl
+    seconds (or one invalidated after a local change) only reads the rows
+    whose row_version moved past the last refresh. Subclasses set select
+    and implement _apply(rows, full).
+    """
+
+    select = None           # SELECT ... FROM ... of the cached rows, without WHERE
+    row_version = "row_version"
+    order_by = ""
+
+    def __init__(self, ttl):
+        super().__init__(ttl)
+        self._watermark = None    # row_version up to which rows are loaded
+        self._loaded_at = None
+
+    def invalidate(self, reload=False):
+        """Mark the cache stale; with reload the next refresh reads every row again"""
+        with self._lock:
+            if reload:
+                self._watermark = None
+            self._loaded_at = None
+            self._refresh_if_stale()
+
+    def fetch(self, since=None, conn=None):
+        """Return (rows, watermark): rows changed since the since watermark.
+
+        Only rows below MIN_ACTIVE_ROWVERSION() are read, so a row still being
+        written by an open transaction is picked up by a later refresh instead
+        of being skipped.
+        """
+        with borrowed_connection(conn) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT MIN_ACTIVE_ROWVERSION()")
+            watermark = cursor.fetchone()[0]
+            query = f"{self.select} WHERE {self.row_version} < ?"
+            params = [watermark]
+            if since is not None:
+                query += f" AND {self.row_version} >= ?"
+                params.append(since)
+            if self.order_by:
+                query += f" ORDER BY {self.order_by}"
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            cursor.close()
+        return rows, watermark
+
+    def _refresh_if_stale(self):
+        # Called with the lock held
+        if not self._is_fresh(self._loaded_at):
+            self._start_refresh(None, self._watermark)
+
+    def _load(self, key, since):
+        rows, watermark = self.fetch(since)
+        self._apply(rows, since is None)
+        with self._lock:
+            self._watermark = watermark
+            self._loaded_at = time.monotonic()
+
+    def _apply(self, rows, full):
+        """Merge fetched rows into the cache (replacing it if full); takes the lock itself"""
+        raise NotImplementedError
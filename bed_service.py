@@ -0,0 +1,149 @@
+from background_cache import WatermarkCache
+
+
+class _Room:
+    """The beds of one room, with the occupied ones as bits of an int"""
+
+    __slots__ = ('room_type', 'beds', 'bits', 'occupied', 'free')
+
+    def __init__(self, room_type):
+        self.room_type = room_type
+        self.beds = []      # bed numbers; bed beds[i] is bit i
+        self.bits = {}      # bed number -> bit
+        self.occupied = 0   # bitmap of the occupied beds
+        self.free = 0
+
+    def first_free(self):
+        """Bed number of the lowest free bed, or None"""
+        free = ~self.occupied & ((1 << len(self.beds)) - 1)
+        if not free:
+            return None
+        return self.beds[(free & -free).bit_length() - 1]
+
+
+class BedService(WatermarkCache):
+    """Live bed occupancy, kept in memory as one bitmap per room.
+
+    Free-bed counts per room type and overall are kept as running totals, so
+    they and next_free_bed() are answered without touching the database or
+    walking the beds. Nothing here ever queries on the calling thread: the
+    first call loads every bed in the background, occupy()/release() apply
+    this workstation's admissions and discharges straight away, and an entry
+    older than ttl seconds starts a background refresh that only fetches
+    beds whose Bed.row_version moved past the last one (migration 009),
+    which picks up changes made on other workstations.
+    """
+
+    select = """
+        SELECT b.room_number, b.bed_number, b.is_occupied, r.room_type
+        FROM Bed b
+        LEFT JOIN Room r ON r.room_number = b.room_number
+    """
+    row_version = "b.row_version"
+    order_by = "b.room_number, b.bed_number"
+    error_message = "Error loading bed occupancy"
+
+    def __init__(self, ttl=30):
+        super().__init__(ttl)
+        self._rooms = {}          # room_number -> _Room
+        self._free_by_type = {}   # room_type -> free beds
+        self._open_rooms = {}     # room_type -> {room_number: None} of rooms with a free bed
+        self._free_total = 0
+
+    def free_count(self, room_type=None):
+        """Return (free beds of room_type, or of every type, ready)"""
+        with self._lock:
+            self._refresh_if_stale()
+            count = self._free_total if room_type is None else self._free_by_type.get(room_type, 0)
+            return count, self._watermark is not None
+
+    def free_counts(self):
+        """Return ({room_type: free beds}, ready)"""
+        with self._lock:
+            self._refresh_if_stale()
+            return dict(self._free_by_type), self._watermark is not None
+
+    def room_types(self):
+        with self._lock:
+            return sorted(self._free_by_type, key=str)
+
+    def next_free_bed(self, room_type=None):
+        """(room_number, bed_number) of a free bed of room_type (any type if None), or None.
+
+        Rooms are offered in the order their first bed became free, so
+        consecutive admissions spread over the rooms. The bed is only taken
+        once occupy() records the admission.
+        """
+        with self._lock:
+            self._refresh_if_stale()
+            types = [room_type] if room_type is not None else list(self._open_rooms)
+            for kind in types:
+                for room_number in self._open_rooms.get(kind, ()):
+                    return room_number, self._rooms[room_number].first_free()
+        return None
+
+    def is_free(self, room_number, bed_number):
+        """True or False, or None for a bed the service does not know (yet)"""
+        with self._lock:
+            room = self._rooms.get(room_number)
+            if room is None or bed_number not in room.bits:
+                return None
+            return not room.occupied >> room.bits[bed_number] & 1
+
+    def occupy(self, room_number, bed_number):
+        """Record an admission to the bed"""
+        with self._lock:
+            self._set(room_number, bed_number, True)
+
+    def release(self, room_number, bed_number):
+        """Record a discharge from the bed"""
+        with self._lock:
+            self._set(room_number, bed_number, False)
+
+    def invalidate(self, reload=False):
+        """Mark the service stale, e.g. after adding a bed.
+
+        With reload the next refresh reads every bed again, as it must after
+        beds were renamed or moved or a room's type changed.
+        """
+        super().invalidate(reload)
+
+    def _apply(self, rows, full):
+        # rows are (room_number, bed_number, is_occupied, room_type)
+        with self._lock:
+            if full:
+                self._rooms, self._free_by_type, self._open_rooms = {}, {}, {}
+                self._free_total = 0
+            for room_number, bed_number, occupied, room_type in rows:
+                self._set(room_number, bed_number, bool(occupied), room_type)
+
+    def _set(self, room_number, bed_number, occupied, room_type=None):
+        # Called with the lock held; adds beds and rooms it has not seen
+        room = self._rooms.get(room_number)
+        if room is None:
+            room = self._rooms[room_number] = _Room(room_type)
+            self._free_by_type.setdefault(room_type, 0)
+        bit = room.bits.get(bed_number)
+        if bit is None:
+            bit = room.bits[bed_number] = len(room.beds)
+            room.beds.append(bed_number)
+            if occupied:
+                room.occupied |= 1 << bit
+                return
+            delta = 1
+        elif bool(room.occupied >> bit & 1) == occupied:
+            return
+        else:
+            room.occupied ^= 1 << bit
+            delta = -1 if occupied else 1
+        room.free += delta
+        self._free_by_type[room.room_type] += delta
+        self._free_total += delta
+        open_rooms = self._open_rooms.setdefault(room.room_type, {})
+        if room.free:
+            open_rooms.setdefault(room_number, None)
+        else:
+            open_rooms.pop(room_number, None)
+
+
+bed_service = BedService()
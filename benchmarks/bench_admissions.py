@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Stress test concurrent admissions for double-booked beds.
+
+Builds a scratch SQL Server database (dropped afterwards) from
+HospitalManagementSystem.sql, adds a ward of --beds free beds and runs
+--nurses threads, each with its own connection. In each of --rounds rounds
+every nurse waits at a barrier and then admits a patient to a random bed of
+the ward, so hundreds of admissions hit the same few beds at once. Each
+mode is run in turn, on an emptied ward:
+
+  legacy  AdmitPatient as HospitalManagementSystem.sql defines it: check
+          is_occupied, then insert and update the bed
+  locked  db_connect.admit_patient(), after migration 010: the bed is read
+          with UPDLOCK, HOLDLOCK inside the admission's transaction
+
+Refused admissions ("already occupied") are expected. Afterwards every bed
+of the ward must have at most one current admission, and be marked occupied
+exactly when it has one. Reports throughput, latency, admissions, refusals,
+double-booked beds and beds whose is_occupied is wrong.
+There is no SQLite stand-in: the race being tested is SQL Server's.
+
+    python benchmarks/bench_admissions.py --nurses 64 --beds 20 --rounds 10
+"""
+
+import argparse
+import random
+import statistics
+import threading
+import time
+
+from bench_query_plans import SqlServerTarget, dataset_sizes
+from db_connect import admit_patient
+
+WARD_TYPE = 'Stress'
+
+
+def admit_legacy(conn, patient_id, room_number, bed_number, doctor_id):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("EXEC AdmitPatient @patient_id=?, @room_number=?, @bed_number=?, @doctor_id=?, "
+                       "@admission_date=?", (patient_id, room_number, bed_number, doctor_id, "2024-03-04"))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def admit_locked(conn, patient_id, room_number, bed_number, doctor_id):
+    admit_patient(patient_id, room_number, bed_number, doctor_id, "2024-03-04", conn=conn)
+
+
+MODES = {'legacy': admit_legacy, 'locked': admit_locked}
+
+
+def run_nurses(target, mode, nurses, rounds, beds, sizes):
+    """Run every nurse concurrently; returns (elapsed, latencies, refused, errors)"""
+    admit = MODES[mode]
+    latencies, errors = [], []
+    refused = [0]
+    lock = threading.Lock()
+    barrier = threading.Barrier(nurses)
+
+    def nurse(number):
+        rng = random.Random(number)
+        conn = target.connect()
+        try:
+            for _ in range(rounds):
+                barrier.wait()
+                room_number, bed_number = rng.choice(beds)
+                start = time.perf_counter()
+                try:
+                    admit(conn, rng.randint(1, sizes['patients']), room_number, bed_number,
+                          rng.randint(1, sizes['doctors']))
+                except Exception as e:
+                    with lock:
+                        if 'already occupied' in str(e):
+                            refused[0] += 1
+                        else:
+                            errors.append(str(e))
+                    continue
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=nurse, args=(n,)) for n in range(nurses)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start, latencies, refused[0], errors
+
+
+class AdmissionTarget(SqlServerTarget):
+    def connect(self):
+        return self.pyodbc.connect(
+            f"DRIVER={{ODBC Driver 17 for SQL Server}};SERVER={self.server};DATABASE={self.database};Trusted_Connection=yes;"
+        )
+
+    def add_ward(self, beds):
+        """Rooms of two free beds each; returns the (room_number, bed_number) pairs"""
+        pairs = [(f"S{n // 2}", str(n % 2 + 1)) for n in range(beds)]
+        cursor = self.conn.cursor()
+        cursor.executemany("INSERT INTO Room (room_number, room_type, bed_count) VALUES (?, ?, 2)",
+                           [(room, WARD_TYPE) for room in sorted({room for room, _ in pairs})])
+        cursor.executemany("INSERT INTO Bed (room_number, bed_number, is_occupied) VALUES (?, ?, 0)", pairs)
+        self.conn.commit()
+        cursor.close()
+        return pairs
+
+    def empty_ward(self):
+        """Discharge everyone in the ward; the discharge trigger frees the beds"""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            UPDATE a SET discharge_date = '2024-03-05'
+            FROM Admission a
+            JOIN Room r ON r.room_number = a.room_number
+            WHERE r.room_type = ? AND a.discharge_date IS NULL
+        """, WARD_TYPE)
+        cursor.execute("UPDATE b SET is_occupied = 0 FROM Bed b JOIN Room r ON r.room_number = b.room_number "
+                       "WHERE r.room_type = ?", WARD_TYPE)
+        self.conn.commit()
+        cursor.close()
+
+    def check_ward(self):
+        """(admissions, double-booked beds, beds whose is_occupied is wrong) in the ward"""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT b.is_occupied, COUNT(a.admission_id)
+            FROM Bed b
+            JOIN Room r ON r.room_number = b.room_number
+            LEFT JOIN Admission a ON a.room_number = b.room_number AND a.bed_number = b.bed_number
+                                  AND a.discharge_date IS NULL
+            WHERE r.room_type = ?
+            GROUP BY b.room_number, b.bed_number, b.is_occupied
+        """, WARD_TYPE)
+        rows = cursor.fetchall()
+        cursor.close()
+        admissions = sum(count for _, count in rows)
+        double = sum(1 for _, count in rows if count > 1)
+        wrong = sum(1 for occupied, count in rows if bool(occupied) != (count > 0))
+        return admissions, double, wrong
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--nurses', type=int, default=64, help="Concurrent nurses, one connection each")
+    parser.add_argument('--beds', type=int, default=20, help="Free beds in the contended ward")
+    parser.add_argument('--rounds', type=int, default=10, help="Simultaneous admissions per nurse")
+    parser.add_argument('--server', default='localhost')
+    parser.add_argument('--database', default='HospitalBench')
+    args = parser.parse_args()
+
+    sizes = dataset_sizes(20000)
+    target = AdmissionTarget(args)
+    results = {}
+    try:
+        target.seed(sizes)
+        beds = target.add_ward(args.beds)
+        for mode in MODES:
+            if mode == 'locked':
+                target.add_indexes()
+            target.empty_ward()
+            elapsed, latencies, refused, errors = run_nurses(
+                target, mode, args.nurses, args.rounds, beds, sizes)
+            results[mode] = (elapsed, latencies, refused, errors, *target.check_ward())
+    finally:
+        target.close()
+
+    print(f"{args.nurses} nurses x {args.rounds} rounds on {args.beds} beds\n")
+    print(f"{'mode':<7} | {'admits/s':>8} | {'median':>9} | {'p95':>9} | {'admitted':>8} | {'refused':>7} | "
+          f"{'double':>6} | {'wrong':>5} | {'errors':>6}")
+    for mode, (elapsed, latencies, refused, errors, admissions, double, wrong) in results.items():
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+        print(f"{mode:<7} | {len(latencies) / elapsed:8.1f} | {statistics.median(latencies or [0]) * 1000:7.2f}ms | "
+              f"{p95 * 1000:7.2f}ms | {admissions:>8} | {refused:>7} | {double:>6} | {wrong:>5} | {len(errors):>6}")
+        if errors:
+            print(f"    first error: {errors[0]}")
+
+
+if __name__ == '__main__':
+    main()
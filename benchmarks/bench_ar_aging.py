@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Compare accounts receivable reports summed from the payment ledger with the
+materialized balances of migration 008.
+
+For each --payments size, seeds bills paid in installments (most in full,
+some partly, some not at all) and times two reports:
+
+  aging summary   open bills and amount outstanding per aging bucket
+  top balances    the --top patients owing the most
+
+once the way they would be computed from the ledger alone, summing Payment
+per bill on every run, and once as receivables.py reads them: Billing.outstanding
+through IX_Billing_Outstanding and Patient_Balance. The ledger reports grow
+with the number of payments; the materialized ones only with the open bills
+and the rows returned.
+
+By default a SQLite stand-in is used, with outstanding as a generated column
+and the Receivable view and Patient_Balance recreated on it. Pass --odbc to build a
+scratch SQL Server database (dropped afterwards) with the real migrations.
+
+    python benchmarks/bench_ar_aging.py --payments 250000,1000000,3000000
+    python benchmarks/bench_ar_aging.py --odbc --database HospitalBench
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from bench_query_plans import FIRST_PAGE, SQLiteTarget, SqlServerTarget
+from receivables import AGING_SUMMARY_QUERY, TOP_BALANCES_QUERY
+
+INSTALLMENT = 300
+
+DAYS = {
+    'tsql': "DATEDIFF(day, {}, CAST(GETDATE() AS DATE))",
+    'sqlite': "CAST(julianday('now') - julianday({}) AS INTEGER)",
+}
+
+BUCKET = """CASE WHEN {days} <= 30 THEN '0-30'
+                 WHEN {days} <= 60 THEN '31-60'
+                 WHEN {days} <= 90 THEN '61-90'
+                 ELSE '90+' END"""
+
+# What each bill still owes, from the ledger
+LEDGER_BALANCES = """
+    SELECT b.bill_id, b.patient_id, b.billing_date, b.total_amount - COALESCE(pay.paid, 0) AS outstanding
+    FROM Billing b
+    LEFT JOIN (SELECT bill_id, SUM(amount) AS paid FROM Payment GROUP BY bill_id) pay ON pay.bill_id = b.bill_id
+"""
+
+# report -> {mode: query}; {bucket} and {first_page} are filled in per dialect
+REPORTS = {
+    'aging summary': {
+        'ledger': f"""
+            SELECT {{bucket}} AS aging_bucket, COUNT(*), SUM(r.outstanding)
+            FROM ({LEDGER_BALANCES}) r
+            WHERE r.outstanding > 0
+            GROUP BY {{bucket}}
+        """,
+        'materialized': AGING_SUMMARY_QUERY,
+    },
+    'top balances': {
+        'ledger': f"""
+            SELECT r.patient_id, p.first_name + ' ' + p.last_name AS patient_name,
+                   SUM(r.outstanding) AS outstanding, COUNT(*) AS open_bills
+            FROM ({LEDGER_BALANCES}) r
+            JOIN Patient p ON p.patient_id = r.patient_id
+            WHERE r.outstanding > 0
+            GROUP BY r.patient_id, p.first_name, p.last_name
+            ORDER BY outstanding DESC, r.patient_id
+            {{first_page}}
+        """,
+        'materialized': TOP_BALANCES_QUERY,
+    },
+}
+
+
+def render(query, dialect, top):
+    query = query.replace("{bucket}", BUCKET.format(days=DAYS[dialect].format("r.billing_date")))
+    query = query.replace("{first_page}", FIRST_PAGE[dialect].replace("100", str(top)))
+    query = query.replace("OFFSET 0 ROWS FETCH NEXT ? ROWS ONLY", FIRST_PAGE[dialect].replace("100", "?"))
+    if dialect == 'sqlite':
+        query = query.replace(" + ' ' + ", " || ' ' || ")
+    return query
+
+
+def generate(payments, seed=42):
+    """(patients, bills, payment rows) with about the given number of payments.
+
+    Bills are for 1-5 installments billed over the last 200 days; 85% are
+    paid in full and the rest have some installments still open.
+    """
+    rng = random.Random(seed)
+    today = date.today()
+    patients = max(1000, payments // 20)
+    bills, rows = [], []
+    while len(rows) < payments:
+        bill_id = len(bills) + 1
+        installments = rng.randint(1, 5)
+        paid = installments if rng.random() < 0.85 else rng.randrange(installments)
+        billed = today - timedelta(days=rng.randint(0, 200))
+        bills.append((rng.randint(1, patients), INSTALLMENT * installments, INSTALLMENT * paid,
+                      billed.isoformat()))
+        rows += [(bill_id, INSTALLMENT, (billed + timedelta(days=30 * n)).isoformat()) for n in range(paid)]
+    return patients, bills, rows
+
+
+def seed(target, payments):
+    patients, bills, rows = generate(payments)
+    cursor = target.conn.cursor()
+    if target.dialect == 'tsql':
+        cursor.fast_executemany = True
+    for table, columns, data in (
+            ('Patient', ('first_name', 'last_name'), [(f"First{i}", f"Last{i}") for i in range(patients)]),
+            ('Billing', ('patient_id', 'total_amount', 'paid_amount', 'billing_date'), bills),
+            ('Payment', ('bill_id', 'amount', 'paid_on'), rows)):
+        marks = ", ".join("?" for _ in columns)
+        for start in range(0, len(data), 50000):
+            cursor.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({marks})",
+                               data[start:start + 50000])
+        target.conn.commit()
+    cursor.close()
+    return len(bills), len(rows)
+
+
+# Patient_Balance as migration 008 backfills it
+BALANCE_BACKFILL = """
+    INSERT INTO Patient_Balance (patient_id, outstanding, open_bills)
+    SELECT patient_id, SUM(outstanding), SUM(CASE WHEN outstanding > 0 THEN 1 ELSE 0 END)
+    FROM Billing
+    GROUP BY patient_id
+"""
+
+
+class SQLiteAgingTarget(SQLiteTarget):
+    def prepare(self):
+        """Migration 008 on the stand-in; INCLUDE columns become trailing key columns"""
+        self.conn.executescript(f"""
+            CREATE TABLE Payment (payment_id INTEGER PRIMARY KEY, bill_id INT, amount REAL,
+                                  paid_on TEXT, method TEXT DEFAULT 'Cash', reference TEXT);
+            CREATE TABLE Patient_Balance (patient_id INTEGER PRIMARY KEY, outstanding REAL, open_bills INT);
+            ALTER TABLE Billing ADD COLUMN outstanding REAL
+                GENERATED ALWAYS AS (COALESCE(total_amount, 0) - COALESCE(paid_amount, 0)) VIRTUAL;
+            CREATE VIEW Receivable AS
+            SELECT r.*, {BUCKET.format(days='r.days_outstanding')} AS aging_bucket
+            FROM (SELECT b.bill_id, b.patient_id, b.billing_date, b.outstanding,
+                         {DAYS['sqlite'].format('b.billing_date')} AS days_outstanding
+                  FROM Billing b
+                  WHERE b.outstanding > 0) r;
+        """)
+
+    def materialize(self):
+        self.conn.executescript(f"""
+            {BALANCE_BACKFILL};
+            CREATE INDEX IX_Payment_Bill ON Payment (bill_id, amount, paid_on);
+            CREATE INDEX IX_Billing_Outstanding ON Billing (outstanding, billing_date, patient_id);
+            CREATE INDEX IX_Patient_Balance_Outstanding ON Patient_Balance (outstanding, open_bills);
+            ANALYZE;
+        """)
+
+
+class SqlServerAgingTarget(SqlServerTarget):
+    def prepare(self):
+        """Apply the real migrations, then seed without firing their triggers"""
+        self.add_indexes()
+        self.conn.cursor().execute("DISABLE TRIGGER ALL ON Patient; DISABLE TRIGGER ALL ON Billing; "
+                                    "DISABLE TRIGGER ALL ON Payment;")
+        self.conn.commit()
+
+    def materialize(self):
+        # paid_amount is seeded as the payments add up, so only the patient
+        # balances need filling in, in one statement instead of per row
+        cursor = self.conn.cursor()
+        cursor.execute(BALANCE_BACKFILL)
+        cursor.execute("ENABLE TRIGGER ALL ON Patient; ENABLE TRIGGER ALL ON Billing; "
+                       "ENABLE TRIGGER ALL ON Payment;")
+        cursor.execute("EXEC sp_updatestats")
+        self.conn.commit()
+
+
+def time_reports(target, top, repeats):
+    """{(report, mode): (median seconds, rows)}"""
+    results = {}
+    for report, modes in REPORTS.items():
+        for mode, query in modes.items():
+            sql = render(query, target.dialect, top)
+            params = (top,) if '?' in sql else ()
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                rows = target.run(sql, params)
+                timings.append(time.perf_counter() - start)
+            results[report, mode] = (statistics.median(timings), len(rows))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--payments', default='250000,1000000',
+                        help="Comma-separated numbers of payments to seed, one run each")
+    parser.add_argument('--top', type=int, default=100, help="Patients in the top balances report")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--odbc', action='store_true', help="Run against a scratch SQL Server database")
+    parser.add_argument('--server', default='localhost')
+    parser.add_argument('--database', default='HospitalBench')
+    args = parser.parse_args()
+
+    print(f"{'payments':>9} | {'bills':>8} | {'report':<14} | {'ledger':>10} | {'materialized':>12} | {'speedup':>8}")
+    for payments in (int(size) for size in args.payments.split(',')):
+        target = (SqlServerAgingTarget if args.odbc else SQLiteAgingTarget)(args)
+        try:
+            target.prepare()
+            bills, payments = seed(target, payments)
+            target.materialize()
+            results = time_reports(target, args.top, args.repeats)
+        finally:
+            target.close()
+        for report in REPORTS:
+            (ledger, ledger_rows), (materialized, rows) = results[report, 'ledger'], results[report, 'materialized']
+            if ledger_rows != rows:
+                print(f"    {report}: ledger returned {ledger_rows} rows, materialized {rows}")
+            print(f"{payments:>9} | {bills:>8} | {report:<14} | {ledger * 1000:8.1f}ms | "
+                  f"{materialized * 1000:10.1f}ms | {ledger / materialized if materialized else float('inf'):7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Load test bill generation with many clerks billing at the same time.
+
+Builds a scratch SQL Server database (dropped afterwards) from
+HospitalManagementSystem.sql and the migrations, then runs --clerks
+threads, each with its own connection, that generate --bills bills of 1-8
+items. Each mode is run in turn:
+
+  legacy  GenerateBill, SELECT IDENT_CURRENT('Billing'), then one
+          AddBillItem per item, as BillingModule.generate_bill used to
+  atomic  db_connect.create_bill(): one CreateBillWithItems call
+
+Every item description carries its clerk and bill number, so afterwards each
+new bill is checked to hold exactly the items it was generated with and a
+total equal to their sum. Reports throughput, latency and incorrect bills.
+There is no SQLite stand-in: the race being tested is SQL Server's.
+
+    python benchmarks/bench_bill_generation.py --clerks 16 --bills 200
+"""
+
+import argparse
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+from bench_query_plans import SqlServerTarget, dataset_sizes
+from db_connect import create_bill
+
+
+def bill_items(rng, clerk, number):
+    tag = f"c{clerk}b{number}"
+    return [(f"{tag} item {i}", Decimal(rng.randint(100, 50000)) / 100) for i in range(rng.randint(1, 8))]
+
+
+def generate_legacy(conn, admission_id, items):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT patient_id FROM Admission WHERE admission_id = ?", admission_id)
+        patient_id = cursor.fetchone()[0]
+        cursor.execute("EXEC GenerateBill @patient_id=?, @admission_id=?, @total_amount=?, @paid_amount=0, "
+                       "@billing_date=?", (patient_id, admission_id, sum(a for _, a in items), "2024-03-04"))
+        cursor.execute("SELECT IDENT_CURRENT('Billing')")
+        bill_id = int(cursor.fetchone()[0])
+        for desc, amount in items:
+            cursor.execute("EXEC AddBillItem @bill_id=?, @description=?, @amount=?", (bill_id, desc, amount))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def generate_atomic(conn, admission_id, items):
+    create_bill(admission_id, items, billing_date="2024-03-04", conn=conn)
+
+
+MODES = {'legacy': generate_legacy, 'atomic': generate_atomic}
+
+
+def run_clerks(target, mode, clerks, bills, admissions):
+    """Run every clerk concurrently; returns (elapsed, latencies, expected, errors)"""
+    generate = MODES[mode]
+    latencies, errors = [], []
+    expected = {}  # tag -> (item count, total)
+    lock = threading.Lock()
+    barrier = threading.Barrier(clerks)
+
+    def clerk(number):
+        rng = random.Random(number)
+        conn = target.connect()
+        barrier.wait()
+        try:
+            for n in range(bills):
+                items = bill_items(rng, number, n)
+                start = time.perf_counter()
+                try:
+                    generate(conn, rng.randint(1, admissions), items)
+                except Exception as e:
+                    with lock:
+                        errors.append(str(e))
+                    continue
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+                    expected[f"c{number}b{n}"] = (len(items), sum(a for _, a in items))
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=clerk, args=(c,)) for c in range(clerks)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start, latencies, expected, errors
+
+
+def check_bills(target, first_bill_id, expected):
+    """Count the new bills whose items or total do not match what was generated"""
+    cursor = target.conn.cursor()
+    cursor.execute("""
+        SELECT b.bill_id, b.total_amount, bi.description, bi.amount
+        FROM Billing b
+        LEFT JOIN Bill_Item bi ON bi.bill_id = b.bill_id
+        WHERE b.bill_id > ?
+    """, first_bill_id)
+    bills = defaultdict(lambda: [None, []])
+    for bill_id, total, description, amount in cursor.fetchall():
+        bills[bill_id][0] = total
+        if description is not None:
+            bills[bill_id][1].append((description.split()[0], amount))
+    cursor.close()
+
+    wrong = 0
+    for total, items in bills.values():
+        tags = {tag for tag, _ in items}
+        if len(tags) != 1:
+            wrong += 1
+            continue
+        count, expected_total = expected.get(tags.pop(), (None, None))
+        if len(items) != count or total != expected_total or sum(a for _, a in items) != expected_total:
+            wrong += 1
+    return len(bills), wrong
+
+
+class BillingTarget(SqlServerTarget):
+    def connect(self):
+        return self.pyodbc.connect(
+            f"DRIVER={{ODBC Driver 17 for SQL Server}};SERVER={self.server};DATABASE={self.database};Trusted_Connection=yes;"
+        )
+
+    def max_bill_id(self):
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT COALESCE(MAX(bill_id), 0) FROM Billing")
+        bill_id = cursor.fetchone()[0]
+        cursor.close()
+        return bill_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clerks', type=int, default=16, help="Concurrent clerks, one connection each")
+    parser.add_argument('--bills', type=int, default=200, help="Bills generated per clerk")
+    parser.add_argument('--server', default='localhost')
+    parser.add_argument('--database', default='HospitalBench')
+    args = parser.parse_args()
+
+    sizes = dataset_sizes(20000)
+    target = BillingTarget(args)
+    results = {}
+    try:
+        target.seed(sizes)
+        target.add_indexes()
+        for mode in MODES:
+            first_bill_id = target.max_bill_id()
+            elapsed, latencies, expected, errors = run_clerks(
+                target, mode, args.clerks, args.bills, sizes['admissions'])
+            bills, wrong = check_bills(target, first_bill_id, expected)
+            results[mode] = (elapsed, latencies, bills, wrong, errors)
+    finally:
+        target.close()
+
+    print(f"{args.clerks} clerks x {args.bills} bills\n")
+    print(f"{'mode':<8} | {'bills/s':>8} | {'median':>9} | {'p95':>9} | {'bills':>6} | {'wrong':>6} | {'errors':>6}")
+    for mode, (elapsed, latencies, bills, wrong, errors) in results.items():
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+        print(f"{mode:<8} | {len(latencies) / elapsed:8.1f} | {statistics.median(latencies or [0]) * 1000:7.2f}ms | "
+              f"{p95 * 1000:7.2f}ms | {bills:>6} | {wrong:>6} | {len(errors):>6}")
+        if errors:
+            print(f"    first error: {errors[0]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Load test appointment booking with many schedulers booking at the same time.
+
+Builds a scratch SQL Server database (dropped afterwards) from
+HospitalManagementSystem.sql and the migrations, then runs --schedulers
+threads, each with its own connection, that book --bookings appointments
+with --doctors doctors over --days days of hourly slots, so bookings
+regularly clash. Each mode is run in turn:
+
+  trigger  the COUNT(*) pre-check and BookAppointment with
+           trg_PreventDoubleBooking, as before migration 012
+  index    db_connect.book_appointment(): BookAppointment alone, with
+           IX_Appointment_Booked_Slot refusing clashes
+
+A refused booking ("taken") is expected. Afterwards the new appointments are
+checked for doctors booked twice at the same time. Reports throughput,
+latency, bookings, refusals, double bookings and other errors.
+There is no SQLite stand-in: the race being tested is SQL Server's.
+
+    python benchmarks/bench_booking.py --schedulers 32 --bookings 100
+"""
+
+import argparse
+import os
+import random
+import re
+import statistics
+import threading
+import time
+from datetime import datetime, timedelta
+
+from bench_query_plans import ROOT, SqlServerTarget, dataset_sizes
+from db_connect import book_appointment, split_sql_batches
+
+# Far from the seeded appointments, so only the benchmark's own bookings clash
+FIRST_DAY = datetime(2030, 1, 7)
+
+
+def book_with_trigger(conn, patient_id, doctor_id, when):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT COUNT(*) FROM Appointment
+            WHERE doctor_id = ? AND appointment_date = ? AND status != 'cancelled'
+        """, (doctor_id, when))
+        if cursor.fetchone()[0] > 0:
+            return False
+        cursor.execute("EXEC BookAppointment @patient_id=?, @doctor_id=?, @appointment_date=?, @remarks=?",
+                       (patient_id, doctor_id, when, None))
+        conn.commit()
+        return True
+    except Exception as e:
+        conn.rollback()
+        if 'already booked' in str(e):
+            return False
+        raise
+    finally:
+        cursor.close()
+
+
+def book_with_index(conn, patient_id, doctor_id, when):
+    return book_appointment(patient_id, doctor_id, when, conn=conn)
+
+
+MODES = {'trigger': book_with_trigger, 'index': book_with_index}
+
+
+def run_schedulers(target, mode, schedulers, bookings, doctors, days, patients):
+    """Run every scheduler concurrently; returns (elapsed, latencies, refused, errors)"""
+    book = MODES[mode]
+    latencies, errors = [], []
+    refused = [0]
+    lock = threading.Lock()
+    barrier = threading.Barrier(schedulers)
+
+    def scheduler(number):
+        rng = random.Random(number)
+        conn = target.connect()
+        barrier.wait()
+        try:
+            for _ in range(bookings):
+                when = FIRST_DAY + timedelta(days=rng.randrange(days), hours=rng.randint(8, 17))
+                start = time.perf_counter()
+                try:
+                    booked = book(conn, rng.randint(1, patients), rng.randint(1, doctors), when)
+                except Exception as e:
+                    with lock:
+                        errors.append(str(e))
+                    continue
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+                    if not booked:
+                        refused[0] += 1
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=scheduler, args=(s,)) for s in range(schedulers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start, latencies, refused[0], errors
+
+
+class BookingTarget(SqlServerTarget):
+    def connect(self):
+        return self.pyodbc.connect(
+            f"DRIVER={{ODBC Driver 17 for SQL Server}};SERVER={self.server};DATABASE={self.database};Trusted_Connection=yes;"
+        )
+
+    def execute(self, script):
+        cursor = self.conn.cursor()
+        for batch in split_sql_batches(script):
+            cursor.execute(batch)
+        self.conn.commit()
+        cursor.close()
+
+    def use_trigger(self):
+        """Back to trg_PreventDoubleBooking as HospitalManagementSystem.sql defines it"""
+        with open(os.path.join(ROOT, 'HospitalManagementSystem.sql'), 'r', encoding='utf-8') as f:
+            trigger = re.search(r"CREATE OR ALTER TRIGGER trg_PreventDoubleBooking.*?\nEND;", f.read(), re.S).group(0)
+        self.execute(f"DROP INDEX IX_Appointment_Booked_Slot ON Appointment;\nGO\n{trigger}\nGO")
+
+    def use_index(self):
+        """Cancel the benchmark's bookings, then apply migration 012 again"""
+        cursor = self.conn.cursor()
+        cursor.execute("UPDATE Appointment SET status = 'cancelled' WHERE appointment_date >= ?", FIRST_DAY)
+        self.conn.commit()
+        cursor.close()
+        with open(os.path.join(ROOT, 'migrations', '012_appointment_booked_slot.sql'), 'r', encoding='utf-8') as f:
+            self.execute(f.read())
+
+    def double_bookings(self):
+        """Doctor/time pairs booked more than once by the benchmark"""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT COUNT(*) FROM (
+                SELECT doctor_id, appointment_date
+                FROM Appointment
+                WHERE appointment_date >= ? AND status <> 'cancelled'
+                GROUP BY doctor_id, appointment_date
+                HAVING COUNT(*) > 1
+            ) clashes
+        """, FIRST_DAY)
+        count = cursor.fetchone()[0]
+        cursor.close()
+        return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--schedulers', type=int, default=32, help="Concurrent schedulers, one connection each")
+    parser.add_argument('--bookings', type=int, default=100, help="Bookings attempted per scheduler")
+    parser.add_argument('--doctors', type=int, default=20, help="Doctors the bookings are spread over")
+    parser.add_argument('--days', type=int, default=20, help="Days of hourly slots (08:00-17:00) to book")
+    parser.add_argument('--appointments', type=int, default=200000, help="Appointments seeded beforehand")
+    parser.add_argument('--server', default='localhost')
+    parser.add_argument('--database', default='HospitalBench')
+    args = parser.parse_args()
+
+    sizes = dataset_sizes(args.appointments)
+    doctors = min(args.doctors, sizes['doctors'])
+    target = BookingTarget(args)
+    results = {}
+    try:
+        target.seed(sizes)
+        target.add_indexes()
+        for mode in MODES:
+            if mode == 'trigger':
+                target.use_trigger()
+            else:
+                target.use_index()
+            elapsed, latencies, refused, errors = run_schedulers(
+                target, mode, args.schedulers, args.bookings, doctors, args.days, sizes['patients'])
+            results[mode] = (elapsed, latencies, refused, errors, target.double_bookings())
+    finally:
+        target.close()
+
+    print(f"{args.schedulers} schedulers x {args.bookings} bookings, {doctors} doctors x {args.days * 10} slots\n")
+    print(f"{'mode':<8} | {'calls/s':>8} | {'median':>9} | {'p95':>9} | {'booked':>6} | {'taken':>6} | "
+          f"{'double':>6} | {'errors':>6}")
+    for mode, (elapsed, latencies, refused, errors, double) in results.items():
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+        print(f"{mode:<8} | {len(latencies) / elapsed:8.1f} | {statistics.median(latencies or [0]) * 1000:7.2f}ms | "
+              f"{p95 * 1000:7.2f}ms | {len(latencies) - refused:>6} | {refused:>6} | {double:>6} | {len(errors):>6}")
+        if errors:
+            print(f"    first error: {errors[0]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Compare pooled vs. unpooled connection latency.
+
+By default a local SQLite file stands in for SQL Server, with an optional
+simulated handshake delay per connect. Pass --odbc to run against the
+real connection string from db_connect.py.
+
+    python benchmarks/bench_connection_pool.py --queries 500 --handshake-ms 15
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from db_connect import ConnectionPool, CONNECTION_STRING
+
+
+def make_factory(args):
+    if args.odbc:
+        import pyodbc
+        return lambda: pyodbc.connect(CONNECTION_STRING)
+
+    db_path = os.path.join(tempfile.gettempdir(), 'hms_pool_bench.sqlite')
+    setup = sqlite3.connect(db_path)
+    setup.execute("CREATE TABLE IF NOT EXISTS Doctor (doctor_id INTEGER PRIMARY KEY, first_name TEXT)")
+    setup.execute("INSERT OR IGNORE INTO Doctor VALUES (1, 'Alice')")
+    setup.commit()
+    setup.close()
+
+    def factory():
+        # Simulate the network/ODBC handshake a real server connection pays
+        if args.handshake_ms:
+            time.sleep(args.handshake_ms / 1000.0)
+        return sqlite3.connect(db_path, check_same_thread=False)
+    return factory
+
+
+def run_query(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM Doctor")
+    cursor.fetchone()
+    cursor.close()
+
+
+def bench_unpooled(factory, n):
+    timings = []
+    for _ in range(n):
+        start = time.perf_counter()
+        conn = factory()
+        run_query(conn)
+        conn.close()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def bench_pooled(pool, n):
+    timings = []
+    for _ in range(n):
+        start = time.perf_counter()
+        with pool.connection() as conn:
+            run_query(conn)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def bench_pooled_threads(pool, n, threads):
+    per_thread = max(1, n // threads)
+    results = []
+    lock = threading.Lock()
+
+    def worker():
+        timings = bench_pooled(pool, per_thread)
+        with lock:
+            results.extend(timings)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return results
+
+
+def report(name, timings):
+    ms = sorted(t * 1000 for t in timings)
+    p95 = ms[int(len(ms) * 0.95) - 1] if len(ms) > 1 else ms[0]
+    print(f"{name:<24} n={len(ms):<6} mean={statistics.mean(ms):8.3f}ms "
+          f"median={statistics.median(ms):8.3f}ms p95={p95:8.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--pool-size', type=int, default=5)
+    parser.add_argument('--handshake-ms', type=float, default=10.0,
+                        help="simulated connect latency for the SQLite stand-in")
+    parser.add_argument('--odbc', action='store_true', help="benchmark the real SQL Server connection")
+    args = parser.parse_args()
+
+    factory = make_factory(args)
+    pool = ConnectionPool(factory, max_size=args.pool_size)
+
+    report("unpooled", bench_unpooled(factory, args.queries))
+    report("pooled", bench_pooled(pool, args.queries))
+    report(f"pooled x{args.threads} threads", bench_pooled_threads(pool, args.queries, args.threads))
+    print("pool stats:", pool.stats())
+    pool.close_all()
+
+
+if __name__ == '__main__':
+    main()
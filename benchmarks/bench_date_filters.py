@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Compare CAST(appointment_date AS DATE) filters with half-open datetime ranges.
+
+Seeds a multi-million-row Appointment table, applies the index migrations and
+runs each appointment date query twice: once filtering on the column wrapped
+in CAST(... AS DATE), as the application used to, and once with
+appointment_date >= start AND appointment_date < end. Reports the median
+time of each form and whether its plan seeks or scans.
+
+Uses the same SQLite stand-in and --odbc scratch SQL Server database as
+bench_query_plans.py.
+
+    python benchmarks/bench_date_filters.py
+    python benchmarks/bench_date_filters.py --odbc --database HospitalBench
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from bench_query_plans import SQLiteTarget, SqlServerTarget, dataset_sizes, render
+
+# The day the dataset treats as "today"; generate() spreads appointments
+# over 2023-2024
+TODAY = date(2024, 3, 4)
+
+
+def past_day(rng):
+    """A random day within the year before TODAY, as a (first, last) range"""
+    day = TODAY - timedelta(days=rng.randint(0, 365))
+    return day, day
+
+
+# name -> (query, params(rng, sizes)); params returns the leading query
+# parameters and the first and last day of the date filter, which replaces
+# {filter}
+DATE_QUERIES = {
+    'doctor schedule (GetDoctorSchedule)': (
+        """
+        SELECT a.appointment_id, a.appointment_date, a.status, p.first_name, p.last_name, p.contact_number
+        FROM Appointment a
+        JOIN Patient p ON a.patient_id = p.patient_id
+        WHERE a.doctor_id = ? AND {filter}
+        ORDER BY a.appointment_date
+        """,
+        lambda rng, sizes: ((rng.randint(1, sizes['doctors']),), TODAY, TODAY + timedelta(days=6)),
+    ),
+    "today's schedule": (
+        """
+        SELECT a.appointment_id, a.appointment_date, a.status, p.first_name, d.first_name
+        FROM Appointment a
+        LEFT JOIN Patient p ON a.patient_id = p.patient_id
+        LEFT JOIN Doctor d ON a.doctor_id = d.doctor_id
+        WHERE {filter}
+        ORDER BY a.appointment_date ASC
+        """,
+        lambda rng, sizes: ((), TODAY, TODAY),
+    ),
+    'dashboard today count': (
+        "SELECT COUNT(*) FROM Appointment a WHERE {filter}",
+        lambda rng, sizes: ((), TODAY, TODAY),
+    ),
+    'appointment search by date': (
+        """
+        SELECT a.appointment_id, a.appointment_date, a.status, p.first_name, d.first_name
+        FROM Appointment a
+        LEFT JOIN Patient p ON a.patient_id = p.patient_id
+        LEFT JOIN Doctor d ON a.doctor_id = d.doctor_id
+        WHERE {filter}
+        ORDER BY a.appointment_date DESC, a.appointment_id DESC {first_page}
+        """,
+        lambda rng, sizes: ((), *past_day(rng)),
+    ),
+}
+
+# form -> (predicate, params(first_day, last_day))
+FILTERS = {
+    'cast': (
+        "{date:a.appointment_date} BETWEEN ? AND ?",
+        lambda first, last: (first.isoformat(), last.isoformat()),
+    ),
+    'range': (
+        "a.appointment_date >= ? AND a.appointment_date < ?",
+        lambda first, last: (f"{first} 00:00:00", f"{last + timedelta(days=1)} 00:00:00"),
+    ),
+}
+
+
+def time_forms(target, sizes, repeats):
+    """{(query name, form): (median seconds, plan)}"""
+    results = {}
+    for name, (query, params_fn) in DATE_QUERIES.items():
+        for form, (predicate, filter_params) in FILTERS.items():
+            sql = render(query.replace("{filter}", predicate), target.dialect)
+            rng = random.Random(name)
+
+            def params():
+                leading, first, last = params_fn(rng, sizes)
+                return (*leading, *filter_params(first, last))
+
+            timings = []
+            for _ in range(repeats):
+                args = params()
+                start = time.perf_counter()
+                target.run(sql, args)
+                timings.append(time.perf_counter() - start)
+            results[name, form] = (statistics.median(timings), target.plan(sql, params()))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--appointments', type=int, default=2000000,
+                        help="Appointment rows to seed; other tables scale from this")
+    parser.add_argument('--repeats', type=int, default=10)
+    parser.add_argument('--odbc', action='store_true', help="Run against a scratch SQL Server database")
+    parser.add_argument('--server', default='localhost')
+    parser.add_argument('--database', default='HospitalBench')
+    args = parser.parse_args()
+
+    sizes = dataset_sizes(args.appointments)
+    target = (SqlServerTarget if args.odbc else SQLiteTarget)(args)
+    try:
+        start = time.perf_counter()
+        target.seed(sizes)
+        target.add_indexes()
+        print(f"Seeded and indexed {sizes['appointments']} appointments "
+              f"in {time.perf_counter() - start:.1f}s")
+        results = time_forms(target, sizes, args.repeats)
+    finally:
+        target.close()
+
+    print(f"\n{'query':<38} | {'CAST':>10} | {'range':>10} | {'speedup':>8}")
+    for name in DATE_QUERIES:
+        t_cast, plan_cast = results[name, 'cast']
+        t_range, plan_range = results[name, 'range']
+        print(f"{name:<38} | {t_cast * 1000:8.2f}ms | {t_range * 1000:8.2f}ms | "
+              f"{t_cast / t_range if t_range else float('inf'):7.1f}x")
+        print(f"    CAST:  {plan_cast}\n    range: {plan_range}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Measure throughput and peak memory of the streaming exports.
+
+Seeds the bench_query_plans dataset and writes each export dataset twice to
+a temporary file: once by reading the whole result with fetchall() and then
+writing it, and once through bulk_export.export(), which writes every
+fetchmany batch as it arrives. Reports rows/s and the peak Python memory
+traced during a second run of each export; the streaming peak should stay
+flat as --appointments grows.
+
+Uses the same SQLite stand-in and --odbc scratch SQL Server database as
+bench_query_plans.py.
+
+    python benchmarks/bench_export.py --appointments 2000000
+    python benchmarks/bench_export.py --format jsonl --odbc --database HospitalBench
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from bench_query_plans import SQLiteTarget, SqlServerTarget, dataset_sizes
+from bulk_export import EXPORTS, FORMATS, export, export_query
+
+
+def export_fetchall(conn, dataset, path, fmt):
+    """Load the whole result set, then write it: what a naive export does"""
+    query, params = export_query(dataset)
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    rows = cursor.fetchall()
+    writer_class, binary = FORMATS[fmt]
+    with open(path, 'wb') if binary else open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = writer_class(f, cursor.description)
+        writer.write(rows)
+        writer.close()
+    cursor.close()
+    return len(rows)
+
+
+def export_streaming(conn, dataset, path, fmt):
+    return export(dataset, path, fmt, conn=conn)
+
+
+MODES = {'fetchall': export_fetchall, 'streaming': export_streaming}
+
+
+def measure(fn, *args):
+    """(rows, seconds, peak traced bytes) of fn(*args).
+
+    Timed and traced in separate runs: tracing every allocation slows the
+    export down, and not evenly across modes.
+    """
+    start = time.perf_counter()
+    rows = fn(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rows, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--appointments', type=int, default=500000,
+                        help="Appointment rows to seed; other tables scale from this")
+    parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+    parser.add_argument('--odbc', action='store_true', help="Run against a scratch SQL Server database")
+    parser.add_argument('--server', default='localhost')
+    parser.add_argument('--database', default='HospitalBench')
+    args = parser.parse_args()
+
+    sizes = dataset_sizes(args.appointments)
+    target = (SqlServerTarget if args.odbc else SQLiteTarget)(args)
+    path = os.path.join(tempfile.gettempdir(), f"hms_export_bench.{args.format}")
+    results = {}
+    try:
+        target.seed(sizes)
+        for dataset in EXPORTS:
+            for mode, fn in MODES.items():
+                results[dataset, mode] = measure(fn, target.conn, dataset, path, args.format)
+    finally:
+        target.close()
+        if os.path.exists(path):
+            os.remove(path)
+
+    print(f"{'dataset':<16} | {'mode':<9} | {'rows':>9} | {'rows/s':>9} | {'peak memory':>11}")
+    for (dataset, mode), (rows, elapsed, peak) in results.items():
+        print(f"{dataset:<16} | {mode:<9} | {rows:>9} | {rows / elapsed:9.0f} | {peak / 2 ** 20:9.1f}MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Compare per-bill invoice rendering with the batch renderer.
+
+Seeds the bench_query_plans dataset, applies the index migrations and
+renders every bill's invoice into a temporary directory:
+
+  legacy     one query per bill and an HTML string built by repeated
+             concatenation, as BillingModule.print_bill used to
+  batch      invoices.render_invoices() in this process: one streamed
+             query and the module-level templates
+  pool       the same across a process pool (--workers, default one per CPU)
+  document   the pool writing a single multi-invoice document
+
+and reports invoices/second for each.
+
+Uses the same SQLite stand-in and --odbc scratch SQL Server database as
+bench_query_plans.py.
+
+    python benchmarks/bench_invoices.py --appointments 400000
+    python benchmarks/bench_invoices.py --odbc --database HospitalBench
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from bench_query_plans import SQLiteTarget, SqlServerTarget, dataset_sizes
+from invoices import render_invoices
+
+
+def render_legacy(conn, output):
+    cursor = conn.cursor()
+    cursor.execute("SELECT bill_id FROM Billing ORDER BY bill_id")
+    bill_ids = [row[0] for row in cursor.fetchall()]
+    for bill_id in bill_ids:
+        cursor.execute("""
+            SELECT b.bill_id, p.first_name, p.last_name, b.billing_date, b.total_amount,
+                   b.paid_amount, b.admission_id, bi.description, bi.amount
+            FROM Billing b
+            JOIN Patient p ON b.patient_id = p.patient_id
+            LEFT JOIN Bill_Item bi ON b.bill_id = bi.bill_id
+            WHERE b.bill_id = ?
+        """, (bill_id,))
+        items = cursor.fetchall()
+        html_content = f"""
+        <html><body>
+            <h2>Bill #{bill_id}</h2>
+            <p><strong>Patient:</strong> {items[0][1]} {items[0][2]}</p>
+            <p><strong>Admission ID:</strong> {items[0][6]}</p>
+            <p><strong>Date:</strong> {items[0][3]}</p>
+            <table>
+        """
+        for item in items:
+            if item[7] and item[8]:
+                html_content += f"""
+                <tr>
+                    <td>{item[7]}</td>
+                    <td>${item[8]:.2f}</td>
+                </tr>
+                """
+        html_content += f"""
+            </table>
+            <p><strong>Total Amount:</strong> ${items[0][4]:.2f}</p>
+            <p><strong>Paid Amount:</strong> ${items[0][5]:.2f}</p>
+        </body></html>
+        """
+        with open(os.path.join(output, f"bill_{bill_id}.html"), 'w') as f:
+            f.write(html_content)
+    cursor.close()
+    return len(bill_ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--appointments', type=int, default=200000,
+                        help="Appointment rows to seed; bills scale from this")
+    parser.add_argument('--workers', type=int, help="Processes for the pool modes (default: one per CPU)")
+    parser.add_argument('--odbc', action='store_true', help="Run against a scratch SQL Server database")
+    parser.add_argument('--server', default='localhost')
+    parser.add_argument('--database', default='HospitalBench')
+    args = parser.parse_args()
+
+    sizes = dataset_sizes(args.appointments)
+    target = (SqlServerTarget if args.odbc else SQLiteTarget)(args)
+    modes = {
+        'legacy': lambda out: render_legacy(target.conn, out),
+        'batch': lambda out: render_invoices(out, workers=1, conn=target.conn).invoices,
+        'pool': lambda out: render_invoices(out, workers=args.workers, conn=target.conn).invoices,
+        'document': lambda out: render_invoices(os.path.join(out, "invoices.html"), single_file=True,
+                                                workers=args.workers, conn=target.conn).invoices,
+    }
+    results, outputs = {}, []
+    try:
+        target.seed(sizes)
+        target.add_indexes()
+        for mode, render in modes.items():
+            # Removed only at the end: deleting thousands of files right
+            # before the next mode starts slows that mode's file creation
+            outputs.append(tempfile.mkdtemp(prefix="hms_invoices_"))
+            start = time.perf_counter()
+            invoices = render(outputs[-1])
+            results[mode] = (invoices, time.perf_counter() - start)
+    finally:
+        target.close()
+        for output in outputs:
+            shutil.rmtree(output)
+
+    print(f"{sizes['bills']} bills, {os.cpu_count()} CPUs\n")
+    print(f"{'mode':<9} | {'invoices':>8} | {'seconds':>8} | {'invoices/s':>10}")
+    for mode, (invoices, elapsed) in results.items():
+        print(f"{mode:<9} | {invoices:>8} | {elapsed:8.2f} | {invoices / elapsed:10.0f}")
+
+
+if __name__ == '__main__':
+    main()
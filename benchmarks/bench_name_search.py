@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Compare LIKE '%term%' patient name search with the name search index.
+
+Seeds a registry of --patients patients with realistic, heavily repeated
+names, builds the search tables from migrations/004_name_search.sql and
+times the first page of the patient search screen for several kinds of
+search term, once with the old LIKE predicate and once with
+name_search.name_filter().
+
+By default a SQLite stand-in is used, with the search tables filled from
+name_search.tokens()/trigrams() as the triggers would. Pass --odbc to build
+a scratch SQL Server database (dropped afterwards) and apply the real
+migrations, whose backfill indexes the seeded names.
+
+    python benchmarks/bench_name_search.py --patients 1000000
+    python benchmarks/bench_name_search.py --odbc --database HospitalBench
+"""
+
+import argparse
+import itertools
+import random
+import statistics
+import time
+
+from bench_query_plans import SQLiteTarget, SqlServerTarget, render
+import name_search
+
+FIRST_NAMES = [
+    "james", "mary", "john", "patricia", "robert", "jennifer", "michael", "linda", "william", "elizabeth",
+    "david", "barbara", "richard", "susan", "joseph", "jessica", "thomas", "sarah", "charles", "karen",
+    "ahmed", "fatima", "ali", "ayesha", "muhammad", "zainab", "hassan", "maryam", "omar", "sana",
+    "wei", "li", "jose", "maria", "juan", "ana", "raj", "priya", "yuki", "hana",
+]
+SURNAME_STEMS = [
+    "ander", "bal", "car", "del", "ed", "fitz", "gar", "har", "john", "kel", "lind", "mac", "mor", "nel",
+    "pat", "quin", "ros", "stan", "tay", "wil", "ab", "ben", "chau", "dar", "fer", "gon", "hus", "ibr",
+    "kha", "mal", "nak", "rah", "sid", "ter", "vas", "zam",
+]
+SURNAME_ENDINGS = [
+    "son", "ton", "ley", "man", "berg", "wood", "field", "sen", "ez", "ski", "well", "er", "ani", "ino",
+    "ova", "strom", "ayama", "hri", "dez", "kins",
+]
+
+# kind of search term -> term(rng), using a name that exists in the registry
+SEARCHES = {
+    'surname prefix': lambda rng: surname(rng)[:4],
+    'full name': lambda rng: f"{rng.choice(FIRST_NAMES)} {surname(rng)}",
+    'substring': lambda rng: surname(rng)[1:5],
+    'typo': lambda rng: typo(rng, surname(rng)),
+    'no match': lambda rng: "xqzw",
+}
+
+OLD_FILTER = ("first_name LIKE ? OR last_name LIKE ?", lambda term: (f"%{term}%", f"%{term}%"))
+
+SEARCH_PAGE = """
+    SELECT patient_id, first_name, last_name, dob, gender, contact_number
+    FROM Patient
+    WHERE {filter}
+    ORDER BY patient_id ASC {first_page}
+"""
+
+
+def surname(rng):
+    return rng.choice(SURNAME_STEMS) + rng.choice(SURNAME_ENDINGS)
+
+
+def typo(rng, word):
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + rng.choice("aeiourstln") + word[i + 1:]
+
+
+def patients(count, seed=7):
+    rng = random.Random(seed)
+    for i in range(count):
+        yield (rng.choice(FIRST_NAMES).title(), surname(rng).title(), "1980-01-01",
+               rng.choice("MF"), f"{3000000000 + i}")
+
+
+def insert(target, table, columns, rows, chunk=50000):
+    cursor = target.conn.cursor()
+    if target.dialect == 'tsql':
+        cursor.fast_executemany = True
+    marks = ", ".join("?" for _ in columns)
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, chunk))
+        if not batch:
+            break
+        cursor.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({marks})", batch)
+        target.conn.commit()
+
+
+class SQLiteNameTarget(SQLiteTarget):
+    def build_search_index(self):
+        """Fill the search tables from the seeded names, as the triggers would"""
+        self.conn.executescript("""
+            CREATE TABLE Name_Search_Token (entity_type TEXT, token TEXT COLLATE NOCASE, entity_id INT,
+                                            PRIMARY KEY (entity_type, token, entity_id)) WITHOUT ROWID;
+            CREATE TABLE Name_Search_Gram (entity_type TEXT, gram TEXT, entity_id INT,
+                                           PRIMARY KEY (entity_type, gram, entity_id)) WITHOUT ROWID;
+        """)
+        names = self.conn.execute("SELECT patient_id, first_name, last_name FROM Patient")
+        words = [(pid, name_search.tokens(f"{first} {last}")) for pid, first, last in names]
+        insert(self, "Name_Search_Token", ("entity_type", "token", "entity_id"),
+               ((name_search.PATIENT, word, pid) for pid, ws in words for word in ws))
+        insert(self, "Name_Search_Gram", ("entity_type", "gram", "entity_id"),
+               ((name_search.PATIENT, gram, pid) for pid, ws in words
+                for gram in set().union(*(name_search.trigrams(w) for w in ws))))
+        self.conn.execute("ANALYZE")
+        self.conn.commit()
+
+
+class SqlServerNameTarget(SqlServerTarget):
+    def build_search_index(self):
+        """Apply the migrations; 004 backfills the search tables"""
+        self.add_indexes()
+
+
+def time_searches(target, repeats, use_index):
+    """{search kind: (median seconds, rows on the first page)}"""
+    results = {}
+    for kind, term_fn in SEARCHES.items():
+        rng = random.Random(kind)
+        timings, rows = [], []
+        for _ in range(repeats):
+            term = term_fn(rng)
+            if use_index:
+                condition, params = name_search.name_filter("patient_id", term)
+            else:
+                condition, params = OLD_FILTER[0], OLD_FILTER[1](term)
+            sql = render(SEARCH_PAGE.replace("{filter}", condition), target.dialect)
+            start = time.perf_counter()
+            rows.append(len(target.run(sql, params)))
+            timings.append(time.perf_counter() - start)
+        results[kind] = (statistics.median(timings), statistics.median(rows))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--patients', type=int, default=1000000)
+    parser.add_argument('--repeats', type=int, default=10)
+    parser.add_argument('--odbc', action='store_true', help="Run against a scratch SQL Server database")
+    parser.add_argument('--server', default='localhost')
+    parser.add_argument('--database', default='HospitalBench')
+    args = parser.parse_args()
+
+    target = (SqlServerNameTarget if args.odbc else SQLiteNameTarget)(args)
+    try:
+        start = time.perf_counter()
+        insert(target, "Patient", ("first_name", "last_name", "dob", "gender", "contact_number"),
+               patients(args.patients))
+        print(f"Seeded {args.patients} patients in {time.perf_counter() - start:.1f}s")
+        start = time.perf_counter()
+        target.build_search_index()
+        print(f"Built the name search index in {time.perf_counter() - start:.1f}s")
+        before = time_searches(target, args.repeats, use_index=False)
+        after = time_searches(target, args.repeats, use_index=True)
+    finally:
+        target.close()
+
+    print(f"\n{'search':<16} | {'LIKE':>10} {'rows':>5} | {'index':>10} {'rows':>5} | {'speedup':>8}")
+    for kind in SEARCHES:
+        t_like, rows_like = before[kind]
+        t_index, rows_index = after[kind]
+        print(f"{kind:<16} | {t_like * 1000:8.2f}ms {rows_like:>5.0f} | {t_index * 1000:8.2f}ms {rows_index:>5.0f} | "
+              f"{t_like / t_index if t_index else float('inf'):7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
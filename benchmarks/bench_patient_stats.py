@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Show that the patient dashboard aggregate keeps memory flat as the Patient
+table grows, compared with the old fetch-everything-and-len() approach.
+
+Runs the real dashboard query from dashboard_metrics.py against a SQLite
+stand-in populated with synthetic patients.
+
+    python benchmarks/bench_patient_stats.py --sizes 10000 100000 300000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from dashboard_metrics import METRIC_QUERIES, patient_stats_params
+
+
+def populate(conn, rows):
+    conn.execute("DROP TABLE IF EXISTS Patient")
+    conn.execute("""
+        CREATE TABLE Patient (
+            patient_id INTEGER PRIMARY KEY, first_name TEXT, last_name TEXT, dob TEXT,
+            gender TEXT, contact_number TEXT, email TEXT, address TEXT, registered_on TEXT
+        )
+    """)
+    today = date.today()
+    rng = random.Random(42)
+
+    def gen():
+        for i in range(rows):
+            dob = today - timedelta(days=rng.randint(0, 95 * 365))
+            registered = today - timedelta(days=rng.randint(0, 5 * 365))
+            yield (f"First{i}", f"Last{i}", dob.isoformat(), rng.choice("MF"),
+                   f"{rng.randint(10**9, 10**10 - 1)}", f"patient{i}@example.com",
+                   f"{i} Example Street, Sample City", registered.isoformat())
+
+    conn.executemany("""
+        INSERT INTO Patient (first_name, last_name, dob, gender, contact_number, email, address, registered_on)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, gen())
+    conn.commit()
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def fetch_all(conn):
+    cursor = conn.execute("""
+        SELECT patient_id, first_name, last_name, dob, gender, contact_number, email, address
+        FROM Patient
+    """)
+    return len(cursor.fetchall())
+
+
+def aggregate(conn):
+    query, _, params_fn = METRIC_QUERIES['patient']
+    params = tuple(d.isoformat() for d in params_fn())
+    return conn.execute(query, params).fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 50000, 200000])
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.gettempdir(), 'hms_patient_stats_bench.sqlite')
+    conn = sqlite3.connect(db_path)
+    print(f"{'rows':>9} | {'fetchall+len':>24} | {'aggregate':>24}")
+    for size in args.sizes:
+        populate(conn, size)
+        total_a, t_a, peak_a = measure(lambda: fetch_all(conn))
+        total_b, t_b, peak_b = measure(lambda: aggregate(conn))
+        assert total_a == total_b == size
+        print(f"{size:>9} | {t_a * 1000:8.1f}ms {peak_a / 1024 / 1024:9.2f} MiB | "
+              f"{t_b * 1000:8.1f}ms {peak_b / 1024 / 1024:9.3f} MiB")
+    conn.close()
+    os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Time the application's hot queries before and after the index migrations.
+
+Seeds a synthetic hospital dataset, runs each query from HOT_QUERIES with
+only the primary keys in place, applies the indexes and runs them again,
+reporting the median time and whether each plan seeks or scans.
+
+By default a SQLite stand-in is used, with the key columns of every index
+in migrations/ recreated on it. Pass --odbc to build a
+scratch SQL Server database (dropped afterwards) from
+HospitalManagementSystem.sql and apply the real migrations.
+
+    python benchmarks/bench_query_plans.py --appointments 500000
+    python benchmarks/bench_query_plans.py --odbc --database HospitalBench
+"""
+
+import argparse
+import os
+import random
+import re
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from db_connect import split_sql_batches
+
+FIRST_PAGE = {'tsql': "OFFSET 0 ROWS FETCH NEXT 100 ROWS ONLY", 'sqlite': "LIMIT 100"}
+AS_DATE = {'tsql': "CAST({} AS DATE)", 'sqlite': "date({})"}
+
+# name -> (query, params(rng, sizes)); {first_page} and {date:column} are
+# filled in per dialect
+HOT_QUERIES = {
+    'doctor schedule (GetDoctorSchedule)': (
+        """
+        SELECT a.appointment_id, a.appointment_date, a.status, p.first_name, p.last_name, p.contact_number
+        FROM Appointment a
+        JOIN Patient p ON a.patient_id = p.patient_id
+        WHERE a.doctor_id = ?
+        AND a.appointment_date >= ? AND a.appointment_date < ?
+        ORDER BY a.appointment_date
+        """,
+        lambda rng, sizes: (rng.randint(1, sizes['doctors']), '2024-03-01 00:00:00', '2024-03-08 00:00:00'),
+    ),
+    'double booking check': (
+        """
+        SELECT COUNT(*) FROM Appointment
+        WHERE doctor_id = ? AND appointment_date = ? AND status != 'cancelled'
+        """,
+        lambda rng, sizes: (rng.randint(1, sizes['doctors']), '2024-03-04 10:00:00'),
+    ),
+    'appointments by status': (
+        """
+        SELECT appointment_id, appointment_date, status FROM Appointment
+        WHERE status = ?
+        ORDER BY appointment_date DESC {first_page}
+        """,
+        lambda rng, sizes: ('cancelled',),
+    ),
+    'patient appointments': (
+        "SELECT appointment_id, appointment_date, status FROM Appointment WHERE patient_id = ?",
+        lambda rng, sizes: (rng.randint(1, sizes['patients']),),
+    ),
+    'patient history (GetPatientHistory)': (
+        """
+        SELECT record_id, visit_date FROM Medical_Record
+        WHERE patient_id = ?
+        ORDER BY visit_date DESC
+        """,
+        lambda rng, sizes: (rng.randint(1, sizes['patients']),),
+    ),
+    'admitted patients': (
+        """
+        SELECT admission_id, patient_id, room_number, bed_number, admission_date, doctor_id
+        FROM Admission
+        WHERE discharge_date IS NULL
+        ORDER BY admission_date DESC {first_page}
+        """,
+        lambda rng, sizes: (),
+    ),
+    'patient bills': (
+        "SELECT bill_id, billing_date FROM Billing WHERE patient_id = ? ORDER BY billing_date DESC",
+        lambda rng, sizes: (rng.randint(1, sizes['patients']),),
+    ),
+    'bill list first page': (
+        """
+        SELECT b.bill_id, p.first_name, p.last_name, b.billing_date, b.total_amount, b.paid_amount, b.admission_id
+        FROM Billing b
+        JOIN Patient p ON b.patient_id = p.patient_id
+        ORDER BY b.billing_date DESC {first_page}
+        """,
+        lambda rng, sizes: (),
+    ),
+    'bill items': (
+        "SELECT description, amount FROM Bill_Item WHERE bill_id = ?",
+        lambda rng, sizes: (rng.randint(1, sizes['bills']),),
+    ),
+    'free beds': (
+        "SELECT COUNT(*) FROM Bed WHERE is_occupied = 0",
+        lambda rng, sizes: (),
+    ),
+}
+
+
+def render(query, dialect):
+    query = re.sub(r"\{date:([\w.]+)\}", lambda m: AS_DATE[dialect].format(m.group(1)), query)
+    return query.replace("{first_page}", FIRST_PAGE[dialect])
+
+
+def dataset_sizes(appointments):
+    patients = max(1000, appointments // 10)
+    admissions = patients // 2
+    return {
+        'appointments': appointments,
+        'patients': patients,
+        'doctors': max(50, appointments // 2000),
+        'records': appointments // 2,
+        'rooms': 250,
+        'admissions': admissions,
+        'bills': admissions,
+    }
+
+
+def generate(sizes, seed=42):
+    """Yield (table, columns, rows) for every table in insert order"""
+    rng = random.Random(seed)
+    start = datetime(2023, 1, 1)
+    statuses = ['scheduled'] * 3 + ['completed'] * 6 + ['cancelled']
+
+    def day(spread=730):
+        return (start + timedelta(days=rng.randint(0, spread))).strftime('%Y-%m-%d')
+
+    yield ('Patient', ('first_name', 'last_name', 'dob', 'gender', 'contact_number'),
+           ((f"First{i}", f"Last{i}", day(30000), rng.choice("MF"), f"{3000000000 + i}")
+            for i in range(sizes['patients'])))
+    yield ('Doctor', ('first_name', 'last_name', 'specialization'),
+           ((f"Doc{i}", f"Tor{i}", "General") for i in range(sizes['doctors'])))
+
+    def appointments():
+        # A doctor has one non-cancelled appointment per time slot, as the
+        # unique index of migration 012 requires; later clashes are cancelled
+        booked = set()
+        for _ in range(sizes['appointments']):
+            patient_id, doctor_id = rng.randint(1, sizes['patients']), rng.randint(1, sizes['doctors'])
+            when, status = f"{day()} {rng.randint(8, 17):02d}:00:00", rng.choice(statuses)
+            if status != 'cancelled':
+                if (doctor_id, when) in booked:
+                    status = 'cancelled'
+                else:
+                    booked.add((doctor_id, when))
+            yield patient_id, doctor_id, when, status
+
+    yield ('Appointment', ('patient_id', 'doctor_id', 'appointment_date', 'status'), appointments())
+    yield ('Medical_Record', ('patient_id', 'doctor_id', 'visit_date', 'diagnosis'),
+           ((rng.randint(1, sizes['patients']), rng.randint(1, sizes['doctors']), day(), "Checkup")
+            for _ in range(sizes['records'])))
+    yield ('Room', ('room_number', 'room_type', 'bed_count'),
+           ((f"R{i}", "General", 4) for i in range(sizes['rooms'])))
+    yield ('Bed', ('room_number', 'bed_number', 'is_occupied'),
+           ((f"R{i}", f"B{b}", int(rng.random() < 0.7)) for i in range(sizes['rooms']) for b in range(4)))
+    yield ('Admission', ('patient_id', 'room_number', 'bed_number', 'doctor_id', 'admission_date', 'discharge_date'),
+           ((rng.randint(1, sizes['patients']), f"R{rng.randrange(sizes['rooms'])}", f"B{rng.randrange(4)}",
+             rng.randint(1, sizes['doctors']), day(), None if rng.random() < 0.02 else day())
+            for _ in range(sizes['admissions'])))
+    yield ('Billing', ('patient_id', 'admission_id', 'total_amount', 'paid_amount', 'billing_date'),
+           ((rng.randint(1, sizes['patients']), i + 1, 500, rng.choice([0, 250, 500]), day())
+            for i in range(sizes['bills'])))
+    yield ('Bill_Item', ('bill_id', 'description', 'amount'),
+           ((bill, f"Item {n}", 125) for bill in range(1, sizes['bills'] + 1) for n in range(4)))
+
+
+def migration_indexes(migrations_dir):
+    """(name, table, key columns) of each index in the migration files"""
+    indexes = []
+    for name in sorted(os.listdir(migrations_dir)):
+        if name.endswith('.sql'):
+            with open(os.path.join(migrations_dir, name), 'r', encoding='utf-8') as f:
+                sql = f.read()
+            indexes += re.findall(r"CREATE NONCLUSTERED INDEX (\w+) ON (\w+) \(([^)]*)\)", sql)
+    return indexes
+
+
+class SQLiteTarget:
+    dialect = 'sqlite'
+
+    def __init__(self, args):
+        self.path = os.path.join(tempfile.gettempdir(), 'hms_query_plans_bench.sqlite')
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript("""
+            CREATE TABLE Patient (patient_id INTEGER PRIMARY KEY, first_name TEXT, last_name TEXT,
+                                  dob TEXT, gender TEXT, contact_number TEXT, registered_on TEXT);
+            CREATE TABLE Doctor (doctor_id INTEGER PRIMARY KEY, first_name TEXT, last_name TEXT, specialization TEXT);
+            CREATE TABLE Appointment (appointment_id INTEGER PRIMARY KEY, patient_id INT, doctor_id INT,
+                                      appointment_date TEXT, status TEXT, remarks TEXT);
+            CREATE TABLE Medical_Record (record_id INTEGER PRIMARY KEY, patient_id INT, doctor_id INT,
+                                         visit_date TEXT, diagnosis TEXT, notes TEXT);
+            CREATE TABLE Room (room_number TEXT PRIMARY KEY, room_type TEXT, bed_count INT);
+            CREATE TABLE Bed (room_number TEXT, bed_number TEXT, is_occupied INT,
+                              PRIMARY KEY (room_number, bed_number));
+            CREATE TABLE Admission (admission_id INTEGER PRIMARY KEY, patient_id INT, room_number TEXT,
+                                    bed_number TEXT, doctor_id INT, admission_date TEXT, discharge_date TEXT);
+            CREATE TABLE Billing (bill_id INTEGER PRIMARY KEY, patient_id INT, admission_id INT,
+                                  total_amount REAL, paid_amount REAL, billing_date TEXT);
+            CREATE TABLE Bill_Item (item_id INTEGER PRIMARY KEY, bill_id INT, description TEXT, amount REAL);
+        """)
+
+    def seed(self, sizes):
+        for table, columns, rows in generate(sizes):
+            marks = ", ".join("?" for _ in columns)
+            self.conn.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({marks})", rows)
+        self.conn.commit()
+
+    def add_indexes(self):
+        for name, table, columns in migration_indexes(os.path.join(ROOT, 'migrations')):
+            # Skip indexes on tables or columns the stand-in does not have
+            # (Name_Search_Token unless a benchmark creates it, row_version)
+            existing = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+            if all(column.split()[0] in existing for column in columns.split(',')):
+                self.conn.execute(f"CREATE INDEX {name} ON {table} ({columns})")
+        self.conn.execute("ANALYZE")
+        self.conn.commit()
+
+    def run(self, query, params):
+        return self.conn.execute(query, params).fetchall()
+
+    def plan(self, query, params):
+        steps = [row[-1] for row in self.conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+        return "; ".join(steps)
+
+    def close(self):
+        self.conn.close()
+        os.remove(self.path)
+
+
+class SqlServerTarget:
+    dialect = 'tsql'
+
+    def __init__(self, args):
+        import pyodbc
+        from db_connect import create_database, database_exists
+        self.pyodbc = pyodbc
+        self.server = args.server
+        self.database = args.database
+        if database_exists(self.server, self.database):
+            raise SystemExit(f"Database '{self.database}' already exists; pass a scratch --database name")
+        if not create_database(self.server, self.database):
+            raise SystemExit("Could not create the scratch database")
+        self.conn = pyodbc.connect(
+            f"DRIVER={{ODBC Driver 17 for SQL Server}};SERVER={self.server};DATABASE={self.database};Trusted_Connection=yes;"
+        )
+        with open(os.path.join(ROOT, 'HospitalManagementSystem.sql'), 'r', encoding='utf-8') as f:
+            # Never let the schema script switch to the real database
+            script = re.sub(r"^\s*USE\s+\w+\s*;?\s*$", "", f.read(), flags=re.MULTILINE | re.IGNORECASE)
+        cursor = self.conn.cursor()
+        for batch in split_sql_batches(script):
+            cursor.execute(batch)
+        self.conn.commit()
+
+    def seed(self, sizes):
+        cursor = self.conn.cursor()
+        cursor.fast_executemany = True
+        # Per-row triggers would turn seeding into an O(n^2) job
+        cursor.execute("DISABLE TRIGGER ALL ON Appointment; DISABLE TRIGGER ALL ON Admission;")
+        for table, columns, rows in generate(sizes):
+            marks = ", ".join("?" for _ in columns)
+            rows = list(rows)
+            for start in range(0, len(rows), 50000):
+                cursor.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({marks})",
+                                   rows[start:start + 50000])
+            self.conn.commit()
+        cursor.execute("ENABLE TRIGGER ALL ON Appointment; ENABLE TRIGGER ALL ON Admission;")
+        cursor.execute("EXEC sp_updatestats")
+        self.conn.commit()
+
+    def add_indexes(self):
+        from db_connect import apply_migrations
+        apply_migrations(self.server, self.database, os.path.join(ROOT, 'migrations'))
+        self.conn.cursor().execute("EXEC sp_updatestats")
+        self.conn.commit()
+
+    def run(self, query, params):
+        cursor = self.conn.cursor()
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+    def plan(self, query, params):
+        """Physical operators of the actual plan, from SET STATISTICS XML"""
+        cursor = self.conn.cursor()
+        cursor.execute("SET STATISTICS XML ON")
+        try:
+            cursor.execute(query, params)
+            cursor.fetchall()
+            plans = []
+            while cursor.nextset():
+                row = cursor.fetchone()
+                if row and isinstance(row[0], str) and row[0].startswith("<ShowPlanXML"):
+                    plans.append(row[0])
+        finally:
+            cursor.execute("SET STATISTICS XML OFF")
+        ops = []
+        for xml in plans:
+            for op, obj in re.findall(r'PhysicalOp="([^"]+)"[^>]*>.*?<Object [^>]*Index="\[([^\]]+)\]"', xml, re.S):
+                if "Seek" in op or "Scan" in op:
+                    ops.append(f"{op} {obj}")
+        return "; ".join(dict.fromkeys(ops)) or "(no index access)"
+
+    def close(self):
+        self.conn.close()
+        master = self.pyodbc.connect(
+            f"DRIVER={{ODBC Driver 17 for SQL Server}};SERVER={self.server};DATABASE=master;Trusted_Connection=yes;",
+            autocommit=True)
+        master.cursor().execute(f"ALTER DATABASE [{self.database}] SET SINGLE_USER WITH ROLLBACK IMMEDIATE; "
+                                f"DROP DATABASE [{self.database}]")
+        master.close()
+
+
+def time_queries(target, sizes, repeats):
+    results = {}
+    for name, (query, params_fn) in HOT_QUERIES.items():
+        sql = render(query, target.dialect)
+        rng = random.Random(name)
+        timings = []
+        for _ in range(repeats):
+            params = params_fn(rng, sizes)
+            start = time.perf_counter()
+            target.run(sql, params)
+            timings.append(time.perf_counter() - start)
+        results[name] = (statistics.median(timings), target.plan(sql, params_fn(rng, sizes)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--appointments', type=int, default=200000,
+                        help="Appointment rows to seed; other tables scale from this")
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--odbc', action='store_true', help="Run against a scratch SQL Server database")
+    parser.add_argument('--server', default='localhost')
+    parser.add_argument('--database', default='HospitalBench')
+    parser.add_argument('--show-plans', action='store_true')
+    args = parser.parse_args()
+
+    sizes = dataset_sizes(args.appointments)
+    target = (SqlServerTarget if args.odbc else SQLiteTarget)(args)
+    try:
+        start = time.perf_counter()
+        target.seed(sizes)
+        print(f"Seeded {', '.join(f'{v} {k}' for k, v in sizes.items())} "
+              f"in {time.perf_counter() - start:.1f}s")
+        before = time_queries(target, sizes, args.repeats)
+        target.add_indexes()
+        after = time_queries(target, sizes, args.repeats)
+    finally:
+        target.close()
+
+    print(f"\n{'query':<38} | {'before':>10} | {'after':>10} | {'speedup':>8}")
+    for name in HOT_QUERIES:
+        t_before, plan_before = before[name]
+        t_after, plan_after = after[name]
+        print(f"{name:<38} | {t_before * 1000:8.2f}ms | {t_after * 1000:8.2f}ms | "
+              f"{t_before / t_after if t_after else float('inf'):7.1f}x")
+        if args.show_plans:
+            print(f"    before: {plan_before}\n    after:  {plan_after}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Time bulk appointment status changes against one UPDATE per appointment.
+
+Builds a scratch SQL Server database (dropped afterwards) from
+HospitalManagementSystem.sql and the migrations, seeds --appointments
+appointments and then, for each --rows size, adds that many scheduled
+appointments for each of three operations:
+
+  ids     a list of appointment IDs, as checked in the manage view
+  doctor  one doctor's appointments in a time range (called in sick)
+  day     every appointment of one day (closing out the clinic)
+
+Each operation is run twice on its own fresh rows:
+
+  per-row  UPDATE ... WHERE appointment_id = ? and a commit per appointment,
+           as the cancel and complete buttons used to work
+  bulk     db_connect.transition_appointments(): one
+           TransitionAppointmentStatus call (migration 013), which also
+           writes the audit rows
+
+Reports the time per operation and checks that every appointment changed
+and, for bulk, that every change was audited.
+There is no SQLite stand-in: the procedure and its OUTPUT clause are SQL Server's.
+
+    python benchmarks/bench_status_transitions.py --rows 1000,5000,20000
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from bench_query_plans import SqlServerTarget, dataset_sizes
+from db_connect import day_bounds, transition_appointments
+
+# Far from the seeded appointments; each run gets days of its own after it
+FIRST_DAY = datetime(2031, 1, 1)
+OPERATIONS = ('ids', 'doctor', 'day')
+
+
+def block_rows(start, count, doctors, spacing, patients):
+    """count (patient_id, doctor_id, appointment_date) rows from start, spacing minutes apart per doctor"""
+    return [(1 + i % patients, 1 + i % doctors, start + timedelta(minutes=spacing * (i // doctors)))
+            for i in range(count)]
+
+
+class TransitionTarget(SqlServerTarget):
+    def add_block(self, operation, start, count, sizes):
+        """Insert the scheduled appointments for one run at midnight start.
+
+        Returns (transition scope, first free midnight after the block).
+        """
+        if operation == 'doctor':
+            rows = block_rows(start, count, 1, 5, sizes['patients'])
+            scope = {'doctor_id': 1, 'start': start, 'end': rows[-1][2] + timedelta(minutes=5)}
+        else:
+            # A whole day's worth, spread over every doctor
+            rows = block_rows(start, count, sizes['doctors'], max(1, 1440 * sizes['doctors'] // count // 2),
+                              sizes['patients'])
+            scope = dict(zip(('start', 'end'), day_bounds(start)))
+        cursor = self.conn.cursor()
+        cursor.fast_executemany = True
+        cursor.executemany("INSERT INTO Appointment (patient_id, doctor_id, appointment_date, status) "
+                           "VALUES (?, ?, ?, 'scheduled')", rows)
+        self.conn.commit()
+        if operation == 'ids':
+            cursor.execute("SELECT appointment_id FROM Appointment WHERE appointment_date >= ? AND appointment_date < ?",
+                           (scope['start'], scope['end']))
+            scope = {'appointment_ids': [row[0] for row in cursor.fetchall()]}
+        cursor.close()
+        last = rows[-1][2]
+        return scope, datetime(last.year, last.month, last.day) + timedelta(days=1)
+
+    def ids_in_scope(self, scope):
+        """The scheduled appointments a scope selects, as the per-row loop must find them first"""
+        if 'appointment_ids' in scope:
+            return scope['appointment_ids']
+        cursor = self.conn.cursor()
+        query = "SELECT appointment_id FROM Appointment WHERE status = 'scheduled' AND appointment_date >= ? " \
+                "AND appointment_date < ?"
+        params = [scope['start'], scope['end']]
+        if 'doctor_id' in scope:
+            query += " AND doctor_id = ?"
+            params.append(scope['doctor_id'])
+        cursor.execute(query, params)
+        ids = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+        return ids
+
+    def per_row(self, scope):
+        ids = self.ids_in_scope(scope)
+        cursor = self.conn.cursor()
+        for appointment_id in ids:
+            cursor.execute("UPDATE Appointment SET status='cancelled' WHERE appointment_id=?", (appointment_id,))
+            self.conn.commit()
+        cursor.close()
+        return len(ids)
+
+    def bulk(self, scope):
+        return transition_appointments('cancelled', changed_by='bench', conn=self.conn, **scope)
+
+    def audited(self):
+        """Appointments recorded by the latest status change"""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM Appointment_Status_Change_Item "
+                       "WHERE change_id = (SELECT MAX(change_id) FROM Appointment_Status_Change)")
+        count = cursor.fetchone()[0]
+        cursor.close()
+        return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', default='1000,5000,20000',
+                        help="Comma-separated appointments per operation, one run each")
+    parser.add_argument('--appointments', type=int, default=500000, help="Appointments seeded beforehand")
+    parser.add_argument('--server', default='localhost')
+    parser.add_argument('--database', default='HospitalBench')
+    args = parser.parse_args()
+
+    sizes = dataset_sizes(args.appointments)
+    target = TransitionTarget(args)
+    results = []
+    try:
+        target.seed(sizes)
+        target.add_indexes()
+        start = FIRST_DAY
+        for count in (int(size) for size in args.rows.split(',')):
+            for operation in OPERATIONS:
+                timings = {}
+                for mode in ('per-row', 'bulk'):
+                    scope, start = target.add_block(operation, start, count, sizes)
+                    began = time.perf_counter()
+                    changed = target.per_row(scope) if mode == 'per-row' else target.bulk(scope)
+                    timings[mode] = (time.perf_counter() - began, changed)
+                audited = target.audited()
+                results.append((count, operation, timings, audited))
+    finally:
+        target.close()
+
+    print(f"{'rows':>6} | {'operation':<9} | {'per-row':>10} | {'bulk':>9} | {'speedup':>8} | {'changed':>15} | "
+          f"{'audited':>7}")
+    for count, operation, timings, audited in results:
+        (slow, slow_changed), (fast, fast_changed) = timings['per-row'], timings['bulk']
+        print(f"{count:>6} | {operation:<9} | {slow * 1000:8.1f}ms | {fast * 1000:7.1f}ms | "
+              f"{slow / fast if fast else float('inf'):7.1f}x | {slow_changed:>7}/{fast_changed:<7} | {audited:>7}")
+        if fast_changed != count or audited != count:
+            print(f"    expected {count} appointments changed and audited")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from db_connect import borrowed_connection, post_payment
+from invoices import Invoice
+
+# The bill header once, then its items: two result sets from one round trip
+# instead of a Billing x Bill_Item join repeating the header on every item
+BILL_DETAIL_QUERY = """
+    SET NOCOUNT ON;
+    SELECT b.bill_id, p.first_name, p.last_name, b.admission_id, b.billing_date,
+           b.total_amount, b.paid_amount
+    FROM Billing b
+    LEFT JOIN Patient p ON b.patient_id = p.patient_id
+    WHERE b.bill_id = ?;
+    SELECT description, amount
+    FROM Bill_Item
+    WHERE bill_id = ?
+    ORDER BY item_id;
+"""
+
+
+def fetch_bill(bill_id, conn=None):
+    """Return the Invoice for bill_id, or None if there is no such bill.
+
+    items is a tuple of (description, amount), so a cached Invoice cannot
+    be changed by whoever reads it.
+    """
+    with borrowed_connection(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(BILL_DETAIL_QUERY, (bill_id, bill_id))
+            header = cursor.fetchone()
+            if header is None:
+                return None
+            cursor.nextset()
+            items = tuple((description, amount) for description, amount in cursor.fetchall()
+                          if description and amount is not None)
+            bill_id, first_name, last_name, admission_id, billing_date, total, paid = header
+            name = " ".join(part for part in (first_name, last_name) if part)
+            return Invoice(bill_id, name, admission_id, billing_date, total or 0, paid or 0, items)
+        finally:
+            cursor.close()
+
+
+class BillDetails:
+    """LRU cache of recently viewed bills, shared by the details and print screens.
+
+    Entries expire after ttl seconds so changes made from another workstation
+    show up, and record_payment() drops the paid bill straight away.
+    """
+
+    def __init__(self, maxsize=128, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._bills = OrderedDict()  # bill_id -> (loaded at, Invoice), oldest first
+        self._generation = 0         # bumped by invalidate()
+        self._lock = threading.Lock()
+
+    def get(self, bill_id):
+        """The bill's Invoice, from the cache when fresh; None if it does not exist"""
+        with self._lock:
+            entry = self._bills.get(bill_id)
+            if entry and time.monotonic() - entry[0] < self.ttl:
+                self._bills.move_to_end(bill_id)
+                return entry[1]
+            generation = self._generation
+        bill = fetch_bill(bill_id)
+        with self._lock:
+            # A bill read while a payment was being recorded may be stale
+            if bill is not None and generation == self._generation:
+                self._bills[bill_id] = (time.monotonic(), bill)
+                self._bills.move_to_end(bill_id)
+                while len(self._bills) > self.maxsize:
+                    self._bills.popitem(last=False)
+        return bill
+
+    def invalidate(self, bill_id=None):
+        """Drop one bill, or every bill when bill_id is None"""
+        with self._lock:
+            self._generation += 1
+            if bill_id is None:
+                self._bills.clear()
+            else:
+                self._bills.pop(bill_id, None)
+
+    def record_payment(self, bill_id, amount, method='Cash', reference=None):
+        """Post a payment against the bill, drop it from the cache and return the payment_id.
+
+        Raises ValueError if amount is not positive. PostPayment refuses a
+        bill that does not exist or a payment above its outstanding balance.
+        """
+        amount = Decimal(str(amount))
+        if amount <= 0:
+            raise ValueError("Payment amount must be positive")
+        try:
+            return post_payment(bill_id, amount, method, reference)
+        finally:
+            self.invalidate(bill_id)
+
+
+bill_details = BillDetails()
@@ -2,13 +2,41 @@ import customtkinter as ctk
 from tkinter import messagebox
 from datetime import datetime
 from decimal import Decimal
-from db_connect import connect_db
+from db_connect import connect_db, create_bill, KeysetPaginator
+from query_executor import executor
+from widgets import Spinner, LookupCombobox, export_records
+from lookups import patient_lookup, format_patient, open_admission_lookup, format_admission
+from invoices import invoice_html, render_invoices
+from bill_details import bill_details
+from name_search import name_filter
+from receivables import AGING_BUCKETS, aging_summary, top_balances, patient_aging
 import tkinter as tk
 from tkinter import ttk
 from tkinter import filedialog
 import os
 from datetime import datetime
 
+# Bill list columns: bill_id, patient_name, billing_date, total_amount,
+# paid_amount, status, admission_id, then {extra}
+BILL_LIST_SELECT = """
+    SELECT b.bill_id, 
+           p.first_name + ' ' + p.last_name as patient_name,
+           b.billing_date,
+           b.total_amount,
+           b.paid_amount,
+           b.payment_status as status,
+           b.admission_id{extra}
+    FROM Billing b
+    JOIN Patient p ON b.patient_id = p.patient_id
+"""
+
+# How often the bill list picks up bills created or paid elsewhere
+BILL_REFRESH_MS = 10000
+
+# Patients listed on the Receivables tab
+TOP_BALANCES = 100
+
+
 class BillingModule:
     def __init__(self, parent_frame, current_user):
         self.parent = parent_frame
@@ -30,16 +58,17 @@ class BillingModule:
         # Create tabs
         self.tabview.add("Generate Bill")
         self.tabview.add("View Bills")
+        self.tabview.add("Receivables")
         
         # Setup content for each tab
         self.setup_bill_generation(self.tabview.tab("Generate Bill"))
         self.setup_bill_items(self.tabview.tab("Generate Bill"))
         self.setup_bill_viewing(self.tabview.tab("View Bills"))
+        self.setup_receivables(self.tabview.tab("Receivables"))
         
         # Load initial data
-        self.load_patients()
-        self.load_admissions()
         self.load_bills()
+        self.load_receivables()
 
     def create_header(self):
         header_frame = ctk.CTkFrame(self.container)
@@ -48,6 +77,15 @@ class BillingModule:
         title_label = ctk.CTkLabel(header_frame, text="💰 Billing Management", 
                                   font=ctk.CTkFont(size=24, weight="bold"))
         title_label.pack(side="left", padx=20, pady=10)
+        
+        ctk.CTkButton(header_frame, text="📤 Export Items", width=120,
+                      command=lambda: export_records(self.container, "bill_items", "bill items")
+                      ).pack(side="right", padx=(5, 20), pady=10)
+        ctk.CTkButton(header_frame, text="📤 Export Bills", width=120,
+                      command=lambda: export_records(self.container, "bills")
+                      ).pack(side="right", padx=5, pady=10)
+        ctk.CTkButton(header_frame, text="🧾 Batch Invoices", width=120,
+                      command=self.show_batch_invoices).pack(side="right", padx=5, pady=10)
 
     def create_content_area(self):
         # Create two columns
@@ -74,8 +112,10 @@ class BillingModule:
         patient_frame.pack(fill="x", padx=10, pady=5)
         
         ctk.CTkLabel(patient_frame, text="Select Patient:").pack(side="left", padx=5)
-        self.patient_var = ctk.StringVar()
-        self.patient_dropdown = ctk.CTkOptionMenu(patient_frame, variable=self.patient_var)
+        self.patient_dropdown = LookupCombobox(patient_frame, patient_lookup, format_patient,
+                                               placeholder_text="Type a name or ID",
+                                               command=lambda patient_id: self.admission_dropdown.clear(),
+                                               error_message="Failed to load patients")
         self.patient_dropdown.pack(side="left", padx=5, fill="x", expand=True)
         
         # Admission selection
@@ -83,8 +123,11 @@ class BillingModule:
         admission_frame.pack(fill="x", padx=10, pady=5)
         
         ctk.CTkLabel(admission_frame, text="Select Admission:").pack(side="left", padx=5)
-        self.admission_var = ctk.StringVar()
-        self.admission_dropdown = ctk.CTkOptionMenu(admission_frame, variable=self.admission_var)
+        # Only the picked patient's admissions, if a patient is picked
+        self.admission_dropdown = LookupCombobox(
+            admission_frame, lambda term: open_admission_lookup(term, self.patient_dropdown.get()),
+            format_admission, placeholder_text="Type a name, admission or patient ID",
+            error_message="Failed to load admissions")
         self.admission_dropdown.pack(side="left", padx=5, fill="x", expand=True)
         
         # Bill item entry
@@ -152,39 +195,38 @@ class BillingModule:
         clear_btn = ctk.CTkButton(search_frame, text="Clear", command=self.clear_search)
         clear_btn.pack(side="left", padx=5)
         
+        self.bills_spinner = Spinner(search_frame, width=120)
+        self.bills_spinner.pack(side="left", padx=5)
+        
         # Create scrollable frame for bills
         self.bills_frame = ctk.CTkScrollableFrame(parent)
         self.bills_frame.pack(fill="both", expand=True, padx=10, pady=5)
         
-        # Initialize bills list
-        self.bill_widgets = []
+        # Initialize bills list: cards by bill_id, and the bill_ids in display order
+        self.bill_cards = {}
+        self.bill_order = []
+        self.bill_pages = None
+        self.bill_filter = ([], ())
+        self.bills_watermark = None  # Billing.row_version up to which the list is current
+        self.bill_refresh_job = None
+        self.load_more_btn = ctk.CTkButton(self.bills_frame, text="Load more", command=self.load_more_bills)
+        self.bills_spinner.disables.append(self.load_more_btn)
 
     def create_bill_card(self, bill_data):
-        # Create a frame for each bill
+        # Create a frame for each bill; the caller packs it
         bill_frame = ctk.CTkFrame(self.bills_frame)
-        bill_frame.pack(fill="x", padx=5, pady=5)
         
         # Left side - Bill information
         info_frame = ctk.CTkFrame(bill_frame, fg_color="transparent")
         info_frame.pack(side="left", fill="x", expand=True, padx=10, pady=5)
         
         # Bill header
-        header_text = f"Bill #{bill_data[0]} - {bill_data[1]}"
-        header_label = ctk.CTkLabel(info_frame, text=header_text,
-                                  font=ctk.CTkFont(size=16, weight="bold"))
-        header_label.pack(anchor="w", pady=(0, 5))
+        bill_frame.header_label = ctk.CTkLabel(info_frame, font=ctk.CTkFont(size=16, weight="bold"))
+        bill_frame.header_label.pack(anchor="w", pady=(0, 5))
         
         # Bill details
-        details_text = f"""
-        Admission ID: {bill_data[6]}
-        Date: {bill_data[2]}
-        Total Amount: ${bill_data[3]:.2f}
-        Paid Amount: ${bill_data[4]:.2f}
-        Status: {bill_data[5]}
-        """
-        details_label = ctk.CTkLabel(info_frame, text=details_text,
-                                   font=ctk.CTkFont(size=12))
-        details_label.pack(anchor="w")
+        bill_frame.details_label = ctk.CTkLabel(info_frame, font=ctk.CTkFont(size=12))
+        bill_frame.details_label.pack(anchor="w")
         
         # Right side - Action buttons
         button_frame = ctk.CTkFrame(bill_frame, fg_color="transparent")
@@ -198,123 +240,252 @@ class BillingModule:
                                  command=lambda: self.print_bill(bill_data[0]))
         print_btn.pack(side="left", padx=5)
         
+        self.update_bill_card(bill_frame, bill_data)
         return bill_frame
 
-    def load_patients(self):
-        try:
-            conn = connect_db()
-            if conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT patient_id, first_name, last_name FROM Patient")
-                patients = cursor.fetchall()
-                
-                patient_options = [f"{p[0]} - {p[1]} {p[2]}" for p in patients]
-                self.patient_dropdown.configure(values=patient_options)
-                if patient_options:
-                    self.patient_dropdown.set(patient_options[0])
-                cursor.close()
-                conn.close()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load patients: {str(e)}")
+    def update_bill_card(self, bill_frame, bill_data):
+        """Show bill_data on an existing card"""
+        bill_frame.bill = bill_data
+        bill_frame.header_label.configure(text=f"Bill #{bill_data[0]} - {bill_data[1]}")
+        bill_frame.details_label.configure(text=f"""
+        Admission ID: {bill_data[6]}
+        Date: {bill_data[2]}
+        Total Amount: ${bill_data[3]:.2f}
+        Paid Amount: ${bill_data[4]:.2f}
+        Status: {bill_data[5]}
+        """)
+
+    def load_bills(self, where=(), params=()):
+        self.bill_filter = (list(where), tuple(params))
+        self.bill_pages = KeysetPaginator(BILL_LIST_SELECT.format(extra=""),
+            order_by=[("b.billing_date", "DESC", 2), ("b.bill_id", "DESC", 0)],
+            where=where, params=params)
+        
+        # The watermark is read before the first page, so the next refresh
+        # re-reads anything that changes while the page loads
+        pages = self.bill_pages
+        executor.submit(lambda: (self.fetch_bill_changes(None)[0], pages.load_more()),
+                        key="bills", owner=self.bills_frame, indicator=self.bills_spinner,
+                        on_success=lambda result: self.show_bills(pages, result[1], watermark=result[0]),
+                        on_error=lambda e: messagebox.showerror("Error", f"Failed to load bills: {str(e)}"))
+
+    def load_more_bills(self):
+        """Append the next page of bills to the list, fetched in the background"""
+        pages = self.bill_pages
+        executor.submit(pages.load_more, key="bills", owner=self.bills_frame,
+                        indicator=self.bills_spinner,
+                        on_success=lambda bills: self.show_bills(pages, bills),
+                        on_error=lambda e: messagebox.showerror("Error", f"Failed to load bills: {str(e)}"))
 
-    def load_admissions(self):
+    def show_bills(self, pages, bills, watermark=None):
+        """Append a page of bills; with a watermark the page starts a new list"""
+        if pages is not self.bill_pages:
+            return  # a newer search replaced this list
+        
+        self.load_more_btn.pack_forget()
+        if watermark is not None:
+            # Keep the cards of bills that are also in the new list
+            self.bills_watermark = watermark
+            keep = {bill[0] for bill in bills}
+            for bill_id in self.bill_order:
+                if bill_id in keep:
+                    self.bill_cards[bill_id].pack_forget()
+                else:
+                    self.bill_cards.pop(bill_id).destroy()
+            self.bill_order = []
+        
+        for bill in bills:
+            card = self.bill_cards.get(bill[0])
+            if card is None:
+                card = self.bill_cards[bill[0]] = self.create_bill_card(bill)
+            else:
+                self.update_bill_card(card, bill)
+                if bill[0] in self.bill_order:
+                    card.pack_forget()
+                    self.bill_order.remove(bill[0])
+            card.pack(fill="x", padx=5, pady=5)
+            self.bill_order.append(bill[0])
+        
+        # Keep the button below the last card, and only while more bills remain
+        if not pages.exhausted:
+            self.load_more_btn.pack(pady=10)
+        self.schedule_bill_refresh()
+
+    def schedule_bill_refresh(self, delay=BILL_REFRESH_MS):
+        if self.bill_refresh_job:
+            self.bills_frame.after_cancel(self.bill_refresh_job)
+        self.bill_refresh_job = self.bills_frame.after(delay, self.refresh_bills)
+
+    def refresh_bills(self):
+        """Patch the list with the bills created or changed since it was last current"""
+        if self.bill_refresh_job:
+            self.bills_frame.after_cancel(self.bill_refresh_job)
+            self.bill_refresh_job = None
+        if self.bills_watermark is None or not self.bills_frame.winfo_exists():
+            return
+        pages, (where, params) = self.bill_pages, self.bill_filter
+        executor.submit(self.fetch_bill_changes, self.bills_watermark, where, params,
+                        key="bill_changes", owner=self.bills_frame,
+                        on_success=lambda result: self.apply_bill_changes(pages, *result),
+                        on_error=lambda e: self.schedule_bill_refresh())
+
+    def fetch_bill_changes(self, since, where=(), params=()):
+        """Return (watermark, changes): bills whose row_version moved past since.
+
+        changes are (bill row, matches the list's filter) pairs. Only rows
+        below MIN_ACTIVE_ROWVERSION() are read, so a bill still being written
+        by an open transaction is picked up by a later refresh instead of
+        being skipped.
+        """
+        conn = connect_db()
+        if not conn:
+            raise ConnectionError("Could not connect to database")
         try:
-            conn = connect_db()
-            if conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT a.admission_id, p.first_name, p.last_name, a.admission_date 
-                    FROM Admission a
-                    JOIN Patient p ON a.patient_id = p.patient_id
-                    WHERE a.discharge_date IS NULL
-                """)
-                admissions = cursor.fetchall()
-                
-                admission_options = [f"{a[0]} - {a[1]} {a[2]} ({a[3]})" for a in admissions]
-                self.admission_dropdown.configure(values=admission_options)
-                if admission_options:
-                    self.admission_dropdown.set(admission_options[0])
-                cursor.close()
-                conn.close()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load admissions: {str(e)}")
+            cursor = conn.cursor()
+            cursor.execute("SELECT MIN_ACTIVE_ROWVERSION()")
+            watermark = cursor.fetchone()[0]
+            changes = []
+            if since is not None:
+                match = " AND ".join(f"({condition})" for condition in where) or "1 = 1"
+                cursor.execute(
+                    BILL_LIST_SELECT.format(extra=f", CASE WHEN {match} THEN 1 ELSE 0 END")
+                    + " WHERE b.row_version >= ? AND b.row_version < ?",
+                    (*params, since, watermark))
+                changes = [(tuple(row[:-1]), bool(row[-1])) for row in cursor.fetchall()]
+            cursor.close()
+        finally:
+            conn.close()
+        return watermark, changes
+
+    def apply_bill_changes(self, pages, watermark, changes):
+        """Patch, insert or remove only the cards of changed bills"""
+        if pages is not self.bill_pages:
+            return
+        self.bills_watermark = watermark
+        for bill, matches in changes:
+            bill_id = bill[0]
+            card = self.bill_cards.get(bill_id)
+            if card is not None:
+                if matches and self.bill_sort_key(card.bill) == self.bill_sort_key(bill):
+                    self.update_bill_card(card, bill)
+                    continue
+                # No longer in the list, or moved: take it out, re-insert below
+                self.bill_order.remove(bill_id)
+                card.pack_forget()
+                if not matches:
+                    self.bill_cards.pop(bill_id).destroy()
+                    continue
+                self.update_bill_card(card, bill)
+            elif not matches:
+                continue
+            
+            position = self.bill_position(bill)
+            if position == len(self.bill_order) and not pages.exhausted:
+                # Sorts after the loaded cards: "Load more" will bring it in
+                if card is not None:
+                    self.bill_cards.pop(bill_id).destroy()
+                continue
+            if card is None:
+                card = self.bill_cards[bill_id] = self.create_bill_card(bill)
+            if position < len(self.bill_order):
+                card.pack(fill="x", padx=5, pady=5, before=self.bill_cards[self.bill_order[position]])
+            elif self.load_more_btn.winfo_manager():
+                card.pack(fill="x", padx=5, pady=5, before=self.load_more_btn)
+            else:
+                card.pack(fill="x", padx=5, pady=5)
+            self.bill_order.insert(position, bill_id)
+        self.schedule_bill_refresh()
+
+    @staticmethod
+    def bill_sort_key(bill):
+        # The list is ordered by billing_date DESC, bill_id DESC, NULL dates last
+        return (bill[2] is not None, bill[2], bill[0])
+
+    def bill_position(self, bill):
+        """Index in bill_order at which bill belongs"""
+        key = self.bill_sort_key(bill)
+        for position, bill_id in enumerate(self.bill_order):
+            if self.bill_sort_key(self.bill_cards[bill_id].bill) < key:
+                return position
+        return len(self.bill_order)
+
+    def setup_receivables(self, parent):
+        top_frame = ctk.CTkFrame(parent)
+        top_frame.pack(fill="x", padx=10, pady=5)
+        
+        # One card per aging bucket
+        self.aging_labels = {}
+        for bucket in AGING_BUCKETS:
+            card = ctk.CTkFrame(top_frame)
+            card.pack(side="left", fill="x", expand=True, padx=5, pady=5)
+            ctk.CTkLabel(card, text=f"{bucket} days", font=ctk.CTkFont(size=12)).pack(pady=(5, 0))
+            self.aging_labels[bucket] = ctk.CTkLabel(card, text="-", font=ctk.CTkFont(size=16, weight="bold"))
+            self.aging_labels[bucket].pack(pady=(0, 5))
+        
+        refresh_btn = ctk.CTkButton(top_frame, text="🔄 Refresh", width=100, command=self.load_receivables)
+        refresh_btn.pack(side="left", padx=5)
+        self.receivables_spinner = Spinner(top_frame, width=100, disables=[refresh_btn])
+        self.receivables_spinner.pack(side="left", padx=5)
+        
+        ctk.CTkLabel(parent, text=f"Largest outstanding balances (top {TOP_BALANCES})",
+                     font=ctk.CTkFont(size=14, weight="bold")).pack(anchor="w", padx=15, pady=(10, 0))
+        self.balances_frame = ctk.CTkScrollableFrame(parent)
+        self.balances_frame.pack(fill="both", expand=True, padx=10, pady=5)
 
-    def load_bills(self):
+    def load_receivables(self):
+        executor.submit(self.fetch_receivables, key="receivables", owner=self.balances_frame,
+                        indicator=self.receivables_spinner, on_success=self.show_receivables,
+                        on_error=lambda e: messagebox.showerror("Error", f"Failed to load receivables: {str(e)}"))
+
+    @staticmethod
+    def fetch_receivables():
+        """(aging summary, top balances, their aging by patient_id), on one connection"""
+        conn = connect_db()
+        if not conn:
+            raise ConnectionError("Could not connect to database")
         try:
-            conn = connect_db()
-            if conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT b.bill_id, 
-                           p.first_name + ' ' + p.last_name as patient_name,
-                           b.billing_date,
-                           b.total_amount,
-                           b.paid_amount,
-                           CASE WHEN b.paid_amount >= b.total_amount THEN 'Paid' ELSE 'Pending' END as status,
-                           b.admission_id
-                    FROM Billing b
-                    JOIN Patient p ON b.patient_id = p.patient_id
-                    ORDER BY b.billing_date DESC
-                """)
-                bills = cursor.fetchall()
-                
-                # Clear existing bills
-                for widget in self.bill_widgets:
-                    widget.destroy()
-                self.bill_widgets.clear()
-                
-                # Add bills to scrollable frame
-                for bill in bills:
-                    bill_card = self.create_bill_card(bill)
-                    self.bill_widgets.append(bill_card)
-                
-                cursor.close()
-                conn.close()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load bills: {str(e)}")
+            summary = aging_summary(conn=conn)
+            balances = top_balances(TOP_BALANCES, conn=conn)
+            aging = patient_aging([row[0] for row in balances], conn=conn)
+        finally:
+            conn.close()
+        return summary, balances, aging
+
+    def show_receivables(self, result):
+        summary, balances, aging = result
+        for bucket, count, amount in summary:
+            self.aging_labels[bucket].configure(text=f"${amount or 0:,.2f}\n{count} bills")
+        
+        for widget in self.balances_frame.winfo_children():
+            widget.destroy()
+        if not balances:
+            ctk.CTkLabel(self.balances_frame, text="Nothing outstanding").pack(pady=20)
+        for patient_id, patient_name, outstanding, open_bills in balances:
+            row = ctk.CTkFrame(self.balances_frame)
+            row.pack(fill="x", padx=5, pady=2)
+            ctk.CTkLabel(row, text=f"#{patient_id} - {patient_name}",
+                         font=ctk.CTkFont(size=13, weight="bold")).pack(side="left", padx=10, pady=5)
+            ctk.CTkLabel(row, text=f"${outstanding:,.2f} on {open_bills} bills",
+                         font=ctk.CTkFont(size=13)).pack(side="right", padx=10)
+            buckets = aging.get(patient_id)
+            if buckets:
+                ctk.CTkLabel(row, text="  ".join(f"{bucket}: ${amount:,.2f}"
+                                                 for bucket, amount in zip(AGING_BUCKETS, buckets) if amount),
+                             font=ctk.CTkFont(size=12)).pack(side="right", padx=10)
 
     def search_bills(self):
-        search_term = self.search_var.get().lower()
+        search_term = self.search_var.get().strip()
         if not search_term:
             self.load_bills()
             return
         
-        try:
-            conn = connect_db()
-            if conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT b.bill_id, 
-                           p.first_name + ' ' + p.last_name as patient_name,
-                           b.billing_date,
-                           b.total_amount,
-                           b.paid_amount,
-                           CASE WHEN b.paid_amount >= b.total_amount THEN 'Paid' ELSE 'Pending' END as status,
-                           b.admission_id
-                    FROM Billing b
-                    JOIN Patient p ON b.patient_id = p.patient_id
-                    WHERE LOWER(CAST(b.bill_id AS VARCHAR)) LIKE ? OR
-                          LOWER(p.first_name + ' ' + p.last_name) LIKE ? OR
-                          LOWER(CAST(b.admission_id AS VARCHAR)) LIKE ?
-                    ORDER BY b.billing_date DESC
-                """, (f'%{search_term}%', f'%{search_term}%', f'%{search_term}%'))
-                
-                bills = cursor.fetchall()
-                
-                # Clear existing bills
-                for widget in self.bill_widgets:
-                    widget.destroy()
-                self.bill_widgets.clear()
-                
-                # Add filtered bills to scrollable frame
-                for bill in bills:
-                    bill_card = self.create_bill_card(bill)
-                    self.bill_widgets.append(bill_card)
-                
-                cursor.close()
-                conn.close()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to search bills: {str(e)}")
+        # A number is a bill or admission ID, anything else a patient name
+        if search_term.isdigit():
+            self.load_bills(where=["b.bill_id = ? OR b.admission_id = ?"],
+                            params=(int(search_term), int(search_term)))
+        else:
+            name_match, params = name_filter("b.patient_id", search_term)
+            self.load_bills(where=[name_match], params=params)
 
     def clear_search(self):
         self.search_var.set("")
@@ -322,197 +493,191 @@ class BillingModule:
 
     def view_bill_details(self, bill_id):
         try:
-            conn = connect_db()
-            if conn:
-                cursor = conn.cursor()
-                
-                # Get bill details
-                cursor.execute("""
-                    SELECT b.bill_id, 
-                           p.first_name + ' ' + p.last_name as patient_name,
-                           b.billing_date,
-                           b.total_amount,
-                           b.paid_amount,
-                           b.admission_id,
-                           bi.description,
-                           bi.amount
-                    FROM Billing b
-                    JOIN Patient p ON b.patient_id = p.patient_id
-                    LEFT JOIN Bill_Item bi ON b.bill_id = bi.bill_id
-                    WHERE b.bill_id = ?
-                """, (bill_id,))
-                
-                items = cursor.fetchall()
-                if not items:
-                    return
-                
-                # Create details window
-                details_window = ctk.CTkToplevel(self.parent)
-                details_window.title(f"Bill Details - #{bill_id}")
-                details_window.geometry("800x700")
-                
-                # Create content
-                content_frame = ctk.CTkFrame(details_window)
-                content_frame.pack(fill="both", expand=True, padx=20, pady=20)
-                
-                # Header
-                header_frame = ctk.CTkFrame(content_frame)
-                header_frame.pack(fill="x", pady=10)
-                
-                header_text = f"""
-                Bill #{bill_id}
-                Patient: {items[0][1]}
-                Admission ID: {items[0][5]}
-                Date: {items[0][2]}
-                """
-                
-                header_label = ctk.CTkLabel(header_frame, text=header_text,
-                                          font=ctk.CTkFont(size=16, weight="bold"))
-                header_label.pack(pady=10)
-                
-                # Items
-                items_frame = ctk.CTkFrame(content_frame)
-                items_frame.pack(fill="both", expand=True, pady=10)
-                
-                # Create scrollable frame for items
-                items_scroll = ctk.CTkScrollableFrame(items_frame)
-                items_scroll.pack(fill="both", expand=True, padx=10, pady=10)
-                
-                # Add items
-                for item in items:
-                    if item[6] and item[7]:  # If description and amount exist
-                        item_frame = ctk.CTkFrame(items_scroll)
-                        item_frame.pack(fill="x", padx=5, pady=2)
-                        
-                        desc_label = ctk.CTkLabel(item_frame, text=item[6],
-                                                font=ctk.CTkFont(size=12))
-                        desc_label.pack(side="left", padx=5)
-                        
-                        amount_label = ctk.CTkLabel(item_frame, text=f"${item[7]:.2f}",
-                                                  font=ctk.CTkFont(size=12))
-                        amount_label.pack(side="right", padx=5)
-                
-                # Total section
-                total_frame = ctk.CTkFrame(content_frame)
-                total_frame.pack(fill="x", pady=10)
-                
-                total_text = f"""
-                Total Amount: ${items[0][3]:.2f}
-                Paid Amount: ${items[0][4]:.2f}
-                Status: {'Paid' if items[0][4] >= items[0][3] else 'Pending'}
-                """
-                
-                total_label = ctk.CTkLabel(total_frame, text=total_text,
-                                         font=ctk.CTkFont(size=14, weight="bold"))
-                total_label.pack(pady=10)
-                
-                # Print button
-                print_btn = ctk.CTkButton(content_frame, text="Print Bill",
-                                        command=lambda: self.print_bill(bill_id))
-                print_btn.pack(pady=10)
-                
-                cursor.close()
-                conn.close()
+            bill = bill_details.get(bill_id)
+            if not bill:
+                return
+            
+            # Create details window
+            details_window = ctk.CTkToplevel(self.parent)
+            details_window.title(f"Bill Details - #{bill_id}")
+            details_window.geometry("800x700")
+            
+            # Create content
+            content_frame = ctk.CTkFrame(details_window)
+            content_frame.pack(fill="both", expand=True, padx=20, pady=20)
+            
+            # Header
+            header_frame = ctk.CTkFrame(content_frame)
+            header_frame.pack(fill="x", pady=10)
+            
+            header_text = f"""
+            Bill #{bill_id}
+            Patient: {bill.patient_name}
+            Admission ID: {bill.admission_id}
+            Date: {bill.billing_date}
+            """
+            
+            header_label = ctk.CTkLabel(header_frame, text=header_text,
+                                      font=ctk.CTkFont(size=16, weight="bold"))
+            header_label.pack(pady=10)
+            
+            # Items
+            items_frame = ctk.CTkFrame(content_frame)
+            items_frame.pack(fill="both", expand=True, pady=10)
+            
+            # Create scrollable frame for items
+            items_scroll = ctk.CTkScrollableFrame(items_frame)
+            items_scroll.pack(fill="both", expand=True, padx=10, pady=10)
+            
+            # Add items
+            for description, amount in bill.items:
+                item_frame = ctk.CTkFrame(items_scroll)
+                item_frame.pack(fill="x", padx=5, pady=2)
+                
+                desc_label = ctk.CTkLabel(item_frame, text=description,
+                                        font=ctk.CTkFont(size=12))
+                desc_label.pack(side="left", padx=5)
+                
+                amount_label = ctk.CTkLabel(item_frame, text=f"${amount:.2f}",
+                                          font=ctk.CTkFont(size=12))
+                amount_label.pack(side="right", padx=5)
+            
+            # Total section
+            total_frame = ctk.CTkFrame(content_frame)
+            total_frame.pack(fill="x", pady=10)
+            
+            total_text = f"""
+            Total Amount: ${bill.total_amount:.2f}
+            Paid Amount: ${bill.paid_amount:.2f}
+            Status: {'Paid' if bill.paid_amount >= bill.total_amount else 'Pending'}
+            """
+            
+            total_label = ctk.CTkLabel(total_frame, text=total_text,
+                                     font=ctk.CTkFont(size=14, weight="bold"))
+            total_label.pack(pady=10)
+            
+            # Payment
+            if bill.paid_amount < bill.total_amount:
+                payment_frame = ctk.CTkFrame(content_frame, fg_color="transparent")
+                payment_frame.pack(pady=5)
+                payment_entry = ctk.CTkEntry(payment_frame, width=150,
+                                             placeholder_text=f"{bill.total_amount - bill.paid_amount:.2f}")
+                payment_entry.pack(side="left", padx=5)
+                ctk.CTkButton(payment_frame, text="💳 Record Payment",
+                              command=lambda: self.record_payment(bill_id, payment_entry.get(), details_window)
+                              ).pack(side="left", padx=5)
+            
+            # Print button
+            print_btn = ctk.CTkButton(content_frame, text="Print Bill",
+                                    command=lambda: self.print_bill(bill_id))
+            print_btn.pack(pady=10)
                 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to view bill details: {str(e)}")
 
+    def record_payment(self, bill_id, amount, details_window):
+        try:
+            amount = Decimal(amount.strip())
+        except Exception:
+            messagebox.showerror("Error", "Please enter a valid amount", parent=details_window)
+            return
+        try:
+            bill_details.record_payment(bill_id, amount)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e), parent=details_window)
+            return
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to record payment: {e}", parent=details_window)
+            return
+        messagebox.showinfo("Success", f"Payment of ${amount:.2f} recorded for bill #{bill_id}")
+        details_window.destroy()
+        self.refresh_bills()
+        self.load_receivables()
+        self.view_bill_details(bill_id)
+
     def print_bill(self, bill_id):
         try:
-            conn = connect_db()
-            if conn:
-                cursor = conn.cursor()
-                
-                # Get bill details
-                cursor.execute("""
-                    SELECT b.bill_id, 
-                           p.first_name + ' ' + p.last_name as patient_name,
-                           b.billing_date,
-                           b.total_amount,
-                           b.paid_amount,
-                           b.admission_id,
-                           bi.description,
-                           bi.amount
-                    FROM Billing b
-                    JOIN Patient p ON b.patient_id = p.patient_id
-                    LEFT JOIN Bill_Item bi ON b.bill_id = bi.bill_id
-                    WHERE b.bill_id = ?
-                """, (bill_id,))
-                
-                items = cursor.fetchall()
-                if not items:
-                    return
-                
-                # Create HTML content
-                html_content = f"""
-                <html>
-                <head>
-                    <style>
-                        body {{ font-family: Arial, sans-serif; margin: 40px; }}
-                        .header {{ text-align: center; margin-bottom: 30px; }}
-                        .details {{ margin-bottom: 20px; }}
-                        table {{ width: 100%; border-collapse: collapse; }}
-                        th, td {{ padding: 8px; text-align: left; border-bottom: 1px solid #ddd; }}
-                        .total {{ text-align: right; margin-top: 20px; }}
-                    </style>
-                </head>
-                <body>
-                    <div class="header">
-                        <h1>Hospital Bill</h1>
-                        <h2>Bill #{bill_id}</h2>
-                    </div>
-                    <div class="details">
-                        <p><strong>Patient:</strong> {items[0][1]}</p>
-                        <p><strong>Admission ID:</strong> {items[0][5]}</p>
-                        <p><strong>Date:</strong> {items[0][2]}</p>
-                    </div>
-                    <table>
-                        <tr>
-                            <th>Description</th>
-                            <th>Amount</th>
-                        </tr>
-                """
-                
-                # Add items
-                for item in items:
-                    if item[6] and item[7]:  # If description and amount exist
-                        html_content += f"""
-                        <tr>
-                            <td>{item[6]}</td>
-                            <td>${item[7]:.2f}</td>
-                        </tr>
-                        """
-                
-                # Add total
-                html_content += f"""
-                    </table>
-                    <div class="total">
-                        <p><strong>Total Amount:</strong> ${items[0][3]:.2f}</p>
-                        <p><strong>Paid Amount:</strong> ${items[0][4]:.2f}</p>
-                        <p><strong>Status:</strong> {'Paid' if items[0][4] >= items[0][3] else 'Pending'}</p>
-                    </div>
-                </body>
-                </html>
-                """
-                
-                # Save HTML file
-                file_path = filedialog.asksaveasfilename(
-                    defaultextension=".html",
-                    filetypes=[("HTML files", "*.html")],
-                    initialfile=f"bill_{bill_id}.html"
-                )
-                
-                if file_path:
-                    with open(file_path, 'w') as f:
-                        f.write(html_content)
-                    messagebox.showinfo("Success", f"Bill saved to {file_path}")
-                
-                cursor.close()
-                conn.close()
+            bill = bill_details.get(bill_id)
+            if not bill:
+                return
+            
+            # Save HTML file
+            file_path = filedialog.asksaveasfilename(
+                defaultextension=".html",
+                filetypes=[("HTML files", "*.html")],
+                initialfile=f"bill_{bill_id}.html"
+            )
+            
+            if file_path:
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    f.write(invoice_html(bill))
+                messagebox.showinfo("Success", f"Bill saved to {file_path}")
                 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to print bill: {str(e)}")
 
+    def show_batch_invoices(self):
+        dialog = ctk.CTkToplevel(self.container)
+        dialog.title("Batch Invoices")
+        dialog.geometry("420x300")
+        
+        form = ctk.CTkFrame(dialog)
+        form.pack(fill="both", expand=True, padx=20, pady=20)
+        form.grid_columnconfigure(1, weight=1)
+        
+        today = datetime.now().date()
+        ctk.CTkLabel(form, text="From (YYYY-MM-DD):").grid(row=0, column=0, padx=10, pady=5, sticky="w")
+        start_entry = ctk.CTkEntry(form)
+        start_entry.insert(0, today.replace(day=1).isoformat())
+        start_entry.grid(row=0, column=1, padx=10, pady=5, sticky="ew")
+        
+        ctk.CTkLabel(form, text="To (YYYY-MM-DD):").grid(row=1, column=0, padx=10, pady=5, sticky="w")
+        end_entry = ctk.CTkEntry(form)
+        end_entry.insert(0, today.isoformat())
+        end_entry.grid(row=1, column=1, padx=10, pady=5, sticky="ew")
+        
+        ctk.CTkLabel(form, text="Output:").grid(row=2, column=0, padx=10, pady=5, sticky="w")
+        output_menu = ctk.CTkOptionMenu(form, values=["One file per bill", "Single document"])
+        output_menu.grid(row=2, column=1, padx=10, pady=5, sticky="ew")
+        
+        status = ctk.CTkLabel(form, text="")
+        status.grid(row=4, column=0, columnspan=2, padx=10, pady=5)
+        
+        def render():
+            start, end = start_entry.get().strip(), end_entry.get().strip()
+            try:
+                datetime.strptime(start, '%Y-%m-%d')
+                datetime.strptime(end, '%Y-%m-%d')
+            except ValueError:
+                messagebox.showerror("Error", "Invalid date format (YYYY-MM-DD)", parent=dialog)
+                return
+            single_file = output_menu.get() == "Single document"
+            if single_file:
+                output = filedialog.asksaveasfilename(parent=dialog, defaultextension=".html",
+                                                      filetypes=[("HTML files", "*.html")],
+                                                      initialfile=f"invoices_{start}_{end}.html")
+            else:
+                output = filedialog.askdirectory(parent=dialog, title="Folder for the invoices")
+            if not output:
+                return
+            render_btn.configure(state="disabled")
+            status.configure(text="Rendering...")
+            executor.submit(render_invoices, output, start, end, single_file,
+                            on_success=done, on_error=failed, key="batch_invoices", owner=dialog)
+        
+        def done(result):
+            render_btn.configure(state="normal")
+            status.configure(text=f"Rendered {result.invoices:,} invoices in {result.seconds:.1f}s "
+                                  f"({result.rate:,.0f} invoices/s)")
+        
+        def failed(error):
+            render_btn.configure(state="normal")
+            status.configure(text="")
+            messagebox.showerror("Error", f"Failed to render invoices: {error}", parent=dialog)
+        
+        render_btn = ctk.CTkButton(form, text="🧾 Render Invoices", command=render)
+        render_btn.grid(row=3, column=0, columnspan=2, padx=10, pady=15, sticky="ew")
+
     def add_bill_item(self):
         try:
             description = self.description_entry.get().strip()
@@ -558,52 +723,22 @@ class BillingModule:
                 return
             
             # Get selected admission
-            admission_id = int(self.admission_dropdown.get().split(' - ')[0])
+            admission_id = self.admission_dropdown.get()
+            if admission_id is None:
+                messagebox.showwarning("Warning", "Please select an admission")
+                return
+            
+            # One call creates the bill and every item atomically
+            bill_id = create_bill(admission_id, self.current_bill_items, billing_date=datetime.now().date())
+            
+            messagebox.showinfo("Success", f"Bill #{bill_id} generated successfully!")
+            self.refresh_bills()
+            self.load_receivables()
+            
+            # Reset form
+            self.current_bill_items = []
+            self.total_amount = Decimal('0.00')
+            self.update_bill_items_display()
             
-            conn = connect_db()
-            if conn:
-                cursor = conn.cursor()
-                
-                # Get patient ID from admission
-                cursor.execute("SELECT patient_id FROM Admission WHERE admission_id = ?", admission_id)
-                patient_id = cursor.fetchone()[0]
-                
-                # Generate bill
-                cursor.execute("""
-                    EXEC GenerateBill 
-                    @patient_id = ?, 
-                    @admission_id = ?, 
-                    @total_amount = ?, 
-                    @paid_amount = 0, 
-                    @billing_date = ?
-                """, (patient_id, admission_id, self.total_amount, datetime.now().date()))
-                
-                # Get the generated bill ID
-                cursor.execute("SELECT IDENT_CURRENT('Billing')")
-                bill_id = int(cursor.fetchone()[0])
-                
-                # Add bill items
-                for desc, amount in self.current_bill_items:
-                    cursor.execute("""
-                        EXEC AddBillItem 
-                        @bill_id = ?, 
-                        @description = ?, 
-                        @amount = ?
-                    """, (bill_id, desc, amount))
-                
-                conn.commit()
-                cursor.close()
-                conn.close()
-                
-                messagebox.showinfo("Success", "Bill generated successfully!")
-                
-                # Reset form
-                self.current_bill_items = []
-                self.total_amount = Decimal('0.00')
-                self.update_bill_items_display()
-                
         except Exception as e:
-            if 'conn' in locals():
-                conn.rollback()
-                conn.close()
             messagebox.showerror("Error", f"Failed to generate bill: {str(e)}") 
\ No newline at end of file
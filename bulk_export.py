@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Export bills, bill items, appointments or medical records to a file.
+
+Rows are streamed from a forward-only cursor with fetchmany and written as
+they arrive, so memory use stays flat however many rows are exported. The
+format follows the file extension: .csv, .jsonl, or .parquet (columnar,
+one row group per batch; needs the optional pyarrow package).
+
+--from and --to limit the export to a range of days (both inclusive) on
+the dataset's date column: billing_date for bills and bill items,
+appointment_date for appointments and visit_date for medical records.
+
+    python bulk_export.py bills bills_2024.csv --from 2024-01-01 --to 2024-12-31
+    python bulk_export.py appointments appointments.jsonl --status completed
+    python bulk_export.py bill_items items.parquet
+"""
+
+import argparse
+import csv
+import json
+import os
+from datetime import date, datetime
+from decimal import Decimal
+from db_connect import borrowed_connection, day_bounds
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+BATCH_SIZE = 5000
+
+# dataset -> (query, date column, status column or None, key). Rows come out
+# in primary key order, the clustered index order, so SQL Server streams them
+# without a sort.
+EXPORTS = {
+    'bills': ("""
+        SELECT b.bill_id, b.patient_id, p.first_name, p.last_name, b.admission_id,
+               b.total_amount, b.paid_amount, b.total_amount - b.paid_amount AS balance, b.billing_date
+        FROM Billing b
+        LEFT JOIN Patient p ON b.patient_id = p.patient_id
+    """, "b.billing_date", None, "b.bill_id"),
+    'bill_items': ("""
+        SELECT bi.item_id, bi.bill_id, b.patient_id, b.admission_id, b.billing_date,
+               bi.description, bi.amount
+        FROM Bill_Item bi
+        JOIN Billing b ON bi.bill_id = b.bill_id
+    """, "b.billing_date", None, "bi.item_id"),
+    'appointments': ("""
+        SELECT a.appointment_id, a.appointment_date, a.status,
+               a.patient_id, p.first_name AS patient_first_name, p.last_name AS patient_last_name,
+               a.doctor_id, d.first_name AS doctor_first_name, d.last_name AS doctor_last_name,
+               a.remarks
+        FROM Appointment a
+        LEFT JOIN Patient p ON a.patient_id = p.patient_id
+        LEFT JOIN Doctor d ON a.doctor_id = d.doctor_id
+    """, "a.appointment_date", "a.status", "a.appointment_id"),
+    'medical_records': ("""
+        SELECT mr.record_id, mr.visit_date,
+               mr.patient_id, p.first_name AS patient_first_name, p.last_name AS patient_last_name,
+               mr.doctor_id, d.first_name AS doctor_first_name, d.last_name AS doctor_last_name,
+               mr.diagnosis, mr.notes
+        FROM Medical_Record mr
+        LEFT JOIN Patient p ON mr.patient_id = p.patient_id
+        LEFT JOIN Doctor d ON mr.doctor_id = d.doctor_id
+    """, "mr.visit_date", None, "mr.record_id"),
+}
+
+
+def export_query(dataset, start=None, end=None, status=None):
+    """SQL and params of an export; start and end are inclusive days"""
+    query, date_column, status_column, key = EXPORTS[dataset]
+    where, params = [], []
+    if start:
+        where.append(f"{date_column} >= ?")
+        params.append(day_bounds(start)[0])
+    if end:
+        where.append(f"{date_column} < ?")
+        params.append(day_bounds(end)[1])
+    if status:
+        if not status_column:
+            raise ValueError(f"{dataset} cannot be filtered by status")
+        where.append(f"{status_column} = ?")
+        params.append(status)
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    return query + f" ORDER BY {key}", params
+
+
+class CsvWriter:
+    def __init__(self, f, description):
+        self.writer = csv.writer(f)
+        self.writer.writerow([column[0] for column in description])
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        pass
+
+
+class JsonLinesWriter:
+    def __init__(self, f, description):
+        self.f = f
+        self.columns = [column[0] for column in description]
+
+    def write(self, rows):
+        self.f.writelines(json.dumps(dict(zip(self.columns, row)), default=_json_value) + "\n" for row in rows)
+
+    def close(self):
+        pass
+
+
+class ParquetWriter:
+    """Writes each batch as one row group, typed from the cursor description"""
+
+    def __init__(self, f, description):
+        if pyarrow is None:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+        self.f = f
+        self.fields = [(column[0], _arrow_type(column)) for column in description]
+        self.writer = None
+
+    def write(self, rows):
+        columns = list(zip(*rows))
+        if self.writer is None:
+            # Types the driver does not report are taken from the first batch
+            self._open([pyarrow.array(values).type for values in columns])
+        self.writer.write_table(pyarrow.table(
+            [pyarrow.array(values, type=field.type) for values, field in zip(columns, self.writer.schema)],
+            schema=self.writer.schema))
+
+    def close(self):
+        if self.writer is None:
+            self._open([pyarrow.string()] * len(self.fields))
+        self.writer.close()
+
+    def _open(self, inferred):
+        schema = pyarrow.schema([
+            (name, arrow_type or (pyarrow.string() if pyarrow.types.is_null(guess) else guess))
+            for (name, arrow_type), guess in zip(self.fields, inferred)])
+        self.writer = pyarrow.parquet.ParquetWriter(self.f, schema)
+
+
+# format -> (writer, open the file in binary mode)
+FORMATS = {
+    'csv': (CsvWriter, False),
+    'jsonl': (JsonLinesWriter, False),
+    'parquet': (ParquetWriter, True),
+}
+
+
+def available_formats():
+    return [fmt for fmt in FORMATS if fmt != 'parquet' or pyarrow is not None]
+
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def _arrow_type(column):
+    # pyodbc reports the Python type of each column in description[1];
+    # None leaves the type to be inferred from the data
+    _, type_code, _, _, precision, scale, _ = column
+    if type_code is int:
+        return pyarrow.int64()
+    if type_code is float:
+        return pyarrow.float64()
+    if type_code is bool:
+        return pyarrow.bool_()
+    if type_code is Decimal and precision:
+        return pyarrow.decimal128(precision, scale or 0)
+    if type_code is datetime:
+        return pyarrow.timestamp('ms')
+    if type_code is date:
+        return pyarrow.date32()
+    if type_code is str:
+        return pyarrow.string()
+    return None
+
+
+class ExportCancelled(Exception):
+    """Raised by export() when its cancel event is set"""
+
+
+def export(dataset, path, fmt=None, start=None, end=None, status=None,
+           batch_size=BATCH_SIZE, progress=None, cancel=None, conn=None):
+    """Stream a dataset into path and return the number of rows written.
+
+    fmt defaults to the file extension. The file is written next to path
+    and only moved into place once the export has finished, so a failed
+    export never leaves a truncated file behind. progress, if given, is
+    called as progress(rows written) after every batch. cancel, if given, is
+    a threading.Event checked between batches; once it is set the export
+    stops with ExportCancelled and the partial file is removed.
+    """
+    fmt = fmt or os.path.splitext(path)[1].lower().lstrip('.')
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}': use {', '.join(available_formats())}")
+    writer_class, binary = FORMATS[fmt]
+    query, params = export_query(dataset, start, end, status)
+
+    partial = path + ".part"
+    rows_written = 0
+    with borrowed_connection(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query, params)
+            # newline='' lets the csv module pick its own line endings
+            with open(partial, 'wb') if binary else open(partial, 'w', encoding='utf-8', newline='') as f:
+                writer = writer_class(f, cursor.description)
+                try:
+                    while True:
+                        rows = cursor.fetchmany(batch_size)
+                        if not rows:
+                            break
+                        writer.write(rows)
+                        rows_written += len(rows)
+                        if progress:
+                            progress(rows_written)
+                        if cancel is not None and cancel.is_set():
+                            raise ExportCancelled(f"Export cancelled after {rows_written:,} rows")
+                finally:
+                    writer.close()
+            os.replace(partial, path)
+        except BaseException:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        finally:
+            cursor.close()
+    return rows_written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('dataset', choices=sorted(EXPORTS))
+    parser.add_argument('path', help="Output file (.csv, .jsonl or .parquet)")
+    parser.add_argument('--format', choices=sorted(FORMATS), help="Override the format taken from the extension")
+    parser.add_argument('--from', dest='start', metavar='YYYY-MM-DD')
+    parser.add_argument('--to', dest='end', metavar='YYYY-MM-DD')
+    parser.add_argument('--status', help="Appointment status (appointments only)")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    def report(rows):
+        print(f"\r{rows:,} rows written", end="", flush=True)
+
+    rows = export(args.dataset, args.path, args.format, args.start, args.end, args.status,
+                  args.batch_size, progress=report)
+    print(f"\rExported {rows:,} rows to {args.path}")
+
+
+if __name__ == '__main__':
+    main()
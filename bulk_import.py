@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Bulk import patients, doctors or staff from CSV or JSON Lines files.
+
+Rows are streamed from the file, validated with the same rules as the
+registration forms and inserted in batches with fast_executemany. Rows that
+fail validation (or that the database rejects) are skipped and listed in an
+error report; every other row is imported.
+
+Column names are the table's column names (first_name, last_name, dob,
+gender, contact_number, email, address for patients; first_name, last_name,
+specialization, contact_number, email, department_id for doctors;
+first_name, last_name, role, shift, contact_number, department_id for staff).
+
+    python bulk_import.py patients new_clinic_patients.csv --errors rejected.csv
+    python bulk_import.py doctors doctors.jsonl --batch-size 500
+"""
+
+import argparse
+import csv
+import json
+import os
+from db_connect import connect_db
+from validators import validate_phone, validate_date, validate_email
+
+BATCH_SIZE = 1000
+
+
+def _patient_row(record, departments):
+    if record['gender'] not in ('M', 'F'):
+        raise ValueError("gender must be M or F")
+    if not validate_date(record['dob']):
+        raise ValueError("Invalid date format (YYYY-MM-DD)")
+    _check_contact(record)
+    return record
+
+
+def _doctor_row(record, departments):
+    _check_contact(record)
+    _check_department(record, departments)
+    return record
+
+
+def _staff_row(record, departments):
+    if record['shift'] not in ('Morning', 'Evening', 'Night'):
+        raise ValueError("shift must be Morning, Evening or Night")
+    _check_contact(record)
+    _check_department(record, departments)
+    return record
+
+
+def _check_contact(record):
+    if not validate_phone(record['contact_number']):
+        raise ValueError("Contact number must be 10 digits")
+    if record.get('email') and not validate_email(record['email']):
+        raise ValueError("Invalid email format")
+
+
+def _check_department(record, departments):
+    department_id = record['department_id']
+    if not department_id.isdigit() or int(department_id) not in departments:
+        raise ValueError(f"Department ID '{department_id}' does not exist")
+    record['department_id'] = int(department_id)
+
+
+# entity -> (table, columns, required columns, row check)
+IMPORTS = {
+    'patients': (
+        'Patient',
+        ('first_name', 'last_name', 'dob', 'gender', 'contact_number', 'email', 'address'),
+        ('first_name', 'last_name', 'dob', 'gender', 'contact_number'),
+        _patient_row,
+    ),
+    'doctors': (
+        'Doctor',
+        ('first_name', 'last_name', 'specialization', 'contact_number', 'email', 'department_id'),
+        ('first_name', 'last_name', 'specialization', 'contact_number', 'department_id'),
+        _doctor_row,
+    ),
+    'staff': (
+        'Staff',
+        ('first_name', 'last_name', 'role', 'shift', 'contact_number', 'department_id'),
+        ('first_name', 'last_name', 'role', 'shift', 'contact_number', 'department_id'),
+        _staff_row,
+    ),
+}
+
+
+class ImportResult:
+    """Counts and per-row errors of one import"""
+
+    def __init__(self):
+        self.read = 0
+        self.imported = 0
+        self.errors = []  # (line number, message, record)
+        self.cancelled = False
+
+    @property
+    def failed(self):
+        return len(self.errors)
+
+
+def read_records(path):
+    """Yield (line number, record dict) from a .csv or .jsonl file, one row at a time"""
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if extension == '.csv':
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+        elif extension in ('.jsonl', '.ndjson'):
+            for line_no, line in enumerate(f, 1):
+                if line.strip():
+                    try:
+                        record = json.loads(line)
+                    except ValueError as e:
+                        record = {'__error__': f"Invalid JSON: {e}"}
+                    yield line_no, record
+        else:
+            raise ValueError(f"Unsupported file type '{extension}': use .csv or .jsonl")
+
+
+def validate_record(entity, record, departments):
+    """Return the row tuple to insert for record, or raise ValueError"""
+    _, columns, required, check = IMPORTS[entity]
+    if not isinstance(record, dict):
+        raise ValueError("Each line must be a JSON object")
+    if '__error__' in record:
+        raise ValueError(record['__error__'])
+    # Header names are matched case-insensitively; blank values become NULL
+    values = {str(k).strip().lower().replace(' ', '_'): v for k, v in record.items() if k is not None}
+    values = {k: (str(v).strip() or None) if v is not None else None for k, v in values.items()}
+    missing = [column for column in required if not values.get(column)]
+    if missing:
+        raise ValueError(f"Missing required field(s): {', '.join(missing)}")
+    values = check(values, departments)
+    return tuple(values.get(column) for column in columns)
+
+
+def import_file(path, entity, batch_size=BATCH_SIZE, progress=None, cancel=None):
+    """Import every valid row of path into the entity's table and return an ImportResult.
+
+    Valid rows are inserted batch_size at a time, each batch in its own
+    transaction. If the database rejects a batch it is retried row by row so
+    only the offending rows end up in the error report. progress, if given,
+    is called as progress(result) after every batch. cancel, if given, is a
+    threading.Event checked between batches: once it is set the import stops,
+    result.cancelled is set and the batches already committed stay.
+    """
+    table, columns, _, _ = IMPORTS[entity]
+    insert = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+    result = ImportResult()
+    conn = connect_db()
+    if not conn:
+        raise ConnectionError("Could not connect to database")
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT department_id FROM Department")
+        departments = {row[0] for row in cursor.fetchall()}
+        cursor.fast_executemany = True
+
+        batch = []  # (line number, row, record)
+        for line_no, record in read_records(path):
+            result.read += 1
+            try:
+                batch.append((line_no, validate_record(entity, record, departments), record))
+            except ValueError as e:
+                result.errors.append((line_no, str(e), record))
+            if len(batch) >= batch_size:
+                _insert_batch(conn, cursor, insert, batch, result)
+                batch = []
+                if progress:
+                    progress(result)
+                if cancel is not None and cancel.is_set():
+                    result.cancelled = True
+                    break
+        if batch and not result.cancelled:
+            _insert_batch(conn, cursor, insert, batch, result)
+        if progress:
+            progress(result)
+    finally:
+        cursor.close()
+        conn.close()
+    return result
+
+
+def _insert_batch(conn, cursor, insert, batch, result):
+    try:
+        cursor.executemany(insert, [row for _, row, _ in batch])
+        conn.commit()
+        result.imported += len(batch)
+        return
+    except Exception:
+        conn.rollback()
+    for line_no, row, record in batch:
+        try:
+            cursor.execute(insert, row)
+            conn.commit()
+            result.imported += 1
+        except Exception as e:
+            conn.rollback()
+            result.errors.append((line_no, f"Database error: {e}", record))
+
+
+def write_error_report(result, path):
+    """Write the rejected rows of an import to a CSV file"""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['line', 'error', 'record'])
+        for line_no, message, record in sorted(result.errors, key=lambda e: e[0]):
+            writer.writerow([line_no, message, json.dumps(record, default=str)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('entity', choices=sorted(IMPORTS))
+    parser.add_argument('path', help="A .csv or .jsonl file")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--errors', help="Write rejected rows to this CSV file")
+    args = parser.parse_args()
+
+    def report(result):
+        print(f"\r{result.read} read, {result.imported} imported, {result.failed} rejected", end="", flush=True)
+
+    result = import_file(args.path, args.entity, args.batch_size, progress=report)
+    print()
+    if result.errors:
+        if args.errors:
+            write_error_report(result, args.errors)
+            print(f"Rejected rows written to {args.errors}")
+        else:
+            for line_no, message, _ in result.errors[:20]:
+                print(f"  line {line_no}: {message}")
+            if result.failed > 20:
+                print(f"  ... and {result.failed - 20} more (use --errors to save them all)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+import time
+from datetime import date, timedelta
+from background_cache import BackgroundCache
+from db_connect import borrowed_connection, day_bounds
+
+
+def _years_ago(today, years):
+    try:
+        return today.replace(year=today.year - years)
+    except ValueError:  # 29 February
+        return today.replace(year=today.year - years, day=28)
+
+
+def patient_stats_params(today=None):
+    """Date cutoffs for the patient dashboard query, computed client-side so the
+    predicates stay plain column comparisons"""
+    today = today or date.today()
+    week_start = today - timedelta(days=today.weekday())
+    month_start = today.replace(day=1)
+    born_18 = _years_ago(today, 18)
+    born_40 = _years_ago(today, 40)
+    born_65 = _years_ago(today, 65)
+    return (week_start, month_start,
+            born_18,
+            born_18, born_40,
+            born_40, born_65,
+            born_65)
+
+
+# One batched statement per dashboard screen. Each query returns a single row
+# whose columns line up with the listed keys; the optional third element
+# builds the query parameters.
+METRIC_QUERIES = {
+    'admin': (
+        """
+        SELECT
+            (SELECT COUNT(*) FROM Doctor) AS doctors,
+            (SELECT COUNT(*) FROM Staff) AS staff,
+            (SELECT COUNT(*) FROM Room) AS rooms
+        """,
+        ('doctors', 'staff', 'rooms'),
+    ),
+    'appointment': (
+        """
+        SELECT
+            COUNT(*) AS total,
+            (SELECT COUNT(*) FROM Appointment
+             WHERE appointment_date >= ? AND appointment_date < ?) AS today,
+            SUM(CASE WHEN status = 'scheduled' THEN 1 ELSE 0 END) AS scheduled,
+            SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) AS completed,
+            SUM(CASE WHEN status = 'cancelled' THEN 1 ELSE 0 END) AS cancelled
+        FROM Appointment
+        """,
+        ('total', 'today', 'scheduled', 'completed', 'cancelled'),
+        day_bounds,
+    ),
+    'patient': (
+        """
+        SELECT
+            COUNT(*) AS total,
+            SUM(CASE WHEN registered_on >= ? THEN 1 ELSE 0 END) AS new_this_week,
+            SUM(CASE WHEN registered_on >= ? THEN 1 ELSE 0 END) AS new_this_month,
+            SUM(CASE WHEN gender = 'M' THEN 1 ELSE 0 END) AS male,
+            SUM(CASE WHEN gender = 'F' THEN 1 ELSE 0 END) AS female,
+            SUM(CASE WHEN dob > ? THEN 1 ELSE 0 END) AS age_0_17,
+            SUM(CASE WHEN dob <= ? AND dob > ? THEN 1 ELSE 0 END) AS age_18_39,
+            SUM(CASE WHEN dob <= ? AND dob > ? THEN 1 ELSE 0 END) AS age_40_64,
+            SUM(CASE WHEN dob <= ? THEN 1 ELSE 0 END) AS age_65_plus
+        FROM Patient
+        """,
+        ('total', 'new_this_week', 'new_this_month', 'male', 'female',
+         'age_0_17', 'age_18_39', 'age_40_64', 'age_65_plus'),
+        patient_stats_params,
+    ),
+}
+
+
+class DashboardMetrics(BackgroundCache):
+    """Cached dashboard counters, refreshed in the background.
+
+    get() never touches the database on the calling thread: it returns the
+    cached values (possibly stale or None) and starts a background refresh
+    when the entry is older than ttl seconds.
+    """
+
+    error_message = "Error fetching dashboard stats"
+
+    def __init__(self, ttl=30):
+        super().__init__(ttl)
+        self._cache = {}  # screen -> (fetched_at, values)
+
+    def get(self, screen):
+        """Return (values, fresh) for a screen, refreshing stale entries in the background"""
+        with self._lock:
+            entry = self._cache.get(screen)
+            fresh = entry is not None and self._is_fresh(entry[0])
+            if not fresh:
+                self._start_refresh(screen)
+        return (entry[1] if entry else None), fresh
+
+    def fetch(self, screen, conn=None):
+        """Run the batched query for a screen and return its counters as a dict"""
+        query, keys, *params_fn = METRIC_QUERIES[screen]
+        params = params_fn[0]() if params_fn else ()
+        with borrowed_connection(conn) as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            row = cursor.fetchone()
+            cursor.close()
+        return {key: (row[i] or 0) if row else 0 for i, key in enumerate(keys)}
+
+    def invalidate(self, screen=None):
+        """Mark one screen (or all screens) stale so the next get() refreshes it"""
+        with self._lock:
+            if screen is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(screen, None)
+
+    def bind_labels(self, widget, screen, labels, default="0", interval=100):
+        """Update value labels once a background refresh finishes.
+
+        Polls from the Tk main loop via widget.after, so labels are only ever
+        touched on the GUI thread.
+        """
+        def show():
+            with self._lock:
+                entry = self._cache.get(screen)
+            values = entry[1] if entry else None
+            for key, label in labels.items():
+                if label.winfo_exists():
+                    label.configure(text=str(values.get(key, default)) if values else default)
+        self.after_refresh(widget, show, screen, interval)
+
+    def _load(self, screen):
+        values = self.fetch(screen)
+        with self._lock:
+            self._cache[screen] = (time.monotonic(), values)
+
+
+dashboard_metrics = DashboardMetrics()
@@ -1,9 +1,13 @@
 import time
 import pyodbc
-from datetime import datetime
+from datetime import datetime, date, timedelta
 import os
 import sys
 import hashlib
+import json
+import re
+import threading
+from contextlib import contextmanager
 
 def hash_password(password):
     """Hash password using SHA-256"""
@@ -76,14 +80,223 @@ def check_username_exists(username):
             conn.close()
     return False
 
+CONNECTION_STRING = (
+    'DRIVER={ODBC Driver 17 for SQL Server};'
+    'SERVER=localhost;'
+    'DATABASE=Hospital;'
+    'Trusted_Connection=yes;'
+)
+
+
+class PooledConnection:
+    """Checked-out connection; close() hands the underlying connection back to the pool"""
+
+    def __init__(self, pool, raw_conn):
+        self._pool = pool
+        self._raw = raw_conn
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get('_raw')
+        if raw is None:
+            raise AttributeError(f"Connection already returned to pool (accessing '{name}')")
+        return getattr(raw, name)
+
+    def close(self):
+        """Return the connection to the pool instead of closing it"""
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool.release(raw)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def __del__(self):
+        # Safety net for code paths that forget to close the connection
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of database connections.
+
+    Idle connections are health-checked when checked out and evicted after
+    idle_timeout seconds; at most max_size connections are open at once.
+    """
+
+    def __init__(self, factory, max_size=5, idle_timeout=300, checkout_timeout=10,
+                 health_check_query="SELECT 1"):
+        self._factory = factory
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.health_check_query = health_check_query
+        self._idle = []  # (raw connection, last used) pairs
+        self._in_use = 0
+        self._lock = threading.Condition()
+        self._stats = {
+            'created': 0,
+            'reused': 0,
+            'evicted_idle': 0,
+            'failed_health_checks': 0,
+            'discarded': 0,
+            'waits': 0,
+            'timeouts': 0,
+        }
+
+    def acquire(self):
+        """Check a connection out of the pool, opening a new one if needed"""
+        deadline = time.monotonic() + self.checkout_timeout
+        with self._lock:
+            while True:
+                self._evict_idle_locked()
+                while self._idle:
+                    raw, _ = self._idle.pop()
+                    if self._is_healthy(raw):
+                        self._in_use += 1
+                        self._stats['reused'] += 1
+                        return PooledConnection(self, raw)
+                    self._stats['failed_health_checks'] += 1
+                    self._close_raw(raw)
+                if self._in_use < self.max_size:
+                    # Reserve the slot, then connect outside the lock
+                    self._in_use += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise TimeoutError(f"No database connection available after {self.checkout_timeout}s")
+                self._stats['waits'] += 1
+                self._lock.wait(remaining)
+        try:
+            raw = self._factory()
+        except Exception:
+            with self._lock:
+                self._in_use -= 1
+                self._lock.notify()
+            raise
+        with self._lock:
+            self._stats['created'] += 1
+        return PooledConnection(self, raw)
+
+    def release(self, raw):
+        """Return a raw connection to the pool"""
+        healthy = True
+        try:
+            # Never hand an open transaction to the next caller
+            if not getattr(raw, 'autocommit', False):
+                raw.rollback()
+        except Exception:
+            healthy = False
+        with self._lock:
+            self._in_use -= 1
+            if healthy:
+                self._idle.append((raw, time.monotonic()))
+            else:
+                self._stats['discarded'] += 1
+                self._close_raw(raw)
+            self._lock.notify()
+
+    @contextmanager
+    def connection(self):
+        """Context manager yielding a pooled connection"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def stats(self):
+        """Return a snapshot of the pool counters"""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot.update({
+                'max_size': self.max_size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+            })
+            return snapshot
+
+    def close_all(self):
+        """Close every idle connection"""
+        with self._lock:
+            while self._idle:
+                self._close_raw(self._idle.pop()[0])
+
+    def _is_healthy(self, raw):
+        try:
+            cursor = raw.cursor()
+            cursor.execute(self.health_check_query)
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def _evict_idle_locked(self):
+        if not self.idle_timeout:
+            return
+        now = time.monotonic()
+        keep = []
+        for raw, last_used in self._idle:
+            if now - last_used > self.idle_timeout:
+                self._stats['evicted_idle'] += 1
+                self._close_raw(raw)
+            else:
+                keep.append((raw, last_used))
+        self._idle = keep
+
+    @staticmethod
+    def _close_raw(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Return the shared connection pool, creating it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(lambda: pyodbc.connect(CONNECTION_STRING))
+        return _pool
+
+def pool_stats():
+    """Return statistics for the shared connection pool"""
+    return get_pool().stats()
+
+@contextmanager
+def db_connection():
+    """Context manager yielding a pooled connection; raises if none is available"""
+    with get_pool().connection() as conn:
+        yield conn
+
+@contextmanager
+def borrowed_connection(conn=None):
+    """Yield conn if one is given, otherwise a pooled connection returned afterwards.
+
+    For helpers that take an optional conn, so a caller can run them on its
+    own connection (and transaction). Raises if no connection is available.
+    """
+    if conn is not None:
+        yield conn
+        return
+    with db_connection() as conn:
+        yield conn
+
 def connect_db():
+    """Check a connection out of the pool. close() returns it to the pool."""
     try:
-        return pyodbc.connect(
-            'DRIVER={ODBC Driver 17 for SQL Server};'
-            'SERVER=localhost;'
-            'DATABASE=Hospital;'
-            'Trusted_Connection=yes;'
-        )
+        return get_pool().acquire()
     except Exception as e:
         print(f"Error connecting to database: {e}")
         return None
@@ -133,6 +346,11 @@ def create_database(server, db_name):
         print(f"Error creating database: {e}")
         return False
 
+def split_sql_batches(sql_script):
+    """Split a script into batches on GO separators (GO alone on its line)"""
+    batches = re.split(r'^\s*GO\s*;?\s*$', sql_script, flags=re.MULTILINE | re.IGNORECASE)
+    return [batch.strip() for batch in batches if batch.strip()]
+
 def run_sql_file(server, db_name, sql_file_path):
     """Execute SQL file against specific database"""
     try:
@@ -150,7 +368,7 @@ def run_sql_file(server, db_name, sql_file_path):
         sql_script = sql_script.replace(f"USE {db_name};", "")
         
         # Split by GO statements
-        commands = [cmd.strip() for cmd in sql_script.split('GO') if cmd.strip()]
+        commands = split_sql_batches(sql_script)
         
         conn = pyodbc.connect(
             f"DRIVER={{ODBC Driver 17 for SQL Server}};SERVER={server};DATABASE={db_name};Trusted_Connection=yes;"
@@ -174,6 +392,55 @@ def run_sql_file(server, db_name, sql_file_path):
         print(f"Error running SQL file: {e}")
         return False
 
+def apply_migrations(server, db_name, migrations_dir='migrations'):
+    """Apply versioned schema migrations that have not been applied yet.
+
+    Migrations are the .sql files in migrations_dir, applied in file name
+    order. Each file runs in its own transaction and is recorded in
+    Schema_Migration so it is never applied twice.
+    """
+    migrations_path = resource_path(migrations_dir)
+    if not os.path.isdir(migrations_path):
+        return []
+    
+    conn = pyodbc.connect(
+        f"DRIVER={{ODBC Driver 17 for SQL Server}};SERVER={server};DATABASE={db_name};Trusted_Connection=yes;"
+    )
+    cursor = conn.cursor()
+    applied_now = []
+    try:
+        cursor.execute("""
+            IF OBJECT_ID('Schema_Migration', 'U') IS NULL
+                CREATE TABLE Schema_Migration (
+                    version VARCHAR(100) PRIMARY KEY,
+                    applied_at DATETIME NOT NULL DEFAULT GETDATE()
+                )
+        """)
+        conn.commit()
+        cursor.execute("SELECT version FROM Schema_Migration")
+        applied = {row[0] for row in cursor.fetchall()}
+        
+        for file_name in sorted(os.listdir(migrations_path)):
+            version = os.path.splitext(file_name)[0]
+            if not file_name.endswith('.sql') or version in applied:
+                continue
+            print(f"Applying migration: {file_name}")
+            with open(os.path.join(migrations_path, file_name), 'r', encoding='utf-8') as f:
+                batches = split_sql_batches(f.read())
+            try:
+                for batch in batches:
+                    cursor.execute(batch)
+                cursor.execute("INSERT INTO Schema_Migration (version) VALUES (?)", (version,))
+                conn.commit()
+                applied_now.append(version)
+            except Exception as e:
+                conn.rollback()
+                raise Exception(f"Migration {file_name} failed: {e}")
+        return applied_now
+    finally:
+        cursor.close()
+        conn.close()
+
 def ensure_database(server='localhost', db_name='Hospital', sql_file_name='HospitalManagementSystem.sql'):
     """Ensure database exists and create tables if needed"""
     try:
@@ -202,6 +469,9 @@ def ensure_database(server='localhost', db_name='Hospital', sql_file_name='Hospi
         if not database_exists(server, db_name):
             raise Exception("Database was not created successfully")
         
+        # Bring the schema up to date with any pending migrations
+        apply_migrations(server, db_name)
+        
         print(f"Database '{db_name}' is ready.")
         
         # Create tables using the schema file
@@ -212,6 +482,134 @@ def ensure_database(server='localhost', db_name='Hospital', sql_file_name='Hospi
         raise e
 
 
+def fetch_page(query, params=(), offset=0, limit=100):
+    """Return one page of rows for a query that ends in an ORDER BY clause"""
+    conn = connect_db()
+    if not conn:
+        raise ConnectionError("Could not connect to database")
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"{query} OFFSET ? ROWS FETCH NEXT ? ROWS ONLY", (*params, offset, limit))
+        rows = cursor.fetchall()
+        cursor.close()
+        return rows
+    finally:
+        conn.close()
+
+
+def day_bounds(day=None):
+    """Half-open [start, end) datetimes covering one calendar day (default today).
+
+    Filter with col >= start AND col < end rather than CAST(col AS DATE) = day
+    so the predicate can seek an index on the column.
+    """
+    if day is None:
+        day = date.today()
+    elif isinstance(day, str):
+        day = datetime.strptime(day, '%Y-%m-%d').date()
+    elif isinstance(day, datetime):
+        day = day.date()
+    start = datetime(day.year, day.month, day.day)
+    return start, start + timedelta(days=1)
+
+
+PAGE_SIZE = 100
+
+
+class KeysetPaginator:
+    """Seek (keyset) pagination over a list query.
+
+    Instead of OFFSET n, the next page is requested with a predicate on the
+    ORDER BY columns of the last row already seen, so every sequential page
+    costs the same as the first. Jumps to a page that has no cached cursor
+    fall back to OFFSET; sequential reads after the jump seek again.
+
+    select   -- SELECT ... FROM ... [JOIN ...] without WHERE or ORDER BY
+    order_by -- list of (column expression, 'ASC'|'DESC', row index) that
+                together identify a row uniquely
+    where    -- optional list of WHERE conditions, with params for their ? marks
+
+    fetch() is serialized: a superseded background load may still be running
+    when the next one starts, and both walk the same cursor map.
+    """
+
+    def __init__(self, select, order_by, where=(), params=(), page_size=PAGE_SIZE):
+        self.select = select
+        self.order_by = order_by
+        self.where = list(where)
+        self.params = tuple(params)
+        self.page_size = page_size
+        self._cursors = {}  # offset -> sort key of the row just before it
+        self.exhausted = False
+        self._lock = threading.RLock()
+
+    def _key(self, row):
+        return tuple(row[index] for _, _, index in self.order_by)
+
+    def _after(self, key, position=0):
+        """Condition and params selecting rows that sort after key.
+
+        Follows SQL Server's NULL ordering (first when ASC, last when DESC),
+        so nullable sort columns page correctly.
+        """
+        column, direction, _ = self.order_by[position]
+        value = key[position]
+        descending = direction.upper() == 'DESC'
+        if value is None:
+            greater, greater_params = ("1 = 0", []) if descending else (f"{column} IS NOT NULL", [])
+            equal, equal_params = f"{column} IS NULL", []
+        else:
+            greater = f"({column} < ? OR {column} IS NULL)" if descending else f"{column} > ?"
+            greater_params = [value]
+            equal, equal_params = f"{column} = ?", [value]
+        if position == len(self.order_by) - 1:
+            return greater, greater_params
+        rest, rest_params = self._after(key, position + 1)
+        return (f"({greater} OR ({equal} AND {rest}))",
+                greater_params + equal_params + rest_params)
+
+    def _query(self, extra_where=None):
+        conditions = self.where + ([extra_where] if extra_where else [])
+        query = self.select
+        if conditions:
+            query += " WHERE " + " AND ".join(f"({c})" for c in conditions)
+        order = ", ".join(f"{column} {direction}" for column, direction, _ in self.order_by)
+        return f"{query} ORDER BY {order}"
+
+    def fetch(self, offset, limit=None):
+        """Return up to limit rows starting at offset"""
+        limit = limit or self.page_size
+        with self._lock:
+            if offset == 0:
+                # Reading from the top starts a fresh walk; older cursors may be stale
+                self.reset()
+                rows = fetch_page(self._query(), self.params, 0, limit)
+            elif offset in self._cursors:
+                condition, seek_params = self._after(self._cursors[offset])
+                rows = fetch_page(self._query(condition), (*self.params, *seek_params), 0, limit)
+            else:
+                rows = fetch_page(self._query(), self.params, offset, limit)
+            if rows:
+                self._cursors[offset + len(rows)] = self._key(rows[-1])
+            if len(rows) < limit:
+                self.exhausted = True
+            return rows
+
+    def page(self, number):
+        """Jump to a zero-based page number"""
+        return self.fetch(number * self.page_size, self.page_size)
+
+    def load_more(self):
+        """Return the page after the furthest row fetched so far"""
+        with self._lock:
+            return self.fetch(max(self._cursors, default=0), self.page_size)
+
+    def reset(self):
+        with self._lock:
+            self._cursors.clear()
+            self.exhausted = False
+
+
 def get_departments():
     conn = connect_db()
     if conn:
@@ -264,23 +662,23 @@ def get_patient_history(patient_id):
             conn.close()
     return None
 
-def get_doctor_schedule(doctor_id, start_date, end_date):
-    """Get doctor's schedule for a date range"""
-    conn = connect_db()
-    if conn:
+def get_doctor_schedule(doctor_id, start_date, end_date, conn=None):
+    """Get doctor's schedule for a date range, both days inclusive.
+
+    Returns (appointment_id, appointment_date, status, patient_name,
+    contact_number) rows in time order, from one range seek on
+    IX_Appointment_Doctor_Date. Raises on failure, as the schedule calendar
+    runs it on the query executor. Uses a pooled connection unless conn is
+    given.
+    """
+    with borrowed_connection(conn) as conn:
+        cursor = conn.cursor()
         try:
-            cursor = conn.cursor()
-            cursor.execute("EXEC GetDoctorSchedule @doctor_id=?, @start_date=?, @end_date=?", 
-                         (doctor_id, start_date, end_date))
-            schedule = cursor.fetchall()
-            return schedule
-        except Exception as e:
-            print(f"Error getting doctor schedule: {e}")
-            return None
+            cursor.execute("EXEC GetDoctorSchedule @doctor_id=?, @start_date=?, @end_date=?",
+                           (doctor_id, start_date, end_date))
+            return cursor.fetchall()
         finally:
             cursor.close()
-            conn.close()
-    return None
 
 def get_department_statistics(department_id):
     """Get statistics for a department"""
@@ -298,3 +696,256 @@ def get_department_statistics(department_id):
             cursor.close()
             conn.close()
     return None
+
+def create_bill(admission_id, items, billing_date=None, paid_amount=0, conn=None):
+    """Create a bill and all its items in one transaction and return the bill_id.
+
+    items are (description, amount) pairs. CreateBillWithItems takes the
+    patient from the admission and the total from the items. Raises on
+    failure, in which case nothing is written. Uses a pooled connection
+    unless conn is given.
+    """
+    with borrowed_connection(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            items_json = json.dumps([{"description": desc, "amount": str(amount)} for desc, amount in items])
+            cursor.execute("""
+                SET NOCOUNT ON;
+                DECLARE @bill_id INT;
+                EXEC CreateBillWithItems @admission_id=?, @items=?, @billing_date=?, @paid_amount=?,
+                                         @bill_id=@bill_id OUTPUT;
+                SELECT @bill_id;
+            """, (admission_id, items_json, billing_date, paid_amount))
+            bill_id = cursor.fetchone()[0]
+            conn.commit()
+            return bill_id
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+def admit_patient(patient_id, room_number, bed_number, doctor_id, admission_date, conn=None):
+    """Admit a patient to a bed and return the admission_id.
+
+    AdmitPatient locks the bed for the length of its transaction, so of two
+    admissions to the same bed at once the second is refused as occupied.
+    Raises on failure, in which case nothing is written. Uses a pooled
+    connection unless conn is given.
+    """
+    with borrowed_connection(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                SET NOCOUNT ON;
+                DECLARE @admission_id INT;
+                EXEC AdmitPatient @patient_id=?, @room_number=?, @bed_number=?, @doctor_id=?,
+                                  @admission_date=?, @admission_id=@admission_id OUTPUT;
+                SELECT @admission_id;
+            """, (patient_id, room_number, bed_number, doctor_id, admission_date))
+            admission_id = cursor.fetchone()[0]
+            conn.commit()
+            return admission_id
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+def post_payment(bill_id, amount, method='Cash', reference=None, conn=None):
+    """Post a payment against a bill and return its payment_id.
+
+    PostPayment locks the bill, refuses amounts above its outstanding balance
+    and adds the payment to the bill's paid amount and the patient's balance.
+    Raises on failure, in which case nothing is written. Uses a pooled
+    connection unless conn is given.
+    """
+    with borrowed_connection(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                SET NOCOUNT ON;
+                DECLARE @payment_id INT;
+                EXEC PostPayment @bill_id=?, @amount=?, @method=?, @reference=?,
+                                 @payment_id=@payment_id OUTPUT;
+                SELECT @payment_id;
+            """, (bill_id, amount, method, reference))
+            payment_id = cursor.fetchone()[0]
+            conn.commit()
+            return payment_id
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+# Filtered unique index on Appointment (doctor_id, appointment_date) for
+# non-cancelled rows (migration 012)
+BOOKED_SLOT_INDEX = 'IX_Appointment_Booked_Slot'
+
+def is_double_booking(error):
+    """True if error is a clash with another appointment of the same doctor and time"""
+    return BOOKED_SLOT_INDEX in str(error)
+
+def book_appointment(patient_id, doctor_id, appointment_date, remarks=None, conn=None):
+    """Book an appointment; returns False if the doctor is already taken at that time.
+
+    There is no separate availability check: IX_Appointment_Booked_Slot
+    refuses the insert, so of two bookings of one slot at the same moment
+    exactly one succeeds. Raises on any other failure. Uses a pooled
+    connection unless conn is given.
+    """
+    with borrowed_connection(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("EXEC BookAppointment @patient_id=?, @doctor_id=?, @appointment_date=?, @remarks=?",
+                           (patient_id, doctor_id, appointment_date, remarks))
+            conn.commit()
+            return True
+        except Exception as e:
+            conn.rollback()
+            if is_double_booking(e):
+                return False
+            raise
+        finally:
+            cursor.close()
+
+def transition_appointments(new_status, appointment_ids=None, doctor_id=None, start=None, end=None,
+                            changed_by=None, reason=None, conn=None):
+    """Complete or cancel scheduled appointments in bulk and return how many changed.
+
+    Appointments are selected by any combination of appointment_ids, doctor_id
+    and the half-open time range [start, end); rows that are not 'scheduled'
+    are left alone. TransitionAppointmentStatus (migration 013) changes them
+    with one UPDATE and records the change and every appointment it touched.
+    Raises on failure, in which case nothing is written. Uses a pooled
+    connection unless conn is given.
+    """
+    with borrowed_connection(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            ids_json = json.dumps([int(i) for i in appointment_ids]) if appointment_ids is not None else None
+            cursor.execute("""
+                SET NOCOUNT ON;
+                DECLARE @rows_changed INT;
+                EXEC TransitionAppointmentStatus @new_status=?, @appointment_ids=?, @doctor_id=?,
+                                                 @range_start=?, @range_end=?, @changed_by=?, @reason=?,
+                                                 @rows_changed=@rows_changed OUTPUT;
+                SELECT @rows_changed;
+            """, (new_status, ids_json, doctor_id, start, end, changed_by, reason))
+            rows_changed = cursor.fetchone()[0]
+            conn.commit()
+            return rows_changed
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+def find_series_conflicts(doctor_id, occurrences, conn=None):
+    """The occurrences at which the doctor already has an appointment, in order.
+
+    One query checks every occurrence against IX_Appointment_Booked_Slot,
+    however long the series. Uses a pooled connection unless conn is given.
+    """
+    with borrowed_connection(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                SELECT a.appointment_date
+                FROM Appointment a
+                WHERE a.doctor_id = ?
+                  AND a.status <> 'cancelled'
+                  AND a.appointment_date IN (SELECT TRY_CONVERT(DATETIME, value, 126) FROM OPENJSON(?))
+                ORDER BY a.appointment_date
+            """, (doctor_id, json.dumps([o.isoformat() for o in occurrences])))
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+def book_appointment_series(patient_id, doctor_id, occurrences, frequency, every=1, weekdays=None,
+                            until=None, count=None, remarks=None, skip_conflicts=False, conn=None):
+    """Book a recurring appointment and return (series_id, appointments booked).
+
+    occurrences are the datetimes from recurrence.expand(); the pattern is
+    stored with the series. BookAppointmentSeries (migration 014) checks them
+    all against the doctor's appointments and inserts them in one
+    transaction. If any clash, nothing is booked and it raises, unless
+    skip_conflicts is set, in which case the others are booked. Uses a
+    pooled connection unless conn is given.
+    """
+    with borrowed_connection(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                SET NOCOUNT ON;
+                DECLARE @series_id INT, @booked INT;
+                EXEC BookAppointmentSeries @patient_id=?, @doctor_id=?, @occurrences=?, @frequency=?,
+                                           @repeat_every=?, @weekdays=?, @until=?, @occurrence_count=?,
+                                           @remarks=?, @skip_conflicts=?,
+                                           @series_id=@series_id OUTPUT, @booked=@booked OUTPUT;
+                SELECT @series_id, @booked;
+            """, (patient_id, doctor_id, json.dumps([o.isoformat() for o in occurrences]), frequency, every,
+                  weekdays, until, count, remarks, 1 if skip_conflicts else 0))
+            series_id, booked = cursor.fetchone()
+            conn.commit()
+            return series_id, booked
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+def update_series_from(appointment_id, new_time=None, doctor_id=None, remarks=None, conn=None):
+    """Move an appointment and the rest of its series; returns how many changed.
+
+    The scheduled occurrences from appointment_id on get new_time (a
+    datetime.time), doctor_id and remarks where given, and become a series of
+    their own (UpdateAppointmentSeriesFrom, migration 016). Returns None if
+    that would double-book the doctor, in which case nothing changes. Uses a
+    pooled connection unless conn is given.
+    """
+    with borrowed_connection(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                SET NOCOUNT ON;
+                DECLARE @new_series_id INT, @rows_changed INT;
+                EXEC UpdateAppointmentSeriesFrom @appointment_id=?, @new_time=?, @doctor_id=?, @remarks=?,
+                                                 @new_series_id=@new_series_id OUTPUT,
+                                                 @rows_changed=@rows_changed OUTPUT;
+                SELECT @rows_changed;
+            """, (appointment_id, new_time.strftime('%H:%M:%S') if new_time else None, doctor_id, remarks))
+            rows_changed = cursor.fetchone()[0]
+            conn.commit()
+            return rows_changed
+        except Exception as e:
+            conn.rollback()
+            if is_double_booking(e):
+                return None
+            raise
+        finally:
+            cursor.close()
+
+def cancel_series_from(appointment_id, changed_by=None, reason=None, conn=None):
+    """Cancel an appointment and the scheduled rest of its series; returns how many changed.
+
+    Goes through transition_appointments(), so the cancellation is audited
+    like any other. Uses a pooled connection unless conn is given.
+    """
+    with borrowed_connection(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                SELECT f.appointment_id
+                FROM Appointment a
+                JOIN Appointment f ON f.series_id = a.series_id AND f.appointment_date >= a.appointment_date
+                WHERE a.appointment_id = ? AND f.status = 'scheduled'
+            """, (appointment_id,))
+            ids = [row[0] for row in cursor.fetchall()]
+            if not ids:
+                return 0
+            return transition_appointments('cancelled', appointment_ids=ids, changed_by=changed_by,
+                                           reason=reason, conn=conn)
+        finally:
+            cursor.close()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Render HTML invoices for every bill in a date range.
+
+Bills and their items are read with one query, streamed in bill order and
+rendered from module-level templates across a pool of worker processes,
+either as one file per bill (bill_<id>.html in a directory) or as a single
+printable document with one invoice per page.
+
+    python invoices.py invoices/2024-03 --from 2024-03-01 --to 2024-03-31
+    python invoices.py march.html --single --from 2024-03-01 --to 2024-03-31
+"""
+
+import argparse
+import os
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from html import escape
+from db_connect import borrowed_connection, day_bounds
+
+# Invoices handed to a worker process at a time
+CHUNK_SIZE = 200
+
+Invoice = namedtuple('Invoice', 'bill_id patient_name admission_id billing_date total_amount paid_amount items')
+
+# Templates are plain str.format strings: parsed by C on every call, which is
+# as fast as pre-splitting them in Python, and no template engine is needed
+PAGE_START = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+    body {{ font-family: Arial, sans-serif; margin: 40px; }}
+    .invoice {{ page-break-after: always; }}
+    .invoice:last-child {{ page-break-after: auto; }}
+    .header {{ text-align: center; margin-bottom: 30px; }}
+    .details {{ margin-bottom: 20px; }}
+    table {{ width: 100%; border-collapse: collapse; }}
+    th, td {{ padding: 8px; text-align: left; border-bottom: 1px solid #ddd; }}
+    .total {{ text-align: right; margin-top: 20px; }}
+</style>
+</head>
+<body>
+"""
+
+PAGE_END = """</body>
+</html>
+"""
+
+INVOICE = """<section class="invoice">
+    <div class="header">
+        <h1>Hospital Bill</h1>
+        <h2>Bill #{bill_id}</h2>
+    </div>
+    <div class="details">
+        <p><strong>Patient:</strong> {patient_name}</p>
+        <p><strong>Admission ID:</strong> {admission_id}</p>
+        <p><strong>Date:</strong> {billing_date}</p>
+    </div>
+    <table>
+        <tr>
+            <th>Description</th>
+            <th>Amount</th>
+        </tr>
+{items}    </table>
+    <div class="total">
+        <p><strong>Total Amount:</strong> ${total_amount:.2f}</p>
+        <p><strong>Paid Amount:</strong> ${paid_amount:.2f}</p>
+        <p><strong>Status:</strong> {status}</p>
+    </div>
+</section>
+"""
+
+ITEM = """        <tr>
+            <td>{}</td>
+            <td>${:.2f}</td>
+        </tr>
+"""
+
+
+def fetch_invoices(start=None, end=None, bill_ids=None, batch_size=1000, conn=None):
+    """Yield an Invoice for each bill billed from start to end (inclusive days) or listed in bill_ids.
+
+    All bills come from a single query ordered by bill, so the items of a
+    bill arrive together and each Invoice is yielded as soon as it is
+    complete; rows are fetched batch_size at a time.
+    """
+    where, params = [], []
+    if start:
+        where.append("b.billing_date >= ?")
+        params.append(day_bounds(start)[0])
+    if end:
+        where.append("b.billing_date < ?")
+        params.append(day_bounds(end)[1])
+    if bill_ids is not None:
+        where.append(f"b.bill_id IN ({', '.join('?' for _ in bill_ids)})" if bill_ids else "1 = 0")
+        params += list(bill_ids)
+    query = """
+        SELECT b.bill_id, p.first_name, p.last_name, b.admission_id, b.billing_date,
+               b.total_amount, b.paid_amount, bi.description, bi.amount
+        FROM Billing b
+        LEFT JOIN Patient p ON b.patient_id = p.patient_id
+        LEFT JOIN Bill_Item bi ON bi.bill_id = b.bill_id
+    """
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += " ORDER BY b.bill_id, bi.item_id"
+
+    with borrowed_connection(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query, params)
+            invoice = None
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for bill_id, first_name, last_name, admission_id, billing_date, total, paid, description, amount in rows:
+                    if invoice is None or invoice.bill_id != bill_id:
+                        if invoice is not None:
+                            yield invoice
+                        name = " ".join(part for part in (first_name, last_name) if part)
+                        invoice = Invoice(bill_id, name, admission_id, billing_date, total or 0, paid or 0, [])
+                    if description and amount is not None:
+                        invoice.items.append((description, amount))
+            if invoice is not None:
+                yield invoice
+        finally:
+            cursor.close()
+
+
+def render_invoice(invoice):
+    """HTML section of one invoice"""
+    return INVOICE.format(
+        bill_id=invoice.bill_id,
+        patient_name=escape(invoice.patient_name),
+        admission_id=invoice.admission_id,
+        billing_date=invoice.billing_date,
+        items="".join(ITEM.format(escape(description), amount) for description, amount in invoice.items),
+        total_amount=invoice.total_amount,
+        paid_amount=invoice.paid_amount,
+        status='Paid' if invoice.paid_amount >= invoice.total_amount else 'Pending',
+    )
+
+
+def invoice_html(invoice):
+    """Complete HTML document of one invoice"""
+    return PAGE_START.format(title=f"Bill #{invoice.bill_id}") + render_invoice(invoice) + PAGE_END
+
+
+def _write_files(invoices, directory):
+    # Worker process: one file per invoice
+    for invoice in invoices:
+        with open(os.path.join(directory, f"bill_{invoice.bill_id}.html"), 'w', encoding='utf-8') as f:
+            f.write(invoice_html(invoice))
+    return len(invoices), ""
+
+
+def _render_sections(invoices):
+    # Worker process: sections for the parent to append to the document
+    return len(invoices), "".join(render_invoice(invoice) for invoice in invoices)
+
+
+def _chunks(invoices, size):
+    chunk = []
+    for invoice in invoices:
+        chunk.append(invoice)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _run(task, chunks, args, workers):
+    """Yield task(chunk, *args) for every chunk, in order.
+
+    With more than one worker the chunks are rendered in a process pool; at
+    most two chunks per worker are in flight, so a long run never holds more
+    than that in memory while the query is still streaming.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for chunk in chunks:
+            yield task(chunk, *args)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(task, chunk, *args))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class RenderResult:
+    """Invoices rendered by one batch and how long it took"""
+
+    def __init__(self, invoices, seconds):
+        self.invoices = invoices
+        self.seconds = seconds
+
+    @property
+    def rate(self):
+        return self.invoices / self.seconds if self.seconds else 0.0
+
+
+def render_invoices(output, start=None, end=None, single_file=False, workers=None,
+                    chunk_size=CHUNK_SIZE, progress=None, conn=None):
+    """Render the invoices of every bill from start to end and return a RenderResult.
+
+    output is a directory that receives bill_<id>.html files, or with
+    single_file the path of one document holding every invoice. workers is
+    the number of rendering processes (default: one per CPU; 1 renders in
+    this process). progress, if given, is called as progress(invoices
+    rendered) after every chunk.
+    """
+    started = time.perf_counter()
+    chunks = _chunks(fetch_invoices(start, end, conn=conn), chunk_size)
+    rendered = 0
+    if single_file:
+        with open(output, 'w', encoding='utf-8') as document:
+            document.write(PAGE_START.format(title=f"Invoices {start or ''} - {end or ''}"))
+            for count, sections in _run(_render_sections, chunks, (), workers):
+                document.write(sections)
+                rendered += count
+                if progress:
+                    progress(rendered)
+            document.write(PAGE_END)
+    else:
+        os.makedirs(output, exist_ok=True)
+        for count, _ in _run(_write_files, chunks, (output,), workers):
+            rendered += count
+            if progress:
+                progress(rendered)
+    return RenderResult(rendered, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('output', help="Directory for bill_<id>.html files, or a file with --single")
+    parser.add_argument('--from', dest='start', metavar='YYYY-MM-DD')
+    parser.add_argument('--to', dest='end', metavar='YYYY-MM-DD')
+    parser.add_argument('--single', action='store_true', help="Write one document with every invoice")
+    parser.add_argument('--workers', type=int, help="Rendering processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    def report(count):
+        print(f"\r{count:,} invoices rendered", end="", flush=True)
+
+    result = render_invoices(args.output, args.start, args.end, args.single, args.workers, progress=report)
+    print(f"\rRendered {result.invoices:,} invoices in {result.seconds:.1f}s ({result.rate:,.0f} invoices/s)")
+
+
+if __name__ == '__main__':
+    main()
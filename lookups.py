@@ -0,0 +1,87 @@
+from db_connect import KeysetPaginator
+from name_search import DOCTOR, like_prefix, name_filter
+
+# Options fetched per page of a widgets.LookupCombobox
+LOOKUP_PAGE_SIZE = 50
+
+
+def patient_lookup(term):
+    """Patients by ID or name, newest first: (patient_id, first_name, last_name, contact_number)"""
+    where, params = [], ()
+    if term.isdigit():
+        where, params = ["patient_id = ?"], (int(term),)
+    elif term:
+        name_match, params = name_filter("patient_id", term)
+        where = [name_match]
+    return KeysetPaginator("SELECT patient_id, first_name, last_name, contact_number FROM Patient",
+                           order_by=[("patient_id", "DESC", 0)], where=where, params=params,
+                           page_size=LOOKUP_PAGE_SIZE)
+
+
+def format_patient(row):
+    return f"{row[0]} - {row[1]} {row[2]}" + (f" ({row[3]})" if row[3] else "")
+
+
+def doctor_lookup(term):
+    """Doctors by ID, name or specialization: (doctor_id, first_name, last_name, specialization)"""
+    where, params = [], ()
+    if term.isdigit():
+        where, params = ["doctor_id = ?"], (int(term),)
+    elif term:
+        name_match, params = name_filter("doctor_id", term, DOCTOR)
+        pattern, escape = like_prefix(term)
+        where, params = [f"{name_match} OR specialization LIKE ?{escape}"], (*params, pattern)
+    return KeysetPaginator("SELECT doctor_id, first_name, last_name, specialization FROM Doctor",
+                           order_by=[("doctor_id", "ASC", 0)], where=where, params=params,
+                           page_size=LOOKUP_PAGE_SIZE)
+
+
+def format_doctor(row):
+    return f"{row[0]} - Dr. {row[1]} {row[2]}" + (f" | {row[3]}" if row[3] else "")
+
+
+def free_bed_lookup(term):
+    """Unoccupied beds, optionally in rooms starting with term: (room_number, bed_number, room_type)"""
+    where, params = ["b.is_occupied = 0"], ()
+    if term:
+        pattern, escape = like_prefix(term)
+        where, params = where + [f"b.room_number LIKE ?{escape}"], (pattern,)
+    return KeysetPaginator("""
+        SELECT b.room_number, b.bed_number, r.room_type
+        FROM Bed b
+        LEFT JOIN Room r ON r.room_number = b.room_number
+    """, order_by=[("b.room_number", "ASC", 0), ("b.bed_number", "ASC", 1)], where=where, params=params,
+        page_size=LOOKUP_PAGE_SIZE)
+
+
+def format_bed(row):
+    return f"{row[0]}-{row[1]}" + (f" ({row[2]})" if row[2] else "")
+
+
+def open_admission_lookup(term, patient_id=None):
+    """Current admissions by admission/patient ID or patient name, latest first.
+
+    Rows are (admission_id, first_name, last_name, admission_date); with
+    patient_id only that patient's admissions are offered.
+    """
+    where, params = ["a.discharge_date IS NULL"], []
+    if patient_id is not None:
+        where.append("a.patient_id = ?")
+        params.append(patient_id)
+    if term.isdigit():
+        where.append("a.admission_id = ? OR a.patient_id = ?")
+        params += [int(term), int(term)]
+    elif term:
+        name_match, name_params = name_filter("a.patient_id", term)
+        where.append(name_match)
+        params += name_params
+    return KeysetPaginator("""
+        SELECT a.admission_id, p.first_name, p.last_name, a.admission_date
+        FROM Admission a
+        JOIN Patient p ON a.patient_id = p.patient_id
+    """, order_by=[("a.admission_date", "DESC", 3), ("a.admission_id", "DESC", 0)], where=where,
+        params=params, page_size=LOOKUP_PAGE_SIZE)
+
+
+def format_admission(row):
+    return f"{row[0]} - {row[1]} {row[2]} ({row[3]})"
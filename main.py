@@ -1,5 +1,6 @@
 import customtkinter as ctk
 from tkinter import messagebox
+import multiprocessing
 import sys
 from auth_interface import AuthInterface
 from admin_module import AdminModule
@@ -7,6 +8,7 @@ from patient_module import PatientModule
 from appointment_module import AppointmentModule
 from billing_module import BillingModule
 from db_connect import ensure_database
+from query_executor import executor, job_executor
 
 # Set appearance mode and default color theme
 ctk.set_appearance_mode("dark")
@@ -31,6 +33,10 @@ class HospitalManagementSystem:
         self.current_user = None
         self.current_module = None
         
+        # Deliver background query results on the Tk main loop
+        executor.attach(self.root)
+        job_executor.attach(self.root)
+        
         # Ensure database exists
         self.setup_database()
         
@@ -127,9 +133,14 @@ class HospitalManagementSystem:
     def run(self):
         """Start the application"""
         self.root.mainloop()
+        executor.shutdown()
+        job_executor.shutdown()
 
 def main():
     """Main entry point"""
+    # Batch invoice rendering starts worker processes; in the frozen .exe each
+    # worker re-runs this entry point and must not open another window
+    multiprocessing.freeze_support()
     try:
         app = HospitalManagementSystem()
         app.run()
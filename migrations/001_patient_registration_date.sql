@@ -0,0 +1,12 @@
+-- Record when each patient was registered so the patient dashboard can
+-- report new registrations. Existing rows keep a NULL registration date.
+IF COL_LENGTH('Patient', 'registered_on') IS NULL
+    ALTER TABLE Patient ADD registered_on DATE NULL
+        CONSTRAINT DF_Patient_registered_on DEFAULT (CAST(GETDATE() AS DATE));
+GO
+
+-- Narrow index covering the patient dashboard aggregate so it scans this
+-- index instead of the full Patient rows
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Patient_Dashboard' AND object_id = OBJECT_ID('Patient'))
+    CREATE NONCLUSTERED INDEX IX_Patient_Dashboard ON Patient (registered_on) INCLUDE (gender, dob);
+GO
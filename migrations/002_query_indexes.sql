@@ -0,0 +1,51 @@
+-- Secondary indexes for the predicates the application filters, joins and
+-- sorts on. Until now the schema only had primary keys, so every lookup
+-- below was a clustered index scan.
+
+-- GetDoctorSchedule, trg_PreventDoubleBooking and the booking conflict check
+-- look up a doctor's appointments by date
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Appointment_Doctor_Date' AND object_id = OBJECT_ID('Appointment'))
+    CREATE NONCLUSTERED INDEX IX_Appointment_Doctor_Date ON Appointment (doctor_id, appointment_date) INCLUDE (status, patient_id);
+GO
+
+-- Status filter on the manage appointments screen, newest first
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Appointment_Status' AND object_id = OBJECT_ID('Appointment'))
+    CREATE NONCLUSTERED INDEX IX_Appointment_Status ON Appointment (status, appointment_date);
+GO
+
+-- A patient's appointments, and the Patient foreign key
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Appointment_Patient' AND object_id = OBJECT_ID('Appointment'))
+    CREATE NONCLUSTERED INDEX IX_Appointment_Patient ON Appointment (patient_id);
+GO
+
+-- GetPatientHistory and the medical records patient filter
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Medical_Record_Patient_Visit' AND object_id = OBJECT_ID('Medical_Record'))
+    CREATE NONCLUSTERED INDEX IX_Medical_Record_Patient_Visit ON Medical_Record (patient_id, visit_date);
+GO
+
+-- Currently admitted patients (discharge_date IS NULL), newest first
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Admission_Discharge' AND object_id = OBJECT_ID('Admission'))
+    CREATE NONCLUSTERED INDEX IX_Admission_Discharge ON Admission (discharge_date, admission_date)
+        INCLUDE (patient_id, doctor_id, room_number, bed_number);
+GO
+
+-- A patient's bills
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Billing_Patient_Date' AND object_id = OBJECT_ID('Billing'))
+    CREATE NONCLUSTERED INDEX IX_Billing_Patient_Date ON Billing (patient_id, billing_date);
+GO
+
+-- The bill list is read newest first
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Billing_Date' AND object_id = OBJECT_ID('Billing'))
+    CREATE NONCLUSTERED INDEX IX_Billing_Date ON Billing (billing_date)
+        INCLUDE (patient_id, admission_id, total_amount, paid_amount);
+GO
+
+-- Bill details and printing read all items of one bill
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Bill_Item_Bill' AND object_id = OBJECT_ID('Bill_Item'))
+    CREATE NONCLUSTERED INDEX IX_Bill_Item_Bill ON Bill_Item (bill_id) INCLUDE (description, amount);
+GO
+
+-- Free bed lookups for admissions and the admin dashboard
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Bed_Occupied' AND object_id = OBJECT_ID('Bed'))
+    CREATE NONCLUSTERED INDEX IX_Bed_Occupied ON Bed (is_occupied);
+GO
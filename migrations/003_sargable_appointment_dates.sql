@@ -0,0 +1,36 @@
+-- Filter appointment dates with half-open ranges instead of
+-- CAST(appointment_date AS DATE), which hides the column from the
+-- optimizer and forces a scan of every appointment.
+CREATE OR ALTER PROCEDURE GetDoctorSchedule
+    @doctor_id INT,
+    @start_date DATE,
+    @end_date DATE
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    -- [start of @start_date, start of the day after @end_date)
+    DECLARE @from DATETIME = CAST(@start_date AS DATETIME);
+    DECLARE @to DATETIME = DATEADD(DAY, 1, CAST(@end_date AS DATETIME));
+
+    SELECT
+        a.appointment_id,
+        a.appointment_date,
+        a.status,
+        CONCAT(p.first_name, ' ', p.last_name) as patient_name,
+        p.contact_number
+    FROM Appointment a
+    JOIN Patient p ON a.patient_id = p.patient_id
+    WHERE a.doctor_id = @doctor_id
+    AND a.appointment_date >= @from
+    AND a.appointment_date < @to
+    ORDER BY a.appointment_date;
+END;
+GO
+
+-- Covers date-range reads across all doctors: today's schedule, the
+-- dashboard "today" count and the appointment search by date
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Appointment_Date' AND object_id = OBJECT_ID('Appointment'))
+    CREATE NONCLUSTERED INDEX IX_Appointment_Date ON Appointment (appointment_date)
+        INCLUDE (doctor_id, patient_id, status);
+GO
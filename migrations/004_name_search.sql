@@ -0,0 +1,134 @@
+-- Name search index over Patient and Doctor names. Searching with
+-- LIKE '%term%' scans every row; instead each name is split into lower-case
+-- words (for prefix seeks) and the words into trigrams (for substring and
+-- fuzzy matches), kept up to date by triggers. Queried through name_search.py.
+IF OBJECT_ID('Name_Search_Token', 'U') IS NULL
+    CREATE TABLE Name_Search_Token (
+        entity_type CHAR(1) NOT NULL,  -- 'P' patient, 'D' doctor
+        token VARCHAR(50) NOT NULL,
+        entity_id INT NOT NULL,
+        CONSTRAINT PK_Name_Search_Token PRIMARY KEY (entity_type, token, entity_id)
+    );
+GO
+
+IF OBJECT_ID('Name_Search_Gram', 'U') IS NULL
+    CREATE TABLE Name_Search_Gram (
+        entity_type CHAR(1) NOT NULL,
+        gram VARCHAR(3) NOT NULL,
+        entity_id INT NOT NULL,
+        CONSTRAINT PK_Name_Search_Gram PRIMARY KEY (entity_type, gram, entity_id)
+    );
+GO
+
+-- The triggers replace all rows of a changed entity
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Name_Search_Token_Entity' AND object_id = OBJECT_ID('Name_Search_Token'))
+    CREATE NONCLUSTERED INDEX IX_Name_Search_Token_Entity ON Name_Search_Token (entity_type, entity_id);
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Name_Search_Gram_Entity' AND object_id = OBJECT_ID('Name_Search_Gram'))
+    CREATE NONCLUSTERED INDEX IX_Name_Search_Gram_Entity ON Name_Search_Gram (entity_type, entity_id);
+GO
+
+-- Lower-case words of a name; keep the separators in sync with name_search.tokens()
+CREATE OR ALTER FUNCTION dbo.NameSearchTokens (@name VARCHAR(101))
+RETURNS TABLE
+AS
+RETURN
+    SELECT DISTINCT LOWER(value) AS token
+    FROM STRING_SPLIT(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(@name,
+        CHAR(9), ' '), '-', ' '), '.', ' '), ',', ' '), '''', ' '), ' ')
+    WHERE value <> '';
+GO
+
+-- Trigrams of ' ' + word + ' ', as name_search.trigrams(word)
+CREATE OR ALTER FUNCTION dbo.NameSearchGrams (@token VARCHAR(50))
+RETURNS TABLE
+AS
+RETURN
+    SELECT DISTINCT SUBSTRING(' ' + @token + ' ', n, 3) AS gram
+    FROM (
+        SELECT TOP (LEN(@token)) ROW_NUMBER() OVER (ORDER BY (SELECT NULL)) AS n
+        FROM (VALUES (0), (0), (0), (0), (0), (0), (0), (0)) a(x)
+        CROSS JOIN (VALUES (0), (0), (0), (0), (0), (0), (0), (0)) b(x)
+    ) numbers;
+GO
+
+CREATE OR ALTER TRIGGER trg_PatientNameSearch
+ON Patient
+AFTER INSERT, UPDATE, DELETE
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    IF EXISTS (SELECT 1 FROM inserted) AND EXISTS (SELECT 1 FROM deleted)
+       AND NOT (UPDATE(first_name) OR UPDATE(last_name))
+        RETURN;
+
+    DELETE t FROM Name_Search_Token t
+    JOIN deleted d ON t.entity_type = 'P' AND t.entity_id = d.patient_id;
+
+    DELETE g FROM Name_Search_Gram g
+    JOIN deleted d ON g.entity_type = 'P' AND g.entity_id = d.patient_id;
+
+    INSERT INTO Name_Search_Token (entity_type, token, entity_id)
+    SELECT 'P', t.token, i.patient_id
+    FROM inserted i
+    CROSS APPLY dbo.NameSearchTokens(CONCAT(i.first_name, ' ', i.last_name)) t;
+
+    INSERT INTO Name_Search_Gram (entity_type, gram, entity_id)
+    SELECT DISTINCT 'P', g.gram, i.patient_id
+    FROM inserted i
+    CROSS APPLY dbo.NameSearchTokens(CONCAT(i.first_name, ' ', i.last_name)) t
+    CROSS APPLY dbo.NameSearchGrams(t.token) g;
+END;
+GO
+
+CREATE OR ALTER TRIGGER trg_DoctorNameSearch
+ON Doctor
+AFTER INSERT, UPDATE, DELETE
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    IF EXISTS (SELECT 1 FROM inserted) AND EXISTS (SELECT 1 FROM deleted)
+       AND NOT (UPDATE(first_name) OR UPDATE(last_name))
+        RETURN;
+
+    DELETE t FROM Name_Search_Token t
+    JOIN deleted d ON t.entity_type = 'D' AND t.entity_id = d.doctor_id;
+
+    DELETE g FROM Name_Search_Gram g
+    JOIN deleted d ON g.entity_type = 'D' AND g.entity_id = d.doctor_id;
+
+    INSERT INTO Name_Search_Token (entity_type, token, entity_id)
+    SELECT 'D', t.token, i.doctor_id
+    FROM inserted i
+    CROSS APPLY dbo.NameSearchTokens(CONCAT(i.first_name, ' ', i.last_name)) t;
+
+    INSERT INTO Name_Search_Gram (entity_type, gram, entity_id)
+    SELECT DISTINCT 'D', g.gram, i.doctor_id
+    FROM inserted i
+    CROSS APPLY dbo.NameSearchTokens(CONCAT(i.first_name, ' ', i.last_name)) t
+    CROSS APPLY dbo.NameSearchGrams(t.token) g;
+END;
+GO
+
+-- Index the names already on file
+IF NOT EXISTS (SELECT 1 FROM Name_Search_Token)
+BEGIN
+    INSERT INTO Name_Search_Token (entity_type, token, entity_id)
+    SELECT 'P', t.token, p.patient_id
+    FROM Patient p
+    CROSS APPLY dbo.NameSearchTokens(CONCAT(p.first_name, ' ', p.last_name)) t;
+
+    INSERT INTO Name_Search_Token (entity_type, token, entity_id)
+    SELECT 'D', t.token, d.doctor_id
+    FROM Doctor d
+    CROSS APPLY dbo.NameSearchTokens(CONCAT(d.first_name, ' ', d.last_name)) t;
+
+    INSERT INTO Name_Search_Gram (entity_type, gram, entity_id)
+    SELECT DISTINCT t.entity_type, g.gram, t.entity_id
+    FROM Name_Search_Token t
+    CROSS APPLY dbo.NameSearchGrams(t.token) g;
+END;
+GO
@@ -0,0 +1,10 @@
+-- Version stamp on every Patient change, so the in-memory patient directory
+-- (patient_directory.py) can fetch just the rows changed since its last
+-- refresh instead of reloading the registry
+IF COL_LENGTH('Patient', 'row_version') IS NULL
+    ALTER TABLE Patient ADD row_version ROWVERSION;
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Patient_RowVersion' AND object_id = OBJECT_ID('Patient'))
+    CREATE NONCLUSTERED INDEX IX_Patient_RowVersion ON Patient (row_version);
+GO
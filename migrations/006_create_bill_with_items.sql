@@ -0,0 +1,72 @@
+-- Create a bill and all of its items in one call and one transaction.
+-- Replaces GenerateBill + SELECT IDENT_CURRENT('Billing') + one AddBillItem
+-- per item: IDENT_CURRENT is the last identity issued by any session, so
+-- two clerks billing at the same moment could attach items to each other's
+-- bills. The patient comes from the admission and the total from the items.
+--
+-- @items is a JSON array: [{"description": "Room charges", "amount": 1500.00}, ...]
+CREATE OR ALTER PROCEDURE CreateBillWithItems
+    @admission_id INT,
+    @items NVARCHAR(MAX),
+    @billing_date DATE = NULL,
+    @paid_amount DECIMAL(10,2) = 0,
+    @bill_id INT OUTPUT
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    IF ISJSON(@items) = 0
+    BEGIN
+        RAISERROR('Bill items must be a JSON array.', 16, 1);
+        RETURN;
+    END
+
+    DECLARE @lines TABLE (
+        line INT PRIMARY KEY,
+        description VARCHAR(200),
+        amount DECIMAL(10,2)
+    );
+
+    INSERT INTO @lines (line, description, amount)
+    SELECT CAST([key] AS INT),
+           CAST(JSON_VALUE(value, '$.description') AS VARCHAR(200)),
+           TRY_CAST(JSON_VALUE(value, '$.amount') AS DECIMAL(10,2))
+    FROM OPENJSON(@items);
+
+    IF NOT EXISTS (SELECT 1 FROM @lines)
+    BEGIN
+        RAISERROR('A bill needs at least one item.', 16, 1);
+        RETURN;
+    END
+
+    IF EXISTS (SELECT 1 FROM @lines WHERE description IS NULL OR amount IS NULL OR amount < 0)
+    BEGIN
+        RAISERROR('Every bill item needs a description and a non-negative amount.', 16, 1);
+        RETURN;
+    END
+
+    DECLARE @patient_id INT = (SELECT patient_id FROM Admission WHERE admission_id = @admission_id);
+    IF @patient_id IS NULL
+    BEGIN
+        RAISERROR('Admission %d does not exist.', 16, 1, @admission_id);
+        RETURN;
+    END
+
+    BEGIN TRANSACTION;
+
+    INSERT INTO Billing (patient_id, admission_id, total_amount, paid_amount, billing_date)
+    SELECT @patient_id, @admission_id, SUM(amount), @paid_amount,
+           COALESCE(@billing_date, CAST(GETDATE() AS DATE))
+    FROM @lines;
+
+    SET @bill_id = SCOPE_IDENTITY();
+
+    INSERT INTO Bill_Item (bill_id, description, amount)
+    SELECT @bill_id, description, amount
+    FROM @lines
+    ORDER BY line;
+
+    COMMIT TRANSACTION;
+END;
+GO
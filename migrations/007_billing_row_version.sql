@@ -0,0 +1,10 @@
+-- Version stamp on every Billing change, so the bill list can fetch just the
+-- bills created or paid since its last refresh and patch those cards
+-- instead of rebuilding the whole list
+IF COL_LENGTH('Billing', 'row_version') IS NULL
+    ALTER TABLE Billing ADD row_version ROWVERSION;
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Billing_RowVersion' AND object_id = OBJECT_ID('Billing'))
+    CREATE NONCLUSTERED INDEX IX_Billing_RowVersion ON Billing (row_version);
+GO
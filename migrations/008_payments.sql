@@ -0,0 +1,291 @@
+-- Payments ledger. Every payment is a Payment row posted through PostPayment.
+-- Billing.paid_amount becomes the running total of a bill's payments and
+-- Patient_Balance the outstanding total of each patient's bills; triggers
+-- apply each change as a delta, so balances and receivables never re-sum
+-- the ledger. Receivable and AR_Aging report what is still owed by age.
+IF OBJECT_ID('Payment', 'U') IS NULL
+    CREATE TABLE Payment (
+        payment_id INT PRIMARY KEY IDENTITY,
+        bill_id INT NOT NULL FOREIGN KEY REFERENCES Billing(bill_id),
+        amount DECIMAL(10,2) NOT NULL CHECK (amount > 0),
+        paid_on DATETIME NOT NULL DEFAULT GETDATE(),
+        method VARCHAR(20) NOT NULL DEFAULT 'Cash',
+        reference VARCHAR(100) NULL
+    );
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Payment_Bill' AND object_id = OBJECT_ID('Payment'))
+    CREATE NONCLUSTERED INDEX IX_Payment_Bill ON Payment (bill_id) INCLUDE (amount, paid_on);
+GO
+
+-- What was paid before the ledger existed becomes one opening payment per bill
+INSERT INTO Payment (bill_id, amount, paid_on, method)
+SELECT b.bill_id, b.paid_amount, COALESCE(CAST(b.billing_date AS DATETIME), GETDATE()), 'Opening balance'
+FROM Billing b
+WHERE b.paid_amount > 0
+  AND NOT EXISTS (SELECT 1 FROM Payment p WHERE p.bill_id = b.bill_id);
+GO
+
+UPDATE Billing SET paid_amount = 0 WHERE paid_amount IS NULL;
+GO
+
+-- Persisted, so the bill list reads the status instead of recomputing it and
+-- receivables seek the bills with something outstanding
+IF COL_LENGTH('Billing', 'outstanding') IS NULL
+    ALTER TABLE Billing ADD outstanding AS (COALESCE(total_amount, 0) - COALESCE(paid_amount, 0)) PERSISTED;
+GO
+
+IF COL_LENGTH('Billing', 'payment_status') IS NULL
+    ALTER TABLE Billing ADD payment_status AS (CAST(CASE WHEN COALESCE(paid_amount, 0) >= COALESCE(total_amount, 0)
+                                                         THEN 'Paid' ELSE 'Pending' END AS VARCHAR(7))) PERSISTED;
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Billing_Outstanding' AND object_id = OBJECT_ID('Billing'))
+    CREATE NONCLUSTERED INDEX IX_Billing_Outstanding ON Billing (outstanding, billing_date) INCLUDE (patient_id);
+GO
+
+IF OBJECT_ID('Patient_Balance', 'U') IS NULL
+    CREATE TABLE Patient_Balance (
+        patient_id INT PRIMARY KEY FOREIGN KEY REFERENCES Patient(patient_id),
+        outstanding DECIMAL(12,2) NOT NULL DEFAULT 0,
+        open_bills INT NOT NULL DEFAULT 0
+    );
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Patient_Balance_Outstanding' AND object_id = OBJECT_ID('Patient_Balance'))
+    CREATE NONCLUSTERED INDEX IX_Patient_Balance_Outstanding ON Patient_Balance (outstanding) INCLUDE (open_bills);
+GO
+
+INSERT INTO Patient_Balance (patient_id, outstanding, open_bills)
+SELECT b.patient_id, SUM(b.outstanding), SUM(CASE WHEN b.outstanding > 0 THEN 1 ELSE 0 END)
+FROM Billing b
+WHERE b.patient_id IS NOT NULL
+  AND NOT EXISTS (SELECT 1 FROM Patient_Balance pb WHERE pb.patient_id = b.patient_id)
+GROUP BY b.patient_id;
+GO
+
+-- Payments move their bill's paid_amount...
+CREATE OR ALTER TRIGGER trg_PaymentPaidAmount
+ON Payment
+AFTER INSERT, UPDATE, DELETE
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    UPDATE b
+    SET paid_amount = COALESCE(b.paid_amount, 0) + d.amount
+    FROM Billing b
+    JOIN (
+        SELECT bill_id, SUM(amount) AS amount
+        FROM (SELECT bill_id, amount FROM inserted
+              UNION ALL
+              SELECT bill_id, -amount FROM deleted) changes
+        GROUP BY bill_id
+    ) d ON d.bill_id = b.bill_id
+    WHERE d.amount <> 0;
+END;
+GO
+
+-- ...and bill changes move their patient's balance
+CREATE OR ALTER TRIGGER trg_BillingPatientBalance
+ON Billing
+AFTER INSERT, UPDATE, DELETE
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE @delta TABLE (patient_id INT PRIMARY KEY, outstanding DECIMAL(12,2), open_bills INT);
+
+    INSERT INTO @delta (patient_id, outstanding, open_bills)
+    SELECT patient_id, SUM(outstanding), SUM(open_bills)
+    FROM (SELECT patient_id, outstanding, CASE WHEN outstanding > 0 THEN 1 ELSE 0 END AS open_bills
+          FROM inserted
+          UNION ALL
+          SELECT patient_id, -outstanding, CASE WHEN outstanding > 0 THEN -1 ELSE 0 END
+          FROM deleted) changes
+    WHERE patient_id IS NOT NULL
+    GROUP BY patient_id
+    HAVING SUM(outstanding) <> 0 OR SUM(open_bills) <> 0;
+
+    UPDATE pb
+    SET outstanding = pb.outstanding + d.outstanding,
+        open_bills = pb.open_bills + d.open_bills
+    FROM Patient_Balance pb
+    JOIN @delta d ON d.patient_id = pb.patient_id;
+
+    INSERT INTO Patient_Balance (patient_id, outstanding, open_bills)
+    SELECT d.patient_id, d.outstanding, d.open_bills
+    FROM @delta d
+    WHERE NOT EXISTS (SELECT 1 FROM Patient_Balance pb WITH (UPDLOCK, HOLDLOCK)
+                      WHERE pb.patient_id = d.patient_id);
+END;
+GO
+
+CREATE OR ALTER PROCEDURE PostPayment
+    @bill_id INT,
+    @amount DECIMAL(10,2),
+    @method VARCHAR(20) = 'Cash',
+    @reference VARCHAR(100) = NULL,
+    @paid_on DATETIME = NULL,
+    @payment_id INT OUTPUT
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    IF @amount IS NULL OR @amount <= 0
+    BEGIN
+        RAISERROR('Payment amount must be positive.', 16, 1);
+        RETURN;
+    END
+
+    BEGIN TRANSACTION;
+
+    -- Lock the bill so two payments at once cannot both pass the balance check
+    DECLARE @outstanding DECIMAL(10,2);
+    SELECT @outstanding = outstanding FROM Billing WITH (UPDLOCK, HOLDLOCK) WHERE bill_id = @bill_id;
+
+    IF @outstanding IS NULL
+    BEGIN
+        ROLLBACK TRANSACTION;
+        RAISERROR('Bill %d does not exist.', 16, 1, @bill_id);
+        RETURN;
+    END
+
+    IF @amount > @outstanding
+    BEGIN
+        ROLLBACK TRANSACTION;
+        RAISERROR('Payment exceeds the outstanding balance of bill %d.', 16, 1, @bill_id);
+        RETURN;
+    END
+
+    INSERT INTO Payment (bill_id, amount, paid_on, method, reference)
+    VALUES (@bill_id, @amount, COALESCE(@paid_on, GETDATE()), COALESCE(@method, 'Cash'), @reference);
+
+    SET @payment_id = SCOPE_IDENTITY();
+
+    COMMIT TRANSACTION;
+END;
+GO
+
+-- An amount paid when the bill is created is posted to the ledger as well
+CREATE OR ALTER PROCEDURE CreateBillWithItems
+    @admission_id INT,
+    @items NVARCHAR(MAX),
+    @billing_date DATE = NULL,
+    @paid_amount DECIMAL(10,2) = 0,
+    @bill_id INT OUTPUT
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    IF ISJSON(@items) = 0
+    BEGIN
+        RAISERROR('Bill items must be a JSON array.', 16, 1);
+        RETURN;
+    END
+
+    DECLARE @lines TABLE (
+        line INT PRIMARY KEY,
+        description VARCHAR(200),
+        amount DECIMAL(10,2)
+    );
+
+    INSERT INTO @lines (line, description, amount)
+    SELECT CAST([key] AS INT),
+           CAST(JSON_VALUE(value, '$.description') AS VARCHAR(200)),
+           TRY_CAST(JSON_VALUE(value, '$.amount') AS DECIMAL(10,2))
+    FROM OPENJSON(@items);
+
+    IF NOT EXISTS (SELECT 1 FROM @lines)
+    BEGIN
+        RAISERROR('A bill needs at least one item.', 16, 1);
+        RETURN;
+    END
+
+    IF EXISTS (SELECT 1 FROM @lines WHERE description IS NULL OR amount IS NULL OR amount < 0)
+    BEGIN
+        RAISERROR('Every bill item needs a description and a non-negative amount.', 16, 1);
+        RETURN;
+    END
+
+    DECLARE @patient_id INT = (SELECT patient_id FROM Admission WHERE admission_id = @admission_id);
+    IF @patient_id IS NULL
+    BEGIN
+        RAISERROR('Admission %d does not exist.', 16, 1, @admission_id);
+        RETURN;
+    END
+
+    BEGIN TRANSACTION;
+
+    INSERT INTO Billing (patient_id, admission_id, total_amount, paid_amount, billing_date)
+    SELECT @patient_id, @admission_id, SUM(amount), 0,
+           COALESCE(@billing_date, CAST(GETDATE() AS DATE))
+    FROM @lines;
+
+    SET @bill_id = SCOPE_IDENTITY();
+
+    INSERT INTO Bill_Item (bill_id, description, amount)
+    SELECT @bill_id, description, amount
+    FROM @lines
+    ORDER BY line;
+
+    IF @paid_amount > 0
+        INSERT INTO Payment (bill_id, amount, method)
+        VALUES (@bill_id, @paid_amount, 'Cash');
+
+    COMMIT TRANSACTION;
+END;
+GO
+
+CREATE OR ALTER PROCEDURE GenerateBill
+    @patient_id INT,
+    @admission_id INT,
+    @total_amount DECIMAL(10,2),
+    @paid_amount DECIMAL(10,2),
+    @billing_date DATE
+AS
+BEGIN
+    SET XACT_ABORT ON;
+    BEGIN TRANSACTION;
+
+    INSERT INTO Billing(patient_id, admission_id, total_amount, paid_amount, billing_date)
+    VALUES (@patient_id, @admission_id, @total_amount, 0, @billing_date);
+
+    IF @paid_amount > 0
+        INSERT INTO Payment (bill_id, amount, method)
+        VALUES (SCOPE_IDENTITY(), @paid_amount, 'Cash');
+
+    COMMIT TRANSACTION;
+END;
+GO
+
+-- Bills with something outstanding and how long they have been open
+CREATE OR ALTER VIEW Receivable
+AS
+SELECT b.bill_id, b.patient_id, b.admission_id, b.billing_date,
+       b.total_amount, b.paid_amount, b.outstanding, a.days_outstanding,
+       CASE WHEN a.days_outstanding <= 30 THEN '0-30'
+            WHEN a.days_outstanding <= 60 THEN '31-60'
+            WHEN a.days_outstanding <= 90 THEN '61-90'
+            ELSE '90+' END AS aging_bucket
+FROM Billing b
+CROSS APPLY (SELECT DATEDIFF(day, b.billing_date, CAST(GETDATE() AS DATE)) AS days_outstanding) a
+WHERE b.outstanding > 0;
+GO
+
+-- Accounts receivable aging: what each patient owes, by age of the bill
+CREATE OR ALTER VIEW AR_Aging
+AS
+SELECT r.patient_id,
+       SUM(CASE WHEN r.aging_bucket = '0-30' THEN r.outstanding ELSE 0 END) AS days_0_30,
+       SUM(CASE WHEN r.aging_bucket = '31-60' THEN r.outstanding ELSE 0 END) AS days_31_60,
+       SUM(CASE WHEN r.aging_bucket = '61-90' THEN r.outstanding ELSE 0 END) AS days_61_90,
+       SUM(CASE WHEN r.aging_bucket = '90+' THEN r.outstanding ELSE 0 END) AS days_over_90,
+       SUM(r.outstanding) AS total_outstanding,
+       COUNT(*) AS open_bills,
+       MIN(r.billing_date) AS oldest_bill
+FROM Receivable r
+GROUP BY r.patient_id;
+GO
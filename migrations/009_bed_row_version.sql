@@ -0,0 +1,10 @@
+-- Version stamp on every Bed change, so the in-process bed occupancy service
+-- (bed_service.py) can fetch just the beds admitted to, discharged from or
+-- added since its last refresh instead of reloading every bed
+IF COL_LENGTH('Bed', 'row_version') IS NULL
+    ALTER TABLE Bed ADD row_version ROWVERSION;
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Bed_RowVersion' AND object_id = OBJECT_ID('Bed'))
+    CREATE NONCLUSTERED INDEX IX_Bed_RowVersion ON Bed (row_version);
+GO
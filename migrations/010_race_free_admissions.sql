@@ -0,0 +1,67 @@
+-- Race-free admissions. AdmitPatient used to check is_occupied and then
+-- insert, so two nurses admitting to the same bed at once could both pass
+-- the check; it also set is_occupied itself after trg_UpdateBedStatusAfterAdmission
+-- had already done so. The bed row is now read with UPDLOCK, HOLDLOCK inside
+-- the admission's transaction: a second admission to the same bed waits for
+-- the first to commit and then sees the bed occupied. The trigger is the only
+-- place that marks a bed occupied.
+CREATE OR ALTER PROCEDURE AdmitPatient
+    @patient_id INT,
+    @room_number VARCHAR(10),
+    @bed_number VARCHAR(10),
+    @doctor_id INT,
+    @admission_date DATE,
+    @admission_id INT = NULL OUTPUT
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    BEGIN TRANSACTION;
+
+    -- Lock the bed until the admission commits
+    DECLARE @is_occupied BIT;
+    SELECT @is_occupied = is_occupied
+    FROM Bed WITH (UPDLOCK, HOLDLOCK)
+    WHERE room_number = @room_number AND bed_number = @bed_number;
+
+    IF @is_occupied IS NULL
+    BEGIN
+        ROLLBACK TRANSACTION;
+        RAISERROR('Bed %s-%s does not exist.', 16, 1, @room_number, @bed_number);
+        RETURN;
+    END
+
+    IF @is_occupied = 1
+    BEGIN
+        ROLLBACK TRANSACTION;
+        RAISERROR('The selected bed is already occupied.', 16, 1);
+        RETURN;
+    END
+
+    -- trg_UpdateBedStatusAfterAdmission marks the bed occupied
+    INSERT INTO Admission (patient_id, room_number, bed_number, doctor_id, admission_date)
+    VALUES (@patient_id, @room_number, @bed_number, @doctor_id, @admission_date);
+
+    SET @admission_id = SCOPE_IDENTITY();
+
+    COMMIT TRANSACTION;
+END;
+GO
+
+-- Only current admissions occupy a bed; an admission recorded with its
+-- discharge date already set (e.g. imported history) leaves the bed alone
+CREATE OR ALTER TRIGGER trg_UpdateBedStatusAfterAdmission
+ON Admission
+AFTER INSERT
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    UPDATE b
+    SET b.is_occupied = 1
+    FROM Bed b
+    INNER JOIN inserted i ON b.room_number = i.room_number AND b.bed_number = i.bed_number
+    WHERE i.discharge_date IS NULL;
+END;
+GO
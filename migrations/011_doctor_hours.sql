@@ -0,0 +1,16 @@
+-- Working hours per doctor and weekday, read by the appointment slot engine
+-- (slot_engine.py). A doctor may have several shifts a day; each is cut into
+-- slots of slot_minutes. weekday follows Python's date.weekday(): 0 is
+-- Monday. An end_time of 00:00 means midnight. Doctors without rows keep
+-- the whole day in hourly slots, as the time picker offered before.
+IF OBJECT_ID('Doctor_Hours', 'U') IS NULL
+    CREATE TABLE Doctor_Hours (
+        doctor_id INT NOT NULL FOREIGN KEY REFERENCES Doctor(doctor_id),
+        weekday TINYINT NOT NULL CHECK (weekday BETWEEN 0 AND 6),
+        start_time TIME(0) NOT NULL,
+        end_time TIME(0) NOT NULL,
+        slot_minutes INT NOT NULL DEFAULT 60 CHECK (slot_minutes BETWEEN 5 AND 480),
+        PRIMARY KEY (doctor_id, weekday, start_time),
+        CHECK (end_time > start_time OR end_time = '00:00')
+    );
+GO
@@ -0,0 +1,24 @@
+-- One non-cancelled appointment per doctor and time, enforced by a filtered
+-- unique index instead of trg_PreventDoubleBooking. The trigger joined every
+-- inserted or updated row against the doctor's appointments, also on status
+-- changes that cannot create a clash, and as an AFTER trigger it did not stop
+-- two bookings committed at the same moment. The index is checked as part of
+-- the insert itself; a clash fails with a duplicate key error (2601) naming
+-- IX_Appointment_Booked_Slot.
+IF EXISTS (
+    SELECT 1
+    FROM Appointment
+    WHERE status <> 'cancelled'
+    GROUP BY doctor_id, appointment_date
+    HAVING COUNT(*) > 1
+)
+    RAISERROR('Some doctors have more than one non-cancelled appointment at the same time. Cancel or move the extra appointments, then restart to apply this migration.', 16, 1);
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Appointment_Booked_Slot' AND object_id = OBJECT_ID('Appointment'))
+    CREATE UNIQUE NONCLUSTERED INDEX IX_Appointment_Booked_Slot ON Appointment (doctor_id, appointment_date)
+    WHERE status <> 'cancelled';
+GO
+
+DROP TRIGGER IF EXISTS trg_PreventDoubleBooking;
+GO
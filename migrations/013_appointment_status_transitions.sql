@@ -0,0 +1,102 @@
+-- Bulk appointment status changes. TransitionAppointmentStatus moves every
+-- scheduled appointment matching a list of IDs, a doctor, a time range or a
+-- combination of them to 'completed' or 'cancelled' in one UPDATE. Each call
+-- writes one Appointment_Status_Change row (who, when, what), and the UPDATE's
+-- OUTPUT clause records every appointment it touched, with its old status, in
+-- Appointment_Status_Change_Item.
+IF OBJECT_ID('Appointment_Status_Change', 'U') IS NULL
+    CREATE TABLE Appointment_Status_Change (
+        change_id INT PRIMARY KEY IDENTITY,
+        changed_at DATETIME NOT NULL DEFAULT GETDATE(),
+        changed_by VARCHAR(50) NULL,
+        new_status VARCHAR(20) NOT NULL,
+        doctor_id INT NULL,
+        range_start DATETIME NULL,
+        range_end DATETIME NULL,
+        reason VARCHAR(200) NULL,
+        rows_changed INT NOT NULL DEFAULT 0
+    );
+GO
+
+-- The target of an OUTPUT ... INTO clause may not have foreign keys or triggers
+IF OBJECT_ID('Appointment_Status_Change_Item', 'U') IS NULL
+    CREATE TABLE Appointment_Status_Change_Item (
+        change_id INT NOT NULL,
+        appointment_id INT NOT NULL,
+        old_status VARCHAR(20) NULL,
+        PRIMARY KEY (change_id, appointment_id)
+    );
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Appointment_Status_Change_Item_Appointment'
+               AND object_id = OBJECT_ID('Appointment_Status_Change_Item'))
+    CREATE NONCLUSTERED INDEX IX_Appointment_Status_Change_Item_Appointment ON Appointment_Status_Change_Item (appointment_id);
+GO
+
+-- @appointment_ids is a JSON array of IDs: [101, 102, 103]. The time range is
+-- half-open, [@range_start, @range_end). At least one filter is required.
+CREATE OR ALTER PROCEDURE TransitionAppointmentStatus
+    @new_status VARCHAR(20),
+    @appointment_ids NVARCHAR(MAX) = NULL,
+    @doctor_id INT = NULL,
+    @range_start DATETIME = NULL,
+    @range_end DATETIME = NULL,
+    @changed_by VARCHAR(50) = NULL,
+    @reason VARCHAR(200) = NULL,
+    @rows_changed INT OUTPUT
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    IF @new_status NOT IN ('completed', 'cancelled')
+    BEGIN
+        RAISERROR('Appointments can only be completed or cancelled.', 16, 1);
+        RETURN;
+    END
+
+    IF @appointment_ids IS NULL AND @doctor_id IS NULL AND @range_start IS NULL AND @range_end IS NULL
+    BEGIN
+        RAISERROR('Select appointments by ID, doctor or time range.', 16, 1);
+        RETURN;
+    END
+
+    IF @appointment_ids IS NOT NULL AND ISJSON(@appointment_ids) = 0
+    BEGIN
+        RAISERROR('Appointment IDs must be a JSON array.', 16, 1);
+        RETURN;
+    END
+
+    DECLARE @ids TABLE (appointment_id INT PRIMARY KEY);
+    INSERT INTO @ids (appointment_id)
+    SELECT DISTINCT TRY_CAST(value AS INT)
+    FROM OPENJSON(@appointment_ids)
+    WHERE TRY_CAST(value AS INT) IS NOT NULL;
+
+    BEGIN TRANSACTION;
+
+    INSERT INTO Appointment_Status_Change (changed_by, new_status, doctor_id, range_start, range_end, reason)
+    VALUES (@changed_by, @new_status, @doctor_id, @range_start, @range_end, @reason);
+
+    DECLARE @change_id INT = SCOPE_IDENTITY();
+
+    -- RECOMPILE: each call seeks whichever index its filters allow
+    UPDATE a
+    SET status = @new_status
+    OUTPUT @change_id, deleted.appointment_id, deleted.status
+        INTO Appointment_Status_Change_Item (change_id, appointment_id, old_status)
+    FROM Appointment a
+    WHERE a.status = 'scheduled'
+      AND (@appointment_ids IS NULL OR a.appointment_id IN (SELECT appointment_id FROM @ids))
+      AND (@doctor_id IS NULL OR a.doctor_id = @doctor_id)
+      AND (@range_start IS NULL OR a.appointment_date >= @range_start)
+      AND (@range_end IS NULL OR a.appointment_date < @range_end)
+    OPTION (RECOMPILE);
+
+    SET @rows_changed = @@ROWCOUNT;
+
+    UPDATE Appointment_Status_Change SET rows_changed = @rows_changed WHERE change_id = @change_id;
+
+    COMMIT TRANSACTION;
+END;
+GO
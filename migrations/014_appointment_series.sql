@@ -0,0 +1,171 @@
+-- Recurring appointments. An Appointment_Series row keeps the pattern (daily or
+-- weekly, every N days/weeks, on which weekdays, until when or how many
+-- times); its occurrences are ordinary Appointment rows pointing back at it.
+-- Occurrences are expanded client-side (recurrence.py) and booked by
+-- BookAppointmentSeries in one transaction: one query finds every clash with
+-- the doctor's appointments and one INSERT adds them all.
+IF OBJECT_ID('Appointment_Series', 'U') IS NULL
+    CREATE TABLE Appointment_Series (
+        series_id INT PRIMARY KEY IDENTITY,
+        patient_id INT NOT NULL FOREIGN KEY REFERENCES Patient(patient_id),
+        doctor_id INT NOT NULL FOREIGN KEY REFERENCES Doctor(doctor_id),
+        frequency VARCHAR(10) NOT NULL CHECK (frequency IN ('daily', 'weekly')),
+        repeat_every INT NOT NULL DEFAULT 1 CHECK (repeat_every >= 1),
+        weekdays VARCHAR(20) NULL,          -- weekly: '0,2,4' (0 is Monday)
+        starts_at DATETIME NOT NULL,
+        until DATE NULL,
+        occurrence_count INT NULL,
+        remarks VARCHAR(MAX) NULL,
+        split_from INT NULL,                -- series this one was split off by a "this and following" edit
+        created_at DATETIME NOT NULL DEFAULT GETDATE()
+    );
+GO
+
+IF COL_LENGTH('Appointment', 'series_id') IS NULL
+    ALTER TABLE Appointment ADD series_id INT NULL FOREIGN KEY REFERENCES Appointment_Series(series_id);
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Appointment_Series' AND object_id = OBJECT_ID('Appointment'))
+    CREATE NONCLUSTERED INDEX IX_Appointment_Series ON Appointment (series_id, appointment_date) INCLUDE (status) WHERE series_id IS NOT NULL;
+GO
+
+-- @occurrences is a JSON array of ISO datetimes: ["2024-03-04T09:00:00", ...].
+-- Clashing occurrences fail the whole series unless @skip_conflicts is set,
+-- in which case the others are booked and @booked says how many.
+CREATE OR ALTER PROCEDURE BookAppointmentSeries
+    @patient_id INT,
+    @doctor_id INT,
+    @occurrences NVARCHAR(MAX),
+    @frequency VARCHAR(10),
+    @repeat_every INT = 1,
+    @weekdays VARCHAR(20) = NULL,
+    @until DATE = NULL,
+    @occurrence_count INT = NULL,
+    @remarks VARCHAR(MAX) = NULL,
+    @skip_conflicts BIT = 0,
+    @series_id INT OUTPUT,
+    @booked INT OUTPUT
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    IF ISJSON(@occurrences) = 0
+    BEGIN
+        RAISERROR('Occurrences must be a JSON array.', 16, 1);
+        RETURN;
+    END
+
+    DECLARE @dates TABLE (appointment_date DATETIME PRIMARY KEY);
+    INSERT INTO @dates (appointment_date)
+    SELECT DISTINCT TRY_CONVERT(DATETIME, value, 126)
+    FROM OPENJSON(@occurrences)
+    WHERE TRY_CONVERT(DATETIME, value, 126) IS NOT NULL;
+
+    IF NOT EXISTS (SELECT 1 FROM @dates)
+    BEGIN
+        RAISERROR('A series needs at least one occurrence.', 16, 1);
+        RETURN;
+    END
+
+    BEGIN TRANSACTION;
+
+    -- One seek per occurrence on IX_Appointment_Booked_Slot; the key-range
+    -- locks keep the free slots free until the series is inserted
+    DECLARE @clashes TABLE (appointment_date DATETIME PRIMARY KEY);
+    INSERT INTO @clashes (appointment_date)
+    SELECT d.appointment_date
+    FROM @dates d
+    WHERE EXISTS (
+        SELECT 1
+        FROM Appointment a WITH (UPDLOCK, HOLDLOCK)
+        WHERE a.doctor_id = @doctor_id
+          AND a.appointment_date = d.appointment_date
+          AND a.status <> 'cancelled'
+    );
+
+    DECLARE @clash_count INT = (SELECT COUNT(*) FROM @clashes);
+    IF @clash_count > 0 AND @skip_conflicts = 0
+    BEGIN
+        ROLLBACK TRANSACTION;
+        RAISERROR('%d of the occurrences clash with the doctor''s appointments.', 16, 1, @clash_count);
+        RETURN;
+    END
+
+    INSERT INTO Appointment_Series (patient_id, doctor_id, frequency, repeat_every, weekdays, starts_at,
+                                    until, occurrence_count, remarks)
+    VALUES (@patient_id, @doctor_id, @frequency, @repeat_every, @weekdays,
+            (SELECT MIN(appointment_date) FROM @dates), @until, @occurrence_count, @remarks);
+
+    SET @series_id = SCOPE_IDENTITY();
+
+    INSERT INTO Appointment (patient_id, doctor_id, appointment_date, status, remarks, series_id)
+    SELECT @patient_id, @doctor_id, d.appointment_date, 'scheduled', @remarks, @series_id
+    FROM @dates d
+    WHERE NOT EXISTS (SELECT 1 FROM @clashes c WHERE c.appointment_date = d.appointment_date);
+
+    SET @booked = @@ROWCOUNT;
+
+    COMMIT TRANSACTION;
+END;
+GO
+
+-- "This and following": the scheduled occurrences from @appointment_id on are
+-- split off into a new series (the old one now ends the day before) and
+-- moved to @new_time, @doctor_id and @remarks where given, in one UPDATE.
+-- A clash with another appointment fails the whole edit (IX_Appointment_Booked_Slot).
+CREATE OR ALTER PROCEDURE UpdateAppointmentSeriesFrom
+    @appointment_id INT,
+    @new_time TIME(0) = NULL,
+    @doctor_id INT = NULL,
+    @remarks VARCHAR(MAX) = NULL,
+    @new_series_id INT OUTPUT,
+    @rows_changed INT OUTPUT
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    DECLARE @series_id INT, @pivot DATETIME;
+    SELECT @series_id = series_id, @pivot = appointment_date
+    FROM Appointment
+    WHERE appointment_id = @appointment_id;
+
+    IF @series_id IS NULL
+    BEGIN
+        RAISERROR('Appointment %d is not part of a series.', 16, 1, @appointment_id);
+        RETURN;
+    END
+
+    BEGIN TRANSACTION;
+
+    INSERT INTO Appointment_Series (patient_id, doctor_id, frequency, repeat_every, weekdays, starts_at,
+                                    until, occurrence_count, remarks, split_from)
+    SELECT patient_id, COALESCE(@doctor_id, doctor_id), frequency, repeat_every, weekdays,
+           CASE WHEN @new_time IS NULL THEN @pivot
+                ELSE CAST(CAST(@pivot AS DATE) AS DATETIME) + CAST(@new_time AS DATETIME) END,
+           until, NULL, COALESCE(@remarks, remarks), series_id
+    FROM Appointment_Series
+    WHERE series_id = @series_id;
+
+    SET @new_series_id = SCOPE_IDENTITY();
+
+    UPDATE Appointment_Series
+    SET until = DATEADD(day, -1, CAST(@pivot AS DATE)), occurrence_count = NULL
+    WHERE series_id = @series_id;
+
+    UPDATE Appointment
+    SET series_id = @new_series_id,
+        doctor_id = COALESCE(@doctor_id, doctor_id),
+        appointment_date = CASE WHEN @new_time IS NULL THEN appointment_date
+                                ELSE CAST(CAST(appointment_date AS DATE) AS DATETIME) + CAST(@new_time AS DATETIME) END,
+        remarks = COALESCE(@remarks, remarks)
+    WHERE series_id = @series_id
+      AND appointment_date >= @pivot
+      AND status = 'scheduled';
+
+    SET @rows_changed = @@ROWCOUNT;
+
+    COMMIT TRANSACTION;
+END;
+GO
@@ -0,0 +1,39 @@
+-- trg_BillingPatientBalance (migration 008) updated the balance rows without
+-- a lock and only locked when inserting the missing ones. Two first bills of
+-- one patient committed together both found no row to update; the second
+-- then waited on the first's insert, found its row and skipped its own
+-- insert, losing its delta. Missing rows are now inserted first, as zeros
+-- under a key-range lock, and every delta is applied by the one UPDATE.
+CREATE OR ALTER TRIGGER trg_BillingPatientBalance
+ON Billing
+AFTER INSERT, UPDATE, DELETE
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE @delta TABLE (patient_id INT PRIMARY KEY, outstanding DECIMAL(12,2), open_bills INT);
+
+    INSERT INTO @delta (patient_id, outstanding, open_bills)
+    SELECT patient_id, SUM(outstanding), SUM(open_bills)
+    FROM (SELECT patient_id, outstanding, CASE WHEN outstanding > 0 THEN 1 ELSE 0 END AS open_bills
+          FROM inserted
+          UNION ALL
+          SELECT patient_id, -outstanding, CASE WHEN outstanding > 0 THEN -1 ELSE 0 END
+          FROM deleted) changes
+    WHERE patient_id IS NOT NULL
+    GROUP BY patient_id
+    HAVING SUM(outstanding) <> 0 OR SUM(open_bills) <> 0;
+
+    INSERT INTO Patient_Balance (patient_id, outstanding, open_bills)
+    SELECT d.patient_id, 0, 0
+    FROM @delta d
+    WHERE NOT EXISTS (SELECT 1 FROM Patient_Balance pb WITH (UPDLOCK, HOLDLOCK)
+                      WHERE pb.patient_id = d.patient_id);
+
+    UPDATE pb
+    SET outstanding = pb.outstanding + d.outstanding,
+        open_bills = pb.open_bills + d.open_bills
+    FROM Patient_Balance pb
+    JOIN @delta d ON d.patient_id = pb.patient_id;
+END;
+GO
@@ -0,0 +1,67 @@
+-- UpdateAppointmentSeriesFrom (migration 014) left the split-off series
+-- without an occurrence_count, so a series booked for N occurrences lost its
+-- end by count. The new series now keeps the remaining count (the original
+-- count minus the occurrences before the pivot) and the old one ends with
+-- the occurrences it kept.
+CREATE OR ALTER PROCEDURE UpdateAppointmentSeriesFrom
+    @appointment_id INT,
+    @new_time TIME(0) = NULL,
+    @doctor_id INT = NULL,
+    @remarks VARCHAR(MAX) = NULL,
+    @new_series_id INT OUTPUT,
+    @rows_changed INT OUTPUT
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    DECLARE @series_id INT, @pivot DATETIME;
+    SELECT @series_id = series_id, @pivot = appointment_date
+    FROM Appointment
+    WHERE appointment_id = @appointment_id;
+
+    IF @series_id IS NULL
+    BEGIN
+        RAISERROR('Appointment %d is not part of a series.', 16, 1, @appointment_id);
+        RETURN;
+    END
+
+    BEGIN TRANSACTION;
+
+    DECLARE @before INT = (
+        SELECT COUNT(*)
+        FROM Appointment
+        WHERE series_id = @series_id AND appointment_date < @pivot
+    );
+
+    INSERT INTO Appointment_Series (patient_id, doctor_id, frequency, repeat_every, weekdays, starts_at,
+                                    until, occurrence_count, remarks, split_from)
+    SELECT patient_id, COALESCE(@doctor_id, doctor_id), frequency, repeat_every, weekdays,
+           CASE WHEN @new_time IS NULL THEN @pivot
+                ELSE CAST(CAST(@pivot AS DATE) AS DATETIME) + CAST(@new_time AS DATETIME) END,
+           until, occurrence_count - @before, COALESCE(@remarks, remarks), series_id
+    FROM Appointment_Series
+    WHERE series_id = @series_id;
+
+    SET @new_series_id = SCOPE_IDENTITY();
+
+    UPDATE Appointment_Series
+    SET until = DATEADD(day, -1, CAST(@pivot AS DATE)),
+        occurrence_count = CASE WHEN occurrence_count IS NULL THEN NULL ELSE @before END
+    WHERE series_id = @series_id;
+
+    UPDATE Appointment
+    SET series_id = @new_series_id,
+        doctor_id = COALESCE(@doctor_id, doctor_id),
+        appointment_date = CASE WHEN @new_time IS NULL THEN appointment_date
+                                ELSE CAST(CAST(appointment_date AS DATE) AS DATETIME) + CAST(@new_time AS DATETIME) END,
+        remarks = COALESCE(@remarks, remarks)
+    WHERE series_id = @series_id
+      AND appointment_date >= @pivot
+      AND status = 'scheduled';
+
+    SET @rows_changed = @@ROWCOUNT;
+
+    COMMIT TRANSACTION;
+END;
+GO
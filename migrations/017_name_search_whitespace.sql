@@ -0,0 +1,47 @@
+-- dbo.NameSearchTokens (migration 004) only split names on spaces and tabs,
+-- while name_search.tokens() split on any whitespace, so a name holding a
+-- line break or a non-breaking space was indexed as one word but searched
+-- as two. Both now split on the same characters: space, tab, line feed,
+-- vertical tab, form feed, carriage return, non-breaking space (CHAR(160))
+-- and - . , '
+CREATE OR ALTER FUNCTION dbo.NameSearchTokens (@name VARCHAR(101))
+RETURNS TABLE
+AS
+RETURN
+    SELECT DISTINCT LOWER(value) AS token
+    FROM STRING_SPLIT(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(@name,
+        CHAR(9), ' '), CHAR(10), ' '), CHAR(11), ' '), CHAR(12), ' '), CHAR(13), ' '), CHAR(160), ' '),
+        '-', ' '), '.', ' '), ',', ' '), '''', ' '), ' ')
+    WHERE value <> '';
+GO
+
+-- Re-index the names the old function split differently
+DECLARE @whitespace VARCHAR(10) = '%[' + CHAR(10) + CHAR(11) + CHAR(12) + CHAR(13) + CHAR(160) + ']%';
+DECLARE @changed TABLE (entity_type CHAR(1), entity_id INT, name VARCHAR(101), PRIMARY KEY (entity_type, entity_id));
+
+INSERT INTO @changed (entity_type, entity_id, name)
+SELECT 'P', patient_id, CONCAT(first_name, ' ', last_name)
+FROM Patient
+WHERE CONCAT(first_name, ' ', last_name) LIKE @whitespace
+UNION ALL
+SELECT 'D', doctor_id, CONCAT(first_name, ' ', last_name)
+FROM Doctor
+WHERE CONCAT(first_name, ' ', last_name) LIKE @whitespace;
+
+DELETE t FROM Name_Search_Token t
+JOIN @changed c ON t.entity_type = c.entity_type AND t.entity_id = c.entity_id;
+
+DELETE g FROM Name_Search_Gram g
+JOIN @changed c ON g.entity_type = c.entity_type AND g.entity_id = c.entity_id;
+
+INSERT INTO Name_Search_Token (entity_type, token, entity_id)
+SELECT c.entity_type, t.token, c.entity_id
+FROM @changed c
+CROSS APPLY dbo.NameSearchTokens(c.name) t;
+
+INSERT INTO Name_Search_Gram (entity_type, gram, entity_id)
+SELECT DISTINCT c.entity_type, g.gram, c.entity_id
+FROM @changed c
+CROSS APPLY dbo.NameSearchTokens(c.name) t
+CROSS APPLY dbo.NameSearchGrams(t.token) g;
+GO
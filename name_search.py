@@ -0,0 +1,82 @@
+import math
+import re
+
+# Entity types in Name_Search_Token / Name_Search_Gram (migration 004)
+PATIENT = 'P'
+DOCTOR = 'D'
+
+# A fuzzy match shares at least this fraction of a search word's trigrams
+FUZZY_THRESHOLD = 0.6
+
+# Word separators; dbo.NameSearchTokens (migration 017) splits names on the
+# same characters. Not \s, which also matches whitespace the SQL side keeps.
+_SEPARATORS = re.compile(r"[ \t\n\v\f\r\xa0\-.,']+")
+
+
+def tokens(text):
+    """Lower-cased words of a name or search term, without duplicates"""
+    return list(dict.fromkeys(t for t in _SEPARATORS.split((text or "").lower()) if t))
+
+
+def trigrams(token, padded=True):
+    """Three-character grams of a word.
+
+    Indexed names use padded grams (" smith " -> " sm" ... "th "), which also
+    mark where a word starts and ends; search words use unpadded ones so that
+    a substring of a name matches all of its grams.
+    """
+    if padded:
+        token = f" {token} "
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+def like_prefix(token):
+    """LIKE pattern for token as a prefix, and the ESCAPE clause it needs"""
+    escaped = re.sub(r"([\\%_\[])", r"\\\1", token)
+    return escaped + "%", " ESCAPE '\\'" if escaped != token else ""
+
+
+def _word_matches(entity, token, fuzzy):
+    """SELECT of the entity ids with a name word matching token"""
+    pattern, escape = like_prefix(token)
+    prefix = f"SELECT entity_id FROM Name_Search_Token WHERE entity_type = ? AND token LIKE ?{escape}"
+    grams = trigrams(token, padded=False) if fuzzy else set()
+    if not grams:
+        return prefix, [entity, pattern]
+    # Trigrams are only consulted when no name starts with token: a common
+    # prefix such as "joh" would otherwise pull in every "john" as well
+    marks = ", ".join("?" for _ in grams)
+    sql = (f"{prefix} UNION ALL "
+           f"SELECT entity_id FROM Name_Search_Gram WHERE entity_type = ? AND gram IN ({marks})"
+           f" AND NOT EXISTS ({prefix})"
+           f" GROUP BY entity_id HAVING COUNT(*) >= ?")
+    params = [entity, pattern, entity, *sorted(grams), entity, pattern,
+              math.ceil(len(grams) * FUZZY_THRESHOLD)]
+    return sql, params
+
+
+def name_filter(column, term, entity=PATIENT, fuzzy=True):
+    """WHERE condition and params limiting column to ids whose name matches term.
+
+    Every word of term has to match a word of the first or last name as a
+    prefix. With fuzzy, a word that is no name's prefix instead matches names
+    sharing FUZZY_THRESHOLD of its trigrams, which covers substrings and small
+    typos. Each word is answered by index seeks on the search tables rather
+    than a LIKE '%term%' scan.
+    """
+    words = tokens(term)
+    if not words:
+        return "1 = 0", ()
+    selects, params = [], []
+    for word in words:
+        sql, word_params = _word_matches(entity, word, fuzzy)
+        selects.append(f"SELECT entity_id FROM ({sql}) m")
+        params += word_params
+    return f"{column} IN ({' INTERSECT '.join(selects)})", tuple(params)
+
+
+def patient_or_doctor_filter(term, patient_column="a.patient_id", doctor_column="a.doctor_id"):
+    """name_filter matching rows whose patient or doctor name matches term"""
+    patient_match, patient_params = name_filter(patient_column, term, PATIENT)
+    doctor_match, doctor_params = name_filter(doctor_column, term, DOCTOR)
+    return f"{patient_match} OR {doctor_match}", patient_params + doctor_params
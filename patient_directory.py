@@ -0,0 +1,112 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from sys import intern
+from background_cache import WatermarkCache
+from name_search import tokens
+
+
+class PatientDirectory(WatermarkCache):
+    """In-memory prefix index of (patient_id, name, contact) for type-ahead lookups.
+
+    lookup() never touches the database: the first call loads every patient in
+    the background, and from then on an entry older than ttl seconds (or one
+    invalidated after a local change) starts a background refresh that only
+    fetches rows whose Patient.row_version moved past the last refresh.
+    Name words are kept in one sorted list, so all names with a given word
+    prefix form a contiguous range found by bisection.
+    """
+
+    select = "SELECT patient_id, first_name, last_name, contact_number FROM Patient"
+    error_message = "Error loading patient directory"
+
+    def __init__(self, ttl=30):
+        super().__init__(ttl)
+        self._records = {}        # patient_id -> (name, contact)
+        self._words = []          # sorted name words...
+        self._ids = array('i')    # ...and the patient each one belongs to
+
+    def lookup(self, term, limit=20):
+        """Return (matches, ready) for a search term.
+
+        matches are (patient_id, name, contact) of patients with a name word
+        starting with every word of term, ordered by the matched word. ready
+        is False until the directory has loaded once.
+        """
+        words = tokens(term)
+        with self._lock:
+            self._refresh_if_stale()
+            ready = self._watermark is not None
+            if not words:
+                return [], ready
+            # Walk the narrowest prefix range; the other words only need to
+            # contain the patient somewhere in theirs
+            ranges = sorted((self._prefix_range(word) for word in words), key=lambda r: r[1] - r[0])
+            (lo, hi), others = ranges[0], ranges[1:]
+            candidates = None
+            if others:
+                candidates = set(self._ids[lo:hi]).intersection(*(self._ids[o_lo:o_hi] for o_lo, o_hi in others))
+                if not candidates:
+                    return [], ready
+            matches, seen = [], set()
+            for i in range(lo, hi):
+                patient_id = self._ids[i]
+                if patient_id in seen:
+                    continue
+                seen.add(patient_id)
+                if candidates is None or patient_id in candidates:
+                    name, contact = self._records[patient_id]
+                    matches.append((patient_id, name, contact))
+                    if len(matches) >= limit:
+                        break
+        return matches, ready
+
+    def _apply(self, rows, full):
+        if full:
+            records, words, ids = self._build(rows)
+            with self._lock:
+                self._records, self._words, self._ids = records, words, ids
+        else:
+            with self._lock:
+                for patient_id, first_name, last_name, contact in rows:
+                    self._remove(patient_id)
+                    self._add(patient_id, _full_name(first_name, last_name), contact)
+
+    @staticmethod
+    def _build(rows):
+        # Built off the lock: sorting a large registry takes a moment
+        records, entries = {}, []
+        for patient_id, first_name, last_name, contact in rows:
+            name = _full_name(first_name, last_name)
+            records[patient_id] = (name, contact)
+            entries.extend((intern(word), patient_id) for word in tokens(name))
+        entries.sort()
+        return records, [word for word, _ in entries], array('i', (pid for _, pid in entries))
+
+    def _prefix_range(self, prefix):
+        """Slice of _words starting with prefix"""
+        return bisect_left(self._words, prefix), bisect_left(self._words, prefix + "\uffff")
+
+    def _add(self, patient_id, name, contact):
+        self._records[patient_id] = (name, contact)
+        for word in tokens(name):
+            i = bisect_right(self._words, word)
+            self._words.insert(i, intern(word))
+            self._ids.insert(i, patient_id)
+
+    def _remove(self, patient_id):
+        old = self._records.pop(patient_id, None)
+        if old is None:
+            return
+        for word in tokens(old[0]):
+            lo = bisect_left(self._words, word)
+            hi = bisect_right(self._words, word)
+            i = lo + self._ids[lo:hi].index(patient_id)
+            del self._words[i]
+            del self._ids[i]
+
+
+def _full_name(first_name, last_name):
+    return " ".join(part for part in (first_name, last_name) if part)
+
+
+patient_directory = PatientDirectory()
@@ -1,9 +1,16 @@
 import customtkinter as ctk
 from tkinter import messagebox
 from datetime import datetime
-import re
 from db_connect import *
 from CTkTable import *
+from dashboard_metrics import dashboard_metrics
+from widgets import VirtualTable, Debouncer, LookupCombobox, import_records, export_records
+from lookups import (patient_lookup, format_patient, doctor_lookup, format_doctor,
+                     free_bed_lookup, format_bed)
+from name_search import name_filter, patient_or_doctor_filter
+from patient_directory import patient_directory
+from bed_service import bed_service
+from validators import validate_phone, validate_date, validate_email
 
 class PatientModule:
     def __init__(self, main_frame, user_info):
@@ -63,18 +70,13 @@ class PatientModule:
             widget.destroy()
     
     def validate_phone(self, phone):
-        return bool(re.match(r'^\d{10}$', phone))
+        return validate_phone(phone)
     
     def validate_date(self, date_str):
-        try:
-            datetime.strptime(date_str, '%Y-%m-%d')
-            return True
-        except ValueError:
-            return False
+        return validate_date(date_str)
     
     def validate_email(self, email):
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return bool(re.match(pattern, email))
+        return validate_email(email)
     
     def show_dashboard(self):
         self.clear_content()
@@ -82,32 +84,49 @@ class PatientModule:
         title.pack(pady=(0, 30))
         stats_frame = ctk.CTkFrame(self.content_frame)
         stats_frame.pack(fill="x", padx=20, pady=10)
-        # Fetch real patient stats from database
-        try:
-            conn = connect_db()
-            if conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT patient_id, first_name, last_name, dob, gender, contact_number, email, address
-                    FROM Patient
-                """)
-                patients = cursor.fetchall()
-                cursor.close()
-                conn.close()
-        except Exception as e:
-            patients = []
+        # Aggregates are computed server-side and cached by the shared metrics
+        # service; a background refresh fills in stale or missing values
+        values, fresh = dashboard_metrics.get('patient')
         stats = [
-            ("👥 Total Patients", len(patients), "#3498db"),
+            ("👥 Total Patients", 'total', "#3498db"),
+            ("🆕 New This Week", 'new_this_week', "#27ae60"),
+            ("📅 New This Month", 'new_this_month', "#f39c12"),
         ]
+        breakdown = [
+            ("♂ Male", 'male'),
+            ("♀ Female", 'female'),
+            ("Age 0-17", 'age_0_17'),
+            ("Age 18-39", 'age_18_39'),
+            ("Age 40-64", 'age_40_64'),
+            ("Age 65+", 'age_65_plus'),
+        ]
+        value_labels = {}
         num_stats = len(stats)
         for col in range(num_stats):
             stats_frame.grid_columnconfigure(col, weight=1)
-        for i, (label, value, color) in enumerate(stats):
+        for i, (label, key, color) in enumerate(stats):
             card = ctk.CTkFrame(stats_frame, fg_color=color)
             card.grid(row=0, column=i, padx=10, pady=20, sticky="nsew")
-            ctk.CTkLabel(card, text=str(value), font=ctk.CTkFont(size=28, weight="bold"), text_color="white").pack(pady=(10, 5))
+            value = str(values[key]) if values else "…"
+            value_labels[key] = ctk.CTkLabel(card, text=value, font=ctk.CTkFont(size=28, weight="bold"), text_color="white")
+            value_labels[key].pack(pady=(10, 5))
             ctk.CTkLabel(card, text=label, font=ctk.CTkFont(size=14), text_color="white").pack(pady=(0, 10))
         
+        # Gender and age breakdown
+        breakdown_frame = ctk.CTkFrame(self.content_frame)
+        breakdown_frame.pack(fill="x", padx=20, pady=10)
+        for col in range(len(breakdown)):
+            breakdown_frame.grid_columnconfigure(col, weight=1)
+        for i, (label, key) in enumerate(breakdown):
+            cell = ctk.CTkFrame(breakdown_frame, fg_color="transparent")
+            cell.grid(row=0, column=i, padx=5, pady=10, sticky="nsew")
+            value = str(values[key]) if values else "…"
+            value_labels[key] = ctk.CTkLabel(cell, text=value, font=ctk.CTkFont(size=20, weight="bold"))
+            value_labels[key].pack()
+            ctk.CTkLabel(cell, text=label, font=ctk.CTkFont(size=12)).pack()
+        if not fresh:
+            dashboard_metrics.bind_labels(stats_frame, 'patient', value_labels)
+        
         # Quick actions
         actions_frame = ctk.CTkFrame(self.content_frame)
         actions_frame.pack(fill="x", padx=20, pady=20)
@@ -192,13 +211,33 @@ class PatientModule:
                      font=ctk.CTkFont(size=18, weight="bold")).grid(row=0, column=0, sticky="w")
         ctk.CTkButton(header, text="🔄 Refresh", command=self.load_patients,
                      width=100, height=30).grid(row=0, column=1)
-        
-        # Scrollable table
-        self.patient_table_scroll = ctk.CTkScrollableFrame(table_frame)
-        self.patient_table_scroll.grid(row=1, column=0, sticky="nsew", padx=20, pady=(5, 20))
+        ctk.CTkButton(header, text="📥 Import", width=100, height=30,
+                      command=lambda: import_records(self.main_frame, "patients", self.on_patients_imported)
+                      ).grid(row=0, column=2, padx=(10, 0))
+        
+        # Virtualized table
+        self.patient_table = VirtualTable(
+            table_frame,
+            columns=[("ID", 40), ("First Name", 80), ("Last Name", 80), ("DOB", 80), ("Gender", 50),
+                     ("Contact", 100), ("Email", 120), ("Address", 140)],
+            fetch_page=self.fetch_patients_page,
+            error_message="Failed to load patients",
+            format_row=lambda p: [p[0], p[1], p[2], p[3], p[4], p[5], p[6] or "N/A", p[7] or "N/A"],
+            row_actions=lambda p: [("✏️", self.edit_patient),
+                                   ("📋", lambda patient: self.view_patient_records(patient[0]))],
+            actions_width=80,
+        )
+        self.patient_table.grid(row=1, column=0, sticky="nsew", padx=20, pady=(5, 20))
         
         self.load_patients()
     
+    def on_patients_imported(self, result):
+        if result.imported:
+            dashboard_metrics.invalidate('patient')
+            patient_directory.invalidate()
+            if self.patient_table.winfo_exists():
+                self.load_patients()
+    
     def register_patient(self):
         entries = self.patient_entries
         try:
@@ -228,6 +267,8 @@ class PatientModule:
                 cursor.execute("EXEC RegisterPatient @first_name=?, @last_name=?, @dob=?, @gender=?, @contact_number=?, @email=?, @address=?",
                              (first_name, last_name, dob, gender, contact, email or None, address))
                 conn.commit()
+                dashboard_metrics.invalidate('patient')
+                patient_directory.invalidate()
                 messagebox.showinfo("Success", "Patient registered successfully!")
                 # Clear form
                 for key, entry in entries.items():
@@ -244,55 +285,14 @@ class PatientModule:
                 conn.close()
     
     def load_patients(self):
-        try:
-            # Clear existing content
-            for widget in self.patient_table_scroll.winfo_children():
-                widget.destroy()
-            conn = connect_db()
-            if conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT patient_id, first_name, last_name, dob, gender, contact_number, email, address
-                    FROM Patient
-                """)
-                patients = cursor.fetchall()
-                # Create header
-                columns = ["ID", "First Name", "Last Name", "DOB", "Gender", "Contact", "Email", "Address", "Actions"]
-                # Use smaller widths to avoid horizontal scroll
-                widths = [40, 80, 80, 80, 50, 100, 120, 140, 80]
-                header_frame = ctk.CTkFrame(self.patient_table_scroll, fg_color="#1f538d")
-                header_frame.pack(fill="x", padx=5, pady=(5,0))
-                for i, (col, width) in enumerate(zip(columns, widths)):
-                    header_frame.grid_columnconfigure(i, minsize=width)
-                    ctk.CTkLabel(header_frame, text=col, font=ctk.CTkFont(size=12, weight="bold"),
-                                text_color="white").grid(row=0, column=i, padx=2, pady=4, sticky="ew")
-                # Create content frame
-                content_frame = ctk.CTkFrame(self.patient_table_scroll)
-                content_frame.pack(fill="both", expand=True, padx=5, pady=(0,5))
-                for i, width in enumerate(widths):
-                    content_frame.grid_columnconfigure(i, minsize=width)
-                # Add rows
-                for row_idx, patient in enumerate(patients):
-                    values = [str(patient[0]), patient[1], patient[2], str(patient[3]), 
-                             patient[4], patient[5], patient[6] or "N/A", patient[7] or "N/A"]
-                    for col_idx, (value, width) in enumerate(zip(values, widths[:-1])):
-                        wrap = width-10 if col_idx in [6,7] else 0
-                        ctk.CTkLabel(content_frame, text=value, font=ctk.CTkFont(size=12), wraplength=wrap).grid(
-                            row=row_idx, column=col_idx, padx=2, pady=2, sticky="w"
-                        )
-                    # Action buttons
-                    actions_frame = ctk.CTkFrame(content_frame, fg_color="transparent")
-                    actions_frame.grid(row=row_idx, column=len(columns)-1, padx=2, pady=2)
-                    ctk.CTkButton(actions_frame, text="✏️", width=28, height=22,
-                                 command=lambda p=patient: self.edit_patient(p)).pack(side="left", padx=1)
-                    ctk.CTkButton(actions_frame, text="📋", width=28, height=22,
-                                 command=lambda p=patient: self.view_patient_records(p[0])).pack(side="left", padx=1)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load patients: {e}")
-        finally:
-            if conn:
-                cursor.close()
-                conn.close()
+        self.patient_pages = KeysetPaginator("""
+            SELECT patient_id, first_name, last_name, dob, gender, contact_number, email, address
+            FROM Patient
+        """, order_by=[("patient_id", "ASC", 0)])
+        self.patient_table.refresh()
+    
+    def fetch_patients_page(self, offset, limit):
+        return self.patient_pages.fetch(offset, limit)
     
     def edit_patient(self, patient):
         # Create edit dialog
@@ -345,6 +345,7 @@ class PatientModule:
                         patient[0]
                     ))
                     conn.commit()
+                    patient_directory.invalidate()
                     messagebox.showinfo("Success", "Patient updated successfully!")
                     dialog.destroy()
                     self.load_patients()
@@ -458,10 +459,20 @@ class PatientModule:
                      font=ctk.CTkFont(size=18, weight="bold")).grid(row=0, column=0, sticky="w")
         ctk.CTkButton(header, text="🔄 Refresh", command=self.load_medical_records,
                      width=100, height=30).grid(row=0, column=1)
-        
-        # Scrollable records list
-        self.records_list_scroll = ctk.CTkScrollableFrame(list_frame)
-        self.records_list_scroll.grid(row=1, column=0, sticky="nsew", padx=20, pady=(5, 20))
+        ctk.CTkButton(header, text="📤 Export", width=100, height=30,
+                      command=lambda: export_records(self.main_frame, "medical_records", "medical records")
+                      ).grid(row=0, column=2, padx=(10, 0))
+        
+        # Virtualized records list
+        self.records_table = VirtualTable(
+            list_frame,
+            columns=[("Record", 60), ("Date", 90), ("Patient", 130), ("Doctor", 130),
+                     ("Diagnosis", 180), ("Notes", 180)],
+            fetch_page=self.fetch_medical_records_page,
+            error_message="Failed to load medical records",
+            format_row=lambda r: [f"#{r[0]}", r[1], r[4], r[5], r[2], r[3] or ""],
+        )
+        self.records_table.grid(row=1, column=0, sticky="nsew", padx=20, pady=(5, 20))
         
         self.load_medical_records()
     
@@ -509,46 +520,18 @@ class PatientModule:
                 conn.close()
     
     def load_medical_records(self):
-        try:
-            # Clear existing content
-            for widget in self.records_list_scroll.winfo_children():
-                widget.destroy()
-            
-            conn = connect_db()
-            if conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT TOP 20 mr.record_id, mr.visit_date, mr.diagnosis, mr.notes,
-                           p.first_name + ' ' + p.last_name as patient_name,
-                           d.first_name + ' ' + d.last_name as doctor_name
-                    FROM Medical_Record mr
-                    LEFT JOIN Patient p ON mr.patient_id = p.patient_id
-                    LEFT JOIN Doctor d ON mr.doctor_id = d.doctor_id
-                    ORDER BY mr.visit_date DESC
-                """)
-                records = cursor.fetchall()
-                
-                for record in records:
-                    record_card = ctk.CTkFrame(self.records_list_scroll)
-                    record_card.pack(fill="x", pady=5)
-                    
-                    header_text = f"Record #{record[0]} | {record[1]} | Patient: {record[4]} | Doctor: {record[5]}"
-                    ctk.CTkLabel(record_card, text=header_text,
-                                font=ctk.CTkFont(weight="bold")).pack(anchor="w", padx=10, pady=5)
-                    
-                    ctk.CTkLabel(record_card, text=f"Diagnosis: {record[2]}",
-                                wraplength=500).pack(anchor="w", padx=10, pady=2)
-                    
-                    if record[3]:
-                        ctk.CTkLabel(record_card, text=f"Notes: {record[3]}",
-                                    wraplength=500).pack(anchor="w", padx=10, pady=(2, 10))
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load medical records: {e}")
-        finally:
-            if conn:
-                cursor.close()
-                conn.close()
+        self.records_pages = KeysetPaginator("""
+            SELECT mr.record_id, mr.visit_date, mr.diagnosis, mr.notes,
+                   p.first_name + ' ' + p.last_name as patient_name,
+                   d.first_name + ' ' + d.last_name as doctor_name
+            FROM Medical_Record mr
+            LEFT JOIN Patient p ON mr.patient_id = p.patient_id
+            LEFT JOIN Doctor d ON mr.doctor_id = d.doctor_id
+        """, order_by=[("mr.visit_date", "DESC", 1), ("mr.record_id", "DESC", 0)])
+        self.records_table.refresh()
+    
+    def fetch_medical_records_page(self, offset, limit):
+        return self.records_pages.fetch(offset, limit)
     
     def show_patient_search(self):
         self.clear_content()
@@ -571,72 +554,82 @@ class PatientModule:
         ctk.CTkLabel(search_fields, text="Search by Name:").grid(row=0, column=0, padx=10, pady=5)
         self.search_name = ctk.CTkEntry(search_fields, width=200)
         self.search_name.grid(row=0, column=1, padx=10, pady=5)
+        self.search_name.bind("<KeyRelease>", Debouncer(self.search_name, self.show_name_suggestions))
+        
+        # Type-ahead suggestions, answered from the in-memory patient directory
+        self.name_suggestions = ctk.CTkFrame(search_fields, fg_color="transparent")
+        self.name_suggestions.grid(row=1, column=1, padx=10, sticky="ew")
         
-        ctk.CTkLabel(search_fields, text="Search by ID:").grid(row=1, column=0, padx=10, pady=5)
+        ctk.CTkLabel(search_fields, text="Search by ID:").grid(row=2, column=0, padx=10, pady=5)
         self.search_id = ctk.CTkEntry(search_fields, width=200)
-        self.search_id.grid(row=1, column=1, padx=10, pady=5)
+        self.search_id.grid(row=2, column=1, padx=10, pady=5)
         
-        ctk.CTkButton(search_fields, text="🔍 Search", command=self.perform_search).grid(row=2, column=0, columnspan=2, pady=20)
+        ctk.CTkButton(search_fields, text="🔍 Search", command=self.perform_search).grid(row=3, column=0, columnspan=2, pady=20)
         
         # Results area
-        self.search_results = ctk.CTkScrollableFrame(self.content_frame, height=300)
+        self.search_pages = None
+        self.search_results = VirtualTable(
+            self.content_frame,
+            columns=[("ID", 60), ("Name", 200), ("DOB", 100), ("Contact", 120)],
+            fetch_page=self.fetch_search_page,
+            error_message="Search failed",
+            format_row=lambda p: [p[0], f"{p[1]} {p[2]}", p[3], p[5]],
+            row_actions=lambda p: [("📋 View Records", lambda patient: self.view_patient_records(patient[0])),
+                                   ("✏️ Edit", self.edit_patient)],
+            actions_width=200,
+            empty_text="No patients found matching your search criteria",
+        )
         self.search_results.pack(fill="both", expand=True, padx=20, pady=20)
     
-    def perform_search(self):
-        # Clear previous results
-        for widget in self.search_results.winfo_children():
+    def show_name_suggestions(self):
+        for widget in self.name_suggestions.winfo_children():
             widget.destroy()
-        
+        term = self.search_name.get().strip()
+        if not term:
+            return
+        matches, ready = patient_directory.lookup(term, limit=8)
+        if not ready:
+            ctk.CTkLabel(self.name_suggestions, text="⏳ Loading patient directory...").pack(anchor="w")
+            patient_directory.after_refresh(self.name_suggestions, self.show_name_suggestions)
+            return
+        for patient_id, name, contact in matches:
+            ctk.CTkButton(self.name_suggestions, text=f"{name} | {contact or 'No contact'} (ID: {patient_id})",
+                          anchor="w", fg_color="transparent", border_width=1,
+                          command=lambda pid=patient_id: self.select_name_suggestion(pid)).pack(fill="x", pady=1)
+    
+    def select_name_suggestion(self, patient_id):
+        for widget in self.name_suggestions.winfo_children():
+            widget.destroy()
+        self.search_id.delete(0, "end")
+        self.search_id.insert(0, str(patient_id))
+        self.perform_search()
+    
+    def perform_search(self):
         name_query = self.search_name.get().strip()
         id_query = self.search_id.get().strip()
         
         if not name_query and not id_query:
-            ctk.CTkLabel(self.search_results, text="Please enter search criteria").pack(pady=20)
+            messagebox.showwarning("Search", "Please enter search criteria")
+            return
+        if id_query and not id_query.isdigit():
+            messagebox.showerror("Error", "Patient ID must be a number")
             return
         
-        try:
-            conn = connect_db()
-            if conn:
-                cursor = conn.cursor()
-                
-                if id_query:
-                    cursor.execute("""
-                        SELECT patient_id, first_name, last_name, dob, gender, contact_number, email, address
-                        FROM Patient WHERE patient_id = ?
-                    """, (int(id_query),))
-                else:
-                    cursor.execute("""
-                        SELECT patient_id, first_name, last_name, dob, gender, contact_number, email, address
-                        FROM Patient WHERE first_name LIKE ? OR last_name LIKE ?
-                    """, (f"%{name_query}%", f"%{name_query}%"))
-                
-                results = cursor.fetchall()
-                
-                if results:
-                    for patient in results:
-                        result_card = ctk.CTkFrame(self.search_results)
-                        result_card.pack(fill="x", pady=5)
-                        
-                        info_text = f"ID: {patient[0]} | Name: {patient[1]} {patient[2]} | DOB: {patient[3]} | Contact: {patient[5]}"
-                        ctk.CTkLabel(result_card, text=info_text).pack(anchor="w", padx=10, pady=10)
-                        
-                        # Action buttons
-                        btn_frame = ctk.CTkFrame(result_card, fg_color="transparent")
-                        btn_frame.pack(anchor="w", padx=10, pady=(0, 10))
-                        
-                        ctk.CTkButton(btn_frame, text="📋 View Records", width=120,
-                                     command=lambda p=patient: self.view_patient_records(p[0])).pack(side="left", padx=5)
-                        ctk.CTkButton(btn_frame, text="✏️ Edit", width=80,
-                                     command=lambda p=patient: self.edit_patient(p)).pack(side="left", padx=5)
-                else:
-                    ctk.CTkLabel(self.search_results, text="No patients found matching your search criteria").pack(pady=20)
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Search failed: {e}")
-        finally:
-            if conn:
-                cursor.close()
-                conn.close()
+        if id_query:
+            where, params = ["patient_id = ?"], (int(id_query),)
+        else:
+            name_match, params = name_filter("patient_id", name_query)
+            where = [name_match]
+        self.search_pages = KeysetPaginator("""
+            SELECT patient_id, first_name, last_name, dob, gender, contact_number, email, address
+            FROM Patient
+        """, order_by=[("patient_id", "ASC", 0)], where=where, params=params)
+        self.search_results.refresh()
+    
+    def fetch_search_page(self, offset, limit):
+        if not self.search_pages:
+            return []
+        return self.search_pages.fetch(offset, limit)
     
     def show_patient_reports(self):
         self.clear_content()
@@ -695,81 +688,92 @@ class PatientModule:
         form_frame.pack(padx=50, pady=20, fill="x")
         form_frame.grid_columnconfigure(1, weight=1)
         # Patient selection
-        ctk.CTkLabel(form_frame, text="Patient ID:", font=ctk.CTkFont(size=14)).grid(row=1, column=0, padx=(20, 5), pady=10, sticky="w")
-        self.admit_patient_id = ctk.CTkEntry(form_frame, height=40)
-        self.admit_patient_id.grid(row=1, column=1, padx=(5, 20), pady=10, sticky="ew")
+        ctk.CTkLabel(form_frame, text="Patient:", font=ctk.CTkFont(size=14)).grid(row=1, column=0, padx=(20, 5), pady=10, sticky="nw")
+        self.admit_patient_menu = LookupCombobox(form_frame, patient_lookup, format_patient, height=40,
+                                                 placeholder_text="Type a name or ID",
+                                                 error_message="Failed to load patients")
+        self.admit_patient_menu.grid(row=1, column=1, padx=(5, 20), pady=10, sticky="ew")
         # Doctor selection
-        ctk.CTkLabel(form_frame, text="Doctor:", font=ctk.CTkFont(size=14)).grid(row=2, column=0, padx=(20, 5), pady=10, sticky="w")
-        self.admit_doctor_menu = ctk.CTkOptionMenu(form_frame, values=self.get_doctor_names(), height=40)
+        ctk.CTkLabel(form_frame, text="Doctor:", font=ctk.CTkFont(size=14)).grid(row=2, column=0, padx=(20, 5), pady=10, sticky="nw")
+        self.admit_doctor_menu = LookupCombobox(form_frame, doctor_lookup, format_doctor, height=40,
+                                                placeholder_text="Type a name, specialization or ID",
+                                                error_message="Failed to load doctors")
         self.admit_doctor_menu.grid(row=2, column=1, padx=(5, 20), pady=10, sticky="ew")
+        # Room type, for picking the next free bed from the bed service
+        ctk.CTkLabel(form_frame, text="Room Type:", font=ctk.CTkFont(size=14)).grid(row=3, column=0, padx=(20, 5), pady=10, sticky="w")
+        type_frame = ctk.CTkFrame(form_frame, fg_color="transparent")
+        type_frame.grid(row=3, column=1, padx=(5, 20), pady=10, sticky="ew")
+        self.admit_room_type_menu = ctk.CTkOptionMenu(type_frame, values=["Any"], height=40,
+                                                      command=lambda _: self.show_free_bed_count())
+        self.admit_room_type_menu.pack(side="left")
+        ctk.CTkButton(type_frame, text="Next Free Bed", height=40,
+                      command=self.pick_next_free_bed).pack(side="left", padx=10)
+        self.admit_free_beds_label = ctk.CTkLabel(type_frame, text="", font=ctk.CTkFont(size=14))
+        self.admit_free_beds_label.pack(side="left", padx=10)
         # Bed selection
-        ctk.CTkLabel(form_frame, text="Room & Bed:", font=ctk.CTkFont(size=14)).grid(row=3, column=0, padx=(20, 5), pady=10, sticky="w")
-        self.admit_bed_menu = ctk.CTkOptionMenu(form_frame, values=self.get_available_beds(), height=40)
-        self.admit_bed_menu.grid(row=3, column=1, padx=(5, 20), pady=10, sticky="ew")
+        ctk.CTkLabel(form_frame, text="Room & Bed:", font=ctk.CTkFont(size=14)).grid(row=4, column=0, padx=(20, 5), pady=10, sticky="nw")
+        self.admit_bed_menu = LookupCombobox(form_frame, free_bed_lookup, format_bed, height=40,
+                                             row_value=lambda bed: (bed[0], bed[1]),
+                                             placeholder_text="Type a room number",
+                                             error_message="Failed to load free beds")
+        self.admit_bed_menu.grid(row=4, column=1, padx=(5, 20), pady=10, sticky="ew")
         # Admission date
-        ctk.CTkLabel(form_frame, text="Admission Date:", font=ctk.CTkFont(size=14)).grid(row=4, column=0, padx=(20, 5), pady=10, sticky="w")
+        ctk.CTkLabel(form_frame, text="Admission Date:", font=ctk.CTkFont(size=14)).grid(row=5, column=0, padx=(20, 5), pady=10, sticky="w")
         self.admit_date_entry = ctk.CTkEntry(form_frame, placeholder_text="YYYY-MM-DD", height=40)
-        self.admit_date_entry.grid(row=4, column=1, padx=(5, 20), pady=10, sticky="ew")
+        self.admit_date_entry.grid(row=5, column=1, padx=(5, 20), pady=10, sticky="ew")
         # Submit button
         ctk.CTkButton(form_frame, text="Admit Patient", command=self.process_admit_patient,
                      height=50, font=ctk.CTkFont(size=16, weight="bold")).grid(
-            row=5, column=0, columnspan=2, padx=20, pady=30, sticky="ew"
+            row=6, column=0, columnspan=2, padx=20, pady=30, sticky="ew"
         )
+        self.show_free_bed_count()
 
-    def get_doctor_names(self):
-        try:
-            conn = connect_db()
-            if conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT doctor_id, first_name, last_name FROM Doctor")
-                doctors = cursor.fetchall()
-                cursor.close()
-                conn.close()
-                return [f"{doc[0]} - {doc[1]} {doc[2]}" for doc in doctors]
-        except Exception:
-            return []
-        return []
+    def selected_room_type(self):
+        choice = self.admit_room_type_menu.get()
+        return None if choice == "Any" else choice
 
-    def get_available_beds(self):
-        try:
-            conn = connect_db()
-            if conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT room_number, bed_number FROM Bed WHERE is_occupied=0")
-                beds = cursor.fetchall()
-                cursor.close()
-                conn.close()
-                return [f"{bed[0]}-{bed[1]}" for bed in beds]
-        except Exception:
-            return []
-        return []
+    def show_free_bed_count(self, wait=True):
+        """Fill the room types and free-bed count in from the bed service"""
+        if not self.admit_free_beds_label.winfo_exists():
+            return
+        count, ready = bed_service.free_count(self.selected_room_type())
+        if not ready:
+            self.admit_free_beds_label.configure(text="Loading beds…")
+            if wait:
+                bed_service.after_refresh(self.admit_free_beds_label, lambda: self.show_free_bed_count(wait=False))
+            return
+        self.admit_room_type_menu.configure(values=["Any"] + [kind for kind in bed_service.room_types() if kind])
+        self.admit_free_beds_label.configure(text=f"{count} free")
+
+    def pick_next_free_bed(self):
+        bed = bed_service.next_free_bed(self.selected_room_type())
+        if bed is None:
+            messagebox.showwarning("Warning", "No free bed of this room type")
+            return
+        room_number, bed_number = bed
+        self.admit_bed_menu.set(bed, f"{room_number}-{bed_number}")
 
     def process_admit_patient(self):
-        patient_id = self.admit_patient_id.get().strip()
-        doctor_str = self.admit_doctor_menu.get().strip()
-        bed_str = self.admit_bed_menu.get().strip()
+        patient_id = self.admit_patient_menu.get()
+        doctor_id = self.admit_doctor_menu.get()
+        bed = self.admit_bed_menu.get()
         admission_date = self.admit_date_entry.get().strip()
-        if not all([patient_id, doctor_str, bed_str, admission_date]):
+        if patient_id is None or doctor_id is None or bed is None or not admission_date:
             messagebox.showerror("Error", "Please fill all fields")
             return
         if not self.validate_date(admission_date):
             messagebox.showerror("Error", "Invalid date format (YYYY-MM-DD)")
             return
         try:
-            doctor_id = int(doctor_str.split("-")[0])
-            room_number, bed_number = bed_str.split("-")
-            conn = connect_db()
-            if conn:
-                cursor = conn.cursor()
-                cursor.execute("EXEC AdmitPatient @patient_id=?, @room_number=?, @bed_number=?, @doctor_id=?, @admission_date=?",
-                               (int(patient_id), room_number, bed_number, doctor_id, admission_date))
-                conn.commit()
-                messagebox.showinfo("Success", "Patient admitted successfully!")
-                cursor.close()
-                conn.close()
-                # Refresh bed and doctor lists
-                self.show_admission_interface()
+            room_number, bed_number = bed
+            admit_patient(patient_id, room_number, bed_number, doctor_id, admission_date)
+            bed_service.occupy(room_number, bed_number)
+            messagebox.showinfo("Success", "Patient admitted successfully!")
+            # Refresh bed and doctor lists
+            self.show_admission_interface()
         except Exception as e:
+            # The bed may have been taken from another workstation
+            bed_service.invalidate()
             messagebox.showerror("Error", f"Failed to admit patient: {e}")
 
     def show_appointments(self):
@@ -783,52 +787,32 @@ class PatientModule:
         self.appt_search_entry.pack(side="left", padx=10)
         ctk.CTkButton(search_frame, text="Search", command=self.filter_appointments).pack(side="left", padx=10)
         ctk.CTkButton(search_frame, text="Clear", command=self.load_appointments).pack(side="left", padx=10)
-        self.appointments_table = ctk.CTkFrame(self.content_frame)
+        self.appointments_table = VirtualTable(
+            self.content_frame,
+            columns=[("ID", 60), ("Patient", 180), ("Doctor", 180), ("Date", 120), ("Status", 100)],
+            fetch_page=self.fetch_appointments_page,
+            error_message="Failed to load appointments",
+            format_row=lambda a: [a[0], f"{a[2]} {a[3]}", f"{a[5]} {a[6]}", a[7], a[8]],
+            empty_text="No appointments found.",
+        )
         self.appointments_table.pack(fill="both", expand=True, padx=20, pady=20)
         self.load_appointments()
 
     def load_appointments(self, search_query=None):
-        for widget in self.appointments_table.winfo_children():
-            widget.destroy()
-        try:
-            conn = connect_db()
-            if conn:
-                cursor = conn.cursor()
-                base_query = """
-                    SELECT a.appointment_id, a.patient_id, p.first_name, p.last_name, a.doctor_id, d.first_name, d.last_name, a.appointment_date, a.status
-                    FROM Appointment a
-                    JOIN Patient p ON a.patient_id = p.patient_id
-                    JOIN Doctor d ON a.doctor_id = d.doctor_id
-                """
-                params = []
-                if search_query:
-                    base_query += " WHERE (p.first_name LIKE ? OR p.last_name LIKE ? OR d.first_name LIKE ? OR d.last_name LIKE ?)"
-                    params = [f"%{search_query}%"] * 4
-                base_query += " ORDER BY a.appointment_date DESC"
-                cursor.execute(base_query, params)
-                appointments = cursor.fetchall()
-                cursor.close()
-                conn.close()
-        except Exception as e:
-            appointments = []
-        columns = ["ID", "Patient", "Doctor", "Date", "Status"]
-        widths = [60, 180, 180, 120, 100]
-        for i, (col, width) in enumerate(zip(columns, widths)):
-            self.appointments_table.grid_columnconfigure(i, minsize=width)
-            ctk.CTkLabel(self.appointments_table, text=col, font=ctk.CTkFont(weight="bold"), text_color="white").grid(row=0, column=i, padx=5, pady=5, sticky="ew")
-        if appointments:
-            for row_idx, appt in enumerate(appointments, 1):
-                row_values = [
-                    str(appt[0]),
-                    f"{appt[2]} {appt[3]}",
-                    f"{appt[5]} {appt[6]}",
-                    str(appt[7]),
-                    appt[8]
-                ]
-                for col_idx, value in enumerate(row_values):
-                    ctk.CTkLabel(self.appointments_table, text=value).grid(row=row_idx, column=col_idx, padx=5, pady=2, sticky="ew")
-        else:
-            ctk.CTkLabel(self.appointments_table, text="No appointments found.").grid(row=1, column=0, columnspan=len(columns), pady=50)
+        where, params = [], []
+        if search_query:
+            name_match, params = patient_or_doctor_filter(search_query)
+            where = [name_match]
+        self.appointment_pages = KeysetPaginator("""
+            SELECT a.appointment_id, a.patient_id, p.first_name, p.last_name, a.doctor_id, d.first_name, d.last_name, a.appointment_date, a.status
+            FROM Appointment a
+            JOIN Patient p ON a.patient_id = p.patient_id
+            JOIN Doctor d ON a.doctor_id = d.doctor_id
+        """, order_by=[("a.appointment_date", "DESC", 7), ("a.appointment_id", "DESC", 0)], where=where, params=params)
+        self.appointments_table.refresh()
+
+    def fetch_appointments_page(self, offset, limit):
+        return self.appointment_pages.fetch(offset, limit)
 
     def filter_appointments(self):
         query = self.appt_search_entry.get().strip()
@@ -845,61 +829,42 @@ class PatientModule:
         self.admit_search_entry.pack(side="left", padx=10)
         ctk.CTkButton(search_frame, text="Search", command=self.filter_admitted_patients).pack(side="left", padx=10)
         ctk.CTkButton(search_frame, text="Clear", command=lambda: self.load_admitted_patients()).pack(side="left", padx=10)
-        self.admitted_table = ctk.CTkFrame(self.content_frame)
+        self.admitted_table = VirtualTable(
+            self.content_frame,
+            columns=[("Admission ID", 80), ("Patient", 180), ("Room", 80), ("Bed", 80),
+                     ("Doctor", 180), ("Admitted On", 120)],
+            fetch_page=self.fetch_admitted_page,
+            error_message="Failed to load admitted patients",
+            format_row=lambda a: [a[0], f"{a[2]} {a[3]} (ID: {a[1]})", a[4], a[5],
+                                  f"{a[8]} {a[9]} (ID: {a[7]})", a[6]],
+            row_actions=lambda a: [("Discharge", lambda adm: self.discharge_patient(adm[0], adm[4], adm[5]))],
+            actions_width=100,
+            empty_text="No patients are currently admitted.",
+        )
         self.admitted_table.pack(fill="both", expand=True, padx=20, pady=20)
         self.load_admitted_patients()
 
     def load_admitted_patients(self, search_query=None):
-        for widget in self.admitted_table.winfo_children():
-            widget.destroy()
-        try:
-            conn = connect_db()
-            if conn:
-                cursor = conn.cursor()
-                base_query = """
-                    SELECT a.admission_id, p.patient_id, p.first_name, p.last_name, a.room_number, a.bed_number, a.admission_date, a.doctor_id, d.first_name, d.last_name
-                    FROM Admission a
-                    JOIN Patient p ON a.patient_id = p.patient_id
-                    JOIN Doctor d ON a.doctor_id = d.doctor_id
-                    WHERE a.discharge_date IS NULL
-                """
-                params = []
-                if search_query:
-                    base_query += " AND (p.first_name LIKE ? OR p.last_name LIKE ? OR d.first_name LIKE ? OR d.last_name LIKE ?)"
-                    params = [f"%{search_query}%"] * 4
-                base_query += " ORDER BY a.admission_date DESC"
-                cursor.execute(base_query, params)
-                admissions = cursor.fetchall()
-                cursor.close()
-                conn.close()
-        except Exception as e:
-            admissions = []
-        columns = ["Admission ID", "Patient", "Room", "Bed", "Doctor", "Admitted On", "Actions"]
-        widths = [80, 180, 80, 80, 180, 120, 100]
-        for i, (col, width) in enumerate(zip(columns, widths)):
-            self.admitted_table.grid_columnconfigure(i, minsize=width)
-            ctk.CTkLabel(self.admitted_table, text=col, font=ctk.CTkFont(weight="bold"), text_color="white").grid(row=0, column=i, padx=5, pady=5, sticky="ew")
-        if admissions:
-            for row_idx, adm in enumerate(admissions, 1):
-                row_values = [
-                    str(adm[0]),
-                    f"{adm[2]} {adm[3]} (ID: {adm[1]})",
-                    str(adm[4]),
-                    str(adm[5]),
-                    f"{adm[8]} {adm[9]} (ID: {adm[7]})",
-                    str(adm[6])
-                ]
-                for col_idx, value in enumerate(row_values):
-                    ctk.CTkLabel(self.admitted_table, text=value).grid(row=row_idx, column=col_idx, padx=5, pady=2, sticky="ew")
-                ctk.CTkButton(self.admitted_table, text="Discharge", command=lambda a_id=adm[0]: self.discharge_patient(a_id)).grid(row=row_idx, column=len(columns)-1, padx=5, pady=2, sticky="ew")
-        else:
-            ctk.CTkLabel(self.admitted_table, text="No patients are currently admitted.").grid(row=1, column=0, columnspan=len(columns), pady=50)
+        where, params = ["a.discharge_date IS NULL"], []
+        if search_query:
+            name_match, params = patient_or_doctor_filter(search_query)
+            where.append(name_match)
+        self.admitted_pages = KeysetPaginator("""
+            SELECT a.admission_id, p.patient_id, p.first_name, p.last_name, a.room_number, a.bed_number, a.admission_date, a.doctor_id, d.first_name, d.last_name
+            FROM Admission a
+            JOIN Patient p ON a.patient_id = p.patient_id
+            JOIN Doctor d ON a.doctor_id = d.doctor_id
+        """, order_by=[("a.admission_date", "DESC", 6), ("a.admission_id", "DESC", 0)], where=where, params=params)
+        self.admitted_table.refresh()
+
+    def fetch_admitted_page(self, offset, limit):
+        return self.admitted_pages.fetch(offset, limit)
 
     def filter_admitted_patients(self):
         query = self.admit_search_entry.get().strip()
         self.load_admitted_patients(search_query=query)
 
-    def discharge_patient(self, admission_id):
+    def discharge_patient(self, admission_id, room_number=None, bed_number=None):
         try:
             conn = connect_db()
             if conn:
@@ -908,6 +873,8 @@ class PatientModule:
                 conn.commit()
                 cursor.close()
                 conn.close()
+                if room_number is not None:
+                    bed_service.release(room_number, bed_number)
                 messagebox.showinfo("Success", "Patient discharged successfully!")
                 self.load_admitted_patients()
         except Exception as e:
@@ -0,0 +1,144 @@
+import queue
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueryTask:
+    """Handle for one submitted job; cancel() drops it or discards its result"""
+
+    def __init__(self, key, owner, on_success, on_error, indicator):
+        self.key = key
+        self.owner = owner
+        self.on_success = on_success
+        self.on_error = on_error
+        self.indicator = indicator
+        self.future = None
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Cancel the task; a job that already started still runs, but its callbacks are skipped"""
+        # The future is left alone so the task still reaches the result queue
+        # and its loading indicator is stopped
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+
+class QueryExecutor:
+    """Runs database work on a thread pool and hands results back to the Tk thread.
+
+    Workers never touch widgets: finished jobs are put on a queue that the Tk
+    main loop drains every poll_interval ms via root.after, and only then are
+    the success/error callbacks invoked. Submitting with a key cancels the
+    previous task that used the same key, so the latest request wins.
+    """
+
+    def __init__(self, max_workers=4, poll_interval=50):
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self._pool = None
+        self._root = None
+        self._results = queue.Queue()
+        self._by_key = {}
+        self._lock = threading.Lock()
+
+    def attach(self, root):
+        """Start delivering results on root's main loop"""
+        self._root = root
+        root.after(self.poll_interval, self._poll)
+
+    def submit(self, fn, *args, on_success=None, on_error=None, key=None, owner=None,
+               indicator=None, **kwargs):
+        """Run fn(*args, **kwargs) in the background and return its QueryTask.
+
+        on_success(result) / on_error(exception) run on the Tk thread, unless
+        the task was cancelled or owner (a widget) has been destroyed by then.
+        indicator is any object with start()/stop(), e.g. a widgets.Spinner.
+        """
+        if self._root is None:
+            raise RuntimeError("QueryExecutor.attach(root) must be called before submit()")
+        task = QueryTask(key, owner, on_success, on_error, indicator)
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix="query")
+            if key is not None:
+                previous = self._by_key.get(key)
+                if previous is not None:
+                    previous.cancel()
+                self._by_key[key] = task
+        if indicator is not None:
+            indicator.start()
+        task.future = self._pool.submit(self._run, task, fn, args, kwargs)
+        return task
+
+    def cancel(self, key):
+        """Cancel the pending task submitted under key, if any"""
+        with self._lock:
+            task = self._by_key.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+            for task in self._by_key.values():
+                task.cancel()
+            self._by_key.clear()
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, task, fn, args, kwargs):
+        if task.cancelled:
+            self._results.put((task, None, None))
+            return
+        try:
+            result = fn(*args, **kwargs)
+            self._results.put((task, result, None))
+        except Exception as e:
+            self._results.put((task, None, e))
+
+    def _poll(self):
+        try:
+            while True:
+                try:
+                    task, result, error = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                # A failing callback must not stop delivery of every later result
+                try:
+                    self._deliver(task, result, error)
+                except Exception as e:
+                    print(f"Background query callback failed: {e}")
+                    traceback.print_exc()
+        finally:
+            try:
+                self._root.after(self.poll_interval, self._poll)
+            except Exception:
+                pass  # root destroyed; the application is closing
+
+    def _deliver(self, task, result, error):
+        with self._lock:
+            if task.key is not None and self._by_key.get(task.key) is task:
+                del self._by_key[task.key]
+        if task.indicator is not None:
+            task.indicator.stop()
+        owner_alive = task.owner is None or task.owner.winfo_exists()
+        if task.cancelled or not owner_alive:
+            return
+        if error is not None:
+            if task.on_error is not None:
+                task.on_error(error)
+            else:
+                print(f"Background query failed: {error}")
+        elif task.on_success is not None:
+            task.on_success(result)
+
+
+executor = QueryExecutor()
+# Long-running imports and exports get workers of their own, so they never
+# hold up the list loads and lookups on executor
+job_executor = QueryExecutor(max_workers=2)
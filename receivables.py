@@ -0,0 +1,65 @@
+from db_connect import borrowed_connection
+
+# Aging buckets of the Receivable view (migration 008), youngest first
+AGING_BUCKETS = ('0-30', '31-60', '61-90', '90+')
+
+# Open bills per bucket. Receivable reads Billing.outstanding, kept current
+# by the Payment trigger, through IX_Billing_Outstanding: only bills with
+# something outstanding are touched and the Payment ledger is never summed.
+AGING_SUMMARY_QUERY = """
+    SELECT aging_bucket, COUNT(*), SUM(outstanding)
+    FROM Receivable
+    GROUP BY aging_bucket
+"""
+
+# Patients owing the most: a read of IX_Patient_Balance_Outstanding from the
+# top instead of summing every patient's bills
+TOP_BALANCES_QUERY = """
+    SELECT pb.patient_id, p.first_name + ' ' + p.last_name AS patient_name,
+           pb.outstanding, pb.open_bills
+    FROM Patient_Balance pb
+    JOIN Patient p ON p.patient_id = pb.patient_id
+    WHERE pb.outstanding > 0
+    ORDER BY pb.outstanding DESC, pb.patient_id
+    OFFSET 0 ROWS FETCH NEXT ? ROWS ONLY
+"""
+
+
+def _fetch(query, params, conn):
+    with borrowed_connection(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query, params)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+
+def aging_summary(conn=None):
+    """(bucket, open bills, amount outstanding) for every bucket in AGING_BUCKETS"""
+    totals = {bucket: (count, amount) for bucket, count, amount in _fetch(AGING_SUMMARY_QUERY, (), conn)}
+    return [(bucket, *totals.get(bucket, (0, 0))) for bucket in AGING_BUCKETS]
+
+
+def top_balances(limit=100, conn=None):
+    """(patient_id, patient name, outstanding, open bills) of the patients owing the most"""
+    return _fetch(TOP_BALANCES_QUERY, (limit,), conn)
+
+
+def patient_aging(patient_ids, conn=None):
+    """AR_Aging row of each patient in patient_ids, by patient_id.
+
+    Rows are (days_0_30, days_31_60, days_61_90, days_over_90,
+    total_outstanding, open_bills, oldest_bill); patients who owe nothing
+    are left out.
+    """
+    if not patient_ids:
+        return {}
+    marks = ", ".join("?" for _ in patient_ids)
+    rows = _fetch(f"""
+        SELECT patient_id, days_0_30, days_31_60, days_61_90, days_over_90,
+               total_outstanding, open_bills, oldest_bill
+        FROM AR_Aging
+        WHERE patient_id IN ({marks})
+    """, tuple(patient_ids), conn)
+    return {row[0]: tuple(row[1:]) for row in rows}
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+FREQUENCIES = ('daily', 'weekly')
+WEEKDAY_NAMES = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+# A year of daily appointments; longer series are booked again when they run out
+MAX_OCCURRENCES = 366
+
+
+def expand(start, frequency, every=1, weekdays=None, count=None, until=None):
+    """Occurrence datetimes of a recurring appointment, in order.
+
+    Follows the RRULE subset clinics use: FREQ=DAILY or WEEKLY, INTERVAL
+    (every), BYDAY for weekly series (weekdays, 0 is Monday; defaults to
+    start's weekday) and an end by COUNT (count) or UNTIL (until, a date,
+    inclusive). Every occurrence keeps start's time of day and none comes
+    before start. Raises ValueError for a pattern without an end or with
+    more than MAX_OCCURRENCES occurrences.
+    """
+    if frequency not in FREQUENCIES:
+        raise ValueError(f"Frequency must be one of {', '.join(FREQUENCIES)}")
+    if every < 1:
+        raise ValueError("A series must repeat at least every 1 day or week")
+    if count is None and until is None:
+        raise ValueError("A series needs a number of occurrences or an end date")
+    if count is not None and not 1 <= count <= MAX_OCCURRENCES:
+        raise ValueError(f"A series can have 1 to {MAX_OCCURRENCES} occurrences")
+    if isinstance(until, datetime):
+        until = until.date()
+
+    if frequency == 'daily':
+        step, offsets = timedelta(days=every), [0]
+        first = start
+    else:
+        days = sorted(set(weekdays)) if weekdays else [start.weekday()]
+        if any(not 0 <= d <= 6 for d in days):
+            raise ValueError("Weekdays run from 0 (Monday) to 6 (Sunday)")
+        step, offsets = timedelta(weeks=every), days
+        first = start - timedelta(days=start.weekday())
+
+    occurrences = []
+    period = first
+    while True:
+        for offset in offsets:
+            occurrence = period + timedelta(days=offset)
+            if occurrence < start:
+                continue
+            if until is not None and occurrence.date() > until:
+                return occurrences
+            occurrences.append(occurrence)
+            if len(occurrences) == count:
+                return occurrences
+            if len(occurrences) > MAX_OCCURRENCES:
+                raise ValueError(f"A series can have at most {MAX_OCCURRENCES} occurrences")
+        period += step
+
+
+def weekdays_text(weekdays):
+    """'0,2,4' as stored in Appointment_Series.weekdays, or None"""
+    return ','.join(str(d) for d in sorted(set(weekdays))) if weekdays else None
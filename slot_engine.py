@@ -0,0 +1,149 @@
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from background_cache import BackgroundCache
+from db_connect import borrowed_connection
+
+# Shifts of a doctor without Doctor_Hours rows: the whole day, hourly
+DEFAULT_SHIFTS = ((0, 24 * 60, 60),)
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def free_slots(shifts, booked):
+    """Start minutes of the free slots of one day.
+
+    shifts are (start, end, slot_minutes) minute ranges; booked are the
+    sorted start minutes of the day's appointments, each taken to last one
+    slot. Every shift is swept once alongside the appointments, so a day
+    costs O(slots + appointments) however the two interleave. An
+    appointment that does not start on a slot boundary blocks every slot it
+    overlaps.
+    """
+    free = []
+    for start, end, length in sorted(shifts):
+        i = bisect_left(booked, start - length + 1)
+        for slot in range(start, end - length + 1, length):
+            while i < len(booked) and booked[i] + length <= slot:
+                i += 1
+            if i == len(booked) or booked[i] >= slot + length:
+                free.append(slot)
+    return sorted(set(free))
+
+
+class SlotEngine(BackgroundCache):
+    """Free appointment slots per doctor and day, computed in the background.
+
+    get() never touches the database on the calling thread. A day that is
+    not cached (or older than ttl seconds) starts a background load of the
+    doctor's `days`-day window holding it: one query for their working
+    hours (Doctor_Hours, migration 011) and one range query for their
+    non-cancelled appointments, from which every day's free slots are
+    computed in one sweep. Flipping through the calendar is then answered
+    from memory. Windows are fixed blocks of `days` days, so every day maps
+    to one load; after_refresh() and is_refreshing() take its refresh_key().
+    """
+
+    error_message = "Error loading appointment slots"
+
+    def __init__(self, ttl=60, days=14):
+        super().__init__(ttl)
+        self.days = days
+        self._cache = {}  # (doctor_id, day) -> (fetched_at, free start minutes)
+
+    def get(self, doctor_id, day):
+        """Return (slots, fresh) for a doctor and date.
+
+        slots are "HH:MM" strings of the bookable slots, without those
+        already past if day is today, or None until the day has loaded.
+        """
+        with self._lock:
+            entry = self._cache.get((doctor_id, day))
+            fresh = entry is not None and self._is_fresh(entry[0])
+            if not fresh:
+                key = self.refresh_key(doctor_id, day)
+                self._start_refresh(key, key[1])
+        if entry is None:
+            return None, fresh
+        slots = entry[1]
+        now = datetime.now()
+        if day == now.date():
+            slots = slots[bisect_left(slots, _minutes(now) + 1):]
+        return [f"{m // 60:02d}:{m % 60:02d}" for m in slots], fresh
+
+    def refresh_key(self, doctor_id, day):
+        """(doctor_id, first day of the window) of the load that covers day"""
+        return doctor_id, day - timedelta(days=day.toordinal() % self.days)
+
+    def fetch(self, doctor_id, start, days, conn=None):
+        """Return {day: free start minutes} for days days from start"""
+        end = start + timedelta(days=days)
+        with borrowed_connection(conn) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT weekday, start_time, end_time, slot_minutes
+                FROM Doctor_Hours
+                WHERE doctor_id = ?
+            """, (doctor_id,))
+            shifts = {}
+            for weekday, shift_start, shift_end, length in cursor.fetchall():
+                shifts.setdefault(weekday, []).append(
+                    (_minutes(shift_start), _minutes(shift_end) or 24 * 60, length))
+            cursor.execute("""
+                SELECT appointment_date
+                FROM Appointment
+                WHERE doctor_id = ? AND appointment_date >= ? AND appointment_date < ?
+                  AND status != 'cancelled'
+                ORDER BY appointment_date
+            """, (doctor_id, datetime(start.year, start.month, start.day), datetime(end.year, end.month, end.day)))
+            booked = {}
+            for (when,) in cursor.fetchall():
+                booked.setdefault(when.date(), []).append(_minutes(when))
+            cursor.close()
+        result = {}
+        for offset in range(days):
+            day = start + timedelta(days=offset)
+            day_shifts = shifts.get(day.weekday(), ()) if shifts else DEFAULT_SHIFTS
+            result[day] = free_slots(day_shifts, booked.get(day, []))
+        return result
+
+    def take(self, doctor_id, when):
+        """Drop the slot starting at when (datetime or 'YYYY-MM-DD HH:MM') after booking it"""
+        if isinstance(when, str):
+            when = datetime.strptime(when, '%Y-%m-%d %H:%M')
+        with self._lock:
+            entry = self._cache.get((doctor_id, when.date()))
+            if entry is None:
+                return
+            slots = entry[1]
+            i = bisect_left(slots, _minutes(when))
+            if i < len(slots) and slots[i] == _minutes(when):
+                self._cache[doctor_id, when.date()] = (entry[0], slots[:i] + slots[i + 1:])
+            else:
+                # Not on the grid: the slots it overlaps are unknown here
+                del self._cache[doctor_id, when.date()]
+
+    def invalidate(self, doctor_id=None):
+        """Mark one doctor's days (or every doctor's) stale so the next get() reloads them"""
+        with self._lock:
+            if doctor_id is None:
+                self._cache.clear()
+            else:
+                for key in [key for key in self._cache if key[0] == doctor_id]:
+                    del self._cache[key]
+
+    def _load(self, key, start):
+        doctor_id = key[0]
+        days = self.fetch(doctor_id, start, self.days)
+        with self._lock:
+            now = time.monotonic()
+            # Drop expired days of every doctor so the cache stays bounded
+            for key in [key for key, entry in self._cache.items() if now - entry[0] >= self.ttl]:
+                del self._cache[key]
+            for loaded_day, slots in days.items():
+                self._cache[doctor_id, loaded_day] = (now, slots)
+
+
+slot_engine = SlotEngine()
@@ -0,0 +1,19 @@
+import re
+from datetime import datetime
+
+
+def validate_phone(phone):
+    return bool(re.match(r'^\d{10}$', phone))
+
+
+def validate_date(date_str):
+    try:
+        datetime.strptime(date_str, '%Y-%m-%d')
+        return True
+    except ValueError:
+        return False
+
+
+def validate_email(email):
+    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+    return bool(re.match(pattern, email))
@@ -0,0 +1,1086 @@
+import customtkinter as ctk
+import os
+import threading
+from datetime import date, timedelta
+from tkinter import messagebox, filedialog
+from query_executor import executor, job_executor
+from bulk_import import import_file, write_error_report
+from bulk_export import export, available_formats, ExportCancelled
+
+HEADER_COLOR = "#1f538d"
+CHECKBOX_WIDTH = 30
+# Appointment status -> color, as in today's schedule
+STATUS_COLORS = {'scheduled': '#f39c12', 'completed': '#27ae60', 'cancelled': '#e74c3c', None: '#95a5a6'}
+
+
+class Spinner(ctk.CTkLabel):
+    """Label that animates while at least one background task is running.
+
+    start()/stop() nest, so several tasks can share one indicator. Widgets
+    listed in disables (e.g. the button that started the task) are disabled
+    while it is busy.
+    """
+
+    def __init__(self, master, text="Loading", interval=300, disables=(), **kwargs):
+        super().__init__(master, text="", **kwargs)
+        self.message = text
+        self.interval = interval
+        self.disables = list(disables)
+        self._depth = 0
+        self._frame = 0
+        self._job = None
+
+    @property
+    def busy(self):
+        return self._depth > 0
+
+    def start(self):
+        self._depth += 1
+        if self._depth == 1:
+            for widget in self.disables:
+                widget.configure(state="disabled")
+            self._tick()
+
+    def stop(self):
+        self._depth = max(0, self._depth - 1)
+        if self._depth == 0 and self.winfo_exists():
+            if self._job is not None:
+                self.after_cancel(self._job)
+                self._job = None
+            self.configure(text="")
+            for widget in self.disables:
+                if widget.winfo_exists():
+                    widget.configure(state="normal")
+
+    def _tick(self):
+        if not self.winfo_exists():
+            return
+        self.configure(text=f"⏳ {self.message}{'.' * (self._frame % 4)}")
+        self._frame += 1
+        self._job = self.after(self.interval, self._tick)
+
+
+class Debouncer:
+    """Call fn once calls have stopped coming in for delay ms.
+
+    Bound to an entry's <KeyRelease>, fn runs when the user pauses typing
+    rather than on every keystroke.
+    """
+
+    def __init__(self, widget, fn, delay=150):
+        self.widget = widget
+        self.fn = fn
+        self.delay = delay
+        self._job = None
+
+    def __call__(self, event=None):
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+        self._job = self.widget.after(self.delay, self._fire)
+
+    def _fire(self):
+        self._job = None
+        if self.widget.winfo_exists():
+            self.fn()
+
+
+class VirtualTable(ctk.CTkFrame):
+    """Scrollable table that only creates widgets for the visible rows.
+
+    A fixed pool of row widgets is recycled as the user scrolls; rows are
+    pulled from fetch_page(offset, limit) one page at a time, only for the
+    pages the visible window touches. Pages are kept sparsely, so jumping to
+    a distant row loads just that page rather than everything before it.
+
+    fetch_page runs on the query executor's worker threads, so it must not
+    touch any widgets; errors it raises are reported with error_message.
+
+    columns     -- list of (title, width) pairs
+    fetch_page  -- callable(offset, limit) returning a list of rows
+    format_row  -- callable(row) returning one display string per column
+    row_actions -- optional callable(row) returning [(text, command), ...];
+                   a command of None renders the text as a plain label
+    selectable  -- show a checkbox per row; selection() returns the checked rows
+    row_key     -- callable(row) identifying a row in the selection (default row[0])
+    """
+
+    def __init__(self, master, columns, fetch_page, format_row, row_actions=None,
+                 actions_width=120, page_size=100, visible_rows=15, row_height=30,
+                 empty_text="No records found.", error_message="Failed to load records",
+                 selectable=False, row_key=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.columns = columns
+        self.fetch_page = fetch_page
+        self.format_row = format_row
+        self.row_actions = row_actions
+        self.actions_width = actions_width
+        self.page_size = page_size
+        self.visible_rows = visible_rows
+        self.row_height = row_height
+        self.empty_text = empty_text
+        self.error_message = error_message
+        self.selectable = selectable
+        self.row_key = row_key or (lambda row: row[0])
+        self.selected = {}  # row key -> row, in the order they were checked
+        self.first_column = 1 if selectable else 0
+
+        self.pages = {}  # page number -> rows
+        self.total = None  # row count, once the last page has been seen
+        self.top = 0
+        self.generation = 0  # bumped on refresh so late results are dropped
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+        self._build_header()
+        self._build_body()
+        self._build_footer()
+
+    def _build_header(self):
+        header = ctk.CTkFrame(self, fg_color=HEADER_COLOR)
+        header.grid(row=0, column=0, columnspan=2, sticky="ew", padx=5, pady=(5, 0))
+        if self.selectable:
+            header.grid_columnconfigure(0, minsize=CHECKBOX_WIDTH)
+        for i, (title, width) in enumerate(self.columns, self.first_column):
+            header.grid_columnconfigure(i, minsize=width)
+            ctk.CTkLabel(header, text=title, font=ctk.CTkFont(weight="bold"), text_color="white",
+                         width=width - 10).grid(row=0, column=i, padx=5, pady=5, sticky="ew")
+        if self.row_actions:
+            actions_column = self.first_column + len(self.columns)
+            header.grid_columnconfigure(actions_column, minsize=self.actions_width)
+            ctk.CTkLabel(header, text="Actions", font=ctk.CTkFont(weight="bold"), text_color="white",
+                         width=self.actions_width - 10).grid(row=0, column=actions_column, padx=5, pady=5)
+
+    def _build_body(self):
+        self.body = ctk.CTkFrame(self, fg_color="transparent")
+        self.body.grid(row=1, column=0, sticky="nsew", padx=5, pady=(0, 5))
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.grid(row=1, column=1, sticky="ns", pady=(0, 5))
+
+        self.empty_label = ctk.CTkLabel(self.body, text=self.empty_text)
+
+        # Fixed pool of row widgets, reused for whichever rows are visible
+        self.slots = []
+        for slot_idx in range(self.visible_rows):
+            row_frame = ctk.CTkFrame(self.body, height=self.row_height, fg_color="transparent")
+            row_frame.grid_propagate(False)
+            slot = {'frame': row_frame, 'row': None, 'buttons': []}
+            if self.selectable:
+                row_frame.grid_columnconfigure(0, minsize=CHECKBOX_WIDTH)
+                slot['checkbox'] = ctk.CTkCheckBox(row_frame, text="", width=CHECKBOX_WIDTH, checkbox_width=18,
+                                                   checkbox_height=18, command=lambda s=slot: self._on_check(s))
+                slot['checkbox'].grid(row=0, column=0, padx=(5, 0), pady=2)
+            labels = []
+            for col_idx, (_, width) in enumerate(self.columns, self.first_column):
+                row_frame.grid_columnconfigure(col_idx, minsize=width)
+                label = ctk.CTkLabel(row_frame, text="", width=width - 10, anchor="w")
+                label.grid(row=0, column=col_idx, padx=5, pady=2, sticky="ew")
+                labels.append(label)
+            actions_frame = ctk.CTkFrame(row_frame, fg_color="transparent")
+            actions_frame.grid(row=0, column=self.first_column + len(self.columns), padx=5, pady=2)
+            slot.update(labels=labels, actions=actions_frame)
+            self.slots.append(slot)
+            row_frame.grid(row=slot_idx, column=0, sticky="ew")
+            self._bind_wheel(row_frame)
+
+        self._bind_wheel(self.body)
+
+    def _build_footer(self):
+        footer = ctk.CTkFrame(self, fg_color="transparent")
+        footer.grid(row=2, column=0, columnspan=2, sticky="ew", padx=5, pady=(0, 5))
+        self.status_label = ctk.CTkLabel(footer, text="")
+        self.status_label.pack(side="left", padx=5)
+        self.spinner = Spinner(footer)
+        self.spinner.pack(side="left", padx=5)
+        self.load_more_button = ctk.CTkButton(footer, text="Load more", width=90, height=24,
+                                              command=self.load_more)
+        self.load_more_button.pack(side="right", padx=5)
+        ctk.CTkButton(footer, text="Go", width=40, height=24,
+                      command=self._on_jump).pack(side="right", padx=(0, 5))
+        self.jump_entry = ctk.CTkEntry(footer, width=70, height=24, placeholder_text="Row #")
+        self.jump_entry.pack(side="right", padx=5)
+        self.jump_entry.bind("<Return>", lambda e: self._on_jump())
+
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self._on_mousewheel, add="+")
+        widget.bind("<Button-4>", lambda e: self.scroll_by(-3), add="+")
+        widget.bind("<Button-5>", lambda e: self.scroll_by(3), add="+")
+        for child in widget.winfo_children():
+            self._bind_wheel(child)
+
+    def refresh(self):
+        """Drop loaded rows (and the selection) and reload from the first page"""
+        self.generation += 1
+        self.pages = {}
+        self.total = None
+        if self.selected:
+            self.clear_selection()
+        self.scroll_to(0)
+
+    def selection(self):
+        """The checked rows, in the order they were checked"""
+        return list(self.selected.values())
+
+    def clear_selection(self):
+        self.selected = {}
+        self._render()
+
+    def _on_check(self, slot):
+        row = slot['row']
+        if row is None:
+            return
+        if slot['checkbox'].get():
+            self.selected[self.row_key(row)] = row
+        else:
+            self.selected.pop(self.row_key(row), None)
+        self._update_footer()
+
+    def scroll_to(self, index):
+        """Make row index the first visible row, loading missing pages in the background"""
+        index = max(0, index)
+        if self.total is not None:
+            index = min(index, max(0, self.total - self.visible_rows))
+        self.top = index
+        if self._missing_pages(index):
+            self._load(index)
+        self._render()
+
+    def scroll_by(self, delta):
+        self.scroll_to(self.top + delta)
+        return "break"
+
+    def load_more(self):
+        """Load the page after the furthest one loaded and scroll to it"""
+        if self.total is None:
+            self.scroll_to(self._known_rows())
+
+    def _on_jump(self):
+        text = self.jump_entry.get().strip()
+        if text.isdigit():
+            self.scroll_to(int(text) - 1)
+
+    def _window_pages(self, top):
+        first = top // self.page_size
+        last = (top + self.visible_rows - 1) // self.page_size
+        return range(first, last + 1)
+
+    def _missing_pages(self, top):
+        return [number for number in self._window_pages(top)
+                if number not in self.pages
+                and (self.total is None or number * self.page_size < self.total)]
+
+    def _load(self, top):
+        generation = self.generation
+        executor.submit(self._fetch_window, top, dict(self.pages), self.total,
+                        key=("virtual-table", id(self)), owner=self, indicator=self.spinner,
+                        on_success=lambda result: self._on_loaded(generation, result),
+                        on_error=self._on_load_error)
+
+    def _on_loaded(self, generation, result):
+        if generation != self.generation:
+            return
+        pages, total = result
+        self.pages.update(pages)
+        self.total = total
+        # Re-clamp now that the end of the data may be known
+        self.scroll_to(self.top)
+
+    def _on_load_error(self, error):
+        messagebox.showerror("Error", f"{self.error_message}: {error}")
+
+    def _fetch_window(self, top, pages, total):
+        """Fetch the pages the window at top needs; runs on a worker thread.
+
+        Works on a copy of the loaded pages and returns (pages, total) for
+        _on_loaded to merge on the Tk thread.
+        """
+        for number in self._window_pages(top):
+            if number in pages:
+                continue
+            if total is not None and number * self.page_size >= total:
+                break
+            page = self.fetch_page(number * self.page_size, self.page_size)
+            if len(page) == self.page_size:
+                pages[number] = page
+            elif page or number == 0:
+                pages[number] = page
+                total = number * self.page_size + len(page)
+                break
+            else:
+                # Jumped past the end; the real end is somewhere earlier
+                total = self._find_end(pages, number)
+                break
+        return pages, total
+
+    def _find_end(self, pages, empty):
+        """Binary search for the last non-empty page below an empty one; returns the row count"""
+        full = max((n for n, rows in pages.items() if n < empty and rows), default=-1)
+        while empty - full > 1:
+            number = (full + empty) // 2
+            page = pages.get(number)
+            if page is None:
+                page = self.fetch_page(number * self.page_size, self.page_size)
+            if not page:
+                empty = number
+                continue
+            pages[number] = page
+            if len(page) < self.page_size:
+                return number * self.page_size + len(page)
+            full = number
+        return (full + 1) * self.page_size
+
+    def _row(self, index):
+        page = self.pages.get(index // self.page_size)
+        offset = index % self.page_size
+        return page[offset] if page is not None and offset < len(page) else None
+
+    def _known_rows(self):
+        if self.total is not None:
+            return self.total
+        return (max(self.pages) + 1) * self.page_size if self.pages else 0
+
+    def _render(self):
+        if self.total == 0:
+            for slot in self.slots:
+                slot['frame'].grid_remove()
+            self.empty_label.grid(row=0, column=0, pady=40)
+        else:
+            self.empty_label.grid_remove()
+            for slot_idx, slot in enumerate(self.slots):
+                row = self._row(self.top + slot_idx)
+                if row is not None:
+                    self._fill_slot(slot, row)
+                    slot['frame'].grid()
+                else:
+                    slot['frame'].grid_remove()
+        self._update_scrollbar()
+        self._update_footer()
+
+    def _update_footer(self):
+        known = self._known_rows()
+        if known == 0:
+            text = "0 rows" if self.total == 0 else ""
+        else:
+            last = min(self.top + self.visible_rows, known)
+            text = f"Rows {self.top + 1}-{last} of {known}{'' if self.total is not None else '+'}"
+        if self.selected:
+            text += f" · {len(self.selected)} selected"
+        self.status_label.configure(text=text)
+        self.load_more_button.configure(state="normal" if self.total is None else "disabled")
+
+    def _fill_slot(self, slot, row):
+        slot['row'] = row
+        if self.selectable:
+            if self.row_key(row) in self.selected:
+                slot['checkbox'].select()
+            else:
+                slot['checkbox'].deselect()
+        values = self.format_row(row)
+        for label, value, (_, width) in zip(slot['labels'], values, self.columns):
+            label.configure(text=self._fit(value, width))
+        if not self.row_actions:
+            return
+        actions = self.row_actions(row)
+        buttons = slot['buttons']
+        # Grow the slot's button pool only when a row needs more buttons than before
+        while len(buttons) < len(actions):
+            button = ctk.CTkButton(slot['actions'], text="", width=30, height=24)
+            self._bind_wheel(button)
+            buttons.append(button)
+        for button, (text, command) in zip(buttons, actions):
+            width = 30 if len(text) <= 2 else len(text) * 8
+            if command is None:
+                button.configure(text=text, command=None, state="disabled", fg_color="transparent",
+                                 width=width)
+            else:
+                button.configure(text=text, command=lambda c=command, r=row: c(r), state="normal",
+                                 fg_color=ctk.ThemeManager.theme["CTkButton"]["fg_color"], width=width)
+            button.pack(side="left", padx=2)
+        for button in buttons[len(actions):]:
+            button.pack_forget()
+
+    @staticmethod
+    def _fit(value, width):
+        text = "" if value is None else str(value)
+        max_chars = max(4, (width - 10) // 7)
+        return text if len(text) <= max_chars else text[:max_chars - 3] + "..."
+
+    def _total_for_scrollbar(self):
+        # While more pages exist, leave room past the end so the user can scroll on
+        if self.total is not None:
+            return self.total
+        return self._known_rows() + self.visible_rows
+
+    def _update_scrollbar(self):
+        total = self._total_for_scrollbar()
+        if total <= self.visible_rows:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.top / total, min(1, (self.top + self.visible_rows) / total))
+
+    def _on_scrollbar(self, action, *args):
+        if action == "moveto":
+            self.scroll_to(int(float(args[0]) * self._total_for_scrollbar()))
+        elif action == "scroll":
+            amount, unit = int(args[0]), args[1]
+            self.scroll_by(amount * (self.visible_rows if unit == "pages" else 1))
+
+    def _on_mousewheel(self, event):
+        return self.scroll_by(-3 if event.delta > 0 else 3)
+
+
+class ScheduleCalendar(ctk.CTkFrame):
+    """Week or month calendar of appointments, drawn on one canvas.
+
+    Every appointment is a rectangle and a text item on the canvas rather
+    than a frame with labels, so a busy week redraws in milliseconds.
+    Appointments are cached per week: showing a period fetches all of its
+    missing weeks with one fetch_range call, then the periods before and
+    after it are prefetched in the background, so paging to the adjacent
+    week or month is answered from memory.
+
+    fetch_range runs on the query executor's worker threads, so it must not
+    touch any widgets; errors it raises are reported with error_message.
+
+    fetch_range -- callable(first_day, last_day) returning the rows of those
+                   days, both inclusive; row[1] is the datetime, row[2] the status
+    format_item -- callable(row) returning the text shown for one appointment
+    on_open     -- optional callable(row), run when an appointment is clicked
+    mode        -- "week" or "month"
+    """
+
+    ITEM_MINUTES = 30  # Drawn length of an appointment in the week view
+    MONTH_ROWS = 6
+    MONTH_ITEMS = 4  # Appointments listed per day in the month view
+
+    def __init__(self, master, fetch_range, format_item, on_open=None, mode="week", day=None,
+                 hour_height=40, first_hour=8, error_message="Failed to load appointments", **kwargs):
+        super().__init__(master, **kwargs)
+        self.fetch_range = fetch_range
+        self.format_item = format_item
+        self.on_open = on_open
+        self.mode = mode
+        self.day = day or date.today()
+        self.hour_height = hour_height
+        self.first_hour = first_hour
+        self.error_message = error_message
+
+        self.weeks = {}  # Monday -> rows of that week
+        self.pending = set()  # Mondays being fetched
+        self.error = None
+        self.generation = 0  # bumped on refresh so late results are dropped
+        self.items = {}  # canvas item -> row
+        self.day_cells = {}  # canvas item -> day, in the month view
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+        self._build_toolbar()
+        self._build_canvas()
+        self.show(self.day)
+
+    def _build_toolbar(self):
+        toolbar = ctk.CTkFrame(self, fg_color="transparent")
+        toolbar.grid(row=0, column=0, columnspan=2, sticky="ew", padx=5, pady=5)
+        ctk.CTkButton(toolbar, text="◀", width=40, command=lambda: self.step(-1)).pack(side="left", padx=(0, 5))
+        ctk.CTkButton(toolbar, text="Today", width=70, command=lambda: self.show(date.today())).pack(side="left")
+        ctk.CTkButton(toolbar, text="▶", width=40, command=lambda: self.step(1)).pack(side="left", padx=5)
+        self.title_label = ctk.CTkLabel(toolbar, text="", font=ctk.CTkFont(size=16, weight="bold"))
+        self.title_label.pack(side="left", padx=10)
+        self.spinner = Spinner(toolbar)
+        self.spinner.pack(side="left", padx=5)
+        self.mode_switch = ctk.CTkSegmentedButton(toolbar, values=["Week", "Month"],
+                                                  command=lambda value: self.set_mode(value.lower()))
+        self.mode_switch.set(self.mode.capitalize())
+        self.mode_switch.pack(side="right")
+
+    def _build_canvas(self):
+        self.canvas = ctk.CTkCanvas(self, highlightthickness=0,
+                                    bg=self._apply_appearance_mode(ctk.ThemeManager.theme["CTkFrame"]["fg_color"]))
+        self.canvas.grid(row=1, column=0, sticky="nsew", padx=(5, 0), pady=(0, 5))
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.canvas.yview)
+        self.scrollbar.grid(row=1, column=1, sticky="ns", pady=(0, 5))
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.text_color = self._apply_appearance_mode(ctk.ThemeManager.theme["CTkLabel"]["text_color"])
+        self.size = None
+        self.canvas.bind("<Configure>", self._on_resize)
+        self.canvas.bind("<MouseWheel>", self._on_mousewheel)
+        self.canvas.bind("<Shift-MouseWheel>", lambda e: self.step(-1 if e.delta > 0 else 1))
+        self.canvas.bind("<Button-1>", self._on_click)
+
+    # Periods
+
+    def period(self):
+        """(first_day, last_day) drawn for the current mode and day"""
+        if self.mode == "week":
+            first = self.day - timedelta(days=self.day.weekday())
+            return first, first + timedelta(days=6)
+        first_of_month = self.day.replace(day=1)
+        first = first_of_month - timedelta(days=first_of_month.weekday())
+        return first, first + timedelta(weeks=self.MONTH_ROWS) - timedelta(days=1)
+
+    def _adjacent_days(self, direction):
+        if self.mode == "week":
+            return self.day + timedelta(weeks=direction)
+        month = self.day.month - 1 + direction
+        return date(self.day.year + month // 12, month % 12 + 1, 1)
+
+    def show(self, day):
+        """Show the week or month containing day"""
+        self.day = day
+        first, last = self.period()
+        if self.mode == "week":
+            self.title_label.configure(text=f"{first:%b %d} – {last:%b %d, %Y}")
+        else:
+            self.title_label.configure(text=f"{self.day:%B %Y}")
+        self._load(first, last, prefetch=False)
+        self._draw(scroll=True)
+        # The neighbouring periods, so paging to them needs no round trip
+        for direction in (-1, 1):
+            self._load(*self._period_of(self._adjacent_days(direction)), prefetch=True)
+
+    def _period_of(self, day):
+        current = self.day
+        self.day = day
+        try:
+            return self.period()
+        finally:
+            self.day = current
+
+    def step(self, direction):
+        self.show(self._adjacent_days(direction))
+        return "break"
+
+    def set_mode(self, mode):
+        self.mode = mode
+        self.mode_switch.set(mode.capitalize())
+        self.show(self.day)
+
+    def refresh(self):
+        """Drop the cached weeks and reload the current period"""
+        self.generation += 1
+        self.weeks = {}
+        self.pending = set()
+        self.show(self.day)
+
+    # Loading
+
+    def _load(self, first, last, prefetch):
+        """Fetch the weeks of [first, last] not cached or on their way, as one range"""
+        mondays = [first + timedelta(weeks=i) for i in range((last - first).days // 7 + 1)]
+        missing = [monday for monday in mondays if monday not in self.weeks and monday not in self.pending]
+        if not missing:
+            return
+        self.error = None
+        self.pending.update(missing)
+        generation = self.generation
+        start, end = missing[0], missing[-1] + timedelta(days=6)
+        executor.submit(self.fetch_range, start, end,
+                        key=("schedule-calendar", id(self), start), owner=self,
+                        indicator=None if prefetch else self.spinner,
+                        on_success=lambda rows: self._on_loaded(generation, missing, rows),
+                        on_error=lambda e: self._on_load_error(generation, missing, e, prefetch))
+
+    def _on_loaded(self, generation, mondays, rows):
+        if generation != self.generation:
+            return
+        weeks = {monday: [] for monday in mondays}
+        for row in rows or ():
+            day = row[1].date()
+            weeks.setdefault(day - timedelta(days=day.weekday()), []).append(row)
+        self.weeks.update(weeks)
+        self.pending.difference_update(mondays)
+        first, last = self.period()
+        if any(first <= monday <= last for monday in mondays):
+            # Once the whole period is in, scroll to its first appointment
+            self._draw(scroll=self._rows(first, last) is not None)
+
+    def _on_load_error(self, generation, mondays, error, prefetch):
+        if generation != self.generation:
+            return
+        self.pending.difference_update(mondays)
+        if not prefetch:
+            self.error = f"{self.error_message}: {error}"
+            self._draw()
+
+    def _rows(self, first, last):
+        """Cached rows of [first, last], or None while any of its weeks is missing"""
+        rows = []
+        monday = first
+        while monday <= last:
+            if monday not in self.weeks:
+                return None
+            rows.extend(self.weeks[monday])
+            monday += timedelta(weeks=1)
+        return rows
+
+    # Drawing
+
+    def _on_resize(self, event):
+        if (event.width, event.height) != self.size:
+            self.size = (event.width, event.height)
+            self._draw()
+
+    def _draw(self, scroll=False):
+        self.canvas.delete("all")
+        self.items = {}
+        self.day_cells = {}
+        width = max(self.canvas.winfo_width(), 200)
+        height = max(self.canvas.winfo_height(), 200)
+        first, last = self.period()
+        rows = self._rows(first, last)
+        if self.mode == "week":
+            self._draw_week(first, rows or [], width, scroll)
+        else:
+            self._draw_month(first, rows or [], width, height)
+        if rows is None or self.error:
+            self.canvas.create_text(width / 2, height / 2, fill=self.text_color,
+                                    text=self.error or "Loading…", font=("", 14))
+
+    def _draw_week(self, first, rows, width, scroll):
+        gutter, header = 50, 30
+        column = (width - gutter) / 7
+        total = header + 24 * self.hour_height
+        today = date.today()
+        for i in range(7):
+            day = first + timedelta(days=i)
+            x = gutter + i * column
+            if day == today:
+                self.canvas.create_rectangle(x, 0, x + column, total, fill=HEADER_COLOR, stipple="gray25", width=0)
+            self.canvas.create_text(x + column / 2, header / 2, text=f"{day:%a %d}", fill=self.text_color,
+                                    font=("", 11, "bold"))
+            self.canvas.create_line(x, 0, x, total, fill="gray40")
+        for hour in range(24):
+            y = header + hour * self.hour_height
+            self.canvas.create_line(gutter, y, width, y, fill="gray30")
+            self.canvas.create_text(gutter - 5, y + 2, text=f"{hour:02d}:00", anchor="ne", fill=self.text_color,
+                                    font=("", 9))
+
+        by_day = {}
+        for row in rows:
+            by_day.setdefault(row[1].date(), []).append(row)
+        item_height = self.hour_height * self.ITEM_MINUTES / 60
+        for day, day_rows in by_day.items():
+            x = gutter + (day - first).days * column
+            for row, lane, lanes in self._lanes(sorted(day_rows, key=lambda r: r[1])):
+                minutes = row[1].hour * 60 + row[1].minute
+                y = header + minutes * self.hour_height / 60
+                lane_width = (column - 4) / lanes
+                x0 = x + 2 + lane * lane_width
+                rect = self.canvas.create_rectangle(x0, y + 1, x0 + lane_width - 1, y + item_height - 1,
+                                                    fill=STATUS_COLORS.get(row[2], STATUS_COLORS[None]), width=0)
+                text = self.canvas.create_text(x0 + 3, y + 2, anchor="nw", fill="white", font=("", 9),
+                                               text=VirtualTable._fit(self.format_item(row), lane_width))
+                self.items[rect] = self.items[text] = row
+
+        self.canvas.configure(scrollregion=(0, 0, width, total))
+        if scroll:
+            # Start at the first appointment of the week, or at the usual opening hour
+            hour = min((row[1].hour for row in rows), default=self.first_hour)
+            # The hour lines sit below the day header, so its height counts too
+            self.canvas.yview_moveto((header + hour * self.hour_height) / total)
+
+    def _lanes(self, day_rows):
+        """(row, lane, lanes in its cluster) so overlapping appointments sit side by side"""
+        length = timedelta(minutes=self.ITEM_MINUTES)
+        cluster, lane_ends, cluster_end = [], [], None
+        for row in day_rows + [None]:
+            if row is None or (cluster_end is not None and row[1] >= cluster_end):
+                for placed, lane in cluster:
+                    yield placed, lane, len(lane_ends)
+                if row is None:
+                    return
+                cluster, lane_ends = [], []
+            lane = next((i for i, end in enumerate(lane_ends) if end <= row[1]), len(lane_ends))
+            if lane == len(lane_ends):
+                lane_ends.append(None)
+            lane_ends[lane] = row[1] + length
+            cluster.append((row, lane))
+            cluster_end = max(lane_ends)
+
+    def _draw_month(self, first, rows, width, height):
+        header = 25
+        column = width / 7
+        cell = (height - header) / self.MONTH_ROWS
+        line = 16
+        today = date.today()
+        for i, name in enumerate(("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")):
+            self.canvas.create_text(i * column + column / 2, header / 2, text=name, fill=self.text_color,
+                                    font=("", 11, "bold"))
+        by_day = {}
+        for row in sorted(rows, key=lambda r: r[1]):
+            by_day.setdefault(row[1].date(), []).append(row)
+        for index in range(7 * self.MONTH_ROWS):
+            day = first + timedelta(days=index)
+            x, y = (index % 7) * column, header + (index // 7) * cell
+            box = self.canvas.create_rectangle(x, y, x + column, y + cell, outline="gray40",
+                                               fill=HEADER_COLOR if day == today else "",
+                                               stipple="gray25" if day == today else "")
+            color = self.text_color if day.month == self.day.month else "gray50"
+            number = self.canvas.create_text(x + 5, y + 3, anchor="nw", text=str(day.day), fill=color,
+                                             font=("", 10, "bold"))
+            self.day_cells[box] = self.day_cells[number] = day
+            day_rows = by_day.get(day, [])
+            shown = day_rows if len(day_rows) <= self.MONTH_ITEMS else day_rows[:self.MONTH_ITEMS - 1]
+            for n, row in enumerate(shown):
+                top = y + 20 + n * line
+                if top + line > y + cell:
+                    break
+                text = self.canvas.create_text(x + 5, top, anchor="nw", font=("", 9),
+                                               fill=STATUS_COLORS.get(row[2], STATUS_COLORS[None]),
+                                               text=VirtualTable._fit(self.format_item(row), column))
+                self.items[text] = row
+            if len(shown) < len(day_rows):
+                more = self.canvas.create_text(x + 5, y + 20 + len(shown) * line, anchor="nw", font=("", 9),
+                                               fill=self.text_color, text=f"+{len(day_rows) - len(shown)} more")
+                self.day_cells[more] = day
+        self.canvas.configure(scrollregion=(0, 0, width, height))
+
+    # Events
+
+    def _on_click(self, event):
+        found = self.canvas.find_overlapping(event.x, self.canvas.canvasy(event.y),
+                                             event.x, self.canvas.canvasy(event.y))
+        for item in reversed(found):
+            if item in self.items:
+                if self.on_open:
+                    self.on_open(self.items[item])
+                return
+            if item in self.day_cells:
+                # A day of the month view opens its week
+                self.day = self.day_cells[item]
+                self.set_mode("week")
+                return
+
+    def _on_mousewheel(self, event):
+        if self.mode == "month":
+            return self.step(-1 if event.delta > 0 else 1)
+        self.canvas.yview_scroll(-3 if event.delta > 0 else 3, "units")
+        return "break"
+
+
+class LookupCombobox(ctk.CTkFrame):
+    """Searchable drop-down for picking one row out of a large table.
+
+    Typing filters the options and the arrow button opens the list. Options
+    are never loaded up front: source(term) returns a KeysetPaginator for the
+    current search, whose pages are fetched on the query executor as the
+    list opens and as "Load more" is pressed, so the widget costs the same
+    with ten rows as with a million.
+
+    source      -- callable(term) returning a KeysetPaginator
+    format_row  -- callable(row) returning the option's text
+    row_value   -- callable(row) returning what get() reports (default row[0])
+    command     -- optional callable(value) run when an option is picked
+    """
+
+    def __init__(self, master, source, format_row, row_value=None, command=None,
+                 placeholder_text="Type to search", list_height=180, height=35,
+                 error_message="Failed to load options", **kwargs):
+        super().__init__(master, fg_color="transparent", **kwargs)
+        self.source = source
+        self.format_row = format_row
+        self.row_value = row_value or (lambda row: row[0])
+        self.command = command
+        self.error_message = error_message
+        self.value = None
+        self.pages = None
+        self.term = None
+        self.shown = 0  # options listed for the current search
+        self.is_open = False
+
+        self.grid_columnconfigure(0, weight=1)
+        self.entry = ctk.CTkEntry(self, placeholder_text=placeholder_text, height=height)
+        self.entry.grid(row=0, column=0, sticky="ew")
+        self.toggle_button = ctk.CTkButton(self, text="▾", width=height, height=height, command=self.toggle)
+        self.toggle_button.grid(row=0, column=1, padx=(5, 0))
+        self.options = ctk.CTkScrollableFrame(self, height=list_height)
+        self.load_more_button = ctk.CTkButton(self.options, text="Load more", height=24,
+                                              command=self.load_more)
+        self.spinner = Spinner(self, text="Searching", width=90, disables=[self.load_more_button])
+        self.spinner.grid(row=0, column=2, padx=(5, 0))
+
+        self.entry.bind("<KeyRelease>", self._on_key, add="+")
+        self.entry.bind("<Escape>", lambda e: self.close(), add="+")
+        self._debounced_search = Debouncer(self.entry, self._search, delay=250)
+
+    def get(self):
+        """Value of the picked option, or None while nothing is picked"""
+        return self.value
+
+    def set(self, value, text):
+        """Pick value, shown as text, without opening the list"""
+        self.value = value
+        self.entry.delete(0, "end")
+        if text:
+            self.entry.insert(0, text)
+        self.close()
+
+    def clear(self):
+        self.value = None
+        self.entry.delete(0, "end")
+        self.pages = self.term = None
+        self.close()
+
+    def open(self):
+        """Show the list; searches again only if the text changed since the last search"""
+        self._expand()
+        # With an option picked, the list offers every option rather than just that one
+        term = "" if self.value is not None else self.entry.get().strip()
+        if self.pages is None or term != self.term:
+            self._search(term)
+
+    def _expand(self):
+        if not self.is_open:
+            self.options.grid(row=1, column=0, columnspan=3, sticky="ew", pady=(5, 0))
+            self.is_open = True
+
+    def close(self):
+        if self.is_open:
+            self.options.grid_remove()
+            self.is_open = False
+
+    def toggle(self):
+        if self.is_open:
+            self.close()
+        else:
+            self.open()
+
+    def refresh(self):
+        """Forget the loaded options, e.g. after the underlying table changed"""
+        self.pages = self.term = None
+        if self.is_open:
+            self.open()
+
+    def _on_key(self, event):
+        if event.keysym in ("Escape", "Tab", "Return"):
+            return
+        # Editing the text drops the picked option until another is picked
+        self.value = None
+        self._debounced_search()
+
+    def _search(self, term=None):
+        if term is None:
+            term = self.entry.get().strip()
+        self.term = term
+        self.pages = self.source(term)
+        self.shown = 0
+        for widget in self.options.winfo_children():
+            if widget is not self.load_more_button:
+                widget.destroy()
+        self.load_more_button.pack_forget()
+        self._expand()
+        self.load_more()
+
+    def load_more(self):
+        pages = self.pages
+        executor.submit(pages.load_more, key=("lookup", id(self)), owner=self, indicator=self.spinner,
+                        on_success=lambda rows: self._show(pages, rows),
+                        on_error=lambda e: messagebox.showerror("Error", f"{self.error_message}: {e}"))
+
+    def _show(self, pages, rows):
+        if pages is not self.pages:
+            return  # a newer search replaced this one
+        # Keep the button below the last option, and only while more remain
+        self.load_more_button.pack_forget()
+        for row in rows:
+            ctk.CTkButton(self.options, text=self.format_row(row), anchor="w", fg_color="transparent",
+                          border_width=1, command=lambda r=row: self._pick(r)).pack(fill="x", pady=1)
+        self.shown += len(rows)
+        if not self.shown:
+            ctk.CTkLabel(self.options, text="No matches", text_color="gray").pack(pady=5)
+        if not pages.exhausted:
+            self.load_more_button.pack(pady=5)
+
+    def _pick(self, row):
+        self.set(self.row_value(row), self.format_row(row))
+        if self.command:
+            self.command(self.value)
+
+
+def import_records(master, entity, on_finished=None):
+    """Ask for a CSV/JSON Lines file and bulk import it into entity's table.
+
+    on_finished(result) runs on the GUI thread after the import, e.g. to
+    reload the list the records went into.
+    """
+    path = filedialog.askopenfilename(
+        parent=master, title=f"Import {entity}",
+        filetypes=[("CSV or JSON Lines", "*.csv *.jsonl *.ndjson"), ("All files", "*.*")])
+    if path:
+        ImportDialog(master, entity, path, on_finished)
+
+
+class ImportDialog(ctk.CTkToplevel):
+    """Runs one bulk import in the background and shows its progress.
+
+    The import runs on job_executor, not the executor list loads share.
+    Cancel, or closing the dialog, stops it after the batch in flight.
+    """
+
+    def __init__(self, master, entity, path, on_finished=None, poll_interval=200):
+        super().__init__(master)
+        self.title(f"Import {entity}")
+        self.geometry("480x220")
+        self.on_finished = on_finished
+        self.poll_interval = poll_interval
+        self.result = None
+        self._counts = (0, 0, 0)  # written by the import thread
+        self.cancel_event = threading.Event()
+
+        ctk.CTkLabel(self, text=f"Importing {entity} from {os.path.basename(path)}",
+                     font=ctk.CTkFont(size=16, weight="bold")).pack(padx=20, pady=(20, 10))
+        self.progress = ctk.CTkProgressBar(self, mode="indeterminate")
+        self.progress.pack(fill="x", padx=20, pady=10)
+        self.progress.start()
+        self.status = ctk.CTkLabel(self, text="Starting...")
+        self.status.pack(padx=20, pady=5)
+        self.buttons = ctk.CTkFrame(self, fg_color="transparent")
+        self.buttons.pack(pady=10)
+        self.cancel_button = ctk.CTkButton(self.buttons, text="Cancel", command=self.cancel)
+        self.cancel_button.pack(side="left", padx=5)
+
+        job_executor.submit(import_file, path, entity, progress=self._on_progress, cancel=self.cancel_event,
+                            on_success=self._on_done, on_error=self._on_error,
+                            key=("import", id(self)), owner=self)
+        self.after(self.poll_interval, self._poll)
+
+    def cancel(self):
+        self.cancel_event.set()
+        self.cancel_button.configure(state="disabled")
+        self.status.configure(text="Cancelling after the current batch...")
+
+    def destroy(self):
+        # A closed dialog must not leave the import committing batches
+        self.cancel_event.set()
+        super().destroy()
+
+    def _on_progress(self, result):
+        # Import thread: only hand the numbers over, the GUI thread draws them
+        self._counts = (result.read, result.imported, result.failed)
+
+    def _poll(self):
+        if self.result is not None or not self.winfo_exists():
+            return
+        if self.cancel_event.is_set():
+            self.after(self.poll_interval, self._poll)
+            return
+        read, imported, failed = self._counts
+        self.status.configure(text=f"{read:,} rows read, {imported:,} imported, {failed:,} rejected")
+        self.after(self.poll_interval, self._poll)
+
+    def _on_done(self, result):
+        self.result = result
+        self.progress.stop()
+        self.progress.configure(mode="determinate")
+        self.progress.set(1)
+        self.cancel_button.destroy()
+        self.status.configure(text=f"{'Cancelled' if result.cancelled else 'Done'}: {result.imported:,} imported, "
+                                   f"{result.failed:,} rejected of {result.read:,} rows")
+        if result.errors:
+            ctk.CTkButton(self.buttons, text="💾 Save Error Report",
+                          command=self.save_error_report).pack(side="left", padx=5)
+        ctk.CTkButton(self.buttons, text="Close", command=self.destroy).pack(side="left", padx=5)
+        if self.on_finished:
+            self.on_finished(result)
+
+    def _on_error(self, error):
+        messagebox.showerror("Error", f"Import failed: {error}", parent=self)
+        self.destroy()
+
+    def save_error_report(self):
+        path = filedialog.asksaveasfilename(parent=self, defaultextension=".csv",
+                                            initialfile="import_errors.csv",
+                                            filetypes=[("CSV files", "*.csv")])
+        if path:
+            try:
+                write_error_report(self.result, path)
+                messagebox.showinfo("Success", f"Error report saved to {path}", parent=self)
+            except OSError as e:
+                messagebox.showerror("Error", f"Failed to save error report: {e}", parent=self)
+
+
+def export_records(master, dataset, title=None, **filters):
+    """Ask where to save and stream dataset there in the background.
+
+    filters (start, end, status) are passed on to bulk_export.export; the
+    file type picked in the dialog decides the format.
+    """
+    title = title or dataset.replace('_', ' ')
+    filetypes = {'csv': ("CSV files", "*.csv"), 'jsonl': ("JSON Lines", "*.jsonl"),
+                 'parquet': ("Parquet files", "*.parquet")}
+    path = filedialog.asksaveasfilename(
+        parent=master, title=f"Export {title}", defaultextension=".csv", initialfile=f"{dataset}.csv",
+        filetypes=[filetypes[fmt] for fmt in available_formats()])
+    if path:
+        ExportDialog(master, dataset, path, title, filters)
+
+
+class ExportDialog(ctk.CTkToplevel):
+    """Runs one export in the background and shows how many rows are written.
+
+    The export runs on job_executor, not the executor list loads share.
+    Cancel, or closing the dialog, stops it and removes the partial file.
+    """
+
+    def __init__(self, master, dataset, path, title, filters, poll_interval=200):
+        super().__init__(master)
+        self.title(f"Export {title}")
+        self.geometry("480x200")
+        self.poll_interval = poll_interval
+        self.done = False
+        self._rows = 0  # written by the export thread
+        self.cancel_event = threading.Event()
+
+        ctk.CTkLabel(self, text=f"Exporting {title} to {os.path.basename(path)}",
+                     font=ctk.CTkFont(size=16, weight="bold")).pack(padx=20, pady=(20, 10))
+        self.progress = ctk.CTkProgressBar(self, mode="indeterminate")
+        self.progress.pack(fill="x", padx=20, pady=10)
+        self.progress.start()
+        self.status = ctk.CTkLabel(self, text="Starting...")
+        self.status.pack(padx=20, pady=5)
+        self.cancel_button = ctk.CTkButton(self, text="Cancel", command=self.cancel)
+        self.cancel_button.pack(pady=10)
+
+        job_executor.submit(export, dataset, path, progress=self._on_progress, cancel=self.cancel_event, **filters,
+                            on_success=self._on_done, on_error=self._on_error,
+                            key=("export", id(self)), owner=self)
+        self.after(self.poll_interval, self._poll)
+
+    def cancel(self):
+        self.cancel_event.set()
+        self.cancel_button.configure(state="disabled")
+        self.status.configure(text="Cancelling...")
+
+    def destroy(self):
+        # A closed dialog must not leave the export running
+        self.cancel_event.set()
+        super().destroy()
+
+    def _on_progress(self, rows):
+        self._rows = rows
+
+    def _poll(self):
+        if self.done or not self.winfo_exists():
+            return
+        if self.cancel_event.is_set():
+            self.after(self.poll_interval, self._poll)
+            return
+        self.status.configure(text=f"{self._rows:,} rows written")
+        self.after(self.poll_interval, self._poll)
+
+    def _on_done(self, rows):
+        self.done = True
+        self.progress.stop()
+        self.progress.configure(mode="determinate")
+        self.progress.set(1)
+        self.status.configure(text=f"Done: {rows:,} rows exported")
+        self.cancel_button.configure(text="Close", state="normal", command=self.destroy)
+
+    def _on_error(self, error):
+        if isinstance(error, ExportCancelled):
+            self.done = True
+            self.progress.stop()
+            self.status.configure(text=str(error))
+            self.cancel_button.configure(text="Close", state="normal", command=self.destroy)
+            return
+        messagebox.showerror("Error", f"Export failed: {error}", parent=self)
+        self.destroy()